@@ -2,8 +2,12 @@ from flask import Flask, render_template, request, jsonify, Blueprint
 import logging
 import pandas as pd
 import os
+import sys
 import json
 
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+from common.feature_dataset import FeatureDataset
+
 app = Flask(__name__)
 
 # Configuração de logging
@@ -16,9 +20,23 @@ from .routes.notifications import notifications_bp
 app.register_blueprint(trading_bp, url_prefix="/api/trading")
 app.register_blueprint(notifications_bp, url_prefix="/api/notifications")
 
-# Caminho para salvar dados históricos
+# Caminho para salvar dados históricos (arquivo único legado)
 HISTORICAL_DATA_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "optimizer", "processed", "historical_data.parquet")
 
+# Dataset particionado e append-only lido pelo train.py
+HISTORICAL_DATASET_PATH = os.environ.get(
+    "HISTORICAL_DATASET_PATH",
+    os.path.join(os.path.dirname(__file__), "..", "..", "optimizer", "processed", "historical"),
+)
+
+def get_historical_dataset():
+    """Abre o dataset histórico, migrando o arquivo único legado na primeira vez."""
+    dataset = FeatureDataset(HISTORICAL_DATASET_PATH)
+    if not dataset.exists() and os.path.exists(HISTORICAL_DATA_PATH):
+        dataset.append(pd.read_parquet(HISTORICAL_DATA_PATH))
+        logging.info(f"Arquivo legado {HISTORICAL_DATA_PATH} migrado para {HISTORICAL_DATASET_PATH}")
+    return dataset
+
 @app.route("/")
 def index():
     return render_template("index.html")
@@ -47,17 +65,11 @@ def upload_historical_data():
 
         df_new = pd.DataFrame(data)
 
-        # Verificar se o arquivo já existe e carregar para append
-        if os.path.exists(HISTORICAL_DATA_PATH):
-            df_existing = pd.read_parquet(HISTORICAL_DATA_PATH)
-            df_combined = pd.concat([df_existing, df_new], ignore_index=True)
-            # Remover duplicatas se houver uma chave única, por exemplo, 'timestamp'
-            # df_combined.drop_duplicates(subset=['timestamp'], inplace=True)
-            df_combined.to_parquet(HISTORICAL_DATA_PATH, index=False)
-            logging.info(f"Dados históricos anexados ao arquivo existente: {HISTORICAL_DATA_PATH}")
-        else:
-            df_new.to_parquet(HISTORICAL_DATA_PATH, index=False)
-            logging.info(f"Novo arquivo de dados históricos criado: {HISTORICAL_DATA_PATH}")
+        # Append-only: grava só os novos arquivos, sem reler nem reescrever o histórico
+        dataset = get_historical_dataset()
+        written = dataset.append(df_new)
+        dataset.compact()
+        logging.info(f"{len(df_new)} linhas anexadas em {len(written)} arquivos de {HISTORICAL_DATASET_PATH}")
 
         return jsonify({"message": "Dados históricos recebidos e salvos com sucesso!"}), 200
 
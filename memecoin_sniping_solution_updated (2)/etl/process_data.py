@@ -1,97 +1,133 @@
 import pandas as pd
 import os
+import sys
+from datetime import date, timedelta
+
 import numpy as np
 
-def process_data(input_path, output_path):
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from common.feature_dataset import FeatureDataset
+from common.feature_pipeline import build_features, slice_sources, to_utc
+from common.feature_schema import FEATURE_SCHEMA
+from common.trade_paths import TradePathStore
+
+SOURCE_NAMES = ("trades", "prices", "analyses", "migrations")
+
+# Trades só entram depois de fechados: o dia D é processado a partir de D + LABEL_DELAY_DAYS
+LABEL_DELAY_DAYS = int(os.environ.get("LABEL_DELAY_DAYS", "1"))
+# Histórico carregado antes de cada dia para as janelas (rolling, lags, volatilidade)
+LOOKBACK_DAYS = float(os.environ.get("FEATURE_LOOKBACK_DAYS", "7"))
+QUOTE_USD = float(os.environ.get("QUOTE_USD", "1.0"))
+
+
+def load_source(source_dir, name):
+    """Lê <name>.parquet (ou <name>.csv) exportado do ledger/logs/tabelas; None se ausente."""
+    parquet_path = os.path.join(source_dir, f"{name}.parquet")
+    csv_path = os.path.join(source_dir, f"{name}.csv")
+    if os.path.exists(parquet_path):
+        return pd.read_parquet(parquet_path)
+    if os.path.exists(csv_path):
+        return pd.read_csv(csv_path)
+    return None
+
+
+def load_price_paths(path_root, trades):
+    """Preços dos TradePathStore (trade_id -> token pelo ledger), sem volume."""
+    store = TradePathStore(path_root)
+    token_of = dict(zip(trades["trade_id"].astype(str), trades["token_address"].astype(str)))
+    frames = []
+    for trade_id in store.trade_ids():
+        if trade_id not in token_of:
+            continue
+        timestamps, prices = store.path(trade_id)
+        frames.append(pd.DataFrame({
+            "token_address": token_of[trade_id],
+            "timestamp": timestamps,
+            "price": prices,
+            "volume_usd": np.nan,
+        }))
+    if not frames:
+        return None
+    return pd.concat(frames, ignore_index=True).drop_duplicates(["token_address", "timestamp"])
+
+
+def load_sources(source_dir):
+    """Ledger de trades, logs de preço, análises e migrações de um diretório local."""
+    sources = {name: load_source(source_dir, name) for name in SOURCE_NAMES}
+    if sources["trades"] is None:
+        raise FileNotFoundError(f"Ledger de trades não encontrado em {source_dir}")
+    path_root = os.path.join(source_dir, "trade_paths")
+    if sources["prices"] is None and os.path.isdir(path_root):
+        sources["prices"] = load_price_paths(path_root, sources["trades"])
+    return sources
+
+
+def pending_days(dataset, trades, today=None):
+    """Dias com trades ainda não processados, até hoje - LABEL_DELAY_DAYS."""
+    today = today or date.today()
+    last_day = (today - timedelta(days=LABEL_DELAY_DAYS)).isoformat()
+    processed = [entry["date"] for entry in dataset.files()] if dataset.exists() else []
+    after = max(processed) if processed else ""
+    trade_days = np.unique(to_utc(trades["order_time"]).dt.strftime("%Y-%m-%d").dropna())
+    return [day for day in trade_days if after < day <= last_day]
+
+
+def process_day(sources, day):
+    """Features de um dia, calculadas só com as fontes dentro do lookback."""
+    end = pd.Timestamp(day) + pd.Timedelta(days=1)
+    window = slice_sources(sources, day, end, lookback_days=LOOKBACK_DAYS)
+    return build_features(**window, start=day, end=end, quote_usd=QUOTE_USD)
+
+
+def process_data(source_dir, output_path=None, dataset_path=None, today=None):
     """
-    Extrai dados brutos, transforma e normaliza.
+    Calcula as features a partir das fontes reais (sem valores aleatórios).
+
+    Com ``dataset_path``, processa de forma incremental os dias pendentes e
+    anexa cada dia ao dataset particionado; senão grava tudo em ``output_path``.
     """
-    print(f"Processando dados de: {input_path}")
-    df = pd.read_csv(input_path)
-
-    # Exemplo de transformação: criar uma nova feature
-    df["new_feature"] = df["feature1"] * df["feature2"]
-
-    # Adicionando as novas features com valores de exemplo/placeholder
-    df["token_age_hours"] = np.random.uniform(1, 720, len(df)) # 1 hora a 30 dias
-    df["snif_score"] = np.random.randint(0, 101, len(df)) # 0 a 100
-    df["whale_buy_activity"] = np.random.uniform(0, 1, len(df))
-    df["whale_sell_activity"] = np.random.uniform(0, 1, len(df))
-    df["new_whale_entries"] = np.random.randint(0, 10, len(df))
-    df["total_supply"] = np.random.uniform(1e9, 1e12, len(df))
-    df["circulating_supply"] = df["total_supply"] * np.random.uniform(0.5, 1, len(df))
-    df["liquidity_usd"] = np.random.uniform(1000, 1000000, len(df))
-    df["volume_24h_usd"] = np.random.uniform(10000, 10000000, len(df))
-
-    # Features existentes do test_endpoint do model_deployer.py
-    df["amount_usd"] = np.random.uniform(10, 1000, len(df))
-    df["price_per_token"] = np.random.uniform(0.000001, 0.1, len(df))
-    df["slippage"] = np.random.uniform(0.01, 0.1, len(df))
-    df["gas_price_avg"] = np.random.uniform(10, 100, len(df))
-    df["gas_price_std"] = np.random.uniform(1, 10, len(df))
-    df["rpc_latency"] = np.random.uniform(50, 200, len(df))
-    df["security_score"] = np.random.uniform(0.1, 0.9, len(df))
-    df["failure_rate"] = np.random.uniform(0.01, 0.2, len(df))
-    df["social_sentiment_score"] = np.random.uniform(-1, 1, len(df))
-    df["hour"] = np.random.randint(0, 24, len(df))
-    df["day_of_week"] = np.random.randint(0, 7, len(df))
-    df["is_weekend"] = df["day_of_week"].apply(lambda x: 1 if x >= 5 else 0)
-    df["liquidity_locked"] = np.random.randint(0, 2, len(df))
-    df["price_change_pct"] = np.random.uniform(-0.1, 0.2, len(df))
-    df["volume_ma_5"] = np.random.uniform(100, 10000, len(df))
-    df["slippage_amount_interaction"] = df["slippage"] * df["amount_usd"]
-    df["security_sentiment_interaction"] = df["security_score"] * df["social_sentiment_score"]
-    df["prev_price"] = np.random.uniform(0.000001, 0.1, len(df))
-    df["prev_volume"] = np.random.uniform(1000, 100000, len(df))
-    df["price_volatility"] = np.random.uniform(0.01, 0.1, len(df))
-
-    # Reordenar colunas para corresponder à ordem esperada pelo modelo (se houver)
-    # Isso é crucial para a inferência do SageMaker
-    expected_features = [
-        'amount_usd', 'price_per_token', 'slippage', 'gas_price_avg', 'gas_price_std',
-        'rpc_latency', 'security_score', 'failure_rate', 'social_sentiment_score',
-        'hour', 'day_of_week', 'is_weekend', 'liquidity_locked', 'price_change_pct',
-        'volume_ma_5', 'slippage_amount_interaction', 'security_sentiment_interaction',
-        'prev_price', 'prev_volume', 'price_volatility', 'token_age_hours', 'snif_score',
-        'whale_buy_activity', 'whale_sell_activity', 'new_whale_entries', 'total_supply',
-        'circulating_supply', 'liquidity_usd', 'volume_24h_usd'
-    ]
-    
-    # Garantir que todas as colunas esperadas estejam presentes, preenchendo com 0 se ausentes
-    for col in expected_features:
-        if col not in df.columns:
-            df[col] = 0
-
-    # Selecionar e reordenar as colunas
-    df = df[expected_features + ['target']]
+    print(f"Processando dados de: {source_dir}")
+    sources = load_sources(source_dir)
+
+    if dataset_path:
+        dataset = FeatureDataset(dataset_path)
+        days = pending_days(dataset, sources["trades"], today)
+        total = 0
+        for day in days:
+            features = process_day(sources, day)
+            if len(features):
+                dataset.append(features)
+            total += len(features)
+            print(f"{day}: {len(features)} linhas")
+        if days:
+            dataset.compact()
+        print(f"{total} linhas anexadas em {dataset_path} ({len(days)} dias)")
+        return total
+
+    # Colunas na ordem e com os tipos compactos do schema (float32/int8/bool)
+    df = build_features(**sources, quote_usd=QUOTE_USD)
 
     # Salvar dados processados em formato parquet
     output_dir = os.path.dirname(output_path)
     os.makedirs(output_dir, exist_ok=True)
     df.to_parquet(output_path, index=False)
-    print(f"Dados processados salvos em: {output_path}")
+    print(f"Dados processados salvos em: {output_path} (schema de features v{FEATURE_SCHEMA.version})")
+    return len(df)
 
 if __name__ == "__main__":
     # Exemplo de uso local
     current_dir = os.path.dirname(os.path.abspath(__file__))
-    input_file = os.path.join(current_dir, '..', 'optimizer', 'raw', 'sample_data.csv')
+    source_dir = os.environ.get("FEATURE_SOURCES_DIR", os.path.join(current_dir, '..', 'optimizer', 'raw'))
+    dataset_path = os.environ.get("HISTORICAL_DATASET_PATH")
     output_file = os.path.join(current_dir, '..', 'optimizer', 'processed', 'sample_features.parquet')
-    
-    # Criar um arquivo CSV de exemplo se não existir
-    if not os.path.exists(input_file):
-        print(f"Criando arquivo de exemplo: {input_file}")
-        sample_df = pd.DataFrame({
-            'feature1': [1, 2, 3, 4, 5, 6, 7, 8, 9, 10],
-            'feature2': [10, 20, 30, 40, 50, 60, 70, 80, 90, 100],
-            'target': [0, 1, 0, 1, 0, 1, 0, 1, 0, 1]
-        })
-        os.makedirs(os.path.dirname(input_file), exist_ok=True)
-        sample_df.to_csv(input_file, index=False)
-
-    process_data(input_file, output_file)
-
-
-
-
 
+    # Criar fontes de exemplo se não existirem
+    if load_source(source_dir, "trades") is None:
+        from common.feature_pipeline import synthetic_sources
+        print(f"Criando fontes de exemplo em: {source_dir}")
+        os.makedirs(source_dir, exist_ok=True)
+        for name, frame in synthetic_sources(rows=1_000, tokens=50, days=3).items():
+            frame.to_parquet(os.path.join(source_dir, f"{name}.parquet"), index=False)
 
+    process_data(source_dir, output_file, dataset_path)
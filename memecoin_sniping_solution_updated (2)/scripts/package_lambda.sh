@@ -28,6 +28,8 @@ package_agent() {
     
     # Copiar código fonte
     cp *.py temp_package/
+    mkdir -p temp_package/common
+    cp ../common/*.py temp_package/common/
     cp requirements.txt temp_package/
     
     cd temp_package
@@ -36,7 +38,7 @@ package_agent() {
     pip install -r requirements.txt -t . --quiet
     
     # Criar ZIP
-    zip -r "../${agent}.zip" . -x "test_*" "__pycache__/*" "*.pyc" > /dev/null
+    zip -r "../${agent}.zip" . -x "test_*" "*/test_*" "__pycache__/*" "*.pyc" > /dev/null
     
     # Limpar diretório temporário
     cd ..
@@ -0,0 +1,414 @@
+"""
+Persistência em lote das análises do Analyzer.
+
+O formato antigo gravava um item por token com ``asdict`` da análise: nomes
+de atributos longos, fatores como frases completas e floats (que o boto3
+rejeita sem conversão para ``Decimal``).  Aqui os itens usam um esquema
+compacto:
+
+- scores como ``Decimal`` com 4 casas, agrupados no mapa ``sc``;
+- fatores de risco/oportunidade como códigos curtos (``FACTOR_CATALOG``), com
+  os valores numéricos da frase como argumentos (``"a1b2c3|50,000"``);
+- atributo ``ttl`` (epoch) para o TTL do DynamoDB expirar análises antigas.
+
+As gravações são acumuladas e enviadas com ``batch_writer`` (25 itens por
+requisição).  Opcionalmente, o mesmo lote é anexado em paralelo como Parquet
+no S3 para consultas analíticas (bucket em ``parquet_bucket`` ou na variável
+``ANALYSIS_PARQUET_BUCKET``).  Falhas do lote ou da exportação são propagadas
+pelo ``flush`` depois de registradas.
+
+Execute ``python analysis_store.py`` para comparar bytes e WCUs por análise
+entre o formato antigo e o compacto.
+"""
+
+import io
+import logging
+import math
+import os
+import re
+import time
+import uuid
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - Parquet é opcional
+    pa = None
+    pq = None
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Limite de itens por requisição BatchWriteItem
+BATCH_WRITE_LIMIT = 25
+
+# Números dentro das frases de fatores (valores em dólar, menções, percentuais)
+_NUMBER = re.compile(r"\d[\d,]*(?:\.\d+)?")
+
+# Frases emitidas pelas dimensões do ScoringPipeline.  ``{}`` marca trechos
+# formatados; números literais viram argumentos do código automaticamente.
+FACTOR_TEMPLATES = (
+    # early_adoption
+    "Detectado na primeira hora pós-migração",
+    "Detectado nas primeiras 3 horas",
+    "Detectado nas primeiras 6 horas",
+    "Detectado após 24 horas da migração",
+    "Detectado muito tarde pós-migração",
+    "PumpSwap ainda com poucos tokens",
+    "PumpSwap em fase inicial",
+    "Entre os primeiros tokens do dia",
+    "Entre os primeiros 10 tokens do dia",
+    "Entre os primeiros tokens no PumpSwap",
+    # liquidity_growth / liquidity_stability
+    "Dados de pool não disponíveis",
+    "Alta liquidez: ${}",
+    "Boa liquidez: ${}",
+    "Liquidez moderada: ${}",
+    "Baixa liquidez: ${}",
+    "Alto turnover de liquidez",
+    "Bom turnover de liquidez",
+    "Baixo turnover de liquidez",
+    "Liquidez em forte crescimento",
+    "Liquidez em crescimento",
+    "Liquidez em declínio",
+    "Dados de liquidez insuficientes",
+    "Histórico de liquidez muito curto",
+    "Liquidez média zero",
+    "Liquidez muito estável",
+    "Liquidez estável",
+    "Liquidez moderadamente volátil",
+    "Liquidez muito volátil",
+    # volume_momentum / post_migration_volume
+    "Alto volume total: ${}",
+    "Bom volume total: ${}",
+    "Baixo volume total: ${}",
+    "Trades de alto valor",
+    "Trades de valor moderado",
+    "Trades de baixo valor",
+    "Volume em forte aceleração",
+    "Volume em aceleração",
+    "Volume desacelerando",
+    "Alta atividade de trading",
+    "Boa atividade de trading",
+    "Baixa atividade de trading",
+    "Dados de volume insuficientes",
+    "Histórico de volume muito curto",
+    "Volume muito alto",
+    "Volume alto",
+    "Volume muito baixo",
+    "Volume em crescimento",
+    "Volume em declínio",
+    # price_stability
+    "Dados de preço não disponíveis",
+    "Preço inválido",
+    "Preço muito estável",
+    "Preço estável",
+    "Preço moderadamente volátil",
+    "Preço muito volátil",
+    "Tendência de alta controlada: +{}%",
+    "Alta muito agressiva pode indicar pump",
+    "Queda significativa de preço",
+    "Baixa volatilidade histórica",
+    "Alta volatilidade histórica",
+    # community_interest
+    "Alto interesse no Twitter: {} menções",
+    "Bom interesse no Twitter: {} menções",
+    "Baixo interesse social",
+    "Ativo em múltiplas plataformas sociais",
+    "Ativo em várias plataformas",
+    "Símbolo limpo e memorável",
+    "Nome profissional",
+    "Nome genérico pode indicar falta de originalidade",
+    # smart_money_following
+    "Nenhuma atividade de smart money detectada",
+    "{} smart wallets comprando",
+    "{} smart wallets vendendo",
+    "Forte interesse de smart money",
+    "Baixo interesse de smart money",
+    # migration_timing / migration_destination_quality
+    "Migração em horário de alta atividade",
+    "Migração em horário de baixa atividade",
+    "Migração durante alta do SOL",
+    "Migração durante estabilidade do SOL",
+    "Migração durante queda do SOL",
+    "Alto volume de memecoins",
+    "Baixo volume de memecoins",
+    "Migração para PumpSwap (sem taxas)",
+    "Migração para Raydium (estabelecido)",
+    "Raydium com alta liquidez",
+    "Destino de migração desconhecido",
+    # fatores de erro das dimensões
+    "Erro na análise de early adoption",
+    "Erro na análise de liquidez",
+    "Erro na análise de volume",
+    "Erro na análise de estabilidade",
+    "Erro na análise de comunidade",
+    "Erro na análise de smart money",
+    "Erro na análise de timing",
+    "Erro na análise do destino",
+)
+
+
+def _factor_key(text: str) -> str:
+    return _NUMBER.sub("{}", text)
+
+
+def factor_code(template: str) -> str:
+    """Código estável (6 hex) de um template de fator."""
+    return format(zlib.crc32(_factor_key(template).encode("utf-8")) & 0xFFFFFF, "06x")
+
+
+# código -> template normalizado (números como ``{}``)
+FACTOR_CATALOG: Dict[str, str] = {factor_code(t): _factor_key(t) for t in FACTOR_TEMPLATES}
+_CODE_BY_KEY = {key: code for code, key in FACTOR_CATALOG.items()}
+
+
+def encode_factor(text: str) -> str:
+    """Converte uma frase em ``código[|arg...]``; frases fora do catálogo ficam inalteradas."""
+    code = _CODE_BY_KEY.get(_factor_key(text))
+    if code is None:
+        return text
+    args = _NUMBER.findall(text)
+    return "|".join([code, *args]) if args else code
+
+
+def decode_factor(value: str) -> str:
+    """Inverso de ``encode_factor``."""
+    code, *args = value.split("|")
+    template = FACTOR_CATALOG.get(code)
+    if template is None:
+        return value
+    return template.format(*args)
+
+
+def to_decimal(value: float, places: int = 4) -> Optional[Decimal]:
+    """Converte float para ``Decimal`` aceito pelo DynamoDB (NaN/inf viram None)."""
+    value = float(value)
+    if math.isnan(value) or math.isinf(value):
+        return None
+    return Decimal(str(round(value, places)))
+
+
+# Atributos textuais das análises e seus nomes curtos no item
+SHORT_NAMES = {
+    "token_symbol": "sym",
+    "token_name": "nm",
+    "migration_destination": "dst",
+    "recommended_action": "act",
+    "confidence_level": "conf",
+}
+
+# Scores redundantes com o overall (não eram persistidos no formato antigo)
+SKIPPED_FIELDS = ("pumpswap_quality_score", "migration_quality_score")
+
+
+def encode_analysis(fields: Dict[str, Any], analysis_type: str, timestamp: str,
+                    expires_at: int) -> Dict[str, Any]:
+    """Monta o item compacto a partir de ``asdict(analysis)``."""
+    item: Dict[str, Any] = {
+        "token_address": fields["token_address"],
+        "analysis_timestamp": timestamp,
+        "typ": analysis_type,
+        "ttl": expires_at,
+    }
+    scores: Dict[str, Decimal] = {}
+    for key, value in fields.items():
+        if key in SKIPPED_FIELDS or key == "token_address":
+            continue
+        if key.startswith("overall_"):
+            item["ov"] = to_decimal(value)
+        elif key.endswith("_score"):
+            encoded = to_decimal(value)
+            if encoded is not None:
+                scores[key[: -len("_score")]] = encoded
+        elif key == "risk_factors":
+            item["rf"] = [encode_factor(f) for f in value]
+        elif key == "opportunity_factors":
+            item["of"] = [encode_factor(f) for f in value]
+        elif key == "timed_out_dimensions" and value:
+            item["to"] = list(value)
+        elif key in SHORT_NAMES and value:
+            item[SHORT_NAMES[key]] = value
+    item["sc"] = scores
+    return {key: value for key, value in item.items() if value is not None}
+
+
+def _number_size(value) -> int:
+    digits = len(str(value).lstrip("-").replace(".", "").lstrip("0")) or 1
+    return 1 + math.ceil(digits / 2)
+
+
+def item_size(value: Any) -> int:
+    """Estimativa do tamanho de um item/valor pelas regras de cobrança do DynamoDB."""
+    if isinstance(value, dict):
+        return 3 + sum(len(k.encode("utf-8")) + item_size(v) + 1 for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return 3 + sum(item_size(v) + 1 for v in value)
+    if isinstance(value, bool) or value is None:
+        return 1
+    if isinstance(value, (int, float, Decimal)):
+        return _number_size(value)
+    return len(str(value).encode("utf-8"))
+
+
+def write_units(item: Dict[str, Any]) -> int:
+    """WCUs de um ``PutItem`` padrão (1 KB por unidade, arredondado para cima)."""
+    # O mapa de topo não tem o overhead de 3 bytes de um atributo do tipo M
+    size = item_size(item) - 3 - len(item)
+    return max(1, math.ceil(size / 1024))
+
+
+class AnalysisStore:
+    """Acumula análises e grava em lote no DynamoDB (e opcionalmente em Parquet no S3)."""
+
+    def __init__(self, table, s3_client=None, parquet_bucket: Optional[str] = None,
+                 parquet_prefix: str = "analytics/analysis", ttl_days: float = 30,
+                 clock=time.time):
+        self.table = table
+        self.s3_client = s3_client
+        self.parquet_bucket = parquet_bucket if pq is not None else None
+        self.parquet_prefix = parquet_prefix.rstrip("/")
+        self.ttl_s = ttl_days * 86400
+        self.clock = clock
+        self._pending: List[Dict[str, Any]] = []
+        if parquet_bucket and pq is None:
+            logger.warning("pyarrow não instalado; exportação Parquet desativada")
+
+    @classmethod
+    def from_config(cls, table, config: Dict, s3_client=None) -> "AnalysisStore":
+        """Cria o store a partir da seção ``analyzer.analysis_store`` da config."""
+        params = config.get("analyzer", {}).get("analysis_store", {})
+        return cls(
+            table,
+            s3_client=s3_client,
+            parquet_bucket=params.get("parquet_bucket") or os.environ.get("ANALYSIS_PARQUET_BUCKET"),
+            parquet_prefix=params.get("parquet_prefix", "analytics/analysis"),
+            ttl_days=params.get("ttl_days", 30),
+        )
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(self, fields: Dict[str, Any], analysis_type: str) -> Dict[str, Any]:
+        """Codifica e enfileira uma análise; retorna o item gerado."""
+        now = self.clock()
+        timestamp = datetime.fromtimestamp(now, tz=timezone.utc).isoformat()
+        item = encode_analysis(fields, analysis_type, timestamp, int(now + self.ttl_s))
+        self._pending.append(item)
+        return item
+
+    def flush(self) -> int:
+        """Grava as análises pendentes; retorna quantas foram enviadas ao DynamoDB.
+
+        Raises:
+            Exception: o erro do lote no DynamoDB ou, se o lote foi gravado,
+                o erro da exportação Parquet.
+        """
+        if not self._pending:
+            return 0
+        items, self._pending = self._pending, []
+
+        upload = None
+        executor = None
+        if self.parquet_bucket and self.s3_client is not None:
+            executor = ThreadPoolExecutor(max_workers=1)
+            upload = executor.submit(self._write_parquet, items)
+
+        written = 0
+        error = None
+        try:
+            # overwrite_by_pkeys evita erro de chave duplicada dentro do mesmo lote
+            with self.table.batch_writer(overwrite_by_pkeys=["token_address", "analysis_timestamp"]) as batch:
+                for item in items:
+                    batch.put_item(Item=item)
+                    written += 1
+            logger.info(f"{written} análises gravadas em lote")
+        except Exception as e:
+            logger.error(f"Erro ao gravar {len(items)} análises em lote: {e}")
+            error = e
+        finally:
+            if upload is not None:
+                try:
+                    upload.result()
+                except Exception as e:
+                    logger.error(f"Erro ao exportar análises em Parquet: {e}")
+                    error = error or e
+                executor.shutdown()
+        if error is not None:
+            raise error
+        return written
+
+    def _write_parquet(self, items: List[Dict[str, Any]]) -> str:
+        rows = [parquet_row(item) for item in items]
+        buffer = io.BytesIO()
+        pq.write_table(pa.Table.from_pylist(rows), buffer, compression="zstd")
+        day = items[0]["analysis_timestamp"][:10]
+        key = f"{self.parquet_prefix}/dt={day}/{uuid.uuid4().hex}.parquet"
+        self.s3_client.put_object(Bucket=self.parquet_bucket, Key=key, Body=buffer.getvalue())
+        logger.info(f"{len(rows)} análises exportadas para s3://{self.parquet_bucket}/{key}")
+        return key
+
+
+def parquet_row(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Achata um item compacto em uma linha tabular (scores como colunas float)."""
+    row = {
+        "token_address": item["token_address"],
+        "analysis_timestamp": item["analysis_timestamp"],
+        "analysis_type": item["typ"],
+        "overall_score": float(item["ov"]) if "ov" in item else None,
+        "risk_factors": item.get("rf", []),
+        "opportunity_factors": item.get("of", []),
+        "timed_out_dimensions": item.get("to", []),
+    }
+    for long_name, short_name in SHORT_NAMES.items():
+        row[long_name] = item.get(short_name)
+    for name, value in item.get("sc", {}).items():
+        row[f"{name}_score"] = float(value)
+    return row
+
+
+def _benchmark() -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    legacy = {
+        "token_address": "7GCihgDB8fe6KNjn2MYtkzZcRjQy3t9GHdC8uHYmW2hr",
+        "analysis_timestamp": datetime.now().isoformat(),
+        "token_symbol": "PEPE2",
+        "token_name": "Pepe Two",
+        "early_adoption_score": 0.812345678,
+        "liquidity_growth_score": 0.6512345,
+        "volume_momentum_score": 0.70123456,
+        "price_stability_score": 0.55123456,
+        "community_interest_score": 0.60987654,
+        "overall_pumpswap_score": 0.67654321,
+        "risk_factors": ["Preço moderadamente volátil", "Baixo turnover de liquidez"],
+        "opportunity_factors": [
+            "Detectado nas primeiras 3 horas",
+            "PumpSwap em fase inicial",
+            "Boa liquidez: $54,321",
+            "Bom volume total: $123,456",
+            "Volume em aceleração",
+            "Bom interesse no Twitter: 230 menções",
+            "Ativo em várias plataformas",
+            "Símbolo limpo e memorável",
+        ],
+        "recommended_action": "CONSIDER",
+        "confidence_level": "MEDIUM",
+        "analysis_type": "pumpswap_analysis",
+    }
+    compact = encode_analysis(legacy, "pumpswap", legacy["analysis_timestamp"], int(time.time()))
+    return legacy, compact
+
+
+if __name__ == "__main__":
+    legacy_item, compact_item = _benchmark()
+    for label, item in (("antigo", legacy_item), ("compacto", compact_item)):
+        size = item_size(item) - 3 - len(item)
+        print(f"{label:>9}: {size:5d} bytes, {write_units(item)} WCU por análise")
+    # batch_writer: 1 requisição BatchWriteItem a cada BATCH_WRITE_LIMIT itens
+    count = 100
+    batches = math.ceil(count / BATCH_WRITE_LIMIT)
+    print(f"requisições para {count} análises: {count} (put_item) -> {batches} (batch_writer)")
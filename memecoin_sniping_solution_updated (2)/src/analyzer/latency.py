@@ -0,0 +1,129 @@
+"""
+Histogramas de latência por fonte de dados e por dimensão do scoring.
+
+As latências são acumuladas em buckets fixos durante a execução do Lambda e
+emitidas no formato CloudWatch Embedded Metric Format (EMF): uma linha JSON
+no log que o CloudWatch converte em métricas com ``Values``/``Counts``, sem
+chamadas extras de API.  Assim dá para ver qual fonte é o gargalo (p50/p99
+por dimensão) e quantas vezes cada uma estourou o orçamento.
+"""
+
+import bisect
+import json
+import logging
+import time
+from typing import Dict, List, Optional
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Limites superiores dos buckets em milissegundos
+DEFAULT_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class LatencyHistogram:
+    """Histograma de latências com buckets fixos."""
+
+    __slots__ = ("bounds", "counts", "timeouts", "total_ms", "max_ms")
+
+    def __init__(self, bounds=DEFAULT_BUCKETS_MS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)  # último bucket: acima do maior limite
+        self.timeouts = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def observe(self, latency_ms: float, timed_out: bool = False) -> None:
+        self.counts[bisect.bisect_left(self.bounds, latency_ms)] += 1
+        self.total_ms += latency_ms
+        self.max_ms = max(self.max_ms, latency_ms)
+        if timed_out:
+            self.timeouts += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Limite superior do bucket que contém o quantil ``q``."""
+        total = self.count
+        if not total:
+            return None
+        target = q * total
+        cumulative = 0
+        for i, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= target:
+                return float(self.bounds[i]) if i < len(self.bounds) else self.max_ms
+        return self.max_ms
+
+    def values_and_counts(self):
+        """Pares (valor representativo, contagem) dos buckets não vazios, para EMF."""
+        values: List[float] = []
+        counts: List[int] = []
+        for i, count in enumerate(self.counts):
+            if count:
+                values.append(float(self.bounds[i]) if i < len(self.bounds) else self.max_ms)
+                counts.append(count)
+        return values, counts
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "timeouts": self.timeouts,
+            "mean_ms": round(self.total_ms / self.count, 2) if self.count else 0.0,
+            "p50_ms": self.quantile(0.5),
+            "p99_ms": self.quantile(0.99),
+            "max_ms": round(self.max_ms, 2),
+        }
+
+
+class LatencyRecorder:
+    """Conjunto de histogramas nomeados (``source:<nome>``, ``dimension:<nome>``)."""
+
+    def __init__(self, namespace: str = "MemecoinSniping/Analyzer"):
+        self.namespace = namespace
+        self.histograms: Dict[str, LatencyHistogram] = {}
+
+    def observe(self, name: str, latency_ms: float, timed_out: bool = False) -> None:
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = LatencyHistogram()
+        histogram.observe(latency_ms, timed_out)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        return {name: hist.summary() for name, hist in sorted(self.histograms.items())}
+
+    def emf_records(self) -> List[Dict]:
+        """Um registro EMF por histograma, com dimensões ``Kind`` e ``Name``."""
+        timestamp = int(time.time() * 1000)
+        records = []
+        for name, hist in sorted(self.histograms.items()):
+            if not hist.count:
+                continue
+            kind, _, short_name = name.partition(":")
+            values, counts = hist.values_and_counts()
+            records.append({
+                "_aws": {
+                    "Timestamp": timestamp,
+                    "CloudWatchMetrics": [{
+                        "Namespace": self.namespace,
+                        "Dimensions": [["Kind", "Name"]],
+                        "Metrics": [
+                            {"Name": "LatencyMs", "Unit": "Milliseconds"},
+                            {"Name": "Timeouts", "Unit": "Count"},
+                        ],
+                    }],
+                },
+                "Kind": kind,
+                "Name": short_name,
+                "LatencyMs": {"Values": values, "Counts": counts},
+                "Timeouts": hist.timeouts,
+            })
+        return records
+
+    def emit(self) -> None:
+        """Escreve os histogramas no log (EMF) e zera os acumuladores."""
+        for record in self.emf_records():
+            print(json.dumps(record))
+        self.histograms.clear()
@@ -0,0 +1,870 @@
+"""
+Pipeline de scoring plugável do Analyzer.
+
+Cada dimensão de score é um plugin registrado com ``@dimension`` que declara
+as fontes de dados de que depende.  As fontes são registradas com
+``@data_source`` e buscadas no máximo uma vez por token, mesmo quando várias
+dimensões (ou várias estratégias) precisam delas.  As estratégias
+(``pumpswap``, ``migration``...) são apenas conjuntos de pesos vindos da
+configuração, então rodar as duas para o mesmo token não duplica chamadas
+upstream.
+
+As fontes de dados delegam para métodos de um *provider* (o analyzer), que
+concentra sessão HTTP, segredos e demais acessos externos.
+
+Com ``budget_ms`` configurado, cada análise tem um orçamento de latência: as
+fontes que não respondem no prazo são canceladas e as dimensões que dependem
+delas são marcadas em ``timed_out_dimensions``.  Uma dimensão com valor em
+``fallback_scores`` entra no score geral com esse valor e o seu peso; as
+demais recebem ``error_score`` apenas para exibição e saem da média, que é
+renormalizada sobre as dimensões restantes.  Uma decisão parcial no prazo
+vale mais que uma completa tarde.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from latency import LatencyRecorder
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Palavras que classificam um fator como risco
+RISK_KEYWORDS = ("risco", "erro", "baixo", "declínio", "volátil", "insuficiente", "genérico")
+
+# Estratégias padrão; podem ser sobrescritas em ``analyzer.strategies`` na config
+DEFAULT_STRATEGIES: Dict[str, Dict[str, Any]] = {
+    "pumpswap": {
+        "weights": {
+            "early_adoption": 0.25,      # Ser cedo no PumpSwap é vantajoso
+            "liquidity_growth": 0.20,    # Crescimento de liquidez
+            "volume_momentum": 0.20,     # Momentum de volume
+            "price_stability": 0.15,     # Estabilidade de preço
+            "community_interest": 0.20,  # Interesse da comunidade
+        },
+        "trader_threshold": 0.5,
+    },
+    "migration": {
+        "weights": {
+            "liquidity_stability": 0.25,
+            "post_migration_volume": 0.20,
+            "smart_money_following": 0.20,
+            "migration_timing": 0.15,
+            "migration_destination_quality": 0.20,
+        },
+        "trader_threshold": 0.6,
+    },
+}
+
+ScoreResult = Tuple[float, List[str]]
+
+
+@dataclass(frozen=True)
+class DataSource:
+    """Fonte de dados compartilhada entre dimensões."""
+    name: str
+    fetch: Callable[[Any, Dict], Awaitable[Any]]
+
+
+@dataclass(frozen=True)
+class Dimension:
+    """Dimensão de score: função pura sobre token_data e dependências."""
+    name: str
+    depends_on: Tuple[str, ...]
+    score: Callable[[Dict, Dict[str, Any]], ScoreResult]
+    error_factor: str
+    error_score: float = 0.0
+
+
+DATA_SOURCES: Dict[str, DataSource] = {}
+DIMENSIONS: Dict[str, Dimension] = {}
+
+
+def data_source(name: str):
+    """Registra uma fonte de dados ``async fn(provider, token_data)``."""
+    def decorator(fn):
+        DATA_SOURCES[name] = DataSource(name, fn)
+        return fn
+    return decorator
+
+
+def dimension(name: str, depends_on: Iterable[str] = (), error_factor: str = "", error_score: float = 0.0):
+    """Registra uma dimensão ``fn(token_data, deps) -> (score, fatores)``."""
+    def decorator(fn):
+        DIMENSIONS[name] = Dimension(
+            name=name,
+            depends_on=tuple(depends_on),
+            score=fn,
+            error_factor=error_factor or f"Erro na análise de {name}",
+            error_score=error_score,
+        )
+        return fn
+    return decorator
+
+
+@dataclass
+class StrategyScore:
+    """Resultado de uma estratégia de scoring para um token."""
+    strategy: str
+    overall_score: float
+    dimension_scores: Dict[str, float]
+    risk_factors: List[str]
+    opportunity_factors: List[str]
+    failed_dimensions: List[str] = field(default_factory=list)
+    timed_out_dimensions: List[str] = field(default_factory=list)
+
+
+class DeadlineExceeded(Exception):
+    """Fonte de dados cancelada por estourar o orçamento de latência."""
+
+
+def split_factors(factors: List[str]) -> Tuple[List[str], List[str]]:
+    """Separa fatores em risco e oportunidade pelas palavras-chave."""
+    risk = [f for f in factors if any(word in f.lower() for word in RISK_KEYWORDS)]
+    opportunity = [f for f in factors if f not in risk]
+    return risk, opportunity
+
+
+def calculate_trend(values: List[float]) -> float:
+    """Calcula a tendência normalizada de uma série de valores."""
+    if len(values) < 2:
+        return 0.0
+    x = np.arange(len(values))
+    slope = np.polyfit(x, values, 1)[0]
+    return slope / (np.mean(values) + 1)
+
+
+def parse_timestamp(value: str) -> datetime:
+    """Converte timestamp ISO (com ``Z`` opcional) em datetime timezone-aware."""
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+class ScoringPipeline:
+    """Executa as dimensões habilitadas sobre um grafo de dependências compartilhado."""
+
+    def __init__(self, provider, strategies: Optional[Dict[str, Dict[str, Any]]] = None,
+                 budget_ms: Optional[float] = None, fallback_scores: Optional[Dict[str, float]] = None,
+                 latency: Optional[LatencyRecorder] = None):
+        self.provider = provider
+        self.strategies = strategies or DEFAULT_STRATEGIES
+        self.budget_ms = budget_ms
+        self.fallback_scores = fallback_scores or {}
+        self.latency = latency or LatencyRecorder()
+
+    @classmethod
+    def from_config(cls, provider, config: Dict) -> "ScoringPipeline":
+        analyzer_config = config.get("analyzer", {})
+        strategies = {name: dict(spec) for name, spec in DEFAULT_STRATEGIES.items()}
+        for name, spec in analyzer_config.get("strategies", {}).items():
+            strategies[name] = {**strategies.get(name, {}), **spec}
+        budget = analyzer_config.get("latency_budget", {})
+        return cls(
+            provider,
+            strategies,
+            budget_ms=budget.get("budget_ms"),
+            fallback_scores=budget.get("fallback_scores"),
+        )
+
+    def weights(self, strategy: str) -> Dict[str, float]:
+        return self.strategies[strategy]["weights"]
+
+    def trader_threshold(self, strategy: str) -> float:
+        return self.strategies[strategy].get("trader_threshold", 0.5)
+
+    def fallback_score(self, dim: Dimension) -> float:
+        return self.fallback_scores.get(dim.name, dim.error_score)
+
+    async def _timed_fetch(self, name: str, token_data: Dict, started: float, elapsed: Dict[str, float]) -> Any:
+        try:
+            return await DATA_SOURCES[name].fetch(self.provider, token_data)
+        finally:
+            elapsed[name] = (time.perf_counter() - started) * 1000
+
+    async def _fetch_dependencies(self, names: Iterable[str], token_data: Dict,
+                                  deadline: Optional[float] = None) -> Tuple[Dict[str, Any], Dict[str, float]]:
+        """Busca cada fonte uma única vez, até o ``deadline`` (``perf_counter``).
+
+        Retorna ``(resultados, latências em ms)``; falhas ficam registradas como
+        exceção e fontes canceladas por prazo como ``DeadlineExceeded``.
+        """
+        names = list(dict.fromkeys(names))
+        started = time.perf_counter()
+        elapsed: Dict[str, float] = {}
+        tasks = {
+            name: asyncio.ensure_future(self._timed_fetch(name, token_data, started, elapsed))
+            for name in names
+        }
+        if tasks:
+            timeout = None if deadline is None else max(deadline - started, 0.0)
+            _, pending = await asyncio.wait(tasks.values(), timeout=timeout)
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        results: Dict[str, Any] = {}
+        for name, task in tasks.items():
+            if task.cancelled():
+                results[name] = DeadlineExceeded(name)
+                logger.warning(f"Fonte de dados {name} cancelada por estourar o orçamento de latência")
+            elif task.exception() is not None:
+                results[name] = task.exception()
+                logger.error(f"Erro ao buscar fonte de dados {name}: {results[name]}")
+            else:
+                results[name] = task.result()
+            self.latency.observe(f"source:{name}", elapsed.get(name, 0.0),
+                                 timed_out=isinstance(results[name], DeadlineExceeded))
+        return results, elapsed
+
+    def _run_dimension(self, dim: Dimension, token_data: Dict, deps: Dict[str, Any]) -> Tuple[ScoreResult, bool]:
+        if any(isinstance(deps[name], Exception) for name in dim.depends_on):
+            return (dim.error_score, [dim.error_factor]), True
+        try:
+            return dim.score(token_data, deps), False
+        except Exception as e:
+            logger.error(f"Erro na dimensão {dim.name}: {e}")
+            return (dim.error_score, [dim.error_factor]), True
+
+    async def run(self, token_data: Dict, strategies: Iterable[str]) -> Dict[str, StrategyScore]:
+        """Calcula os scores das estratégias pedidas para um token."""
+        started = time.perf_counter()
+        deadline = None if self.budget_ms is None else started + self.budget_ms / 1000
+        strategies = list(strategies)
+        dim_names = list(dict.fromkeys(
+            name for strategy in strategies for name in self.weights(strategy)
+        ))
+        dims = [DIMENSIONS[name] for name in dim_names]
+        deps, elapsed = await self._fetch_dependencies(
+            (dep for dim in dims for dep in dim.depends_on), token_data, deadline
+        )
+
+        results: Dict[str, ScoreResult] = {}
+        failed: Dict[str, bool] = {}
+        timed_out: Dict[str, bool] = {}
+        for dim in dims:
+            score_started = time.perf_counter()
+            timed_out[dim.name] = any(isinstance(deps[name], DeadlineExceeded) for name in dim.depends_on)
+            if timed_out[dim.name]:
+                results[dim.name], failed[dim.name] = (self.fallback_score(dim), []), False
+            else:
+                results[dim.name], failed[dim.name] = self._run_dimension(dim, token_data, deps)
+            # Latência da dimensão: a dependência mais lenta + o cálculo do score
+            wait_ms = max((elapsed.get(name, 0.0) for name in dim.depends_on), default=0.0)
+            self.latency.observe(
+                f"dimension:{dim.name}",
+                wait_ms + (time.perf_counter() - score_started) * 1000,
+                timed_out=timed_out[dim.name],
+            )
+
+        return {strategy: self._combine(strategy, results, failed, timed_out) for strategy in strategies}
+
+    def _combine(self, strategy: str, results: Dict[str, ScoreResult], failed: Dict[str, bool],
+                 timed_out: Dict[str, bool]) -> StrategyScore:
+        weights = self.weights(strategy)
+        # Dimensões fora do prazo só contam quando têm fallback configurado
+        counted = {name: weight for name, weight in weights.items()
+                   if not timed_out[name] or name in self.fallback_scores}
+        counted_weight = sum(counted.values())
+        if counted and counted_weight > 0:
+            # Renormaliza sobre as dimensões que entram no score
+            overall = sum(results[name][0] * weight for name, weight in counted.items()) / counted_weight
+            overall *= sum(weights.values())
+        else:
+            overall = sum(results[name][0] * weight for name, weight in weights.items())
+        all_factors = [f for name in weights for f in results[name][1]]
+        risk, opportunity = split_factors(all_factors)
+        return StrategyScore(
+            strategy=strategy,
+            overall_score=overall,
+            dimension_scores={name: results[name][0] for name in weights},
+            risk_factors=risk,
+            opportunity_factors=opportunity,
+            failed_dimensions=[name for name in weights if failed[name]],
+            timed_out_dimensions=[name for name in weights if timed_out[name]],
+        )
+
+
+# ---------------------------------------------------------------------------
+# Fontes de dados
+# ---------------------------------------------------------------------------
+
+@data_source("pumpswap_token_count")
+async def _pumpswap_token_count(provider, token_data):
+    return await provider.get_current_pumpswap_token_count()
+
+
+@data_source("daily_migration_count")
+async def _daily_migration_count(provider, token_data):
+    return await provider.get_daily_migration_count()
+
+
+@data_source("liquidity_growth_trend")
+async def _liquidity_growth_trend(provider, token_data):
+    return await provider.get_liquidity_growth_trend(token_data["token_address"])
+
+
+@data_source("volume_acceleration")
+async def _volume_acceleration(provider, token_data):
+    return await provider.get_volume_acceleration(token_data["token_address"])
+
+
+@data_source("price_volatility")
+async def _price_volatility(provider, token_data):
+    return await provider.get_price_volatility(token_data["token_address"])
+
+
+@data_source("social_metrics")
+async def _social_metrics(provider, token_data):
+    return await provider.get_social_metrics(token_data.get("token_symbol", ""), token_data.get("token_name", ""))
+
+
+@data_source("post_migration_liquidity")
+async def _post_migration_liquidity(provider, token_data):
+    return await provider.get_post_migration_liquidity(
+        token_data["token_address"], token_data.get("migration_destination", "PumpSwap")
+    )
+
+
+@data_source("post_migration_volume")
+async def _post_migration_volume(provider, token_data):
+    return await provider.get_post_migration_volume(
+        token_data["token_address"], token_data.get("migration_destination", "PumpSwap")
+    )
+
+
+@data_source("smart_money")
+async def _smart_money(provider, token_data):
+    # Com índice invertido disponível a consulta é uma leitura de dicionário
+    index = getattr(provider, "smart_money_index", None)
+    if index is not None and index.wallet_count:
+        activity = index.activity(token_data["token_address"])
+        if activity:
+            return {"wallet_count": index.wallet_count, "activity": activity}
+    # Sem acerto no índice (local ao container, pode não ter visto os swaps): consulta por carteira
+    wallets = await provider.get_smart_money_wallets()
+    activity = await provider.check_smart_money_activity(token_data["token_address"], wallets)
+    return {"wallet_count": len(wallets), "activity": activity}
+
+
+@data_source("market_conditions")
+async def _market_conditions(provider, token_data):
+    return await provider.get_market_conditions_at_time(parse_timestamp(token_data.get("migration_timestamp", "")))
+
+
+@data_source("raydium_tvl")
+async def _raydium_tvl(provider, token_data):
+    return await provider.get_raydium_tvl()
+
+
+# ---------------------------------------------------------------------------
+# Dimensões PumpSwap
+# ---------------------------------------------------------------------------
+
+@dimension("early_adoption", depends_on=("pumpswap_token_count", "daily_migration_count"),
+           error_factor="Erro na análise de early adoption")
+def score_early_adoption(token_data: Dict, deps: Dict[str, Any]) -> ScoreResult:
+    """Vantagem de early adoption: tokens detectados cedo pós-migração."""
+    risk_factors = []
+    opportunity_factors = []
+
+    migration_timestamp = parse_timestamp(token_data["migration_timestamp"])
+    hours_since_migration = (datetime.now(timezone.utc) - migration_timestamp).total_seconds() / 3600
+
+    if hours_since_migration <= 1:
+        early_score = 1.0
+        opportunity_factors.append("Detectado na primeira hora pós-migração")
+    elif hours_since_migration <= 3:
+        early_score = 0.9
+        opportunity_factors.append("Detectado nas primeiras 3 horas")
+    elif hours_since_migration <= 6:
+        early_score = 0.7
+        opportunity_factors.append("Detectado nas primeiras 6 horas")
+    elif hours_since_migration <= 12:
+        early_score = 0.5
+    elif hours_since_migration <= 24:
+        early_score = 0.3
+        risk_factors.append("Detectado após 24 horas da migração")
+    else:
+        early_score = 0.1
+        risk_factors.append("Detectado muito tarde pós-migração")
+
+    # Bonus para tokens com poucos concorrentes no PumpSwap
+    pumpswap_token_count = deps["pumpswap_token_count"]
+    if pumpswap_token_count < 100:
+        early_score *= 1.3
+        opportunity_factors.append("PumpSwap ainda com poucos tokens")
+    elif pumpswap_token_count < 500:
+        early_score *= 1.1
+        opportunity_factors.append("PumpSwap em fase inicial")
+
+    # Verificar se é um dos primeiros tokens do dia
+    daily_migration_count = deps["daily_migration_count"]
+    if daily_migration_count <= 5:
+        early_score *= 1.2
+        opportunity_factors.append("Entre os primeiros tokens do dia")
+    elif daily_migration_count <= 10:
+        early_score *= 1.1
+        opportunity_factors.append("Entre os primeiros 10 tokens do dia")
+
+    return min(early_score, 1.0), risk_factors + opportunity_factors
+
+
+@dimension("liquidity_growth", depends_on=("liquidity_growth_trend",),
+           error_factor="Erro na análise de liquidez")
+def score_liquidity_growth(token_data: Dict, deps: Dict[str, Any]) -> ScoreResult:
+    """Potencial de crescimento de liquidez no PumpSwap."""
+    risk_factors = []
+    opportunity_factors = []
+
+    pool_data = token_data.get("pool_data", {})
+    if not pool_data:
+        risk_factors.append("Dados de pool não disponíveis")
+        return 0.3, risk_factors
+
+    current_liquidity = pool_data.get("liquidity_usd", 0)
+    volume_24h = pool_data.get("volume_24h_usd", 0)
+
+    # Score baseado na liquidez atual
+    if current_liquidity >= 10000:
+        liquidity_score = 1.0
+        opportunity_factors.append(f"Alta liquidez: ${current_liquidity:,.0f}")
+    elif current_liquidity >= 5000:
+        liquidity_score = 0.8
+        opportunity_factors.append(f"Boa liquidez: ${current_liquidity:,.0f}")
+    elif current_liquidity >= 1000:
+        liquidity_score = 0.6
+        opportunity_factors.append(f"Liquidez moderada: ${current_liquidity:,.0f}")
+    elif current_liquidity >= 500:
+        liquidity_score = 0.4
+    else:
+        liquidity_score = 0.2
+        risk_factors.append(f"Baixa liquidez: ${current_liquidity:,.0f}")
+
+    # Analisar ratio volume/liquidez (turnover)
+    if current_liquidity > 0:
+        turnover_ratio = volume_24h / current_liquidity
+        if turnover_ratio > 2.0:  # Volume > 2x liquidez
+            liquidity_score *= 1.3
+            opportunity_factors.append("Alto turnover de liquidez")
+        elif turnover_ratio > 1.0:
+            liquidity_score *= 1.1
+            opportunity_factors.append("Bom turnover de liquidez")
+        elif turnover_ratio < 0.1:
+            liquidity_score *= 0.7
+            risk_factors.append("Baixo turnover de liquidez")
+
+    # Verificar crescimento histórico de liquidez
+    liquidity_growth = deps["liquidity_growth_trend"]
+    if liquidity_growth > 0.2:  # 20% crescimento
+        liquidity_score *= 1.2
+        opportunity_factors.append("Liquidez em forte crescimento")
+    elif liquidity_growth > 0.1:
+        liquidity_score *= 1.1
+        opportunity_factors.append("Liquidez em crescimento")
+    elif liquidity_growth < -0.1:
+        liquidity_score *= 0.8
+        risk_factors.append("Liquidez em declínio")
+
+    return min(liquidity_score, 1.0), risk_factors + opportunity_factors
+
+
+@dimension("volume_momentum", depends_on=("volume_acceleration",),
+           error_factor="Erro na análise de volume")
+def score_volume_momentum(token_data: Dict, deps: Dict[str, Any]) -> ScoreResult:
+    """Momentum de volume no PumpSwap."""
+    risk_factors = []
+    opportunity_factors = []
+
+    total_volume = token_data.get("total_volume_usd", 0)
+    trade_count = token_data.get("trade_count", 0)
+
+    # Score baseado no volume total desde migração
+    if total_volume >= 50000:
+        volume_score = 1.0
+        opportunity_factors.append(f"Alto volume total: ${total_volume:,.0f}")
+    elif total_volume >= 20000:
+        volume_score = 0.8
+        opportunity_factors.append(f"Bom volume total: ${total_volume:,.0f}")
+    elif total_volume >= 5000:
+        volume_score = 0.6
+    elif total_volume >= 1000:
+        volume_score = 0.4
+    else:
+        volume_score = 0.2
+        risk_factors.append(f"Baixo volume total: ${total_volume:,.0f}")
+
+    # Tamanho médio dos trades
+    if trade_count > 0:
+        avg_trade_size = total_volume / trade_count
+        if avg_trade_size >= 1000:
+            volume_score *= 1.2
+            opportunity_factors.append("Trades de alto valor")
+        elif avg_trade_size >= 500:
+            volume_score *= 1.1
+            opportunity_factors.append("Trades de valor moderado")
+        elif avg_trade_size < 100:
+            volume_score *= 0.8
+            risk_factors.append("Trades de baixo valor")
+
+    # Verificar aceleração de volume
+    volume_acceleration = deps["volume_acceleration"]
+    if volume_acceleration > 0.5:  # 50% aceleração
+        volume_score *= 1.3
+        opportunity_factors.append("Volume em forte aceleração")
+    elif volume_acceleration > 0.2:
+        volume_score *= 1.1
+        opportunity_factors.append("Volume em aceleração")
+    elif volume_acceleration < -0.2:
+        volume_score *= 0.7
+        risk_factors.append("Volume desacelerando")
+
+    # Verificar consistência de trades
+    if trade_count >= 20:
+        opportunity_factors.append("Alta atividade de trading")
+        volume_score *= 1.1
+    elif trade_count >= 10:
+        opportunity_factors.append("Boa atividade de trading")
+    elif trade_count < 5:
+        risk_factors.append("Baixa atividade de trading")
+        volume_score *= 0.8
+
+    return min(volume_score, 1.0), risk_factors + opportunity_factors
+
+
+@dimension("price_stability", depends_on=("price_volatility",),
+           error_factor="Erro na análise de estabilidade")
+def score_price_stability(token_data: Dict, deps: Dict[str, Any]) -> ScoreResult:
+    """Estabilidade de preço no PumpSwap."""
+    risk_factors = []
+    opportunity_factors = []
+
+    pool_data = token_data.get("pool_data", {})
+    if not pool_data:
+        risk_factors.append("Dados de preço não disponíveis")
+        return 0.3, risk_factors
+
+    current_price = pool_data.get("price_usd", 0)
+    price_change_24h = pool_data.get("price_change_24h", 0)
+
+    if current_price <= 0:
+        risk_factors.append("Preço inválido")
+        return 0.1, risk_factors
+
+    # Score baseado na variação de preço 24h
+    abs_price_change = abs(price_change_24h)
+    if abs_price_change <= 0.1:  # ±10%
+        stability_score = 1.0
+        opportunity_factors.append("Preço muito estável")
+    elif abs_price_change <= 0.2:  # ±20%
+        stability_score = 0.8
+        opportunity_factors.append("Preço estável")
+    elif abs_price_change <= 0.3:  # ±30%
+        stability_score = 0.6
+    elif abs_price_change <= 0.5:  # ±50%
+        stability_score = 0.4
+        risk_factors.append("Preço moderadamente volátil")
+    else:
+        stability_score = 0.2
+        risk_factors.append("Preço muito volátil")
+
+    # Bonus para tendência de alta controlada
+    if 0 < price_change_24h <= 0.3:  # Alta de até 30%
+        stability_score *= 1.2
+        opportunity_factors.append(f"Tendência de alta controlada: +{price_change_24h*100:.1f}%")
+    elif price_change_24h > 0.5:  # Alta muito forte
+        stability_score *= 0.8
+        risk_factors.append("Alta muito agressiva pode indicar pump")
+    elif price_change_24h < -0.3:  # Queda forte
+        stability_score *= 0.7
+        risk_factors.append("Queda significativa de preço")
+
+    # Analisar volatilidade histórica
+    price_volatility = deps["price_volatility"]
+    if price_volatility < 0.2:
+        stability_score *= 1.1
+        opportunity_factors.append("Baixa volatilidade histórica")
+    elif price_volatility > 0.6:
+        stability_score *= 0.8
+        risk_factors.append("Alta volatilidade histórica")
+
+    return min(stability_score, 1.0), risk_factors + opportunity_factors
+
+
+@dimension("community_interest", depends_on=("social_metrics",),
+           error_factor="Erro na análise de comunidade")
+def score_community_interest(token_data: Dict, deps: Dict[str, Any]) -> ScoreResult:
+    """Interesse da comunidade no token."""
+    risk_factors = []
+    opportunity_factors = []
+
+    token_symbol = token_data.get("token_symbol", "")
+    token_name = token_data.get("token_name", "")
+
+    social_metrics = deps["social_metrics"]
+    twitter_mentions = social_metrics.get("twitter_mentions", 0)
+    telegram_activity = social_metrics.get("telegram_activity", 0)
+    discord_activity = social_metrics.get("discord_activity", 0)
+
+    if twitter_mentions >= 100:
+        interest_score = 1.0
+        opportunity_factors.append(f"Alto interesse no Twitter: {twitter_mentions} menções")
+    elif twitter_mentions >= 50:
+        interest_score = 0.8
+        opportunity_factors.append(f"Bom interesse no Twitter: {twitter_mentions} menções")
+    elif twitter_mentions >= 10:
+        interest_score = 0.6
+    elif twitter_mentions >= 5:
+        interest_score = 0.4
+    else:
+        interest_score = 0.2
+        risk_factors.append("Baixo interesse social")
+
+    # Bonus para atividade em múltiplas plataformas
+    active_platforms = sum([
+        1 if twitter_mentions > 0 else 0,
+        1 if telegram_activity > 0 else 0,
+        1 if discord_activity > 0 else 0
+    ])
+    if active_platforms >= 3:
+        interest_score *= 1.3
+        opportunity_factors.append("Ativo em múltiplas plataformas sociais")
+    elif active_platforms >= 2:
+        interest_score *= 1.1
+        opportunity_factors.append("Ativo em várias plataformas")
+
+    # Analisar qualidade do nome/símbolo
+    if len(token_symbol) <= 6 and token_symbol.isalpha():
+        interest_score *= 1.1
+        opportunity_factors.append("Símbolo limpo e memorável")
+
+    if len(token_name) <= 20 and not any(char.isdigit() for char in token_name):
+        interest_score *= 1.05
+        opportunity_factors.append("Nome profissional")
+
+    # Verificar se não é um meme muito genérico
+    generic_terms = ["coin", "token", "meme", "doge", "shib", "pepe"]
+    if any(term in token_name.lower() for term in generic_terms):
+        interest_score *= 0.9
+        risk_factors.append("Nome genérico pode indicar falta de originalidade")
+
+    return min(interest_score, 1.0), risk_factors + opportunity_factors
+
+
+# ---------------------------------------------------------------------------
+# Dimensões de migração
+# ---------------------------------------------------------------------------
+
+@dimension("liquidity_stability", depends_on=("post_migration_liquidity",),
+           error_factor="Erro na análise de liquidez")
+def score_liquidity_stability(token_data: Dict, deps: Dict[str, Any]) -> ScoreResult:
+    """Estabilidade da liquidez pós-migração."""
+    risk_factors = []
+    opportunity_factors = []
+
+    liquidity_data = deps["post_migration_liquidity"]
+    if not liquidity_data:
+        risk_factors.append("Dados de liquidez insuficientes")
+        return 0.0, risk_factors
+
+    liquidity_values = [point["liquidity_usd"] for point in liquidity_data]
+    if len(liquidity_values) < 2:
+        risk_factors.append("Histórico de liquidez muito curto")
+        return 0.3, risk_factors
+
+    liquidity_std = np.std(liquidity_values)
+    liquidity_mean = np.mean(liquidity_values)
+    if liquidity_mean == 0:
+        risk_factors.append("Liquidez média zero")
+        return 0.0, risk_factors
+
+    # Menor coeficiente de variação = maior estabilidade
+    coefficient_of_variation = liquidity_std / liquidity_mean
+    if coefficient_of_variation < 0.1:
+        stability_score = 1.0
+        opportunity_factors.append("Liquidez muito estável")
+    elif coefficient_of_variation < 0.2:
+        stability_score = 0.8
+        opportunity_factors.append("Liquidez estável")
+    elif coefficient_of_variation < 0.4:
+        stability_score = 0.6
+    elif coefficient_of_variation < 0.6:
+        stability_score = 0.4
+        risk_factors.append("Liquidez moderadamente volátil")
+    else:
+        stability_score = 0.2
+        risk_factors.append("Liquidez muito volátil")
+
+    # Verificar tendência de crescimento
+    if len(liquidity_values) >= 5:
+        recent_avg = np.mean(liquidity_values[-3:])
+        earlier_avg = np.mean(liquidity_values[:3])
+        if recent_avg > earlier_avg * 1.1:
+            stability_score *= 1.2
+            opportunity_factors.append("Liquidez em crescimento")
+        elif recent_avg < earlier_avg * 0.9:
+            stability_score *= 0.8
+            risk_factors.append("Liquidez em declínio")
+
+    return min(stability_score, 1.0), risk_factors + opportunity_factors
+
+
+@dimension("post_migration_volume", depends_on=("post_migration_volume",),
+           error_factor="Erro na análise de volume")
+def score_post_migration_volume(token_data: Dict, deps: Dict[str, Any]) -> ScoreResult:
+    """Volume de trading pós-migração."""
+    risk_factors = []
+    opportunity_factors = []
+
+    volume_data = deps["post_migration_volume"]
+    if not volume_data:
+        risk_factors.append("Dados de volume insuficientes")
+        return 0.0, risk_factors
+
+    volumes = [point["volume_usd"] for point in volume_data]
+    if len(volumes) < 3:
+        risk_factors.append("Histórico de volume muito curto")
+        return 0.3, risk_factors
+
+    avg_volume = np.mean(volumes)
+    volume_trend = calculate_trend(volumes)
+    volume_consistency = 1 - (np.std(volumes) / (avg_volume + 1))
+
+    if avg_volume > 100000:
+        volume_score = 1.0
+        opportunity_factors.append("Volume muito alto")
+    elif avg_volume > 50000:
+        volume_score = 0.8
+        opportunity_factors.append("Volume alto")
+    elif avg_volume > 10000:
+        volume_score = 0.6
+    elif avg_volume > 1000:
+        volume_score = 0.4
+    else:
+        volume_score = 0.2
+        risk_factors.append("Volume muito baixo")
+
+    if volume_trend > 0.1:
+        volume_score *= 1.3
+        opportunity_factors.append("Volume em crescimento")
+    elif volume_trend < -0.1:
+        volume_score *= 0.7
+        risk_factors.append("Volume em declínio")
+
+    volume_score *= volume_consistency
+    return min(volume_score, 1.0), risk_factors + opportunity_factors
+
+
+@dimension("smart_money_following", depends_on=("smart_money",),
+           error_factor="Erro na análise de smart money")
+def score_smart_money_following(token_data: Dict, deps: Dict[str, Any]) -> ScoreResult:
+    """Atividade de carteiras 'smart money' no token."""
+    risk_factors = []
+    opportunity_factors = []
+
+    total_smart_wallets = deps["smart_money"]["wallet_count"]
+    smart_money_activity = deps["smart_money"]["activity"]
+    if not smart_money_activity:
+        risk_factors.append("Nenhuma atividade de smart money detectada")
+        return 0.2, risk_factors
+
+    active_smart_wallets = len(smart_money_activity)
+    smart_money_ratio = active_smart_wallets / total_smart_wallets
+
+    buy_activity = sum(1 for activity in smart_money_activity if activity["type"] == "buy")
+    sell_activity = active_smart_wallets - buy_activity
+
+    if buy_activity > sell_activity:
+        activity_score = 1.0
+        opportunity_factors.append(f"{buy_activity} smart wallets comprando")
+    elif buy_activity == sell_activity:
+        activity_score = 0.6
+    else:
+        activity_score = 0.3
+        risk_factors.append(f"{sell_activity} smart wallets vendendo")
+
+    final_score = smart_money_ratio * activity_score
+    if final_score > 0.7:
+        opportunity_factors.append("Forte interesse de smart money")
+    elif final_score < 0.3:
+        risk_factors.append("Baixo interesse de smart money")
+
+    return final_score, risk_factors + opportunity_factors
+
+
+@dimension("migration_timing", depends_on=("market_conditions",),
+           error_factor="Erro na análise de timing", error_score=0.5)
+def score_migration_timing(token_data: Dict, deps: Dict[str, Any]) -> ScoreResult:
+    """Timing da migração em relação ao mercado geral."""
+    risk_factors = []
+    opportunity_factors = []
+
+    migration_timestamp = parse_timestamp(token_data.get("migration_timestamp", ""))
+    market_conditions = deps["market_conditions"]
+
+    if market_conditions["sol_price_trend"] > 0.05:  # SOL subindo >5%
+        timing_score = 1.0
+        opportunity_factors.append("Migração durante alta do SOL")
+    elif market_conditions["sol_price_trend"] > 0:
+        timing_score = 0.8
+        opportunity_factors.append("Migração durante estabilidade do SOL")
+    elif market_conditions["sol_price_trend"] > -0.05:
+        timing_score = 0.6
+    else:
+        timing_score = 0.4
+        risk_factors.append("Migração durante queda do SOL")
+
+    if market_conditions["memecoin_volume_trend"] > 0.1:
+        timing_score *= 1.2
+        opportunity_factors.append("Alto volume de memecoins")
+    elif market_conditions["memecoin_volume_trend"] < -0.1:
+        timing_score *= 0.8
+        risk_factors.append("Baixo volume de memecoins")
+
+    # Horários de maior atividade (UTC, aproximadamente)
+    migration_hour = migration_timestamp.hour
+    if 13 <= migration_hour <= 21:
+        timing_score *= 1.1
+        opportunity_factors.append("Migração em horário de alta atividade")
+    elif 2 <= migration_hour <= 6:
+        timing_score *= 0.9
+        risk_factors.append("Migração em horário de baixa atividade")
+
+    return min(timing_score, 1.0), risk_factors + opportunity_factors
+
+
+@dimension("migration_destination_quality", depends_on=("pumpswap_token_count", "raydium_tvl"),
+           error_factor="Erro na análise do destino", error_score=0.5)
+def score_migration_destination_quality(token_data: Dict, deps: Dict[str, Any]) -> ScoreResult:
+    """Qualidade do destino da migração (PumpSwap vs Raydium)."""
+    risk_factors = []
+    opportunity_factors = []
+
+    migration_destination = token_data.get("migration_destination", "PumpSwap")
+    if migration_destination == "PumpSwap":
+        # PumpSwap: mais novo, menos taxas, mas menos liquidez geral
+        destination_score = 0.8
+        opportunity_factors.append("Migração para PumpSwap (sem taxas)")
+        if deps["pumpswap_token_count"] < 1000:
+            destination_score *= 1.2
+            opportunity_factors.append("Entre os primeiros tokens no PumpSwap")
+    elif migration_destination == "Raydium":
+        # Raydium: mais estabelecido, maior liquidez, mas com taxas
+        destination_score = 0.9
+        opportunity_factors.append("Migração para Raydium (estabelecido)")
+        if deps["raydium_tvl"] > 1000000000:  # $1B+ TVL
+            destination_score *= 1.1
+            opportunity_factors.append("Raydium com alta liquidez")
+    else:
+        destination_score = 0.5
+        risk_factors.append("Destino de migração desconhecido")
+
+    return destination_score, risk_factors + opportunity_factors
@@ -0,0 +1,186 @@
+"""
+Índice invertido de atividade de smart money.
+
+Em vez de consultar cada carteira smart money para cada token analisado
+(custo carteiras x tokens), o índice é alimentado por um stream de swaps e
+mantém ``mint -> {carteira: última compra/venda}``.  A consulta por token
+vira uma única leitura de dicionário.
+
+O conjunto de carteiras é um array NumPy ordenado de endereços com largura
+fixa (44 bytes, tamanho máximo de um endereço base58 Solana), versionado a
+cada atualização.  Dezenas de milhares de carteiras ocupam poucos MB.  A
+lista vence após ``wallets_ttl_s`` (``wallets_stale``) e deve ser recarregada.
+
+O índice vive na memória de cada container e só vê os lotes de swaps que o
+container recebeu: um mint sem atividade no índice não prova que nenhuma
+smart wallet o negociou, por isso a consulta por token cai para a busca
+carteira a carteira nesses casos.
+"""
+
+import logging
+import time
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+ADDRESS_DTYPE = "S44"
+
+
+class SmartWalletSet:
+    """Conjunto imutável e versionado de carteiras smart money."""
+
+    def __init__(self, wallets: Iterable[str] = (), version: int = 0):
+        encoded = np.array([w.encode("ascii") for w in wallets], dtype=ADDRESS_DTYPE)
+        self._addresses = np.unique(encoded)
+        self.version = version
+
+    def __len__(self) -> int:
+        return len(self._addresses)
+
+    def __contains__(self, wallet: str) -> bool:
+        if not len(self._addresses):
+            return False
+        key = np.array(wallet.encode("ascii"), dtype=ADDRESS_DTYPE)
+        idx = np.searchsorted(self._addresses, key)
+        return idx < len(self._addresses) and self._addresses[idx] == key
+
+    def contains_many(self, wallets: List[str]) -> np.ndarray:
+        """Teste de pertinência vetorizado; retorna máscara booleana."""
+        if not len(self._addresses) or not wallets:
+            return np.zeros(len(wallets), dtype=bool)
+        keys = np.array([w.encode("ascii") for w in wallets], dtype=ADDRESS_DTYPE)
+        idx = np.searchsorted(self._addresses, keys)
+        idx[idx == len(self._addresses)] = 0
+        return self._addresses[idx] == keys
+
+    def replace(self, wallets: Iterable[str]) -> "SmartWalletSet":
+        """Retorna uma nova versão do conjunto."""
+        return SmartWalletSet(wallets, self.version + 1)
+
+    @property
+    def nbytes(self) -> int:
+        return self._addresses.nbytes
+
+
+class WalletActivity:
+    """Última compra e venda de uma carteira em um mint."""
+
+    __slots__ = ("last_buy_ts", "last_buy_amount", "last_sell_ts", "last_sell_amount")
+
+    def __init__(self):
+        self.last_buy_ts = 0.0
+        self.last_buy_amount = 0.0
+        self.last_sell_ts = 0.0
+        self.last_sell_amount = 0.0
+
+    @property
+    def last_type(self) -> str:
+        return "buy" if self.last_buy_ts >= self.last_sell_ts else "sell"
+
+    @property
+    def last_amount(self) -> float:
+        return self.last_buy_amount if self.last_type == "buy" else self.last_sell_amount
+
+
+class SmartMoneyIndex:
+    """Índice ``mint -> carteiras smart money`` atualizado incrementalmente."""
+
+    def __init__(self, wallets: Optional[SmartWalletSet] = None, ttl_s: float = 7 * 24 * 3600,
+                 max_mints: int = 200_000, wallets_ttl_s: float = 3600, clock=time.time):
+        self.wallets = wallets or SmartWalletSet()
+        self.ttl_s = ttl_s
+        self.max_mints = max_mints
+        self.wallets_ttl_s = wallets_ttl_s
+        self.clock = clock
+        self._wallets_loaded_at = clock() if len(self.wallets) else None
+        self._by_mint: Dict[str, Dict[str, WalletActivity]] = {}
+        self._last_seen: Dict[str, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._by_mint)
+
+    @property
+    def wallet_count(self) -> int:
+        return len(self.wallets)
+
+    @property
+    def wallets_stale(self) -> bool:
+        """True sem lista de carteiras ou quando ela tem mais de ``wallets_ttl_s``."""
+        if self._wallets_loaded_at is None or not len(self.wallets):
+            return True
+        return self.clock() - self._wallets_loaded_at >= self.wallets_ttl_s
+
+    def set_wallets(self, wallets: Iterable[str]) -> None:
+        """Publica uma nova versão da lista e descarta atividade de carteiras removidas."""
+        self.wallets = self.wallets.replace(wallets)
+        self._wallets_loaded_at = self.clock()
+        for mint in list(self._by_mint):
+            activity = self._by_mint[mint]
+            names = list(activity)
+            keep = self.wallets.contains_many(names)
+            for wallet, kept in zip(names, keep):
+                if not kept:
+                    del activity[wallet]
+            if not activity:
+                self._drop_mint(mint)
+        logger.info(f"Lista smart money atualizada para versão {self.wallets.version} ({len(self.wallets)} carteiras)")
+
+    def ingest(self, swaps: List[Dict]) -> int:
+        """Aplica um lote de swaps; retorna quantos envolviam carteiras monitoradas.
+
+        Cada swap: ``{"mint", "wallet", "side": "buy"|"sell", "amount", "timestamp"}``.
+        """
+        if not swaps:
+            return 0
+        tracked = self.wallets.contains_many([swap["wallet"] for swap in swaps])
+        applied = 0
+        for swap, is_tracked in zip(swaps, tracked):
+            if not is_tracked:
+                continue
+            mint = swap["mint"]
+            timestamp = float(swap.get("timestamp") or self.clock())
+            activity = self._by_mint.setdefault(mint, {})
+            entry = activity.get(swap["wallet"])
+            if entry is None:
+                entry = activity[swap["wallet"]] = WalletActivity()
+            if swap["side"] == "buy":
+                if timestamp >= entry.last_buy_ts:
+                    entry.last_buy_ts = timestamp
+                    entry.last_buy_amount = float(swap.get("amount", 0))
+            elif timestamp >= entry.last_sell_ts:
+                entry.last_sell_ts = timestamp
+                entry.last_sell_amount = float(swap.get("amount", 0))
+            self._last_seen[mint] = max(self._last_seen.get(mint, 0.0), timestamp)
+            applied += 1
+        if len(self._by_mint) > self.max_mints:
+            self._evict_oldest(len(self._by_mint) - self.max_mints)
+        return applied
+
+    def activity(self, mint: str) -> List[Dict]:
+        """Atividade smart money no mint, no formato de ``check_smart_money_activity``."""
+        activity = self._by_mint.get(mint)
+        if not activity:
+            return []
+        return [
+            {"wallet": wallet, "type": entry.last_type, "amount": entry.last_amount}
+            for wallet, entry in activity.items()
+        ]
+
+    def expire(self) -> int:
+        """Remove mints sem atividade há mais de ``ttl_s``."""
+        cutoff = self.clock() - self.ttl_s
+        stale = [mint for mint, seen in self._last_seen.items() if seen < cutoff]
+        for mint in stale:
+            self._drop_mint(mint)
+        return len(stale)
+
+    def _drop_mint(self, mint: str) -> None:
+        self._by_mint.pop(mint, None)
+        self._last_seen.pop(mint, None)
+
+    def _evict_oldest(self, count: int) -> None:
+        for mint in sorted(self._last_seen, key=self._last_seen.get)[:count]:
+            self._drop_mint(mint)
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""Testes para a persistência em lote das análises."""
+
+import os
+import re
+import sys
+from decimal import Decimal
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from analysis_store import (
+    FACTOR_CATALOG,
+    FACTOR_TEMPLATES,
+    AnalysisStore,
+    decode_factor,
+    encode_analysis,
+    encode_factor,
+    item_size,
+)
+
+
+class FakeBatch:
+    def __init__(self, table):
+        self.table = table
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.table.batches += 1
+        return False
+
+    def put_item(self, Item):
+        self.table.items.append(Item)
+
+
+class FakeTable:
+    def __init__(self):
+        self.items = []
+        self.batches = 0
+
+    def batch_writer(self, overwrite_by_pkeys=None):
+        return FakeBatch(self)
+
+
+SAMPLE = {
+    "token_address": "TokenA",
+    "token_symbol": "TKA",
+    "token_name": "Token A",
+    "pumpswap_quality_score": 0.7,
+    "early_adoption_score": 0.812345678,
+    "liquidity_growth_score": float("nan"),
+    "overall_pumpswap_score": 0.67654321,
+    "risk_factors": ["Baixa liquidez: $1,234"],
+    "opportunity_factors": ["Detectado nas primeiras 3 horas", "Frase livre"],
+    "recommended_action": "CONSIDER",
+    "confidence_level": "MEDIUM",
+}
+
+
+def test_factor_codes_round_trip_and_cover_pipeline():
+    """Todo fator emitido pelo pipeline tem código e a codificação é reversível."""
+    print("Testando catálogo de fatores...")
+    # Sem colisões: templates que diferem só no número compartilham código
+    assert len(FACTOR_CATALOG) == len({re.sub(r"\d[\d,]*(?:\.\d+)?", "{}", t) for t in FACTOR_TEMPLATES})
+
+    source = open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "scoring_pipeline.py")).read()
+    for match in re.finditer(r'(?:append\(|error_factor=)f?"([^"]*)"', source):
+        text = re.sub(r"\{[^}]*\}", "123", match.group(1))
+        assert encode_factor(text) != text, f"fator sem código: {match.group(1)}"
+
+    for text in ("Alta liquidez: $150,000", "Tendência de alta controlada: +12.5%", "3 smart wallets comprando"):
+        assert decode_factor(encode_factor(text)) == text
+    assert encode_factor("Frase livre") == "Frase livre"
+    print("✓ Catálogo OK")
+
+
+def test_compact_item_is_smaller_and_dynamodb_safe():
+    """Item compacto usa Decimal, omite NaN, tem TTL e ocupa menos bytes."""
+    print("Testando codificação compacta...")
+    item = encode_analysis(SAMPLE, "pumpswap", "2024-01-01T00:00:00+00:00", 1_700_000_000)
+
+    assert item["ov"] == Decimal("0.6765")
+    assert item["sc"] == {"early_adoption": Decimal("0.8123")}
+    assert item["ttl"] == 1_700_000_000
+    assert item["sym"] == "TKA" and item["act"] == "CONSIDER"
+    assert item["of"][1] == "Frase livre"
+    assert decode_factor(item["rf"][0]) == "Baixa liquidez: $1,234"
+    assert not any(isinstance(v, float) for v in item.values())
+    assert item_size(item) < item_size(SAMPLE)
+    print("✓ Codificação OK")
+
+
+def test_flush_uses_single_batch():
+    """As análises pendentes são gravadas num único batch_writer."""
+    print("Testando gravação em lote...")
+    table = FakeTable()
+    store = AnalysisStore(table, ttl_days=1, clock=lambda: 1_000.0)
+    for i in range(30):
+        store.add({**SAMPLE, "token_address": f"Token{i}"}, "pumpswap")
+
+    assert store.flush() == 30
+    assert table.batches == 1 and len(table.items) == 30
+    assert table.items[0]["ttl"] == 1_000 + 86400
+    assert len(store) == 0 and store.flush() == 0
+    print("✓ Gravação em lote OK")
+
+
+class FailingBatch(FakeBatch):
+    def __exit__(self, *exc):
+        raise RuntimeError("AccessDeniedException: BatchWriteItem")
+
+
+class FailingS3:
+    def put_object(self, **kwargs):
+        raise RuntimeError("AccessDenied: PutObject")
+
+
+def test_flush_surfaces_write_failures():
+    """Falhas do BatchWriteItem e do upload Parquet chegam ao chamador."""
+    print("Testando propagação de falhas do flush...")
+    table = FakeTable()
+    table.batch_writer = lambda overwrite_by_pkeys=None: FailingBatch(table)
+    store = AnalysisStore(table)
+    store.add(SAMPLE, "pumpswap")
+    with pytest.raises(RuntimeError, match="BatchWriteItem"):
+        store.flush()
+
+    if AnalysisStore(FakeTable(), parquet_bucket="bucket").parquet_bucket:
+        table = FakeTable()
+        store = AnalysisStore(table, s3_client=FailingS3(), parquet_bucket="bucket")
+        store.add(SAMPLE, "pumpswap")
+        with pytest.raises(RuntimeError, match="PutObject"):
+            store.flush()
+        assert len(table.items) == 1
+    print("✓ Falhas propagadas")
@@ -7,17 +7,24 @@ Este script simula o comportamento do Analyzer sem depender de AWS ou APIs exter
 import json
 import os
 import sys
-from unittest.mock import Mock, patch, MagicMock
+from types import SimpleNamespace
+from unittest.mock import patch
 
 # Adiciona o diretório atual ao path para importar o módulo analyzer
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Mock das dependências para teste local
 with patch('boto3.client'), \
      patch('solana.rpc.api.Client'), \
      patch('tweepy.API'), \
      patch('tweepy.OAuthHandler'):
-    from analyzer import process_token_analysis, calculate_quality_score, lambda_handler
+    import analyzer as analyzer_module
+    from analyzer import process_token_analysis, calculate_quality_score
+
+from discoverer.discoverer import WSOL_MINT, smart_money_messages
+from smart_money_index import SmartMoneyIndex
+from watchlist import WatchlistScheduler
 
 def test_calculate_quality_score():
     """Testa o cálculo do score de qualidade."""
@@ -99,44 +106,137 @@ def test_process_token_analysis():
         
         print(f"✓ Análise processada com score: {result['qualityScore']}")
 
-def test_lambda_handler():
-    """Testa o handler principal do Lambda."""
+class FakeAnalyzer:
+    """Substitui o PumpSwapFocusedAnalyzer (sem rede) e registra as chamadas."""
+
+    instances = []
+    scores = {}
+
+    def __init__(self):
+        self.saved = []
+        self.sent = []
+        self.refreshed = 0
+        FakeAnalyzer.instances.append(self)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def perform_pumpswap_analysis(self, token_data):
+        score = FakeAnalyzer.scores.get(token_data["token_address"], 0.55)
+        return SimpleNamespace(token_address=token_data["token_address"], overall_pumpswap_score=score,
+                               recommended_action="BUY" if score > 0.7 else "CONSIDER")
+
+    async def perform_migration_analysis(self, token_data):
+        return SimpleNamespace(token_address=token_data["token_address"], overall_migration_score=0.5)
+
+    async def refresh_smart_money_wallets(self):
+        self.refreshed += 1
+        analyzer_module.SMART_MONEY_INDEX.set_wallets(["WalletA"])
+
+    def save_analysis(self, analysis):
+        self.saved.append(analysis.token_address)
+
+    def send_to_trader(self, analysis):
+        self.sent.append(analysis.token_address)
+
+
+def patched_handler(monkeypatch, watchlist):
+    FakeAnalyzer.instances.clear()
+    monkeypatch.setattr(FakeAnalyzer, "scores", {"tokBuy": 0.9, "tokUp": 0.9})
+    monkeypatch.setattr(analyzer_module, "PumpSwapFocusedAnalyzer", FakeAnalyzer)
+    monkeypatch.setattr(analyzer_module, "TRADER_QUEUE_URL", "https://sqs.test/trader")
+    monkeypatch.setattr(analyzer_module, "WATCHLIST", watchlist)
+    monkeypatch.setattr(analyzer_module, "SMART_MONEY_INDEX", SmartMoneyIndex())
+    return analyzer_module.lambda_handler
+
+
+def test_lambda_handler(monkeypatch):
+    """O handler real (síncrono) processa tokens SQS e coloca CONSIDER na watchlist."""
     print("Testando lambda_handler...")
-    
-    # Mock das funções
-    with patch('analyzer.process_token_analysis') as mock_process, \
-         patch('analyzer.send_to_trader_queue') as mock_send:
-        
-        # Configura os mocks
-        mock_process.return_value = {
-            'tokenAddress': 'So11111111111111111111111111111111111111112',
-            'qualityScore': 75,
-            'approved': True
-        }
-        
-        # Evento de teste (SQS)
-        test_event = {
-            'Records': [
-                {
-                    'eventSource': 'aws:sqs',
-                    'body': json.dumps({
-                        'tokenAddress': 'So11111111111111111111111111111111111111112',
-                        'poolAddress': 'pool123456789',
-                        'liquidityAmount': 1000000
-                    })
-                }
-            ]
-        }
-        
-        result = lambda_handler(test_event, None)
-        
-        assert result['statusCode'] == 200, f"Status code esperado: 200, recebido: {result['statusCode']}"
-        
-        # Verifica se as funções foram chamadas
-        mock_process.assert_called_once()
-        mock_send.assert_called_once()
-        
-        print("✓ lambda_handler passou no teste")
+    watchlist = WatchlistScheduler(min_interval_s=60, max_interval_s=60)
+    handler = patched_handler(monkeypatch, watchlist)
+    event = {"Records": [
+        {"body": json.dumps({"token_type": "pumpswap_migrated_token", "token_address": "tokConsider"})},
+        {"body": json.dumps({"token_type": "pumpswap_migrated_token", "token_address": "tokBuy"})},
+        {"body": json.dumps({"token_type": "migrated_token", "token_address": "tokMigrated"})},
+    ]}
+
+    result = handler(event, None)
+
+    assert result["statusCode"] == 200, result
+    assert json.loads(result["body"])["tokens_processed"] == 3
+    # CONSIDER só vai ao trader quando a watchlist o promove
+    assert FakeAnalyzer.instances[0].sent == ["tokBuy", "tokMigrated"]
+    assert "tokConsider" in watchlist and "tokBuy" not in watchlist
+    print("✓ lambda_handler passou no teste")
+
+
+def test_watchlist_uses_injected_dynamodb(monkeypatch):
+    """A watchlist grava na tabela do recurso DynamoDB injetado, não no mock do módulo."""
+    print("Testando recurso DynamoDB da watchlist...")
+    tables = {}
+
+    class Resource:
+        def Table(self, name):
+            return tables.setdefault(name, analyzer_module.MockDynamoDBTable(name))
+
+    monkeypatch.setattr(analyzer_module, "WATCHLIST", None)
+    watchlist = analyzer_module.get_watchlist(Resource())
+    assert analyzer_module.get_watchlist() is watchlist
+    watchlist.watch({"token_address": "tokShared"}, 0.55)
+    assert list(tables) == [analyzer_module.WATCHLIST_TABLE]
+    assert "tokShared" in tables[analyzer_module.WATCHLIST_TABLE].items
+    print("✓ Watchlist persistida no recurso injetado")
+
+
+def test_scheduled_event_runs_watchlist(monkeypatch):
+    """O evento do EventBridge reanalisa os tokens vencidos da watchlist."""
+    print("Testando evento agendado da watchlist...")
+    clock = SimpleNamespace(now=1_000_000.0)
+    watchlist = WatchlistScheduler(min_interval_s=60, max_interval_s=60, clock=lambda: clock.now)
+    watchlist.watch({"token_address": "tokUp"}, 0.55)
+    watchlist.watch({"token_address": "tokFlat"}, 0.55)
+    handler = patched_handler(monkeypatch, watchlist)
+
+    assert json.loads(handler({"source": "aws.events"}, None)["body"])["analyzed"] == 0
+    clock.now += 61
+    body = json.loads(handler({"source": "aws.events", "detail-type": "Scheduled Event"}, None)["body"])
+
+    assert body["analyzed"] == 2 and body["promoted"] == 1 and body["watching"] == 1
+    assert FakeAnalyzer.instances[-1].sent == ["tokUp"]
+    assert "tokFlat" in watchlist and "tokUp" not in watchlist
+    print("✓ Watchlist reanalisada pelo agendamento")
+
+
+def test_smart_money_swaps_message(monkeypatch):
+    """Swaps publicados pelo Discoverer (webhook Helius) alimentam o índice pelo handler."""
+    print("Testando ingestão de swaps de smart money...")
+    handler = patched_handler(monkeypatch, WatchlistScheduler())
+    webhook = [
+        {"type": "SWAP", "feePayer": "WalletA", "timestamp": 1_000, "tokenTransfers": [
+            {"fromUserAccount": "WalletA", "toUserAccount": "Pool", "mint": WSOL_MINT, "tokenAmount": 1.5},
+            {"fromUserAccount": "Pool", "toUserAccount": "WalletA", "mint": "MintA", "tokenAmount": 2_000},
+        ]},
+        {"type": "SWAP", "feePayer": "Other", "timestamp": 1_000, "tokenTransfers": [
+            {"fromUserAccount": "Pool", "toUserAccount": "Other", "mint": "MintB", "tokenAmount": 10},
+        ]},
+        {"type": "TRANSFER", "feePayer": "WalletA", "tokenTransfers": []},
+    ]
+    messages = smart_money_messages(webhook)
+    assert [len(message["swaps"]) for message in messages] == [2]
+
+    records = [{"body": json.dumps(message)} for message in messages]
+    result = handler({"Records": records}, None)
+
+    assert result["statusCode"] == 200
+    assert FakeAnalyzer.instances[0].refreshed == 1
+    assert len(analyzer_module.SMART_MONEY_INDEX) == 1
+    assert analyzer_module.SMART_MONEY_INDEX.activity("MintA")[0]["wallet"] == "WalletA"
+    print("✓ Swaps indexados")
+
 
 def test_invalid_token():
     """Testa o processamento de tokens inválidos."""
@@ -160,7 +260,6 @@ if __name__ == "__main__":
     try:
         test_calculate_quality_score()
         test_process_token_analysis()
-        test_lambda_handler()
         test_invalid_token()
         
         print("\n✅ Todos os testes passaram!")
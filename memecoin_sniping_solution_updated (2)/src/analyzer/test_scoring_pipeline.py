@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""Testes para o pipeline de scoring plugável do Analyzer."""
+
+import asyncio
+import os
+import sys
+from collections import Counter
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from scoring_pipeline import DIMENSIONS, ScoringPipeline
+
+
+class CountingProvider:
+    """Provider falso que conta as chamadas a cada fonte de dados."""
+
+    def __init__(self, fail=()):
+        self.calls = Counter()
+        self.fail = set(fail)
+
+    def _hit(self, name, value):
+        self.calls[name] += 1
+        if name in self.fail:
+            raise RuntimeError(f"{name} indisponível")
+        return value
+
+    async def get_current_pumpswap_token_count(self):
+        return self._hit("pumpswap_token_count", 250)
+
+    async def get_daily_migration_count(self):
+        return self._hit("daily_migration_count", 8)
+
+    async def get_liquidity_growth_trend(self, token_address):
+        return self._hit("liquidity_growth_trend", 0.15)
+
+    async def get_volume_acceleration(self, token_address):
+        return self._hit("volume_acceleration", 0.3)
+
+    async def get_price_volatility(self, token_address):
+        return self._hit("price_volatility", 0.25)
+
+    async def get_social_metrics(self, symbol, name):
+        return self._hit("social_metrics", {"twitter_mentions": 25, "telegram_activity": 15, "discord_activity": 10})
+
+    async def get_post_migration_liquidity(self, token_address, destination):
+        return self._hit("post_migration_liquidity", [{"liquidity_usd": 50000 + i * 1000} for i in range(10)])
+
+    async def get_post_migration_volume(self, token_address, destination):
+        return self._hit("post_migration_volume", [{"volume_usd": 10000 + i * 500} for i in range(10)])
+
+    async def get_smart_money_wallets(self):
+        return self._hit("smart_money_wallets", ["w1", "w2", "w3"])
+
+    async def check_smart_money_activity(self, token_address, wallets):
+        return self._hit("smart_money_activity", [{"wallet": "w1", "type": "buy", "amount": 1000}])
+
+    async def get_market_conditions_at_time(self, timestamp):
+        return self._hit("market_conditions", {"sol_price_trend": 0.03, "memecoin_volume_trend": 0.15})
+
+    async def get_raydium_tvl(self):
+        return self._hit("raydium_tvl", 1.5e9)
+
+
+TOKEN = {
+    "token_address": "tokenXYZ",
+    "token_symbol": "XYZ",
+    "token_name": "Xyz",
+    "migration_destination": "PumpSwap",
+    "migration_timestamp": datetime.now(timezone.utc).isoformat(),
+    "total_volume_usd": 15000,
+    "trade_count": 25,
+    "pool_data": {"liquidity_usd": 8000, "volume_24h_usd": 12000, "price_usd": 0.001, "price_change_24h": 0.15},
+}
+
+
+def test_both_strategies_share_dependencies():
+    """Rodar as duas estratégias busca cada fonte de dados uma única vez."""
+    print("Testando dependências compartilhadas...")
+    provider = CountingProvider()
+    pipeline = ScoringPipeline(provider)
+
+    results = asyncio.run(pipeline.run(TOKEN, ["pumpswap", "migration"]))
+
+    assert set(results) == {"pumpswap", "migration"}
+    assert provider.calls["pumpswap_token_count"] == 1, provider.calls
+    assert all(count == 1 for count in provider.calls.values()), provider.calls
+    for score in results.values():
+        assert 0 < score.overall_score <= 1
+        assert not score.failed_dimensions
+    print(f"✓ Fontes buscadas uma vez: {dict(provider.calls)}")
+
+
+def test_weights_from_config():
+    """Pesos por estratégia vêm da configuração."""
+    print("Testando pesos vindos da config...")
+    config = {"analyzer": {"strategies": {"social_only": {"weights": {"community_interest": 1.0}}}}}
+    provider = CountingProvider()
+    pipeline = ScoringPipeline.from_config(provider, config)
+
+    result = asyncio.run(pipeline.run(TOKEN, ["social_only"]))["social_only"]
+
+    assert result.overall_score == result.dimension_scores["community_interest"]
+    assert set(provider.calls) == {"social_metrics"}
+    print("✓ Estratégia customizada executou apenas a dimensão configurada")
+
+
+def test_failed_dependency_marks_dimension():
+    """Falha numa fonte afeta apenas as dimensões que dependem dela."""
+    print("Testando falha de dependência...")
+    provider = CountingProvider(fail={"social_metrics"})
+    pipeline = ScoringPipeline(provider)
+
+    result = asyncio.run(pipeline.run(TOKEN, ["pumpswap"]))["pumpswap"]
+
+    assert result.failed_dimensions == ["community_interest"]
+    assert result.dimension_scores["community_interest"] == DIMENSIONS["community_interest"].error_score
+    assert "Erro na análise de comunidade" in result.risk_factors
+    assert result.dimension_scores["early_adoption"] > 0
+    print("✓ Falha isolada na dimensão dependente")
+
+
+class SlowProvider(CountingProvider):
+    """Provider com uma fonte que não responde dentro do orçamento."""
+
+    async def get_social_metrics(self, symbol, name):
+        await asyncio.sleep(5)
+        return await super().get_social_metrics(symbol, name)
+
+
+def test_deadline_cancels_slow_dimension_and_renormalizes():
+    """Fora do prazo, o fallback configurado entra com seu peso; sem fallback a dimensão sai da média."""
+    print("Testando orçamento de latência...")
+    full = asyncio.run(ScoringPipeline(CountingProvider()).run(TOKEN, ["pumpswap"]))["pumpswap"]
+
+    pipeline = ScoringPipeline(SlowProvider(), budget_ms=50, fallback_scores={"community_interest": 0.1})
+    started = datetime.now()
+    result = asyncio.run(pipeline.run(TOKEN, ["pumpswap"]))["pumpswap"]
+    elapsed = (datetime.now() - started).total_seconds()
+
+    assert elapsed < 1.0
+    assert result.timed_out_dimensions == ["community_interest"]
+    assert not result.failed_dimensions
+    assert result.dimension_scores["community_interest"] == 0.1
+
+    weights = pipeline.weights("pumpswap")
+    completed = {k: w for k, w in weights.items() if k != "community_interest"}
+    expected = sum(full.dimension_scores[k] * w for k, w in completed.items()) + 0.1 * weights["community_interest"]
+    assert abs(result.overall_score - expected) < 1e-9
+
+    # Sem fallback configurado, renormaliza sobre as dimensões concluídas
+    unconfigured = asyncio.run(ScoringPipeline(SlowProvider(), budget_ms=50).run(TOKEN, ["pumpswap"]))["pumpswap"]
+    expected = sum(full.dimension_scores[k] * w for k, w in completed.items()) / sum(completed.values())
+    assert abs(unconfigured.overall_score - expected) < 1e-9
+
+    histograms = pipeline.latency.summary()
+    assert histograms["source:social_metrics"]["timeouts"] == 1
+    assert histograms["dimension:community_interest"]["timeouts"] == 1
+    assert histograms["dimension:early_adoption"]["timeouts"] == 0
+    assert pipeline.latency.emf_records()[0]["_aws"]["CloudWatchMetrics"][0]["Metrics"][0]["Name"] == "LatencyMs"
+    print(f"✓ Decisão parcial em {elapsed * 1000:.0f} ms")
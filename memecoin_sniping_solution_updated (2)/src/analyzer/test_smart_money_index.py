@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""Testes para o índice invertido de smart money."""
+
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from smart_money_index import SmartMoneyIndex, SmartWalletSet
+from scoring_pipeline import ScoringPipeline
+
+
+def test_wallet_set_membership_and_version():
+    """Conjunto ordenado responde pertinência e versiona atualizações."""
+    print("Testando SmartWalletSet...")
+    wallets = [f"Wallet{i:038d}" for i in range(20_000)]
+    wallet_set = SmartWalletSet(wallets)
+
+    assert len(wallet_set) == 20_000
+    assert wallets[123] in wallet_set
+    assert "desconhecida" not in wallet_set
+    mask = wallet_set.contains_many([wallets[0], "x", wallets[-1]])
+    assert mask.tolist() == [True, False, True]
+    assert wallet_set.nbytes == 20_000 * 44
+
+    updated = wallet_set.replace(wallets[:10])
+    assert updated.version == wallet_set.version + 1
+    assert wallets[500] not in updated
+    print("✓ SmartWalletSet OK")
+
+
+def test_index_tracks_last_buy_and_sell():
+    """O índice guarda a última ação de cada carteira monitorada por mint."""
+    print("Testando ingestão incremental de swaps...")
+    index = SmartMoneyIndex(SmartWalletSet(["w1", "w2"]))
+    applied = index.ingest([
+        {"mint": "mintA", "wallet": "w1", "side": "buy", "amount": 100, "timestamp": 1},
+        {"mint": "mintA", "wallet": "w2", "side": "buy", "amount": 50, "timestamp": 2},
+        {"mint": "mintA", "wallet": "w2", "side": "sell", "amount": 70, "timestamp": 3},
+        {"mint": "mintA", "wallet": "outsider", "side": "buy", "amount": 999, "timestamp": 4},
+    ])
+
+    assert applied == 3
+    activity = {a["wallet"]: a for a in index.activity("mintA")}
+    assert activity["w1"] == {"wallet": "w1", "type": "buy", "amount": 100.0}
+    assert activity["w2"]["type"] == "sell" and activity["w2"]["amount"] == 70.0
+    assert index.activity("mintB") == []
+
+    index.set_wallets(["w1"])
+    assert [a["wallet"] for a in index.activity("mintA")] == ["w1"]
+    print("✓ Índice incremental OK")
+
+
+def test_index_expiry():
+    """Mints sem atividade recente expiram."""
+    print("Testando expiração do índice...")
+    now = time.time()
+    index = SmartMoneyIndex(SmartWalletSet(["w1"]), ttl_s=60, clock=lambda: now)
+    index.ingest([
+        {"mint": "old", "wallet": "w1", "side": "buy", "amount": 1, "timestamp": now - 120},
+        {"mint": "new", "wallet": "w1", "side": "buy", "amount": 1, "timestamp": now},
+    ])
+    assert index.expire() == 1
+    assert index.activity("old") == [] and index.activity("new")
+    print("✓ Expiração OK")
+
+
+def test_pipeline_uses_index_instead_of_wallet_queries():
+    """Com índice no provider, a dimensão de smart money não consulta carteiras."""
+    print("Testando integração com o pipeline...")
+
+    class Provider:
+        def __init__(self):
+            self.smart_money_index = SmartMoneyIndex(SmartWalletSet(["w1", "w2", "w3", "w4"]))
+            self.smart_money_index.ingest([
+                {"mint": "tok", "wallet": w, "side": "buy", "amount": 10, "timestamp": 1}
+                for w in ("w1", "w2", "w3")
+            ])
+
+        async def get_smart_money_wallets(self):
+            raise AssertionError("não deveria consultar a lista de carteiras")
+
+        async def check_smart_money_activity(self, token_address, wallets):
+            raise AssertionError("não deveria consultar carteira a carteira")
+
+    pipeline = ScoringPipeline(Provider(), {"sm": {"weights": {"smart_money_following": 1.0}}})
+    result = asyncio.run(pipeline.run({"token_address": "tok"}, ["sm"]))["sm"]
+
+    assert result.overall_score == 0.75
+    assert not result.failed_dimensions
+    print("✓ Pipeline usa o índice")
+
+
+def test_index_miss_falls_back_to_wallet_queries():
+    """Mint ausente do índice (swaps vistos por outro container) usa a consulta por carteira."""
+    print("Testando fallback do índice para consulta por carteira...")
+
+    class Provider:
+        def __init__(self):
+            self.smart_money_index = SmartMoneyIndex(SmartWalletSet(["w1", "w2", "w3", "w4"]))
+            self.queries = 0
+
+        async def get_smart_money_wallets(self):
+            return ["w1", "w2", "w3", "w4"]
+
+        async def check_smart_money_activity(self, token_address, wallets):
+            self.queries += 1
+            return [{"wallet": w, "type": "buy", "amount": 10} for w in ("w1", "w2", "w3")]
+
+    provider = Provider()
+    pipeline = ScoringPipeline(provider, {"sm": {"weights": {"smart_money_following": 1.0}}})
+    result = asyncio.run(pipeline.run({"token_address": "unseen"}, ["sm"]))["sm"]
+
+    assert provider.queries == 1
+    assert result.overall_score == 0.75
+    print("✓ Fallback por carteira OK")
+
+
+def test_wallet_list_goes_stale_after_ttl():
+    """A lista de carteiras vence após ``wallets_ttl_s`` e volta a valer com ``set_wallets``."""
+    print("Testando validade da lista de carteiras...")
+    clock = {"now": 1_000.0}
+    index = SmartMoneyIndex(wallets_ttl_s=60, clock=lambda: clock["now"])
+    assert index.wallets_stale
+
+    index.set_wallets(["w1"])
+    assert not index.wallets_stale
+    clock["now"] += 60
+    assert index.wallets_stale
+    index.set_wallets(["w1", "w2"])
+    assert not index.wallets_stale and index.wallets.version == 2
+    print("✓ Lista de carteiras com TTL")
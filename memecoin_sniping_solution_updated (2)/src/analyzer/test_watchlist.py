@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""Testes para a watchlist de reanálise do Analyzer."""
+
+import asyncio
+import os
+import sys
+from decimal import Decimal
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from watchlist import WatchlistScheduler, WatchlistStore
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeAnalyzer:
+    """Analyzer falso que devolve scores pré-definidos por token."""
+
+    def __init__(self, scores):
+        self.scores = scores
+        self.analyzed = []
+        self.sent = []
+
+    async def perform_pumpswap_analysis(self, token_data):
+        self.analyzed.append(token_data["token_address"])
+        return SimpleNamespace(
+            token_address=token_data["token_address"],
+            overall_pumpswap_score=self.scores[token_data["token_address"]],
+        )
+
+    def save_analysis(self, analysis):
+        pass
+
+    def send_to_trader(self, analysis):
+        self.sent.append(analysis.token_address)
+
+
+class FakeTable:
+    """Tabela DynamoDB em memória; ``query`` devolve o índice ordenado por next_due."""
+
+    def __init__(self):
+        self.items = {}
+
+    def put_item(self, Item):
+        assert not any(isinstance(value, float) for value in Item.values()), Item
+        self.items[Item["token_address"]] = dict(Item)
+
+    def get_item(self, Key):
+        item = self.items.get(Key["token_address"])
+        return {"Item": dict(item)} if item else {}
+
+    def delete_item(self, Key):
+        self.items.pop(Key["token_address"], None)
+
+    def query(self, IndexName, KeyConditionExpression, **kwargs):
+        assert IndexName == "DueIndex"
+        return {"Items": sorted((dict(item) for item in self.items.values()), key=lambda item: item["next_due"])}
+
+
+def test_only_due_tokens_are_reanalyzed():
+    """Tokens só são reanalisados depois do intervalo mínimo."""
+    print("Testando reanálise apenas de tokens vencidos...")
+    clock = FakeClock()
+    watchlist = WatchlistScheduler(min_interval_s=60, max_interval_s=600, clock=clock)
+
+    watchlist.watch({"token_address": "tokA"}, 0.55)
+    assert watchlist.pop_due() == []
+
+    clock.now += 600
+    due = watchlist.pop_due()
+    assert [t["token_address"] for t in due] == ["tokA"]
+    print("✓ Apenas tokens vencidos retornados")
+
+
+def test_promotion_and_drop():
+    """Tokens que cruzam o threshold são promovidos; os que caem saem da fila."""
+    print("Testando promoção ao Trader...")
+    clock = FakeClock()
+    watchlist = WatchlistScheduler(promote_threshold=0.65, drop_threshold=0.35,
+                                   min_interval_s=60, max_interval_s=60, clock=clock)
+    for token in ("up", "down", "flat"):
+        watchlist.watch({"token_address": token, "extra": "x" * 100}, 0.55)
+
+    clock.now += 60
+    analyzer = FakeAnalyzer({"up": 0.70, "down": 0.20, "flat": 0.56})
+    stats = asyncio.run(watchlist.run_due(analyzer))
+
+    assert stats == {"analyzed": 3, "promoted": 1, "dropped": 1, "watching": 1, "failed": 0}
+    assert analyzer.sent == ["up"]
+    assert "flat" in watchlist and "up" not in watchlist and "down" not in watchlist
+    print("✓ Promoção e descarte OK")
+
+
+def test_failed_analysis_is_rescheduled():
+    """Um erro na reanálise de um token não o tira da fila nem interrompe os demais."""
+    print("Testando reagendamento após erro...")
+    clock = FakeClock()
+    watchlist = WatchlistScheduler(min_interval_s=60, max_interval_s=600, clock=clock)
+    watchlist.watch({"token_address": "broken"}, 0.55)
+    watchlist.watch({"token_address": "up"}, 0.55)
+
+    clock.now += 600
+    analyzer = FakeAnalyzer({"up": 0.70})  # "broken" levanta KeyError
+    stats = asyncio.run(watchlist.run_due(analyzer))
+
+    assert stats["failed"] == 1 and stats["promoted"] == 1
+    assert "broken" in watchlist and watchlist.pop_due() == []
+    clock.now += 60
+    assert [t["token_address"] for t in watchlist.pop_due()] == ["broken"]
+    print("✓ Token com erro reagendado")
+
+
+def test_rising_tokens_are_revisited_sooner():
+    """Tokens com score subindo ganham intervalo menor."""
+    print("Testando intervalo adaptativo...")
+    clock = FakeClock()
+    watchlist = WatchlistScheduler(min_interval_s=60, max_interval_s=3600, clock=clock)
+    watchlist.watch({"token_address": "rising"}, 0.50)
+    watchlist.watch({"token_address": "flat"}, 0.50)
+
+    clock.now += 3600
+    watchlist.pop_due()
+    watchlist.record_analysis({"token_address": "rising"}, 0.60)
+    watchlist.record_analysis({"token_address": "flat"}, 0.50)
+
+    clock.now += 1800
+    due = [t["token_address"] for t in watchlist.pop_due()]
+    assert due == ["rising"], f"Esperado apenas 'rising', recebido: {due}"
+    print("✓ Token em alta reanalisado antes")
+
+
+def test_bounded_memory_and_expiry():
+    """Capacidade máxima despeja o pior score e tokens antigos expiram."""
+    print("Testando limite de memória e expiração...")
+    clock = FakeClock()
+    watchlist = WatchlistScheduler(max_tokens=1000, ttl_s=3600, clock=clock)
+    for i in range(5000):
+        watchlist.watch({"token_address": f"tok{i}"}, 0.5 + (i % 100) / 1000)
+
+    assert len(watchlist) == 1000
+    assert len(watchlist._due_heap) <= 2 * 1000 + 64 + 1
+    assert not watchlist.watch({"token_address": "worst"}, 0.0)
+
+    clock.now += 7200
+    assert watchlist.expire_stale() == 1000
+    assert len(watchlist) == 0
+    print("✓ Limite de memória e expiração OK")
+
+
+def test_store_survives_new_containers():
+    """Entradas gravadas no DynamoDB são reanalisadas por um container novo."""
+    print("Testando persistência da watchlist entre containers...")
+    clock = FakeClock()
+    table = FakeTable()
+    first = WatchlistScheduler(min_interval_s=60, max_interval_s=600, clock=clock, store=WatchlistStore(table))
+    first.watch({"token_address": "up", "pool_data": {"liquidity": 1.5}}, 0.55)
+    first.watch({"token_address": "flat"}, 0.55)
+    assert set(table.items) == {"up", "flat"}
+    assert isinstance(table.items["up"]["next_due"], Decimal) and table.items["up"]["expires_at"] == 1_000_000 + 86400
+
+    # Container novo: memória vazia, só o que está na tabela
+    clock.now += 600
+    second = WatchlistScheduler(min_interval_s=60, max_interval_s=600, clock=clock, store=WatchlistStore(table))
+    analyzer = FakeAnalyzer({"up": 0.70, "flat": 0.56})
+    stats = asyncio.run(second.run_due(analyzer))
+
+    assert stats["analyzed"] == 2 and analyzer.sent == ["up"]
+    assert set(table.items) == {"flat"}
+    assert int(table.items["flat"]["analysis_count"]) == 2 and table.items["flat"]["next_due"] > clock.now
+
+    # O primeiro container ainda tem "up" em memória, mas não o promove de novo
+    analyzer = FakeAnalyzer({"up": 0.70, "flat": 0.56})
+    assert asyncio.run(first.run_due(analyzer))["analyzed"] == 0 and "up" not in first
+    print("✓ Watchlist persistida entre containers")
+
+
+def test_watch_resumes_stored_history():
+    """Um token já gravado continua o histórico de score em vez de recomeçar."""
+    print("Testando retomada do histórico salvo...")
+    clock = FakeClock()
+    table = FakeTable()
+    WatchlistScheduler(clock=clock, store=WatchlistStore(table)).watch({"token_address": "tokA"}, 0.50)
+
+    clock.now += 100
+    other = WatchlistScheduler(clock=clock, store=WatchlistStore(table))
+    other.watch({"token_address": "tokA"}, 0.60)
+
+    assert int(table.items["tokA"]["analysis_count"]) == 2
+    assert float(table.items["tokA"]["score_rate"]) > 0
+    other.remove("tokA")
+    assert table.items == {}
+    print("✓ Histórico retomado")
+
+
+def test_cache_limit_never_deletes_shared_rows():
+    """Com store, o limite de memória só despeja do cache; o store continua completo."""
+    print("Testando limite do cache com store...")
+    clock = FakeClock()
+    table = FakeTable()
+    cache = WatchlistScheduler(max_tokens=2, min_interval_s=60, max_interval_s=600, clock=clock,
+                               store=WatchlistStore(table))
+    cache.watch({"token_address": "low"}, 0.50)
+    cache.watch({"token_address": "mid"}, 0.55)
+    cache.watch({"token_address": "high"}, 0.60)
+    assert cache.watch({"token_address": "worst"}, 0.40)
+
+    assert len(cache) == 2 and "low" not in cache and "worst" not in cache
+    assert set(table.items) == {"low", "mid", "high", "worst"}
+
+    # Os vencidos carregados respeitam max_tokens
+    clock.now += 600
+    assert cache.load_due() == 0 and len(cache) == 2
+    fresh = WatchlistScheduler(max_tokens=2, clock=clock, store=WatchlistStore(table))
+    assert fresh.load_due() == 2 and len(fresh) == 2
+    print("✓ Cache limitado sem apagar linhas compartilhadas")
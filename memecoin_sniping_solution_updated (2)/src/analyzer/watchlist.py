@@ -0,0 +1,423 @@
+"""
+Agendador de reanálise para tokens em observação (watchlist).
+
+Tokens classificados como ``CONSIDER`` não são descartados: ficam numa fila
+de prioridade ordenada pelo próximo instante de reanálise e pela variação de
+score esperada.  A cada ciclo apenas os tokens vencidos são reanalisados via
+``perform_pumpswap_analysis``; quem cruza o threshold de promoção é enviado
+ao Trader e sai da fila, quem fica velho demais expira.
+
+A memória é limitada por ``max_tokens``: quando a fila está cheia, o token com
+menor score é despejado para abrir espaço (ou o novo é recusado, se for pior).
+
+Com um ``WatchlistStore`` as entradas também são gravadas no DynamoDB (uma
+linha por token, com ``next_due`` e TTL em ``expires_at``).  A fila em memória
+passa a ser um cache do container: cada ciclo agendado carrega do índice
+``DueIndex`` os tokens vencidos, então nada se perde entre containers.  O
+limite de memória vale só para o cache: o despejo não apaga a linha da tabela
+(o token volta ao vencer) e, com o cache cheio, um token pior é gravado sem
+entrar na memória.
+"""
+
+import heapq
+import itertools
+import json
+import logging
+import time
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+from boto3.dynamodb.conditions import Key
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Campos de token_data necessários para reanalisar um token.  O restante da
+# mensagem do Discoverer é descartado para manter cada entrada pequena.
+WATCHED_FIELDS = (
+    "token_address",
+    "token_symbol",
+    "token_name",
+    "token_type",
+    "migration_timestamp",
+    "migration_destination",
+    "total_volume_usd",
+    "trade_count",
+    "pool_data",
+)
+
+
+class _WatchEntry:
+    """Estado de um token observado."""
+
+    __slots__ = (
+        "token_data", "score", "score_rate", "added_at", "last_analyzed_at",
+        "next_due", "expires_at", "version", "analysis_count",
+    )
+
+    def __init__(self, token_data: Dict, score: float, now: float, ttl: float):
+        self.token_data = token_data
+        self.score = score
+        self.score_rate = 0.0  # variação de score por segundo (EWMA)
+        self.added_at = now
+        self.last_analyzed_at = now
+        self.next_due = now
+        self.expires_at = now + ttl
+        self.version = 0
+        self.analysis_count = 1
+
+    @classmethod
+    def from_item(cls, item: Dict[str, Any]) -> "_WatchEntry":
+        """Reconstrói uma entrada a partir do item gravado pelo ``WatchlistStore``."""
+        entry = cls(json.loads(item["token_data"]), float(item["score"]), float(item["added_at"]), 0)
+        entry.score_rate = float(item.get("score_rate", 0))
+        entry.last_analyzed_at = float(item["last_analyzed_at"])
+        entry.next_due = float(item["next_due"])
+        entry.expires_at = float(item["expires_at"])
+        entry.analysis_count = int(item.get("analysis_count", 1))
+        return entry
+
+
+class WatchlistStore:
+    """Persistência da watchlist numa tabela DynamoDB com chave ``token_address``.
+
+    Todos os itens compartilham a partição ``list_id`` do índice ``DueIndex``
+    (ordenado por ``next_due``), o que permite buscar os vencidos com uma
+    única query.  ``expires_at`` é o atributo de TTL da tabela.
+    """
+
+    LIST_ID = "watchlist"
+
+    def __init__(self, table, index_name: str = "DueIndex"):
+        self.table = table
+        self.index_name = index_name
+
+    def put(self, token_address: str, entry: _WatchEntry) -> None:
+        self.table.put_item(Item={
+            "token_address": token_address,
+            "list_id": self.LIST_ID,
+            "token_data": json.dumps(entry.token_data, default=str),
+            "score": Decimal(str(round(entry.score, 6))),
+            "score_rate": Decimal(str(round(entry.score_rate, 9))),
+            "added_at": Decimal(str(round(entry.added_at, 3))),
+            "last_analyzed_at": Decimal(str(round(entry.last_analyzed_at, 3))),
+            "next_due": Decimal(str(round(entry.next_due, 3))),
+            "expires_at": int(entry.expires_at),
+            "analysis_count": entry.analysis_count,
+        })
+
+    def get(self, token_address: str) -> Optional[_WatchEntry]:
+        item = self.table.get_item(Key={"token_address": token_address}).get("Item")
+        return _WatchEntry.from_item(item) if item else None
+
+    def delete(self, token_address: str) -> None:
+        self.table.delete_item(Key={"token_address": token_address})
+
+    def load_due(self, now: float, limit: Optional[int] = None) -> List[Tuple[str, _WatchEntry]]:
+        """Entradas com ``next_due <= now``, em ordem de vencimento."""
+        kwargs = {
+            "IndexName": self.index_name,
+            "KeyConditionExpression": Key("list_id").eq(self.LIST_ID) & Key("next_due").lte(Decimal(str(now))),
+        }
+        due: List[Tuple[str, _WatchEntry]] = []
+        while limit is None or len(due) < limit:
+            response = self.table.query(**kwargs)
+            for item in response.get("Items", []):
+                if float(item["next_due"]) <= now:
+                    due.append((item["token_address"], _WatchEntry.from_item(item)))
+            if "LastEvaluatedKey" not in response:
+                break
+            kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+        return due[:limit] if limit is not None else due
+
+
+class WatchlistScheduler:
+    """Fila de prioridade de tokens aguardando reanálise."""
+
+    def __init__(
+        self,
+        promote_threshold: float = 0.65,
+        drop_threshold: float = 0.35,
+        min_interval_s: float = 300,
+        max_interval_s: float = 3600,
+        ttl_s: float = 24 * 3600,
+        max_tokens: int = 50_000,
+        rate_smoothing: float = 0.5,
+        clock=time.time,
+        store: Optional[WatchlistStore] = None,
+    ):
+        self.promote_threshold = promote_threshold
+        self.drop_threshold = drop_threshold
+        self.min_interval_s = min_interval_s
+        self.max_interval_s = max_interval_s
+        self.ttl_s = ttl_s
+        self.max_tokens = max_tokens
+        self.rate_smoothing = rate_smoothing
+        self.clock = clock
+        self.store = store
+
+        self._entries: Dict[str, _WatchEntry] = {}
+        # (next_due, -variação esperada, seq, token, versão)
+        self._due_heap: List[Tuple[float, float, int, str, int]] = []
+        # (score, seq, token, versão) - usado para despejo quando cheio
+        self._score_heap: List[Tuple[float, int, str, int]] = []
+        self._seq = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, token_address: str) -> bool:
+        return token_address in self._entries
+
+    @classmethod
+    def from_config(cls, config: Dict, store: Optional[WatchlistStore] = None) -> "WatchlistScheduler":
+        """Cria o agendador a partir da seção ``analyzer.watchlist`` da config."""
+        params = config.get("analyzer", {}).get("watchlist", {})
+        return cls(
+            promote_threshold=params.get("promote_threshold", 0.65),
+            drop_threshold=params.get("drop_threshold", 0.35),
+            min_interval_s=params.get("min_interval_s", 300),
+            max_interval_s=params.get("max_interval_s", 3600),
+            ttl_s=params.get("ttl_s", 24 * 3600),
+            max_tokens=params.get("max_tokens", 50_000),
+            store=store,
+        )
+
+    def _expected_change(self, entry: _WatchEntry, interval: float) -> float:
+        return abs(entry.score_rate) * interval
+
+    def _next_interval(self, entry: _WatchEntry) -> float:
+        """Calcula o intervalo até a próxima reanálise.
+
+        Tokens subindo em direção ao threshold são revisitados mais cedo:
+        o intervalo é metade do tempo estimado para cruzar o threshold.
+        """
+        gap = self.promote_threshold - entry.score
+        if entry.score_rate > 0 and gap > 0:
+            interval = (gap / entry.score_rate) / 2
+        else:
+            interval = self.max_interval_s
+        return min(max(interval, self.min_interval_s), self.max_interval_s)
+
+    def _push(self, token_address: str, entry: _WatchEntry, persist: bool = True) -> None:
+        if persist and self.store is not None:
+            self.store.put(token_address, entry)
+        # Versão única no agendador: entradas recriadas (remoção seguida de
+        # watch, ou carregadas do store) nunca coincidem com itens obsoletos
+        seq = next(self._seq)
+        entry.version = seq
+        interval = entry.next_due - entry.last_analyzed_at
+        priority = -self._expected_change(entry, interval)
+        heapq.heappush(self._due_heap, (entry.next_due, priority, seq, token_address, entry.version))
+        heapq.heappush(self._score_heap, (entry.score, seq, token_address, entry.version))
+        self._maybe_compact()
+
+    def _maybe_compact(self) -> None:
+        """Reconstrói os heaps quando as entradas obsoletas dominam."""
+        live = len(self._entries)
+        if len(self._due_heap) > 2 * live + 64:
+            self._due_heap = [
+                item for item in self._due_heap
+                if item[3] in self._entries and self._entries[item[3]].version == item[4]
+            ]
+            heapq.heapify(self._due_heap)
+        if len(self._score_heap) > 2 * live + 64:
+            self._score_heap = [
+                item for item in self._score_heap
+                if item[2] in self._entries and self._entries[item[2]].version == item[3]
+            ]
+            heapq.heapify(self._score_heap)
+
+    def _lowest_scored(self) -> Optional[Tuple[float, str]]:
+        while self._score_heap:
+            score, _, token_address, version = self._score_heap[0]
+            entry = self._entries.get(token_address)
+            if entry is not None and entry.version == version:
+                return score, token_address
+            heapq.heappop(self._score_heap)
+        return None
+
+    def watch(self, token_data: Dict, score: float) -> bool:
+        """Adiciona (ou atualiza) um token na watchlist.
+
+        Retorna False se o token foi recusado por falta de espaço.
+        """
+        token_address = token_data["token_address"]
+        now = self.clock()
+
+        entry = self._entries.get(token_address)
+        if entry is None and self.store is not None:
+            # Token observado por outro container: continua o histórico de score
+            entry = self.store.get(token_address)
+            if entry is not None:
+                self._entries[token_address] = entry
+        if entry is not None:
+            self._record_score(entry, score, now)
+            self._push(token_address, entry)
+            return True
+
+        compact_data = {key: token_data[key] for key in WATCHED_FIELDS if key in token_data}
+        entry = _WatchEntry(compact_data, score, now, self.ttl_s)
+        entry.next_due = now + self._next_interval(entry)
+        if not self._make_room(score):
+            if self.store is None:
+                logger.info(f"Watchlist cheia; token {token_address} recusado (score {score:.2f})")
+                return False
+            # Fica só na tabela; é carregado quando vencer
+            self.store.put(token_address, entry)
+            return True
+        self._entries[token_address] = entry
+        self._push(token_address, entry)
+        return True
+
+    def _make_room(self, score: float) -> bool:
+        """Garante espaço no cache para um token com ``score``, despejando o pior se ele for menor."""
+        if len(self._entries) < self.max_tokens:
+            return True
+        lowest = self._lowest_scored()
+        if lowest is None or lowest[0] >= score:
+            return False
+        self._evict(lowest[1])
+        logger.info(f"Watchlist cheia; token {lowest[1]} despejado do cache (score {lowest[0]:.2f})")
+        return True
+
+    def _evict(self, token_address: str) -> None:
+        # Só a memória deste container: a linha compartilhada no store continua valendo
+        self._entries.pop(token_address, None)
+
+    def remove(self, token_address: str) -> None:
+        """Remove um token; as entradas nos heaps são descartadas de forma preguiçosa."""
+        self._entries.pop(token_address, None)
+        if self.store is not None:
+            self.store.delete(token_address)
+
+    def load_due(self, limit: Optional[int] = None) -> int:
+        """Sincroniza os tokens vencidos com o store antes de um ciclo.
+
+        Carrega os vencidos que este container não conhece e substitui entradas
+        locais mais antigas que a gravada (reanalisadas por outro container).
+        Vencidos locais ausentes da query foram promovidos, descartados ou
+        reagendados em outro container e são relidos do store.  No máximo
+        ``max_tokens`` vencidos são lidos; com o cache cheio, eles entram no
+        lugar dos tokens em cache que vencem por último (que continuam no
+        store).  Retorna o número de entradas carregadas.
+        """
+        if self.store is None:
+            return 0
+        now = self.clock()
+        limit = self.max_tokens if limit is None else min(limit, self.max_tokens)
+        stored_due = dict(self.store.load_due(now, limit))
+        for token_address, entry in list(self._entries.items()):
+            if entry.next_due <= now and token_address not in stored_due:
+                self._entries.pop(token_address)
+                stored = self.store.get(token_address)
+                if stored is not None:
+                    self._entries[token_address] = stored
+                    self._push(token_address, stored, persist=False)
+        loaded = 0
+        victims: Optional[List[str]] = None
+        for token_address, stored in stored_due.items():
+            local = self._entries.get(token_address)
+            if local is not None and local.last_analyzed_at >= stored.last_analyzed_at:
+                continue
+            if local is None and len(self._entries) >= self.max_tokens:
+                if victims is None:
+                    waiting = [(entry.next_due, token) for token, entry in self._entries.items()
+                               if entry.next_due > now and token not in stored_due]
+                    victims = [token for _, token in sorted(waiting)]
+                if not victims:
+                    break
+                self._evict(victims.pop())
+            self._entries[token_address] = stored
+            self._push(token_address, stored, persist=False)
+            loaded += 1
+        return loaded
+
+    def _record_score(self, entry: _WatchEntry, score: float, now: float) -> None:
+        elapsed = now - entry.last_analyzed_at
+        if elapsed > 0:
+            rate = (score - entry.score) / elapsed
+            alpha = self.rate_smoothing
+            entry.score_rate = alpha * rate + (1 - alpha) * entry.score_rate
+        entry.score = score
+        entry.last_analyzed_at = now
+        entry.analysis_count += 1
+        entry.next_due = now + self._next_interval(entry)
+
+    def pop_due(self, limit: Optional[int] = None) -> List[Dict]:
+        """Retira da fila os tokens vencidos, expirando os antigos pelo caminho."""
+        now = self.clock()
+        due: List[Dict] = []
+        while self._due_heap and (limit is None or len(due) < limit):
+            next_due, _, _, token_address, version = self._due_heap[0]
+            entry = self._entries.get(token_address)
+            if entry is None or entry.version != version:
+                heapq.heappop(self._due_heap)
+                continue
+            if next_due > now:
+                break
+            heapq.heappop(self._due_heap)
+            if now >= entry.expires_at:
+                logger.info(f"Token {token_address} expirou na watchlist após {entry.analysis_count} análises")
+                self.remove(token_address)
+                continue
+            due.append(entry.token_data)
+        return due
+
+    def expire_stale(self) -> int:
+        """Remove todos os tokens expirados (varredura completa)."""
+        now = self.clock()
+        stale = [token for token, entry in self._entries.items() if now >= entry.expires_at]
+        for token_address in stale:
+            self.remove(token_address)
+        self._maybe_compact()
+        return len(stale)
+
+    def retry_later(self, token_address: str) -> None:
+        """Reagenda um token cuja reanálise falhou para daqui a ``min_interval_s``."""
+        entry = self._entries.get(token_address)
+        if entry is None:
+            return
+        entry.next_due = self.clock() + self.min_interval_s
+        self._push(token_address, entry)
+
+    def record_analysis(self, token_data: Dict, score: float) -> str:
+        """Registra o resultado de uma reanálise e decide o destino do token.
+
+        Retorna ``"promote"``, ``"drop"`` ou ``"watch"``.
+        """
+        token_address = token_data["token_address"]
+        if score >= self.promote_threshold:
+            self.remove(token_address)
+            return "promote"
+        if score < self.drop_threshold:
+            self.remove(token_address)
+            return "drop"
+        self.watch(token_data, score)
+        return "watch"
+
+    async def run_due(self, analyzer, limit: Optional[int] = None) -> Dict[str, int]:
+        """Reanalisa os tokens vencidos e promove ao Trader os que cruzarem o threshold."""
+        stats = {"analyzed": 0, "promoted": 0, "dropped": 0, "watching": 0, "failed": 0}
+        self.load_due(limit)
+        for token_data in self.pop_due(limit):
+            try:
+                analysis = await analyzer.perform_pumpswap_analysis(token_data)
+            except Exception as e:
+                # pop_due já tirou o token da fila: reagendar para não perdê-lo
+                logger.error(f"Erro ao reanalisar {token_data['token_address']} da watchlist: {str(e)}")
+                self.retry_later(token_data["token_address"])
+                stats["failed"] += 1
+                continue
+            stats["analyzed"] += 1
+            outcome = self.record_analysis(token_data, analysis.overall_pumpswap_score)
+            if outcome == "promote":
+                analyzer.save_analysis(analysis)
+                analyzer.send_to_trader(analysis)
+                stats["promoted"] += 1
+                logger.info(f"Token {analysis.token_address} promovido da watchlist - Score: {analysis.overall_pumpswap_score:.2f}")
+            elif outcome == "drop":
+                stats["dropped"] += 1
+            else:
+                stats["watching"] += 1
+        return stats
@@ -0,0 +1,253 @@
+"""Slippage-aware order planning on constant-product AMM pools.
+
+PumpSwap and Raydium AMM v4 pools are constant-product markets
+(``x * y = k``) with a fee taken from the input.  For an input of ``a``
+against reserves ``(R_in, R_out)`` and fee ``f``::
+
+    a' = a * (1 - f)
+    out = R_out * a' / (R_in + a')
+    average price = a' / out = (R_in + a') / R_out
+
+so the price impact of an order relative to the spot price
+``p0 = R_in / R_out`` is ``a' / R_in`` and the largest input that keeps the
+average price within ``max_slippage`` of ``p0`` has a closed form.
+
+A single full-size order on a thin pool can move the price far beyond
+``max_slippage``.  Splitting only helps if the pool recovers between child
+orders (arbitrageurs or other traders push the price back), so the planner
+models recovery explicitly: after each child the price deviation from
+``p0`` decays by ``recovery`` per ``interval_seconds`` (``k`` is kept
+constant).  Every child is sized so that its average price stays within
+``max_slippage * (1 - headroom)`` of the original spot price, and carries a
+``min_amount_out`` that enforces ``max_slippage`` on chain; the headroom
+absorbs price moves between planning and execution.  Whatever does not
+fit in ``window_seconds`` is reported as unfilled.
+
+The planner is pure Python (closed-form sizing, no iteration per unit) and
+plans thousands of orders per second.
+
+Usage:
+
+    from common.execution_planner import ExecutionPlanner, PoolReserves
+
+    pool = PoolReserves(reserve_in=250.0, reserve_out=1_000_000.0)   # SOL -> token
+    plan = ExecutionPlanner(max_slippage=0.02).plan(amount_in=12.0, pool=pool)
+    for child in plan.children:
+        ...  # send child.amount_in with child.min_amount_out at child.delay_seconds
+"""
+
+from __future__ import annotations
+
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, Optional
+
+
+@dataclass(frozen=True)
+class PoolReserves:
+    """Reserves of a constant-product pool, oriented for one trade direction.
+
+    ``reserve_in`` is the side the order pays with and ``reserve_out`` the
+    side it receives, in the same units as the order amounts.
+    """
+
+    reserve_in: float
+    reserve_out: float
+    fee_bps: float = 25.0
+
+    @property
+    def fee(self) -> float:
+        return self.fee_bps / 10_000
+
+    @property
+    def spot_price(self) -> float:
+        """Units of input per unit of output, before fees and impact."""
+        return self.reserve_in / self.reserve_out
+
+    def reversed(self) -> "PoolReserves":
+        """The same pool seen from the opposite direction (e.g. sell instead of buy)."""
+        return PoolReserves(self.reserve_out, self.reserve_in, self.fee_bps)
+
+    @classmethod
+    def from_liquidity(cls, liquidity: float, price: float, fee_bps: float = 25.0) -> "PoolReserves":
+        """Approximate a balanced pool from its total liquidity and token price.
+
+        Both amounts are in the quote unit (e.g. USD): half of the liquidity sits
+        on each side, so the pool pays quote for tokens worth ``price`` each.
+        """
+        quote = liquidity / 2
+        return cls(reserve_in=quote, reserve_out=quote / price, fee_bps=fee_bps)
+
+
+def amount_out(amount_in: float, pool: PoolReserves) -> float:
+    """Output of a single swap of ``amount_in`` against ``pool``."""
+    effective = amount_in * (1 - pool.fee)
+    return pool.reserve_out * effective / (pool.reserve_in + effective)
+
+
+def price_impact(amount_in: float, pool: PoolReserves) -> float:
+    """Average execution price over spot price, minus one (fees excluded)."""
+    return amount_in * (1 - pool.fee) / pool.reserve_in
+
+
+def max_input_for_slippage(pool: PoolReserves, max_slippage: float,
+                           reference_price: Optional[float] = None) -> float:
+    """Largest input whose average price stays within ``max_slippage`` of ``reference_price``.
+
+    ``reference_price`` defaults to the pool's spot price.  Returns ``0.0``
+    when the pool price is already beyond the limit.
+    """
+    reference = pool.spot_price if reference_price is None else reference_price
+    effective = pool.reserve_out * reference * (1 + max_slippage) - pool.reserve_in
+    return max(0.0, effective / (1 - pool.fee))
+
+
+@dataclass(frozen=True)
+class ChildOrder:
+    """One slice of a planned order."""
+
+    delay_seconds: float
+    amount_in: float
+    expected_out: float
+    min_amount_out: float
+    price_impact: float
+
+
+@dataclass
+class ExecutionPlan:
+    """Child orders for one parent order and the expected result."""
+
+    amount_in: float
+    spot_price: float
+    fee: float = 0.0
+    children: List[ChildOrder] = field(default_factory=list)
+    unfilled: float = 0.0
+
+    @property
+    def filled(self) -> float:
+        return self.amount_in - self.unfilled
+
+    @property
+    def expected_out(self) -> float:
+        return sum(child.expected_out for child in self.children)
+
+    @property
+    def average_price(self) -> float:
+        out = self.expected_out
+        return self.filled / out if out else math.inf
+
+    @property
+    def slippage(self) -> float:
+        """Average execution price (fees excluded) over spot price, minus one."""
+        return self.average_price * (1 - self.fee) / self.spot_price - 1 if self.children else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "amount_in": self.amount_in,
+            "filled": self.filled,
+            "unfilled": self.unfilled,
+            "expected_out": self.expected_out,
+            "slippage": self.slippage,
+            "children": [child.__dict__.copy() for child in self.children],
+        }
+
+
+class ExecutionPlanner:
+    """Split orders into child orders that each stay under ``max_slippage``."""
+
+    def __init__(self, max_slippage: float = 0.02, window_seconds: float = 10.0,
+                 interval_seconds: float = 2.0, recovery: float = 0.5,
+                 headroom: float = 0.25, min_child_fraction: float = 0.01):
+        """Create a planner.
+
+        Args:
+            max_slippage: Largest accepted average price of a child over the
+                original spot price, minus one.
+            window_seconds: Time span the children may be scheduled over.
+            interval_seconds: Time between consecutive children.
+            recovery: Fraction of the price deviation that reverts per interval.
+            headroom: Fraction of ``max_slippage`` kept free when sizing
+                children, so ``min_amount_out`` does not fail on small moves.
+            min_child_fraction: Children smaller than this fraction of the
+                parent order are not sent; the rest waits for recovery.
+        """
+        self.max_slippage = max_slippage
+        self.window_seconds = window_seconds
+        self.interval_seconds = interval_seconds
+        self.recovery = recovery
+        self.headroom = headroom
+        self.min_child_fraction = min_child_fraction
+
+    @classmethod
+    def from_config(cls, config: Mapping[str, Any]) -> "ExecutionPlanner":
+        """Build a planner from the ``trader`` section (``max_slippage`` + ``execution``)."""
+        options = dict(config.get("execution", {}))
+        options.setdefault("max_slippage", config.get("max_slippage", 0.02))
+        return cls(**options)
+
+    def plan(self, amount_in: float, pool: PoolReserves) -> ExecutionPlan:
+        """Plan ``amount_in`` against ``pool`` (see the module docstring for the model)."""
+        spot = pool.spot_price
+        plan = ExecutionPlan(amount_in=amount_in, spot_price=spot, fee=pool.fee)
+        if amount_in <= 0:
+            return plan
+
+        k = pool.reserve_in * pool.reserve_out
+        reserve_in, reserve_out = pool.reserve_in, pool.reserve_out
+        min_child = amount_in * self.min_child_fraction
+        # Worst accepted price, enforced on chain through min_amount_out
+        limit_price = spot * (1 + self.max_slippage)
+        target_slippage = self.max_slippage * (1 - self.headroom)
+        remaining = amount_in
+        slots = int(self.window_seconds // self.interval_seconds) + 1 if self.interval_seconds > 0 else 1
+
+        for slot in range(slots):
+            current = PoolReserves(reserve_in, reserve_out, pool.fee_bps)
+            capacity = max_input_for_slippage(current, target_slippage, spot)
+            size = min(remaining, capacity)
+            if size >= min(min_child, remaining) and size > 0:
+                out = amount_out(size, current)
+                plan.children.append(ChildOrder(
+                    delay_seconds=slot * self.interval_seconds,
+                    amount_in=size,
+                    expected_out=out,
+                    min_amount_out=size * (1 - pool.fee) / limit_price,
+                    price_impact=price_impact(size, current),
+                ))
+                reserve_in += size * (1 - pool.fee)
+                reserve_out -= out
+                remaining -= size
+                if remaining <= amount_in * 1e-12:
+                    remaining = 0.0
+                    break
+            if self.recovery <= 0:
+                # Without recovery the pool never gets back under the limit
+                break
+            # Price deviation decays towards the original spot with k kept constant
+            price = reserve_in / reserve_out
+            price = spot + (price - spot) * (1 - self.recovery)
+            reserve_in, reserve_out = math.sqrt(k * price), math.sqrt(k / price)
+
+        plan.unfilled = remaining
+        return plan
+
+
+def _benchmark(plans: int = 20_000) -> None:
+    import random
+
+    rng = random.Random(0)
+    planner = ExecutionPlanner(max_slippage=0.02, window_seconds=10, interval_seconds=1)
+    pools = [PoolReserves(rng.uniform(20, 500), rng.uniform(1e5, 1e8)) for _ in range(100)]
+    started = time.perf_counter()
+    children = 0
+    for i in range(plans):
+        pool = pools[i % len(pools)]
+        children += len(planner.plan(pool.reserve_in * rng.uniform(0.001, 0.2), pool).children)
+    elapsed = time.perf_counter() - started
+    print(f"{plans} plans ({children / plans:.1f} children on average) in {elapsed:.2f} s: "
+          f"{plans / elapsed:,.0f} plans/s")
+
+
+if __name__ == "__main__":
+    _benchmark()
@@ -0,0 +1,384 @@
+"""One execution path and one trade ledger for the trading agents.
+
+Order execution used to be implemented twice: the Trader (Solana) wrote
+``MemecoinSnipingTraderTable`` items with ``price_per_token``/``close_price``
+and no P&L, while the Executor (EVM) wrote ``MemecoinSnipingTradeLog`` items
+in camelCase with ``priceBefore``/``priceAfter``.  Monitoring, backtests and
+exports had to read and join both.  This module provides:
+
+* ``Order`` and ``Fill``: a single order/fill schema for every venue.
+* ``VenueAdapter``: the only venue-specific part.  Agents implement
+  ``execute(order) -> Fill`` for their chain (Solana in the Trader, EVM in the
+  Executor); ``PaperVenue`` is the shared simulated venue.
+* ``TradeLedger``: one item per trade in the trader table, written once on
+  entry and updated once on exit, with the fields the optimizer reads
+  (``entry_price``, ``exit_price``, ``pnl``, ``entry_time``, ``exit_time``).
+  Entry orders that were sent but did not fill are kept as ``failed`` items
+  with their network fee, so the fill model can be calibrated on them.
+* ``ExecutionService``: routes an order to its venue and records the fill.
+
+Usage:
+
+    from common.execution_service import ExecutionService, Order, PaperVenue, TradeLedger
+
+    service = ExecutionService([PaperVenue()], TradeLedger(table))
+    trade = service.open_position(Order("TOKEN", "buy", size=0.1, price=0.002))
+    service.close_position(trade, price=0.0025, reason="take_profit")
+"""
+
+from __future__ import annotations
+
+import logging
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Union
+
+from common.execution_planner import ExecutionPlanner, PoolReserves
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+BUY = "buy"
+SELL = "sell"
+SIZE_UNITS = ("fraction", "quote", "base")
+
+
+def _now() -> str:
+    return datetime.utcnow().isoformat()
+
+
+@dataclass(frozen=True)
+class Order:
+    """A request to trade ``size`` of a token at around ``price``.
+
+    ``size_unit`` is ``"fraction"`` (of the venue's capital), ``"quote"``
+    (amount of the quote currency) or ``"base"`` (token amount, for exits).
+    ``route`` and ``pool`` are optional venue inputs (swap accounts, pool
+    reserves); ``metadata`` is copied onto the ledger item.
+    """
+
+    token_address: str
+    side: str
+    size: float
+    price: float
+    size_unit: str = "fraction"
+    venue: str = "paper"
+    trade_id: Optional[str] = None
+    route: Optional[Mapping[str, Any]] = None
+    pool: Optional[PoolReserves] = None
+    metadata: Mapping[str, Any] = field(default_factory=dict)
+    order_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    created_at: str = field(default_factory=_now)
+
+
+@dataclass(frozen=True)
+class Fill:
+    """Outcome of an order on its venue.
+
+    ``network_fee`` is what the transactions cost (paid on failures too) and
+    ``submitted`` tells failed transactions apart from orders rejected before
+    anything was sent (no price, no route...).
+    """
+
+    order_id: str
+    success: bool
+    price: float = 0.0
+    amount_tokens: float = 0.0
+    amount_quote: float = 0.0
+    slippage: float = 0.0
+    tx_signature: str = ""
+    child_orders: int = 1
+    error: str = ""
+    network_fee: float = 0.0
+    submitted: bool = True
+    filled_at: str = field(default_factory=_now)
+
+    @classmethod
+    def rejected(cls, order: Order, error: str, submitted: bool = False, network_fee: float = 0.0) -> "Fill":
+        return cls(order_id=order.order_id, success=False, child_orders=0, error=error,
+                   submitted=submitted, network_fee=network_fee)
+
+
+class VenueAdapter(ABC):
+    """Chain/DEX specific execution; everything else is shared."""
+
+    name: str = ""
+    mode: str = "paper"
+
+    @abstractmethod
+    def execute(self, order: Order) -> Fill:
+        """Execute ``order`` and describe the result (never raises for venue errors)."""
+
+
+class PaperVenue(VenueAdapter):
+    """Simulated venue: fills at the reference price, plus AMM impact when the pool is known."""
+
+    mode = "paper"
+
+    def __init__(self, capital: float = 10.0, planner: Optional[ExecutionPlanner] = None, name: str = "paper"):
+        self.capital = capital
+        self.planner = planner or ExecutionPlanner()
+        self.name = name
+
+    def execute(self, order: Order) -> Fill:
+        if order.price <= 0:
+            return Fill.rejected(order, "no reference price")
+        if order.side == BUY:
+            quote = order.size * self.capital if order.size_unit == "fraction" else order.size
+        else:
+            quote = order.size * order.price if order.size_unit == "base" else order.size
+        if quote <= 0:
+            return Fill.rejected(order, "empty order")
+
+        slippage, children, filled = 0.0, 1, quote
+        if order.pool is not None:
+            pool = order.pool if order.side == BUY else order.pool.reversed()
+            amount_in = quote if order.side == BUY else quote / order.price
+            plan = self.planner.plan(amount_in, pool)
+            if not plan.children:
+                return Fill.rejected(order, "no child order fits under max_slippage")
+            slippage, children = plan.slippage, len(plan.children)
+            filled = quote * plan.filled / plan.amount_in
+        # Buying pays more than the reference price, selling receives less
+        price = order.price * (1 + slippage) if order.side == BUY else order.price / (1 + slippage)
+        return Fill(
+            order_id=order.order_id,
+            success=True,
+            price=price,
+            amount_tokens=filled / price,
+            amount_quote=filled,
+            slippage=slippage,
+            tx_signature=f"paper-{order.order_id}",
+            child_orders=children,
+        )
+
+
+def to_dynamodb(value: Any) -> Any:
+    """Floats become Decimals and ``None`` values are dropped (DynamoDB resource API)."""
+    if isinstance(value, Mapping):
+        return {k: to_dynamodb(v) for k, v in value.items() if v is not None}
+    if isinstance(value, (list, tuple)):
+        return [to_dynamodb(v) for v in value]
+    if isinstance(value, float):
+        return Decimal(str(value))
+    return value
+
+
+def from_dynamodb(value: Any) -> Any:
+    """Decimals (including nested ones) back to int/float."""
+    if isinstance(value, Mapping):
+        return {k: from_dynamodb(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [from_dynamodb(v) for v in value]
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    return value
+
+
+class TradeLedger:
+    """Trades of every venue in one table, one item per trade."""
+
+    def __init__(self, table, key_attribute: str = "tradeId"):
+        """Wrap a DynamoDB ``Table`` (resource API).
+
+        Args:
+            table: Table holding the trades.
+            key_attribute: Partition key of ``table``.  Items also carry
+                ``trade_id``, the field every reader uses.
+        """
+        self.table = table
+        self.key_attribute = key_attribute
+
+    def open(self, order: Order, fill: Fill, mode: str = "paper") -> Dict[str, Any]:
+        """Record a filled entry order as an open trade (one write).
+
+        Write errors are logged, not raised: the order already executed.
+        """
+        trade_id = order.trade_id or fill.tx_signature or order.order_id
+        item = {
+            **dict(order.metadata),
+            self.key_attribute: trade_id,
+            "trade_id": trade_id,
+            "token_address": order.token_address,
+            "venue": order.venue,
+            "mode": mode,
+            "status": "open",
+            "entry_order_id": order.order_id,
+            "order_time": order.created_at,
+            "reference_price": order.price,
+            "entry_time": fill.filled_at,
+            "entry_price": fill.price,
+            "entry_slippage": fill.slippage,
+            "entry_tx": fill.tx_signature,
+            "child_orders": fill.child_orders,
+            "amount_tokens": fill.amount_tokens,
+            "amount_quote": fill.amount_quote,
+            "network_fee": fill.network_fee,
+        }
+        try:
+            self.table.put_item(Item=to_dynamodb(item))
+        except Exception as exc:
+            # The order is filled: report the trade anyway so it is not sent twice
+            logger.error("Trade %s filled but not recorded: %s", trade_id, exc)
+        return {k: v for k, v in item.items() if v is not None}
+
+    def reject(self, order: Order, fill: Fill, mode: str = "paper") -> Dict[str, Any]:
+        """Record an entry order whose transactions failed as a ``failed`` item.
+
+        ``exit_time`` is the failure time, so failed orders are read by status
+        and time range through the same index as closed trades.
+        """
+        trade_id = order.trade_id or order.order_id
+        item = {
+            **dict(order.metadata),
+            self.key_attribute: trade_id,
+            "trade_id": trade_id,
+            "token_address": order.token_address,
+            "venue": order.venue,
+            "mode": mode,
+            "status": "failed",
+            "entry_order_id": order.order_id,
+            "order_time": order.created_at,
+            "reference_price": order.price,
+            "exit_time": fill.filled_at,
+            "error": fill.error,
+            "network_fee": fill.network_fee,
+        }
+        try:
+            self.table.put_item(Item=to_dynamodb(item))
+        except Exception as exc:
+            logger.error("Failed order %s not recorded: %s", trade_id, exc)
+        return item
+
+    def close(self, trade: Mapping[str, Any], order: Order, fill: Fill, reason: str) -> Dict[str, Any]:
+        """Mark ``trade`` closed with the exit fill (one update).
+
+        ``pnl_pct`` is the return on the entry price and ``pnl_quote`` (also
+        written as ``pnl``) the result in quote currency; both quote fields
+        are left out when the entry amount is unknown.
+        """
+        entry_price = float(trade.get("entry_price") or trade.get("price_per_token") or 0)
+        pnl_pct = fill.price / entry_price - 1 if entry_price else 0.0
+        amount_quote = float(trade.get("amount_quote") or 0)
+        pnl_quote = amount_quote * pnl_pct if amount_quote else None
+        updates = {
+            "status": "closed",
+            "close_reason": reason,
+            "exit_order_id": order.order_id,
+            "exit_time": fill.filled_at,
+            "exit_price": fill.price,
+            "exit_slippage": fill.slippage,
+            "exit_tx": fill.tx_signature,
+            "pnl_pct": pnl_pct,
+            "pnl_quote": pnl_quote,
+            "pnl": pnl_quote,
+        }
+        updates = {name: value for name, value in updates.items() if value is not None}
+        names = {f"#f{i}": name for i, name in enumerate(updates)}
+        values = {f":v{i}": to_dynamodb(value) for i, value in enumerate(updates.values())}
+        try:
+            self.table.update_item(
+                Key={self.key_attribute: trade["trade_id"]},
+                UpdateExpression="SET " + ", ".join(f"#f{i} = :v{i}" for i in range(len(updates))),
+                ExpressionAttributeNames=names,
+                ExpressionAttributeValues=values,
+            )
+        except Exception as exc:
+            logger.error("Trade %s closed but not recorded: %s", trade["trade_id"], exc)
+        return {**trade, **updates}
+
+    def get(self, trade_id: str) -> Optional[Dict[str, Any]]:
+        item = self.table.get_item(Key={self.key_attribute: trade_id}).get("Item")
+        return from_dynamodb(item) if item else None
+
+    def open_positions(self) -> List[Dict[str, Any]]:
+        """Every open trade (paginated scan)."""
+        kwargs = {
+            "FilterExpression": "#status = :open",
+            "ExpressionAttributeNames": {"#status": "status"},
+            "ExpressionAttributeValues": {":open": "open"},
+        }
+        items: List[Dict[str, Any]] = []
+        while True:
+            response = self.table.scan(**kwargs)
+            items.extend(from_dynamodb(item) for item in response.get("Items", []) if item.get("status") == "open")
+            if not response.get("LastEvaluatedKey"):
+                return items
+            kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+class InMemoryLedgerTable:
+    """In-memory stand-in for the ledger table (local runs and tests)."""
+
+    def __init__(self, key_attribute: str = "tradeId"):
+        self.key_attribute = key_attribute
+        self.items: Dict[str, Dict[str, Any]] = {}
+        self.writes = 0
+
+    def put_item(self, Item):
+        self.items[Item[self.key_attribute]] = dict(Item)
+        self.writes += 1
+
+    def update_item(self, Key, UpdateExpression, ExpressionAttributeNames, ExpressionAttributeValues):
+        item = self.items.setdefault(Key[self.key_attribute], dict(Key))
+        for assignment in UpdateExpression[len("SET "):].split(", "):
+            name, value = assignment.split(" = ")
+            item[ExpressionAttributeNames[name]] = ExpressionAttributeValues[value]
+        self.writes += 1
+
+    def get_item(self, Key):
+        item = self.items.get(Key[self.key_attribute])
+        return {"Item": dict(item)} if item else {}
+
+    def scan(self, **kwargs):
+        return {"Items": [dict(item) for item in self.items.values()]}
+
+
+class ExecutionService:
+    """Route orders to their venue and record the fills in the ledger."""
+
+    def __init__(self, venues: Union[Iterable[VenueAdapter], Mapping[str, VenueAdapter]], ledger: TradeLedger):
+        self.venues = dict(venues) if isinstance(venues, Mapping) else {venue.name: venue for venue in venues}
+        self.ledger = ledger
+
+    def execute(self, order: Order) -> Fill:
+        venue = self.venues.get(order.venue)
+        if venue is None:
+            return Fill.rejected(order, f"unknown venue {order.venue!r}")
+        try:
+            return venue.execute(order)
+        except Exception as exc:  # venue adapters should not raise, but never lose the order
+            logger.error("Venue %s failed on order %s: %s", order.venue, order.order_id, exc)
+            return Fill.rejected(order, str(exc))
+
+    def open_position(self, order: Order) -> Optional[Dict[str, Any]]:
+        """Execute an entry order; returns the ledger item, or ``None`` if it was not filled."""
+        fill = self.execute(order)
+        if not fill.success:
+            logger.info("Order %s for %s not filled: %s", order.order_id, order.token_address, fill.error)
+            if fill.submitted:
+                self.ledger.reject(order, fill, mode=self.venues[order.venue].mode)
+            return None
+        return self.ledger.open(order, fill, mode=self.venues[order.venue].mode)
+
+    def close_position(self, trade: Mapping[str, Any], price: float, reason: str,
+                       pool: Optional[PoolReserves] = None) -> Optional[Dict[str, Any]]:
+        """Sell the whole position at around ``price``; returns the closed item or ``None``."""
+        order = Order(
+            token_address=trade["token_address"],
+            side=SELL,
+            size=float(trade.get("amount_tokens") or 0),
+            price=price,
+            size_unit="base",
+            venue=trade.get("venue", "paper"),
+            trade_id=trade["trade_id"],
+            pool=pool,
+        )
+        fill = self.execute(order)
+        if not fill.success:
+            logger.warning("Exit order for trade %s not filled: %s", trade["trade_id"], fill.error)
+            return None
+        return self.ledger.close(trade, order, fill, reason)
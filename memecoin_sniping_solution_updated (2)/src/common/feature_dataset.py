@@ -0,0 +1,499 @@
+"""Partitioned, append-only Parquet dataset for processed features.
+
+The ETL used to write one Parquet file per raw file, the dashboard rewrote the
+whole ``historical_data.parquet`` on every upload and training read that single
+file back in full.  This module keeps processed rows in a Hive-style layout:
+
+    {root}/date={YYYY-MM-DD}/token_bucket={N}/part-{ms}-{id}.parquet
+    {root}/_manifest.json
+
+- ``append`` never touches existing files: each call writes one new file per
+  (date, token bucket) partition it hits, rows sorted by token and time so
+  Parquet row-group statistics can skip tokens on read.
+- ``_manifest.json`` lists every live file with its partition and row count,
+  so reads plan from the manifest instead of listing the bucket.
+- ``compact`` merges the small files of a partition into one; the manifest is
+  swapped first, so readers never see duplicates, and the replaced files are
+  only listed as ``tombstones``.  They are deleted by a later ``purge`` once
+  they are older than ``TOMBSTONE_GRACE_S``, so a reader planning from the
+  previous manifest still finds every file it lists.
+- ``read`` prunes files by date range and token bucket from the manifest and
+  pushes column selection and row filters down to ``pyarrow.dataset``.
+  Training on the last 7 days touches only the 7 ``date=`` partitions.
+
+Tokens are hashed into ``token_buckets`` partitions instead of one directory
+per token: there are thousands of memecoins per day, and per-token directories
+would produce thousands of tiny files.  A token lookup still reads a single
+bucket.  Rows without a timestamp column use the ingestion date; rows without
+a token column go to bucket 0.
+
+``root`` is a local directory or any URI understood by ``pyarrow.fs`` (e.g.
+``s3://memecoin-sniping-processed-data/features``).  Several writers (the ETL
+Lambda, the dashboard upload, the trainer's sample data) append to the same
+dataset, so every manifest change is a read-modify-write that cannot lose a
+concurrent one:
+
+- local directories hold an exclusive ``flock`` on ``_manifest.lock`` while
+  they read, change and rename the manifest;
+- on S3 the manifest is written with a conditional ``PutObject``
+  (``If-Match`` on the ETag read, ``If-None-Match: *`` when creating it); a
+  ``412``/``409`` means another writer won, so the change is re-applied to the
+  new manifest, up to ``manifest_retries`` times.  Conditional ``PutObject``
+  needs a botocore that models ``IfMatch`` (the pinned 1.39.x); older SDKs are refused up front instead of
+  failing every write with a parameter validation error.
+
+Data files have unique names and are written before the manifest, so a retry
+never rewrites them.  ``rebuild_manifest`` recovers the manifest from the
+files on disk.
+
+Usage:
+
+    dataset = FeatureDataset("/tmp/features")
+    dataset.append(df)
+    recent = dataset.read(days=7, columns=["price", "target"],
+                          filters=[("liquidity_usd", ">", 10_000)])
+"""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import logging
+import os
+import random
+import time
+import uuid
+import zlib
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+try:
+    from botocore.exceptions import ClientError  # type: ignore
+except Exception:  # pragma: no cover
+    ClientError = Exception  # type: ignore
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+MANIFEST_NAME = "_manifest.json"
+LOCK_NAME = "_manifest.lock"
+# S3 answers 412 when If-Match/If-None-Match fails and 409 on concurrent conditional writes
+_CONFLICT_CODES = ("PreconditionFailed", "ConditionalRequestConflict", "412", "409")
+# Compacted files stay readable this long for readers holding an older manifest
+TOMBSTONE_GRACE_S = 6 * 3600
+PARTITIONING = ds.partitioning(pa.schema([("date", pa.string()), ("token_bucket", pa.int32())]), flavor="hive")
+
+Data = Union[pd.DataFrame, pa.Table, pa.RecordBatch]
+
+
+def token_bucket(token: str, buckets: int) -> int:
+    """Stable bucket of a token address (crc32, identical across processes)."""
+    return zlib.crc32(str(token).encode()) % buckets
+
+
+def _utc_dates(column: pa.ChunkedArray) -> np.ndarray:
+    """``YYYY-MM-DD`` of each value; accepts epoch (s or ms), timestamps or ISO strings."""
+    values = column.to_pandas()
+    if pd.api.types.is_numeric_dtype(values):
+        ms = np.where(values > 1e11, values, values * 1000)
+        moments = pd.to_datetime(ms, unit="ms", utc=True)
+    else:
+        moments = pd.to_datetime(values, utc=True, format="ISO8601")
+    return np.asarray(moments.strftime("%Y-%m-%d"), dtype=object)
+
+
+def _as_table(data: Data) -> pa.Table:
+    if isinstance(data, pd.DataFrame):
+        return pa.Table.from_pandas(data, preserve_index=False)
+    if isinstance(data, pa.RecordBatch):
+        return pa.Table.from_batches([data])
+    return data
+
+
+def _require_conditional_put(client) -> None:
+    """Refuse S3 clients whose SDK cannot send ``If-Match`` on ``PutObject``."""
+    try:
+        members = client.meta.service_model.operation_model("PutObject").input_shape.members
+    except AttributeError:  # test doubles without a service model
+        return
+    if "IfMatch" not in members or "IfNoneMatch" not in members:
+        raise RuntimeError("botocore is too old for conditional PutObject (no IfMatch/IfNoneMatch); "
+                           "the dataset manifest cannot be updated safely on S3")
+
+
+class ManifestConflictError(RuntimeError):
+    """The manifest kept changing under a writer for ``manifest_retries`` attempts."""
+
+
+class FeatureDataset:
+    """Append-only Parquet dataset partitioned by date and token bucket."""
+
+    def __init__(self, root: str, timestamp_column: str = "timestamp", token_column: str = "token_address",
+                 token_buckets: int = 16, filesystem: Optional[pafs.FileSystem] = None,
+                 s3_client=None, manifest_retries: int = 8):
+        if filesystem is not None:
+            self.fs, self.root = filesystem, root.rstrip("/")
+        elif "://" in root:
+            self.fs, self.root = pafs.FileSystem.from_uri(root)
+        else:
+            self.fs, self.root = pafs.LocalFileSystem(), os.path.abspath(root)
+        self.timestamp_column = timestamp_column
+        self.token_column = token_column
+        self.token_buckets = token_buckets
+        self.manifest_retries = manifest_retries
+        if s3_client is not None:
+            _require_conditional_put(s3_client)
+        self._s3 = s3_client
+        self._manifest: Optional[Dict] = None
+
+    # -- manifest ---------------------------------------------------------
+
+    @property
+    def manifest_path(self) -> str:
+        return f"{self.root}/{MANIFEST_NAME}"
+
+    def exists(self) -> bool:
+        return self.fs.get_file_info(self.manifest_path).type == pafs.FileType.File
+
+    def manifest(self, refresh: bool = False) -> Dict:
+        """Manifest ``{"version", "token_buckets", "files": [...]}`` (cached per instance)."""
+        if self._manifest is None or refresh:
+            if self.exists():
+                with self.fs.open_input_stream(self.manifest_path) as f:
+                    self._manifest = json.loads(f.read())
+            else:
+                self._manifest = {"version": 1, "token_buckets": self.token_buckets, "files": []}
+            self.token_buckets = self._manifest.get("token_buckets", self.token_buckets)
+        return self._manifest
+
+    def _update_manifest(self, change: Callable[[List[Dict]], Optional[List[Dict]]],
+                         tombstones: Optional[Callable[[List[Dict]], List[Dict]]] = None) -> Optional[Dict]:
+        """Apply ``change`` to the latest file list and save it without losing concurrent updates.
+
+        ``change`` receives the current entries and returns the new ones, or
+        ``None`` to leave the manifest untouched; ``tombstones`` likewise maps
+        the current tombstones to the new ones.  Both may run more than once.
+
+        Raises:
+            ManifestConflictError: Other writers won ``manifest_retries`` times in a row.
+        """
+        if self._s3_location() is None:
+            self.fs.create_dir(self.root, recursive=True)
+        for attempt in range(self.manifest_retries):
+            with self._manifest_lock():
+                current, etag = self._read_manifest()
+                if current is not None:
+                    self.token_buckets = current.get("token_buckets", self.token_buckets)
+                base = current or {"version": 0, "token_buckets": self.token_buckets, "files": []}
+                files = change(base["files"])
+                if files is None:
+                    self._manifest = base
+                    return None
+                retired = base.get("tombstones", [])
+                if tombstones is not None:
+                    retired = tombstones(retired)
+                manifest = {"version": base.get("version", 0) + 1, "token_buckets": self.token_buckets,
+                            "updated_at": datetime.now(timezone.utc).isoformat(), "files": files}
+                if retired:
+                    manifest["tombstones"] = retired
+                if self._write_manifest(json.dumps(manifest, indent=1).encode(), etag, create=current is None):
+                    self._manifest = manifest
+                    return manifest
+            logger.info("Manifest of %s changed concurrently, retrying (%d)", self.root, attempt + 1)
+            time.sleep(min(2.0, 0.05 * 2 ** attempt) * random.random())
+        raise ManifestConflictError(f"Manifest of {self.root} changed on {self.manifest_retries} attempts")
+
+    def _s3_location(self) -> Optional[Tuple[str, str]]:
+        """``(bucket, key)`` of the manifest when the dataset lives on S3."""
+        if self.fs.type_name != "s3":
+            return None
+        bucket, _, prefix = self.root.partition("/")
+        return bucket, f"{prefix}/{MANIFEST_NAME}" if prefix else MANIFEST_NAME
+
+    def _s3_client(self):
+        if self._s3 is None:
+            import boto3  # type: ignore
+
+            self._s3 = boto3.client("s3")
+            _require_conditional_put(self._s3)
+        return self._s3
+
+    @contextlib.contextmanager
+    def _manifest_lock(self):
+        # S3 relies on conditional writes; a local directory serializes writers with flock
+        if not isinstance(self.fs, pafs.LocalFileSystem) or fcntl is None:
+            yield
+            return
+        with open(f"{self.root}/{LOCK_NAME}", "a") as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def _read_manifest(self) -> Tuple[Optional[Dict], Optional[str]]:
+        """Stored manifest (None when absent) and its ETag (S3 only)."""
+        location = self._s3_location()
+        if location is not None:
+            bucket, key = location
+            try:
+                response = self._s3_client().get_object(Bucket=bucket, Key=key)
+            except ClientError as exc:
+                code = str(getattr(exc, "response", {}).get("Error", {}).get("Code", ""))
+                if code in ("NoSuchKey", "404"):
+                    return None, None
+                raise
+            return json.loads(response["Body"].read()), response["ETag"]
+        if not self.exists():
+            return None, None
+        with self.fs.open_input_stream(self.manifest_path) as f:
+            return json.loads(f.read()), None
+
+    def _write_manifest(self, payload: bytes, etag: Optional[str], create: bool) -> bool:
+        """Write the manifest; False when another writer changed it since it was read."""
+        location = self._s3_location()
+        if location is not None:
+            bucket, key = location
+            condition = {"IfNoneMatch": "*"} if create else {"IfMatch": etag}
+            try:
+                self._s3_client().put_object(Bucket=bucket, Key=key, Body=payload,
+                                             ContentType="application/json", **condition)
+            except ClientError as exc:
+                code = str(getattr(exc, "response", {}).get("Error", {}).get("Code", ""))
+                if code in _CONFLICT_CODES:
+                    return False
+                raise
+            return True
+        if isinstance(self.fs, pafs.LocalFileSystem):
+            # Local: write-then-rename so a crash never leaves half a manifest
+            temp = f"{self.manifest_path}.{uuid.uuid4().hex[:8]}.tmp"
+            with self.fs.open_output_stream(temp) as f:
+                f.write(payload)
+            self.fs.move(temp, self.manifest_path)
+        else:
+            # Other filesystems have no conditional writes: last writer wins
+            with self.fs.open_output_stream(self.manifest_path) as f:
+                f.write(payload)
+        return True
+
+    def files(self, start: Optional[str] = None, end: Optional[str] = None,
+              tokens: Optional[Iterable[str]] = None) -> List[Dict]:
+        """Manifest entries inside ``[start, end]`` (``YYYY-MM-DD``) and the tokens' buckets."""
+        buckets = None if tokens is None else {token_bucket(t, self.token_buckets) for t in tokens}
+        return [entry for entry in self.manifest()["files"]
+                if (start is None or entry["date"] >= start)
+                and (end is None or entry["date"] <= end)
+                and (buckets is None or entry["token_bucket"] in buckets)]
+
+    def rows(self) -> int:
+        return sum(entry["rows"] for entry in self.manifest()["files"])
+
+    # -- writes -----------------------------------------------------------
+
+    def _write_file(self, partition_date: str, bucket: int, table: pa.Table) -> Dict:
+        directory = f"{self.root}/date={partition_date}/token_bucket={bucket}"
+        name = f"part-{int(datetime.now(timezone.utc).timestamp() * 1000)}-{uuid.uuid4().hex[:8]}.parquet"
+        self.fs.create_dir(directory, recursive=True)
+        path = f"{directory}/{name}"
+        pq.write_table(table, path, filesystem=self.fs, compression="snappy")
+        return {"path": path[len(self.root) + 1:], "date": partition_date, "token_bucket": bucket,
+                "rows": table.num_rows, "bytes": self.fs.get_file_info(path).size,
+                "created_at": datetime.now(timezone.utc).isoformat()}
+
+    def _sort_keys(self, table: pa.Table) -> List:
+        return [(column, "ascending") for column in (self.token_column, self.timestamp_column)
+                if column in table.column_names]
+
+    def append(self, data: Data) -> List[Dict]:
+        """Write ``data`` as new files (one per partition hit) and record them in the manifest.
+
+        Returns:
+            The manifest entries of the files written.
+        """
+        table = _as_table(data)
+        if table.num_rows == 0:
+            return []
+        if self.timestamp_column in table.column_names:
+            dates = _utc_dates(table[self.timestamp_column])
+        else:
+            dates = np.full(table.num_rows, datetime.now(timezone.utc).strftime("%Y-%m-%d"), dtype=object)
+        if self.token_column in table.column_names:
+            codes, uniques = pd.factorize(table[self.token_column].to_pandas())
+            bucket_of = np.array([token_bucket(t, self.token_buckets) for t in uniques] + [0])
+            buckets = bucket_of[codes]  # code -1 (null token) picks the extra slot: bucket 0
+        else:
+            buckets = np.zeros(table.num_rows, dtype=np.int64)
+
+        keys = pd.DataFrame({"date": dates, "bucket": buckets})
+        written = []
+        for (partition_date, bucket), index in keys.groupby(["date", "bucket"], sort=True).indices.items():
+            part = table.take(pa.array(index))
+            sort_keys = self._sort_keys(part)
+            if sort_keys:
+                part = part.sort_by(sort_keys)
+            written.append(self._write_file(partition_date, int(bucket), part))
+
+        self._update_manifest(lambda files: files + written)
+        logger.info("Appended %d rows in %d files to %s", table.num_rows, len(written), self.root)
+        return written
+
+    def compact(self, small_file_rows: int = 250_000, min_files: int = 4,
+                grace_s: float = TOMBSTONE_GRACE_S) -> Dict[str, int]:
+        """Merge partitions holding at least ``min_files`` files below ``small_file_rows`` rows.
+
+        The replaced files become tombstones; files retired more than
+        ``grace_s`` seconds ago are purged first.
+
+        Returns:
+            Counts of compacted partitions, files removed and files written.
+        """
+        self.purge(grace_s)
+        entries = self.manifest(refresh=True)["files"]
+        groups: Dict[tuple, List[Dict]] = {}
+        for entry in entries:
+            if entry["rows"] < small_file_rows:
+                groups.setdefault((entry["date"], entry["token_bucket"]), []).append(entry)
+
+        stats = {"partitions": 0, "files_removed": 0, "files_written": 0}
+        replaced, merged = set(), []
+        for (partition_date, bucket), small in sorted(groups.items()):
+            if len(small) < min_files:
+                continue
+            tables = [pq.read_table(f"{self.root}/{entry['path']}", filesystem=self.fs) for entry in small]
+            table = pa.concat_tables(tables, promote_options="default")
+            sort_keys = self._sort_keys(table)
+            if sort_keys:
+                table = table.sort_by(sort_keys)
+            merged.append(self._write_file(partition_date, bucket, table))
+            replaced.update(entry["path"] for entry in small)
+            stats["partitions"] += 1
+            stats["files_removed"] += len(small)
+            stats["files_written"] += 1
+
+        if not merged:
+            return stats
+
+        def swap(files: List[Dict]) -> Optional[List[Dict]]:
+            # Another compaction already replaced some of these files: keep its result
+            if not replaced <= {entry["path"] for entry in files}:
+                return None
+            return [entry for entry in files if entry["path"] not in replaced] + merged
+
+        def retire(tombstones: List[Dict]) -> List[Dict]:
+            retired_at = time.time()
+            return tombstones + [{"path": path, "retired_at": retired_at} for path in sorted(replaced)]
+
+        if self._update_manifest(swap, tombstones=retire) is None:
+            for entry in merged:
+                self.fs.delete_file(f"{self.root}/{entry['path']}")
+            logger.info("Compaction of %s superseded by a concurrent one", self.root)
+            return {"partitions": 0, "files_removed": 0, "files_written": 0}
+        logger.info("Compacted %s: %s", self.root, stats)
+        return stats
+
+    def purge(self, grace_s: float = TOMBSTONE_GRACE_S) -> int:
+        """Delete compacted files retired more than ``grace_s`` seconds ago; returns how many."""
+        cutoff = time.time() - grace_s
+        expired = [entry["path"] for entry in self.manifest(refresh=True).get("tombstones", [])
+                   if entry["retired_at"] <= cutoff]
+        gone = set()
+        for path in expired:
+            try:
+                self.fs.delete_file(f"{self.root}/{path}")
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning("Could not delete compacted file %s: %s", path, e)
+                continue
+            gone.add(path)
+        if gone:
+            self._update_manifest(lambda files: files,
+                                  tombstones=lambda entries: [entry for entry in entries if entry["path"] not in gone])
+            logger.info("Purged %d compacted files from %s", len(gone), self.root)
+        return len(gone)
+
+    def rebuild_manifest(self) -> int:
+        """Rebuild the manifest from the Parquet files on disk; returns the number of files.
+
+        The instance must use the ``token_buckets`` the files were written with.
+        Files still listed as tombstones are left out.
+        """
+        try:
+            current, _ = self._read_manifest()
+        except ValueError:  # the manifest being rebuilt may be corrupt
+            current = None
+        retired = {entry["path"] for entry in (current or {}).get("tombstones", [])}
+        selector = pafs.FileSelector(self.root, recursive=True, allow_not_found=True)
+        entries = []
+        for info in self.fs.get_file_info(selector):
+            if info.type != pafs.FileType.File or not info.path.endswith(".parquet"):
+                continue
+            relative = info.path[len(self.root) + 1:]
+            if relative in retired:
+                continue
+            parts = dict(piece.split("=", 1) for piece in relative.split("/")[:-1] if "=" in piece)
+            if "date" not in parts or "token_bucket" not in parts:
+                continue
+            rows = pq.ParquetFile(info.path, filesystem=self.fs).metadata.num_rows
+            entries.append({"path": relative, "date": parts["date"], "token_bucket": int(parts["token_bucket"]),
+                            "rows": rows, "bytes": info.size, "created_at": None})
+        entries.sort(key=lambda entry: entry["path"])
+        self._update_manifest(lambda files: entries)
+        return len(entries)
+
+    # -- reads ------------------------------------------------------------
+
+    def to_dataset(self, start: Optional[str] = None, end: Optional[str] = None,
+                   tokens: Optional[Iterable[str]] = None) -> Optional[ds.Dataset]:
+        """``pyarrow.dataset`` over the files selected by the manifest (None when empty)."""
+        paths = [f"{self.root}/{entry['path']}" for entry in self.files(start, end, tokens)]
+        if not paths:
+            return None
+        return ds.dataset(paths, filesystem=self.fs, format="parquet",
+                          partitioning=PARTITIONING, partition_base_dir=self.root)
+
+    def read(self, columns: Optional[Sequence[str]] = None, start: Optional[str] = None,
+             end: Optional[str] = None, days: Optional[int] = None, tokens: Optional[Iterable[str]] = None,
+             filters=None, today: Optional[date] = None) -> pd.DataFrame:
+        """Read rows as a DataFrame with partition pruning and column/predicate pushdown.
+
+        Args:
+            columns: Columns to load (default: every data column, without the partition keys).
+            start: First day (``YYYY-MM-DD``), inclusive.
+            end: Last day, inclusive.
+            days: Shortcut for the last ``days`` days up to ``today`` (UTC).
+            tokens: Restrict to these token addresses.
+            filters: ``pyarrow.compute`` expression or pandas-style ``[(col, op, value)]`` list.
+            today: Reference day for ``days`` (tests).
+        """
+        if days is not None:
+            today = today or datetime.now(timezone.utc).date()
+            start = (today - timedelta(days=days - 1)).isoformat()
+            end = today.isoformat()
+        tokens = None if tokens is None else list(tokens)
+        dataset = self.to_dataset(start, end, tokens)
+        if dataset is None:
+            return pd.DataFrame(columns=list(columns or []))
+
+        expression = None
+        if filters is not None:
+            expression = filters if isinstance(filters, pc.Expression) else pq.filters_to_expression(filters)
+        if tokens is not None:
+            token_filter = pc.field(self.token_column).isin(tokens)
+            expression = token_filter if expression is None else expression & token_filter
+        if columns is None:
+            columns = [name for name in dataset.schema.names if name not in PARTITIONING.schema.names]
+        return dataset.to_table(columns=list(columns), filter=expression).to_pandas()
@@ -0,0 +1,526 @@
+"""Feature engineering for the entry model from the data the agents already write.
+
+``etl/process_data.py`` used to fill every model feature with ``np.random``.
+This module computes them from four sources:
+
+- **trades**: the unified trade ledger (``common.execution_service``); one
+  training row per closed trade, labelled ``target = pnl_pct > 0``;
+- **prices**: price observations per token (``common.trade_paths`` segments
+  joined to the ledger by trade id), optionally with ``volume_usd``;
+- **analyses**: the Analyzer's Parquet export (``analyzer.analysis_store``),
+  scores plus encoded risk/opportunity factors;
+- **migrations**: the Discoverer's migration table (graduation time,
+  liquidity, volume and market cap at graduation).
+
+Every feature is evaluated at the decision time (the order's ``order_time``)
+with backward as-of joins, so a row only sees data that existed when the
+trader decided:
+
+- price features come from the last observation at or before the decision;
+- analysis and migration features from the last record at or before it;
+- execution statistics (slippage, network fee, latency, failure rate) from
+  the previous ``trade_window`` fills *completed strictly before* it, so a
+  trade never sees its own fill.  The ledger writes every input: ``order_time``,
+  ``entry_time`` and ``network_fee`` on each fill, and a ``failed`` item for
+  each submitted order whose transactions failed.
+
+Rolling windows are computed per token on sorted arrays with cumulative sums
+(no per-group Python loops), which keeps a full rebuild in seconds at
+millions of rows.  ``build_features(..., start, end)`` restricts the output to
+decisions in ``[start, end)`` while reading history before ``start`` from the
+same frames, so the ETL can run one day at a time.
+
+``FEATURE_SOURCES`` documents where each column comes from.  Run
+``python feature_pipeline.py [rows]`` for the benchmark (1M rows by default).
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+import time
+import zlib
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from common.feature_schema import FEATURE_SCHEMA
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# Column order expected by the model (common.feature_schema)
+FEATURE_COLUMNS = FEATURE_SCHEMA.names
+METADATA_COLUMNS = tuple(column.name for column in FEATURE_SCHEMA.metadata)
+
+FEATURE_SOURCES: Dict[str, str] = {
+    "amount_usd": "ledger amount_usd, else amount_quote * quote_usd (order size, known at decision)",
+    "price_per_token": "ledger reference_price (quote used for the order), else last observed price",
+    "slippage": "mean entry_slippage of the previous trade_window fills",
+    "gas_price_avg": "mean network_fee (Fill.network_fee, quote currency) of the previous trade_window fills",
+    "gas_price_std": "std of network_fee (Fill.network_fee, quote currency) of the previous trade_window fills",
+    "rpc_latency": "mean entry_time - order_time (ms) of the previous trade_window fills",
+    "security_score": "mean of the last analysis' price/liquidity stability scores",
+    "failure_rate": "share of status 'failed' (TradeLedger.reject) among the previous trade_window orders",
+    "social_sentiment_score": "2 * community_interest_score - 1 of the last analysis",
+    "hour": "UTC hour of the decision",
+    "day_of_week": "UTC weekday of the decision (Monday = 0)",
+    "is_weekend": "day_of_week >= 5",
+    "liquidity_locked": "token graduated before the decision (LP burned on migration)",
+    "price_change_pct": "last price / previous price - 1",
+    "volume_ma_5": "mean volume_usd of the last volume_window price observations",
+    "slippage_amount_interaction": "slippage * amount_usd",
+    "security_sentiment_interaction": "security_score * social_sentiment_score",
+    "prev_price": "price observation before the last one",
+    "prev_volume": "volume_usd of the observation before the last one",
+    "price_volatility": "std of log returns over the last volatility_window observations",
+    "token_age_hours": "hours since graduation (else first trade, else first observed price)",
+    "snif_score": "100 * overall_score of the last analysis",
+    "whale_buy_activity": "smart wallets buying in the last analysis ('{} smart wallets comprando')",
+    "whale_sell_activity": "smart wallets selling in the last analysis ('{} smart wallets vendendo')",
+    "new_whale_entries": "increase of buying smart wallets since the token's previous analysis",
+    "total_supply": "migration total_supply, else the pump.fun fixed supply of 1B",
+    "circulating_supply": "migration circulating_supply, else total_supply (fully circulating after graduation)",
+    "liquidity_usd": "liquidity factor of the last analysis ('Alta liquidez: ${}'), else liquidity at graduation",
+    "volume_24h_usd": "volume factor of the last analysis ('Alto volume total: ${}'), else volume at graduation",
+}
+
+PUMP_FUN_TOTAL_SUPPLY = 1_000_000_000.0
+
+_NUMBER = re.compile(r"\d[\d,]*(?:\.\d+)?")
+
+# Analysis factors whose first number is a feature value
+FACTOR_SIGNALS: Dict[str, Tuple[str, ...]] = {
+    "factor_liquidity_usd": ("Alta liquidez: ${}", "Boa liquidez: ${}", "Liquidez moderada: ${}",
+                             "Baixa liquidez: ${}"),
+    "factor_volume_usd": ("Alto volume total: ${}", "Bom volume total: ${}", "Baixo volume total: ${}"),
+    "smart_buyers": ("{} smart wallets comprando",),
+    "smart_sellers": ("{} smart wallets vendendo",),
+}
+
+
+def _factor_code(text: str) -> str:
+    # Same 6-hex code as analyzer.analysis_store.factor_code
+    return format(zlib.crc32(_NUMBER.sub("{}", text).encode("utf-8")) & 0xFFFFFF, "06x")
+
+
+_SIGNAL_BY_CODE = {_factor_code(t): signal for signal, templates in FACTOR_SIGNALS.items() for t in templates}
+
+
+def parse_factor(value: str) -> Tuple[Optional[str], float]:
+    """``(signal, number)`` of an encoded (``"code|50,000"``) or plain factor."""
+    code, *args = value.split("|")
+    signal = _SIGNAL_BY_CODE.get(code)
+    if signal is None:
+        signal = _SIGNAL_BY_CODE.get(_factor_code(value))
+        args = _NUMBER.findall(value)
+    if signal is None or not args:
+        return None, np.nan
+    return signal, float(args[0].replace(",", ""))
+
+
+def to_utc(values: pd.Series) -> pd.Series:
+    """Datetimes (UTC, ns) from ISO strings, datetimes or epoch seconds/milliseconds."""
+    if pd.api.types.is_datetime64_any_dtype(values):
+        moments = pd.to_datetime(values, utc=True)
+    elif pd.api.types.is_numeric_dtype(values):
+        ms = np.where(values > 1e11, values, values * 1000)
+        moments = pd.Series(pd.to_datetime(ms, unit="ms", utc=True), index=values.index)
+    else:
+        moments = pd.to_datetime(values, utc=True, format="ISO8601")
+    # As-of joins need the same resolution on both sides
+    return moments.dt.as_unit("ns")
+
+
+def _column(frame: pd.DataFrame, name: str, default=np.nan) -> pd.Series:
+    if name in frame.columns:
+        return pd.to_numeric(frame[name], errors="coerce")
+    return pd.Series(default, index=frame.index, dtype=float)
+
+
+def group_rolling(values: np.ndarray, groups: np.ndarray, window: int, min_periods: int = 1
+                  ) -> Tuple[np.ndarray, np.ndarray]:
+    """Rolling mean and sample std over the last ``window`` rows of each group.
+
+    ``groups`` labels contiguous groups (any key that changes at group
+    boundaries, e.g. the group's first row index); NaNs are skipped.  Uses
+    cumulative sums, O(n) with no per-group loop.
+    """
+    n = len(values)
+    if n == 0:
+        return np.empty(0), np.empty(0)
+    valid = ~np.isnan(values)
+    x = np.where(valid, values, 0.0)
+    # Prefix sums with a leading zero: sum(i0..i1) = c[i1 + 1] - c[i0]
+    count = np.concatenate(([0], np.cumsum(valid)))
+    total = np.concatenate(([0.0], np.cumsum(x)))
+    squares = np.concatenate(([0.0], np.cumsum(x * x)))
+
+    index = np.arange(n)
+    new_group = np.concatenate(([True], groups[1:] != groups[:-1]))
+    group_start = np.maximum.accumulate(np.where(new_group, index, 0))
+    start = np.maximum(group_start, index - window + 1)
+
+    k = count[index + 1] - count[start]
+    s = total[index + 1] - total[start]
+    s2 = squares[index + 1] - squares[start]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.where(k >= min_periods, s / k, np.nan)
+        var = (s2 - s * s / k) / (k - 1)
+        std = np.where((k >= max(min_periods, 2)), np.sqrt(np.maximum(var, 0.0)), np.nan)
+    return mean, std
+
+
+def _sort_by_token(frame: pd.DataFrame, time_column: str) -> Tuple[pd.DataFrame, np.ndarray]:
+    """Sort by (token, time) on integer keys; returns the frame and each row's group start."""
+    codes = pd.factorize(frame["token_address"])[0]
+    order = np.lexsort((frame[time_column].array.asi8, codes))
+    frame = frame.take(order).reset_index(drop=True)
+    codes = codes[order]
+    index = np.arange(len(codes))
+    new_group = np.concatenate(([True], codes[1:] != codes[:-1])) if len(codes) else np.empty(0, dtype=bool)
+    return frame, np.maximum.accumulate(np.where(new_group, index, 0)) if len(codes) else index
+
+
+def price_features(prices: pd.DataFrame, volatility_window: int = 20, volume_window: int = 5) -> pd.DataFrame:
+    """Per-observation lags and rolling statistics of each token's price series."""
+    frame = pd.DataFrame({
+        "token_address": prices["token_address"].to_numpy(),
+        "observed_at": to_utc(prices["timestamp"]).array,
+        "price": pd.to_numeric(prices["price"], errors="coerce").to_numpy(dtype=float),
+        "volume_usd": _column(prices, "volume_usd").to_numpy(dtype=float),
+    })
+    frame, group_start = _sort_by_token(frame, "observed_at")
+
+    first = group_start == np.arange(len(frame))
+    price = frame["price"].to_numpy()
+    volume = frame["volume_usd"].to_numpy()
+    prev_price = np.where(first, np.nan, np.roll(price, 1))
+    prev_volume = np.where(first, np.nan, np.roll(volume, 1))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        log_return = np.log(price / prev_price)
+    log_return[~np.isfinite(log_return)] = np.nan
+
+    frame["prev_price"] = prev_price
+    frame["prev_volume"] = prev_volume
+    frame["price_change_pct"] = price / prev_price - 1
+    frame["price_volatility"] = group_rolling(log_return, group_start, volatility_window, min_periods=2)[1]
+    frame["volume_ma_5"] = group_rolling(volume, group_start, volume_window)[0]
+    frame["first_seen"] = frame["observed_at"].array.take(group_start)
+    return frame.drop(columns=["volume_usd"])
+
+
+def analysis_features(analyses: pd.DataFrame) -> pd.DataFrame:
+    """Scores and factor-derived signals of each analysis, with lags per token."""
+    analyses = analyses.reset_index(drop=True)
+    frame = pd.DataFrame({
+        "token_address": analyses["token_address"].to_numpy(),
+        "analyzed_at": to_utc(analyses["analysis_timestamp"]).array,
+        "snif_score": 100 * _column(analyses, "overall_score").to_numpy(),
+        "security_score": pd.concat([_column(analyses, "price_stability_score"),
+                                     _column(analyses, "liquidity_stability_score")], axis=1).mean(axis=1).to_numpy(),
+        "social_sentiment_score": (2 * _column(analyses, "community_interest_score") - 1).to_numpy(),
+    })
+
+    for signal in FACTOR_SIGNALS:
+        frame[signal] = np.nan
+    factors = [analyses[c].explode() for c in ("risk_factors", "opportunity_factors") if c in analyses.columns]
+    if factors:
+        exploded = pd.concat(factors).dropna()
+        if len(exploded):
+            # Parse each distinct factor once; rows are positions (index was reset)
+            codes, uniques = pd.factorize(exploded.astype(str))
+            parsed = [parse_factor(value) for value in uniques]
+            signals = np.array([signal or "" for signal, _ in parsed], dtype=object)[codes]
+            values = np.array([value for _, value in parsed])[codes]
+            found = pd.DataFrame({"row": exploded.index.to_numpy(), "signal": signals, "value": values})
+            found = found[found["signal"] != ""]
+            if len(found):
+                pivot = found.pivot_table(index="row", columns="signal", values="value", aggfunc="max")
+                for signal in pivot.columns:
+                    frame.loc[pivot.index, signal] = pivot[signal].to_numpy()
+
+    frame, group_start = _sort_by_token(frame, "analyzed_at")
+    buyers = frame["smart_buyers"].to_numpy()
+    first = group_start == np.arange(len(frame))
+    previous = np.where(first, 0.0, np.nan_to_num(np.roll(buyers, 1)))
+    frame["new_whale_entries"] = np.clip(buyers - previous, 0, None)
+    return frame
+
+
+def execution_features(trades: pd.DataFrame, trade_window: int = 20) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Rolling execution statistics indexed by fill time and failure rate by order time."""
+    order_time = to_utc(trades["order_time"]) if "order_time" in trades else pd.Series(pd.NaT, index=trades.index)
+    entry_time = to_utc(trades["entry_time"]) if "entry_time" in trades else pd.Series(pd.NaT, index=trades.index)
+    status = trades["status"].astype(str) if "status" in trades else pd.Series("", index=trades.index)
+
+    fills = pd.DataFrame({
+        "filled_at": entry_time,
+        "slippage": _column(trades, "entry_slippage"),
+        "network_fee": _column(trades, "network_fee"),
+        "latency_ms": (entry_time - order_time).dt.total_seconds() * 1000,
+    })[entry_time.notna() & (status != "failed")].sort_values("filled_at", kind="stable", ignore_index=True)
+    single = np.zeros(len(fills), dtype=np.int8)
+    fills["slippage"] = group_rolling(fills["slippage"].to_numpy(), single, trade_window)[0]
+    fills["gas_price_avg"], fills["gas_price_std"] = group_rolling(fills["network_fee"].to_numpy(), single, trade_window)
+    fills["rpc_latency"] = group_rolling(fills["latency_ms"].to_numpy(), single, trade_window)[0]
+    fills = fills.drop(columns=["network_fee", "latency_ms"])
+
+    orders = pd.DataFrame({"ordered_at": order_time.fillna(entry_time),
+                           "failed": (status == "failed").astype(float)})
+    orders = orders.dropna(subset=["ordered_at"]).sort_values("ordered_at", kind="stable", ignore_index=True)
+    orders["failure_rate"] = group_rolling(orders["failed"].to_numpy(), np.zeros(len(orders), dtype=np.int8),
+                                           trade_window)[0]
+    return fills, orders.drop(columns=["failed"])
+
+
+def _asof(left: pd.DataFrame, right: pd.DataFrame, right_on: str, by: Optional[str] = None,
+          allow_exact_matches: bool = True) -> pd.DataFrame:
+    right = right.dropna(subset=[right_on])
+    if by is not None:
+        right = right[right[by].isin(left[by].unique())]
+        # Parquet sources load keys as ``string``; merge_asof needs matching dtypes
+        right = right.assign(**{by: right[by].to_numpy(dtype=object)})
+    return pd.merge_asof(left, right.sort_values(right_on, kind="stable"), left_on="decided_at",
+                         right_on=right_on, by=by, direction="backward", allow_exact_matches=allow_exact_matches)
+
+
+def build_features(trades: pd.DataFrame, prices: Optional[pd.DataFrame] = None,
+                   analyses: Optional[pd.DataFrame] = None, migrations: Optional[pd.DataFrame] = None,
+                   start=None, end=None, quote_usd: float = 1.0, trade_window: int = 20,
+                   volatility_window: int = 20, volume_window: int = 5,
+                   labelled_only: bool = True) -> pd.DataFrame:
+    """One row per trade decided in ``[start, end)`` with ``FEATURE_COLUMNS`` and ``target``.
+
+    Args:
+        trades: Ledger items (``order_time``, ``entry_time``, ``status``, ``pnl_pct``...),
+            including history before ``start`` for the execution statistics.
+        prices: ``token_address``, ``timestamp``, ``price`` and optionally ``volume_usd``.
+        analyses: Analyzer Parquet rows (``analysis_store.parquet_row``).
+        migrations: Migration table items (``graduation_timestamp``, ...).
+        start: First decision time included (anything ``to_utc`` accepts).
+        end: Decision time excluded.
+        quote_usd: USD price of the quote asset when trades only carry ``amount_quote``.
+        labelled_only: Keep only closed trades (the ones with a label).
+
+    Returns:
+        ``METADATA_COLUMNS`` (``timestamp`` in epoch ms), ``FEATURE_COLUMNS`` and ``target``,
+        with the ``FEATURE_SCHEMA`` dtypes.
+    """
+    decided_at = to_utc(trades["order_time"] if "order_time" in trades else trades["entry_time"])
+    if "entry_time" in trades:
+        decided_at = decided_at.fillna(to_utc(trades["entry_time"]))
+    mask = decided_at.notna()
+    if start is not None:
+        mask &= decided_at >= to_utc(pd.Series([start]))[0]
+    if end is not None:
+        mask &= decided_at < to_utc(pd.Series([end]))[0]
+    status = trades["status"].astype(str) if "status" in trades else pd.Series("closed", index=trades.index)
+    if labelled_only:
+        mask &= status == "closed"
+
+    selected = trades[mask]
+    amount_usd = _column(selected, "amount_usd")
+    amount_usd = amount_usd.fillna(_column(selected, "amount_quote") * quote_usd)
+    reference_price = _column(selected, "reference_price").fillna(_column(selected, "entry_price"))
+    rows = pd.DataFrame({
+        "trade_id": selected["trade_id"].astype(str).to_numpy() if "trade_id" in selected else np.arange(len(selected)).astype(str),
+        "token_address": selected["token_address"].astype(str).to_numpy(),
+        "decided_at": decided_at[mask].array,
+        "amount_usd": amount_usd.to_numpy(),
+        "reference_price": reference_price.to_numpy(),
+        "target": (_column(selected, "pnl_pct") > 0).astype(np.int8).where(status[mask] == "closed").to_numpy(),
+    }).sort_values("decided_at", kind="stable", ignore_index=True)
+
+    fills, orders = execution_features(trades, trade_window)
+    rows = _asof(rows, fills, "filled_at", allow_exact_matches=False)
+    rows = _asof(rows, orders, "ordered_at", allow_exact_matches=False)
+
+    if prices is not None and len(prices):
+        rows = _asof(rows, price_features(prices, volatility_window, volume_window), "observed_at", by="token_address")
+    else:
+        for name in ("price", "prev_price", "prev_volume", "price_change_pct", "price_volatility", "volume_ma_5"):
+            rows[name] = np.nan
+        rows["first_seen"] = pd.NaT
+
+    if analyses is not None and len(analyses):
+        rows = _asof(rows, analysis_features(analyses), "analyzed_at", by="token_address")
+    else:
+        for name in ("snif_score", "security_score", "social_sentiment_score", "new_whale_entries",
+                     *FACTOR_SIGNALS):
+            rows[name] = np.nan
+
+    graduated_at = pd.Series(pd.NaT, index=rows.index, dtype="datetime64[ns, UTC]")
+    if migrations is not None and len(migrations):
+        migration = pd.DataFrame({
+            "token_address": migrations["token_address"].to_numpy(),
+            "graduated_at": to_utc(migrations["graduation_timestamp"]).array,
+            "first_trade_at": to_utc(migrations["first_trade_timestamp"]).array
+            if "first_trade_timestamp" in migrations else pd.NaT,
+            "liquidity_at_graduation": _column(migrations, "liquidity_at_graduation").to_numpy(),
+            "volume_at_graduation": _column(migrations, "total_volume_usd").to_numpy(),
+            "total_supply": _column(migrations, "total_supply").to_numpy(),
+            "circulating_supply": _column(migrations, "circulating_supply").to_numpy(),
+        })
+        rows = _asof(rows, migration, "graduated_at", by="token_address")
+        graduated_at = rows["graduated_at"]
+    else:
+        for name in ("first_trade_at", "liquidity_at_graduation", "volume_at_graduation", "total_supply",
+                     "circulating_supply"):
+            rows[name] = np.nan
+
+    decided = pd.DatetimeIndex(rows["decided_at"])
+    origin = graduated_at.fillna(pd.to_datetime(rows["first_trade_at"], utc=True)).fillna(
+        pd.to_datetime(rows["first_seen"], utc=True))
+    graduated = graduated_at.notna().to_numpy()
+
+    out = pd.DataFrame({
+        "trade_id": rows["trade_id"],
+        "token_address": rows["token_address"],
+        "timestamp": decided.asi8 // 1_000_000,
+        "amount_usd": rows["amount_usd"],
+        "price_per_token": rows["reference_price"].fillna(rows["price"]),
+        "slippage": rows["slippage"],
+        "gas_price_avg": rows["gas_price_avg"],
+        "gas_price_std": rows["gas_price_std"],
+        "rpc_latency": rows["rpc_latency"],
+        "security_score": rows["security_score"],
+        "failure_rate": rows["failure_rate"],
+        "social_sentiment_score": rows["social_sentiment_score"],
+        "hour": decided.hour,
+        "day_of_week": decided.dayofweek,
+        "is_weekend": (decided.dayofweek >= 5).astype(np.int8),
+        "liquidity_locked": graduated.astype(np.int8),
+        "price_change_pct": rows["price_change_pct"],
+        "volume_ma_5": rows["volume_ma_5"],
+        "prev_price": rows["prev_price"],
+        "prev_volume": rows["prev_volume"],
+        "price_volatility": rows["price_volatility"],
+        "token_age_hours": (decided - pd.DatetimeIndex(origin)).total_seconds() / 3600,
+        "snif_score": rows["snif_score"],
+        "whale_buy_activity": rows["smart_buyers"],
+        "whale_sell_activity": rows["smart_sellers"],
+        "new_whale_entries": rows["new_whale_entries"],
+        "total_supply": rows["total_supply"].fillna(PUMP_FUN_TOTAL_SUPPLY),
+        "liquidity_usd": rows["factor_liquidity_usd"].fillna(rows["liquidity_at_graduation"]),
+        "volume_24h_usd": rows["factor_volume_usd"].fillna(rows["volume_at_graduation"]),
+        "target": rows["target"],
+    })
+    out["circulating_supply"] = rows["circulating_supply"].fillna(out["total_supply"])
+    out["slippage_amount_interaction"] = out["slippage"] * out["amount_usd"]
+    out["security_sentiment_interaction"] = out["security_score"] * out["social_sentiment_score"]
+    return FEATURE_SCHEMA.cast(out)
+
+
+SOURCE_TIME_COLUMNS = {"trades": "order_time", "prices": "timestamp", "analyses": "analysis_timestamp"}
+
+
+def slice_sources(sources: Dict[str, pd.DataFrame], start, end, lookback_days: float = 7
+                  ) -> Dict[str, pd.DataFrame]:
+    """Rows of each source in ``[start - lookback_days, end)`` (migrations are kept whole).
+
+    Enough history for one incremental run: rolling windows are counted in
+    observations, so they only differ from a full rebuild for series with
+    fewer than ``window`` points inside the lookback. Tokens without a
+    migration record date their age from the first price inside the lookback.
+    """
+    lower = to_utc(pd.Series([start]))[0] - pd.Timedelta(days=lookback_days)
+    upper = to_utc(pd.Series([end]))[0]
+    sliced = {}
+    for name, frame in sources.items():
+        column = SOURCE_TIME_COLUMNS.get(name)
+        if frame is None or column is None or column not in frame:
+            sliced[name] = frame
+            continue
+        moments = to_utc(frame[column])
+        sliced[name] = frame[(moments >= lower) & (moments < upper)]
+    return sliced
+
+
+def days_between(first_day: str, last_day: str) -> Iterable[str]:
+    """``YYYY-MM-DD`` days from ``first_day`` to ``last_day`` inclusive."""
+    return [day.strftime("%Y-%m-%d") for day in pd.date_range(first_day, last_day, freq="D")]
+
+
+def synthetic_sources(rows: int = 1_000_000, tokens: int = 20_000, prices_per_trade: int = 5,
+                      days: int = 30, seed: int = 0) -> Dict[str, pd.DataFrame]:
+    """Random sources with the real schemas, for the benchmark and tests."""
+    rng = np.random.default_rng(seed)
+    start_ms = 1_704_067_200_000  # 2024-01-01
+    span_ms = days * 86_400_000
+    names = np.array([f"Tok{i:07d}" for i in range(tokens)])
+
+    graduated = start_ms - 86_400_000 + rng.integers(0, span_ms, tokens)
+    migrations = pd.DataFrame({
+        "token_address": names,
+        "graduation_timestamp": graduated,
+        "first_trade_timestamp": graduated + rng.integers(0, 600_000, tokens),
+        "liquidity_at_graduation": rng.lognormal(10, 1, tokens),
+        "total_volume_usd": rng.lognormal(9, 1.5, tokens),
+    })
+
+    token_of_trade = rng.integers(0, tokens, rows)
+    order_time = np.sort(start_ms + rng.integers(0, span_ms, rows))
+    failed = rng.random(rows) < 0.05
+    entry_time = np.where(failed, np.nan, order_time + rng.lognormal(6.7, 0.6, rows))
+    trades = pd.DataFrame({
+        "trade_id": np.char.add("t", np.arange(rows).astype(str)),
+        "token_address": names[token_of_trade],
+        "status": np.where(failed, "failed", "closed"),
+        "order_time": order_time,
+        "entry_time": entry_time,
+        "reference_price": rng.lognormal(-9, 2, rows),
+        "entry_slippage": np.abs(rng.normal(0.01, 0.005, rows)),
+        "network_fee": rng.lognormal(-11, 0.5, rows),
+        "amount_quote": rng.uniform(0.05, 2.0, rows),
+        "pnl_pct": rng.normal(0.0, 0.3, rows),
+    })
+
+    points = rows * prices_per_trade
+    prices = pd.DataFrame({
+        "token_address": names[rng.integers(0, tokens, points)],
+        "timestamp": start_ms - 86_400_000 + rng.integers(0, span_ms + 86_400_000, points),
+        "price": rng.lognormal(-9, 2, points),
+        "volume_usd": rng.lognormal(7, 1.5, points),
+    })
+
+    analyzed = max(rows // 5, 1)
+    buyers = rng.integers(0, 12, analyzed)
+    analyses = pd.DataFrame({
+        "token_address": names[rng.integers(0, tokens, analyzed)],
+        "analysis_timestamp": start_ms + rng.integers(0, span_ms, analyzed),
+        "overall_score": rng.random(analyzed),
+        "price_stability_score": rng.random(analyzed),
+        "community_interest_score": rng.random(analyzed),
+        "opportunity_factors": [[f"{_factor_code('{} smart wallets comprando')}|{b}",
+                                 f"{_factor_code('Alta liquidez: ${}')}|{int(l):,}"]
+                                for b, l in zip(buyers, rng.lognormal(10, 1, analyzed))],
+        "risk_factors": [[f"{_factor_code('{} smart wallets vendendo')}|{s}"] for s in rng.integers(0, 5, analyzed)],
+    })
+    return {"trades": trades, "prices": prices, "analyses": analyses, "migrations": migrations}
+
+
+def _benchmark(rows: int = 1_000_000) -> None:
+    """Full build and one incremental day over synthetic sources of ``rows`` trades."""
+    started = time.perf_counter()
+    sources = synthetic_sources(rows)
+    print(f"Synthetic sources: {rows:,} trades, {len(sources['prices']):,} prices, "
+          f"{len(sources['analyses']):,} analyses ({time.perf_counter() - started:.1f} s)")
+
+    started = time.perf_counter()
+    features = build_features(**sources)
+    elapsed = time.perf_counter() - started
+    print(f"Full build: {len(features):,} rows in {elapsed:.1f} s ({len(features) / elapsed:,.0f} rows/s)")
+    print(f"Missing feature values: {features[list(FEATURE_COLUMNS)].isna().mean().mean():.1%}")
+
+    started = time.perf_counter()
+    window = slice_sources(sources, "2024-01-15", "2024-01-16")
+    day = build_features(**window, start="2024-01-15", end="2024-01-16")
+    print(f"One day (7-day lookback): {len(day):,} rows in {time.perf_counter() - started:.1f} s")
+
+
+if __name__ == "__main__":
+    import sys
+
+    _benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
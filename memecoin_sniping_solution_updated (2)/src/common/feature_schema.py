@@ -0,0 +1,306 @@
+"""Versioned registry of the entry model's features: names, order and dtypes.
+
+The feature list used to be repeated by hand: ``expected_features`` in
+``etl/process_data.py``, ``feature1``/``feature2`` in the model trainer and
+an unnamed ``features`` array in the inference API.  ``FEATURE_SCHEMA`` is
+now the single definition, used by:
+
+- **ETL** (``common.feature_pipeline``): ``cast`` writes every batch with the
+  schema's order and compact dtypes, so Parquet files hold ``float32``,
+  ``int8`` and ``bool`` columns instead of ``float64``/``int64``;
+- **training** (``train.py``, ``model_trainer``): ``matrix`` selects the
+  features in order and fails on missing columns, and ``save`` stores the
+  schema next to the model;
+- **inference**: ``vector``/``vectors`` validate a request (named or
+  positional) and return the values in model order using only the standard
+  library, raising ``SchemaError`` on unknown, missing or non-numeric values.
+
+Float32 is enough for every feature: the tree models used here
+(``RandomForestClassifier``, ``XGBClassifier``) convert their input to
+float32 before training and predicting, so wider storage adds nothing they
+can see.  Values keep ~7 significant digits at any magnitude, which covers
+token prices down to 1e-38 and supplies up to 3e38.
+
+Any change to names, order or dtypes must bump ``SCHEMA_VERSION``; the
+``fingerprint`` lets training and inference detect a stale schema file.
+Run ``python feature_schema.py [rows]`` for the size/load-time benchmark.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import math
+import numbers
+import zlib
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+SCHEMA_VERSION = 1
+
+# Nullable integer/boolean columns use pandas' masked dtypes when they hold NaN
+_MASKED_DTYPES = {"int8": "Int8", "int16": "Int16", "int32": "Int32", "int64": "Int64", "bool": "boolean"}
+
+
+class SchemaError(ValueError):
+    """Data does not match the feature schema."""
+
+
+@dataclass(frozen=True)
+class Column:
+    name: str
+    dtype: str
+    nullable: bool = True
+
+
+@dataclass(frozen=True)
+class FeatureSchema:
+    """Ordered model features plus the metadata and target columns stored with them."""
+
+    version: int
+    features: Tuple[Column, ...]
+    metadata: Tuple[Column, ...] = ()
+    target: Optional[Column] = None
+
+    @cached_property
+    def names(self) -> Tuple[str, ...]:
+        """Feature names in model order."""
+        return tuple(column.name for column in self.features)
+
+    @cached_property
+    def _name_set(self) -> frozenset:
+        return frozenset(self.names)
+
+    @property
+    def columns(self) -> Tuple[Column, ...]:
+        """Every stored column: metadata, features, then the target."""
+        return self.metadata + self.features + ((self.target,) if self.target else ())
+
+    @property
+    def dtypes(self) -> Dict[str, str]:
+        return {column.name: column.dtype for column in self.columns}
+
+    @property
+    def fingerprint(self) -> str:
+        """CRC32 of the feature names and dtypes, in order."""
+        text = ",".join(f"{column.name}:{column.dtype}" for column in self.features)
+        return format(zlib.crc32(text.encode("utf-8")), "08x")
+
+    # -- serialization -------------------------------------------------------
+
+    def to_dict(self) -> Dict[str, Any]:
+        def encode(columns: Iterable[Column]) -> List[Dict[str, Any]]:
+            return [{"name": c.name, "dtype": c.dtype, "nullable": c.nullable} for c in columns]
+
+        return {
+            "version": self.version,
+            "fingerprint": self.fingerprint,
+            "features": encode(self.features),
+            "metadata": encode(self.metadata),
+            "target": encode([self.target])[0] if self.target else None,
+        }
+
+    @classmethod
+    def from_dict(cls, document: Mapping[str, Any]) -> "FeatureSchema":
+        def decode(items: Iterable[Mapping[str, Any]]) -> Tuple[Column, ...]:
+            return tuple(Column(item["name"], item["dtype"], bool(item.get("nullable", True))) for item in items)
+
+        target = document.get("target")
+        schema = cls(
+            version=int(document["version"]),
+            features=decode(document["features"]),
+            metadata=decode(document.get("metadata", ())),
+            target=decode([target])[0] if target else None,
+        )
+        expected = document.get("fingerprint")
+        if expected and expected != schema.fingerprint:
+            raise SchemaError(f"Schema fingerprint {schema.fingerprint} does not match the stored {expected}")
+        return schema
+
+    def save(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as handle:
+            json.dump(self.to_dict(), handle, indent=2)
+
+    @classmethod
+    def load(cls, path: str) -> "FeatureSchema":
+        with open(path, encoding="utf-8") as handle:
+            return cls.from_dict(json.load(handle))
+
+    def check_compatible(self, other: "FeatureSchema") -> None:
+        """Raise ``SchemaError`` unless ``other`` has the same features, order and dtypes."""
+        if other.fingerprint != self.fingerprint:
+            raise SchemaError(
+                f"Feature schema v{other.version} ({other.fingerprint}) does not match "
+                f"v{self.version} ({self.fingerprint})"
+            )
+
+    # -- frames (ETL and training) -------------------------------------------
+
+    def missing(self, columns: Iterable[str], require_target: bool = False) -> List[str]:
+        """Schema feature (and optionally target) names absent from ``columns``."""
+        present = set(columns)
+        required = list(self.names) + ([self.target.name] if require_target and self.target else [])
+        return [name for name in required if name not in present]
+
+    def cast(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """``frame`` reduced to the schema's columns, in order, with the schema dtypes.
+
+        Metadata and target columns are optional; every feature is required.
+        Raises ``SchemaError`` for missing features, non-numeric values or
+        nulls in non-nullable columns.
+        """
+        missing = self.missing(frame.columns)
+        if missing:
+            raise SchemaError(f"Missing features: {missing}")
+        data = {}
+        for column in self.columns:
+            if column.name in frame.columns:
+                data[column.name] = _cast_column(frame[column.name], column)
+        return pd.DataFrame(data, index=frame.index)
+
+    def matrix(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """Model input: the features of ``frame`` in order and with the schema dtypes."""
+        return self.cast(frame[[name for name in frame.columns if name in self._name_set]])
+
+    # -- inference (no pandas) -----------------------------------------------
+
+    def vector(self, features: Any) -> List[float]:
+        """Validate one request and return its values in model order.
+
+        ``features`` is either a mapping ``{name: value}`` (any key order) or
+        a sequence already in model order.  Booleans become 0.0/1.0 and
+        ``None`` becomes NaN for nullable features.
+        """
+        if isinstance(features, Mapping):
+            unknown = [name for name in features if name not in self._name_set]
+            if unknown:
+                raise SchemaError(f"Unknown features: {unknown}")
+            missing = [name for name in self.names if name not in features]
+            if missing:
+                raise SchemaError(f"Missing features: {missing}")
+            values = [features[name] for name in self.names]
+        elif isinstance(features, Sequence) and not isinstance(features, (str, bytes)):
+            if len(features) != len(self.features):
+                raise SchemaError(f"Expected {len(self.features)} features, got {len(features)}")
+            values = list(features)
+        else:
+            raise SchemaError(f"Features must be an object or an array, got {type(features).__name__}")
+        return [_scalar(value, column) for value, column in zip(values, self.features)]
+
+    def vectors(self, records: Iterable[Any]) -> List[List[float]]:
+        return [self.vector(record) for record in records]
+
+
+def _cast_column(values: pd.Series, column: Column) -> pd.Series:
+    if column.dtype == "string":
+        return values.astype("string")
+    if values.dtype == object:
+        values = pd.to_numeric(values, errors="coerce")
+    if not (pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(values)):
+        raise SchemaError(f"Column {column.name!r} is not numeric ({values.dtype})")
+    if column.dtype.startswith("float"):
+        return values.astype(column.dtype)
+    if values.isna().any():
+        if not column.nullable:
+            raise SchemaError(f"Column {column.name!r} has nulls")
+        return values.astype(_MASKED_DTYPES[column.dtype])
+    return values.astype(column.dtype)
+
+
+def _scalar(value: Any, column: Column) -> float:
+    if value is None:
+        if not column.nullable:
+            raise SchemaError(f"Feature {column.name!r} cannot be null")
+        return math.nan
+    if isinstance(value, (bool, np.bool_)):
+        return float(value)
+    if not isinstance(value, numbers.Real):
+        raise SchemaError(f"Feature {column.name!r} must be a number, got {type(value).__name__}")
+    value = float(value)
+    if math.isnan(value) and not column.nullable:
+        raise SchemaError(f"Feature {column.name!r} cannot be null")
+    return value
+
+
+def _floats(*names: str) -> Tuple[Column, ...]:
+    return tuple(Column(name, "float32") for name in names)
+
+
+FEATURE_SCHEMA = FeatureSchema(
+    version=SCHEMA_VERSION,
+    features=(
+        *_floats("amount_usd", "price_per_token", "slippage", "gas_price_avg", "gas_price_std",
+                 "rpc_latency", "security_score", "failure_rate", "social_sentiment_score"),
+        Column("hour", "int8", nullable=False),
+        Column("day_of_week", "int8", nullable=False),
+        Column("is_weekend", "bool", nullable=False),
+        Column("liquidity_locked", "bool", nullable=False),
+        *_floats("price_change_pct", "volume_ma_5", "slippage_amount_interaction",
+                 "security_sentiment_interaction", "prev_price", "prev_volume", "price_volatility",
+                 "token_age_hours", "snif_score", "whale_buy_activity", "whale_sell_activity",
+                 "new_whale_entries", "total_supply", "circulating_supply", "liquidity_usd",
+                 "volume_24h_usd"),
+    ),
+    metadata=(
+        Column("trade_id", "string", nullable=False),
+        Column("token_address", "string", nullable=False),
+        Column("timestamp", "int64", nullable=False),
+    ),
+    target=Column("target", "int8"),
+)
+
+
+def _benchmark(rows: int = 1_000_000) -> None:
+    import os
+    import tempfile
+    import time
+
+    import pyarrow.parquet as pq
+
+    from common.feature_pipeline import build_features, synthetic_sources
+
+    compact = build_features(**synthetic_sources(rows=rows))
+    wide = compact.astype({column.name: ("float64" if column.dtype.startswith("float") else "int64")
+                           for column in FEATURE_SCHEMA.columns if column.dtype != "string"})
+    print(f"{len(compact):,} rows, {len(FEATURE_SCHEMA.features)} features (schema v{SCHEMA_VERSION})")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {}
+        for label, frame in (("float64/int64", wide), ("schema dtypes", compact)):
+            path = os.path.join(tmp, f"{label.split()[0].replace('/', '_')}.parquet")
+            frame.to_parquet(path, index=False)
+            timings = []
+            for _ in range(5):
+                started = time.perf_counter()
+                loaded = pq.read_table(path, columns=list(FEATURE_SCHEMA.names)).to_pandas()
+                timings.append(time.perf_counter() - started)
+            memory = loaded.memory_usage(index=False).sum()
+            results[label] = (os.path.getsize(path), min(timings), memory)
+            print(f"{label:>14}: file {os.path.getsize(path) / 1e6:6.1f} MB, "
+                  f"load {min(timings) * 1000:6.0f} ms, in memory {memory / 1e6:6.1f} MB")
+
+    (size_a, load_a, mem_a), (size_b, load_b, mem_b) = results.values()
+    print(f"Reduction: file {1 - size_b / size_a:.0%}, load time {1 - load_b / load_a:.0%}, "
+          f"memory {1 - mem_b / mem_a:.0%}")
+
+    records = compact[list(FEATURE_SCHEMA.names)].head(10_000).to_dict("records")
+    records = [{name: (None if isinstance(v, float) and math.isnan(v) else v) for name, v in r.items()}
+               for r in records]
+    started = time.perf_counter()
+    FEATURE_SCHEMA.vectors(records)
+    print(f"Inference validation: {(time.perf_counter() - started) / len(records) * 1e6:.1f} us per request")
+
+
+if __name__ == "__main__":
+    import os
+    import sys
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    _benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
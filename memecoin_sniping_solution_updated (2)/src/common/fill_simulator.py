@@ -0,0 +1,347 @@
+"""Paper-trading fill simulator: latency, price moves, AMM impact, fees and failures.
+
+Paper mode used to fill every order at exactly the fetched price, so paper
+results said nothing about real execution.  ``FillSimulator`` models what
+happens between the decision (reference price ``p0``) and the swap landing:
+
+1. **Latency** to land, lognormal (``latency_median_ms``, ``latency_sigma``).
+2. **Price move** during that latency: taken from a recorded price path
+   (``moves_from_paths``) or, without one, a driftless geometric random walk
+   with ``volatility`` (std of log price per sqrt(second)).
+3. **AMM impact** of the swap against the pool reserves (constant product,
+   ``impact = amount * (1 - fee) / reserve``; see ``common.execution_planner``).
+4. **Fees**: the pool fee (``fee_bps``) plus a fixed ``network_fee`` per
+   transaction, charged on failed transactions too.
+5. **Failures**: the transaction is dropped with probability
+   ``failure_rate``, or reverts when the price moved more than
+   ``max_slippage`` (the ``min_amount_out`` check).  Failed orders can be
+   resubmitted ``retries`` times, each attempt paying latency and fees again.
+
+Amounts are in the units of the order side: quote for buys, tokens for
+sells; prices are in the reference price's units.  ``slippage`` is the
+adverse move of the execution price (fees excluded) against ``p0`` and
+``cost`` the full execution cost (fees included) as a fraction of the
+notional.
+
+``FillModel.calibrate`` fits latency, volatility, failure rate and network
+fee from logged real trades (ledger items with ``mode == "real"``); the
+failure rate needs the failed entry orders (``status == "failed"`` items,
+see ``TradeLedger.reject``), since closed trades alone cannot show failures.  Every
+step is vectorized with NumPy: ``simulate`` fills millions of orders per
+second, which is what the optimizer's backtests need
+(``TradeMatrix.apply_fills``).
+
+Usage:
+
+    from common.fill_simulator import FillModel, FillSimulator
+
+    simulator = FillSimulator(FillModel.calibrate(real_trades, failures=failed_orders), seed=42)
+    fills = simulator.simulate("buy", amounts, prices, reserve_quote=reserves)
+    fills["success"], fills["price"], fills["cost"]
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import time
+from dataclasses import asdict, dataclass, fields
+from datetime import datetime
+from typing import Any, Dict, Iterable, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+BUY = "buy"
+SELL = "sell"
+
+# Result codes of a simulated transaction
+FILLED = 0
+DROPPED = 1
+REVERTED = 2
+
+
+def _epoch_ms(value: Any) -> Optional[float]:
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return float(value) if value > 1e11 else float(value) * 1000
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp() * 1000
+    except ValueError:
+        return None
+
+
+@dataclass
+class FillModel:
+    """Parameters of the fill simulator (see the module docstring)."""
+
+    latency_median_ms: float = 800.0
+    latency_sigma: float = 0.6
+    volatility: float = 0.003
+    failure_rate: float = 0.05
+    fee_bps: float = 25.0
+    network_fee: float = 0.0
+    max_slippage: float = 0.02
+
+    @classmethod
+    def from_config(cls, config: Optional[Mapping[str, Any]]) -> "FillModel":
+        """Build from a config section; unknown keys (``seed``, ``enabled``...) are ignored."""
+        known = {f.name for f in fields(cls)}
+        return cls(**{key: float(value) for key, value in (config or {}).items() if key in known})
+
+    def to_dict(self) -> Dict[str, float]:
+        return asdict(self)
+
+    @classmethod
+    def calibrate(cls, trades: Iterable[Mapping[str, Any]],
+                  price_paths: Optional[Mapping[str, Tuple[np.ndarray, np.ndarray]]] = None,
+                  base: Optional["FillModel"] = None, prior_weight: float = 20.0,
+                  failures: Optional[Iterable[Mapping[str, Any]]] = None) -> "FillModel":
+        """Fit the model to logged real trades.
+
+        Args:
+            trades: Ledger items.  Only ``mode == "real"`` items are used:
+                latency from ``order_time`` to ``entry_time`` and the median
+                ``network_fee``.
+            price_paths: ``{trade_id: (timestamps_ms, prices)}`` (as returned by
+                ``TradePathStore.path``) used to estimate ``volatility``.
+            base: Model providing the defaults for anything the data does not
+                determine.
+            prior_weight: Pseudo-observations of ``base.failure_rate``, so a
+                short history without failures does not yield a zero rate.
+            failures: Failed entry orders of the same period (``failed``
+                ledger items), also used for the network fee.  Without them
+                ``failure_rate`` stays at ``base.failure_rate``.
+        """
+        base = base or cls()
+        model = cls(**base.to_dict())
+        real = [t for t in trades if t.get("mode") == "real" and t.get("status") != "failed"]
+
+        latencies = []
+        for trade in real:
+            sent, landed = _epoch_ms(trade.get("order_time")), _epoch_ms(trade.get("entry_time"))
+            if sent is not None and landed is not None and landed > sent:
+                latencies.append(landed - sent)
+        if latencies:
+            log_latency = np.log(latencies)
+            model.latency_median_ms = float(np.exp(np.median(log_latency)))
+            if len(latencies) > 1:
+                model.latency_sigma = float(np.std(log_latency, ddof=1))
+
+        failed = [t for t in failures or () if t.get("mode") == "real"]
+        if failures is not None:
+            attempts = len(real) + len(failed)
+            model.failure_rate = (len(failed) + prior_weight * base.failure_rate) / (attempts + prior_weight)
+
+        fees = [float(t["network_fee"]) for t in real + failed if t.get("network_fee") is not None]
+        if fees:
+            model.network_fee = float(np.median(fees))
+
+        vols = []
+        for timestamps, prices in (price_paths or {}).values():
+            timestamps = np.asarray(timestamps, dtype=np.float64)
+            prices = np.asarray(prices, dtype=np.float64)
+            dt = np.diff(timestamps) / 1000
+            valid = (dt > 0) & (prices[1:] > 0) & (prices[:-1] > 0)
+            if valid.sum() >= 2:
+                steps = np.log(prices[1:][valid] / prices[:-1][valid]) / np.sqrt(dt[valid])
+                vols.append(np.std(steps, ddof=1))
+        if vols:
+            model.volatility = float(np.median(vols))
+
+        logger.info("Fill model calibrated from %d real trades, %d failures, %d latencies and %d price paths: %s",
+                    len(real), len(failed), len(latencies), len(vols), model.to_dict())
+        return model
+
+
+def moves_from_paths(paths: Sequence[Tuple[np.ndarray, np.ndarray]], decision_ms: np.ndarray,
+                     latency_ms: np.ndarray) -> np.ndarray:
+    """Price ratio between ``decision_ms + latency_ms`` and ``decision_ms`` on each path.
+
+    Paths are step functions (the last price at or before a time); times before
+    the first point take the first price and times after the last the last one.
+    All paths are searched at once: each gets a time offset larger than any
+    query, so the concatenated timestamps stay sorted.
+    """
+    lengths = np.array([len(p[0]) for p in paths], dtype=np.int64)
+    if not len(paths) or (lengths == 0).any():
+        raise ValueError("every path needs at least one point")
+    starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    times = np.concatenate([np.asarray(p[0], dtype=np.float64) for p in paths])
+    prices = np.concatenate([np.asarray(p[1], dtype=np.float64) for p in paths])
+    first = times[starts]
+    relative = times - np.repeat(first, lengths)
+    decision = np.asarray(decision_ms, dtype=np.float64) - first
+    landing = decision + np.asarray(latency_ms, dtype=np.float64)
+    span = max(relative.max(), landing.max(), decision.max(), 0.0) + 1.0
+    offsets = np.arange(len(paths)) * span
+    keys = relative + np.repeat(offsets, lengths)
+
+    def price_at(moment):
+        index = np.searchsorted(keys, np.maximum(moment, 0.0) + offsets, side="right") - 1
+        return prices[np.clip(index, starts, starts + lengths - 1)]
+
+    return price_at(landing) / price_at(decision)
+
+
+class FillSimulator:
+    """Vectorized fills under a ``FillModel``."""
+
+    def __init__(self, model: Optional[FillModel] = None, seed: Optional[int] = None):
+        self.model = model or FillModel()
+        self.rng = np.random.default_rng(seed)
+
+    @classmethod
+    def from_config(cls, config: Optional[Mapping[str, Any]]) -> "FillSimulator":
+        """Build from a ``fill_model`` config section (model fields plus optional ``seed``)."""
+        config = config or {}
+        return cls(FillModel.from_config(config), seed=config.get("seed"))
+
+    def sample_latency(self, n: int) -> np.ndarray:
+        model = self.model
+        return self.rng.lognormal(math.log(model.latency_median_ms), model.latency_sigma, n)
+
+    def sample_moves(self, latency_ms: np.ndarray) -> np.ndarray:
+        """Price ratio after ``latency_ms`` under a driftless geometric random walk."""
+        scale = self.model.volatility * np.sqrt(latency_ms / 1000)
+        return np.exp(scale * self.rng.standard_normal(len(latency_ms)) - 0.5 * scale ** 2)
+
+    def simulate(self, side: str, amount, price, reserve_quote=None, reserve_base=None,
+                 impact=None, fee_bps=None, move=None, latency_ms=None,
+                 max_slippage: Optional[float] = None, retries: int = 0) -> Dict[str, np.ndarray]:
+        """Simulate one transaction per order (all arguments broadcast together).
+
+        Args:
+            side: ``"buy"`` (``amount`` in quote) or ``"sell"`` (``amount`` in tokens).
+            amount: Order size.
+            price: Reference price at decision time, quote per token.
+            reserve_quote: Quote reserve of the pool (buys); ``None``/``inf``/NaN
+                means no pool impact.
+            reserve_base: Token reserve of the pool (sells), same convention.
+            impact: Precomputed price impact (e.g. from an ``ExecutionPlan``);
+                overrides the reserves.
+            fee_bps: Pool fee; defaults to the model's.
+            move: Price ratio between landing and decision (e.g. from
+                ``moves_from_paths``); sampled when omitted.
+            latency_ms: Latency to land; sampled when omitted.
+            max_slippage: Revert threshold; defaults to the model's
+                (``inf`` disables reverts).
+            retries: Resubmissions of dropped or reverted transactions.
+
+        Returns:
+            Arrays: ``success``, ``reason`` (``FILLED``/``DROPPED``/``REVERTED``),
+            ``attempts``, ``latency_ms`` (total until the last attempt),
+            ``price`` (execution price including the pool fee, NaN when
+            failed), ``amount_out``, ``slippage``, ``fees`` (network fees paid)
+            and ``cost``.
+        """
+        model = self.model
+        amount, price = np.broadcast_arrays(np.asarray(amount, dtype=np.float64),
+                                            np.asarray(price, dtype=np.float64))
+        n = amount.size
+        amount, price = amount.ravel(), price.ravel()
+        fee = np.broadcast_to(np.asarray(model.fee_bps if fee_bps is None else fee_bps, dtype=np.float64) / 10_000, n)
+        limit = model.max_slippage if max_slippage is None else max_slippage
+        effective = amount * (1 - fee)
+
+        if impact is not None:
+            impact = np.broadcast_to(np.asarray(impact, dtype=np.float64), n)
+        else:
+            reserve = reserve_quote if side == BUY else reserve_base
+            if reserve is None:
+                impact = np.zeros(n)
+            else:
+                reserve = np.broadcast_to(np.asarray(reserve, dtype=np.float64), n)
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    impact = np.where(np.isfinite(reserve) & (reserve > 0), effective / reserve, 0.0)
+
+        success = np.zeros(n, dtype=bool)
+        reason = np.full(n, DROPPED, dtype=np.int8)
+        attempts = np.zeros(n, dtype=np.int64)
+        total_latency = np.zeros(n)
+        execution = np.full(n, np.nan)
+        slippage = np.zeros(n)
+        pending = np.arange(n)
+        for attempt in range(retries + 1):
+            count = len(pending)
+            if not count:
+                break
+            latency = self.sample_latency(count) if latency_ms is None else \
+                np.broadcast_to(np.asarray(latency_ms, dtype=np.float64), n)[pending]
+            if move is None or attempt > 0:
+                moves = self.sample_moves(latency)
+            else:
+                moves = np.broadcast_to(np.asarray(move, dtype=np.float64), n)[pending]
+            # Execution price without the pool fee: landing price moved by the swap impact
+            if side == BUY:
+                raw = price[pending] * moves * (1 + impact[pending])
+                adverse = raw / price[pending] - 1
+            else:
+                raw = price[pending] * moves / (1 + impact[pending])
+                adverse = price[pending] / raw - 1
+            dropped = self.rng.random(count) < model.failure_rate
+            reverted = ~dropped & (adverse > limit)
+            filled = ~dropped & ~reverted
+
+            attempts[pending] += 1
+            total_latency[pending] += latency
+            done = pending[filled]
+            success[done] = True
+            reason[done] = FILLED
+            slippage[done] = adverse[filled]
+            execution[done] = (raw / (1 - fee[pending]) if side == BUY else raw * (1 - fee[pending]))[filled]
+            reason[pending[reverted]] = REVERTED
+            pending = pending[~filled]
+
+        fees = attempts * model.network_fee
+        with np.errstate(divide="ignore", invalid="ignore"):
+            if side == BUY:
+                amount_out = np.where(success, amount / execution, 0.0)
+                notional = amount
+                received = amount_out * price
+            else:
+                amount_out = np.where(success, amount * execution, 0.0)
+                notional = amount * price
+                received = amount_out
+            cost = np.where(
+                notional > 0,
+                np.where(success, 1 - (received - fees) / notional if side == SELL else (amount + fees) / received - 1,
+                         fees / notional),
+                0.0,
+            )
+        return {
+            "success": success,
+            "reason": reason,
+            "attempts": attempts,
+            "latency_ms": total_latency,
+            "price": execution,
+            "amount_out": amount_out,
+            "slippage": slippage,
+            "fees": fees,
+            "cost": cost,
+        }
+
+    def fill(self, side: str, amount: float, price: float, **kwargs) -> Dict[str, Any]:
+        """``simulate`` for a single order, as plain Python values."""
+        result = self.simulate(side, [amount], [price], **kwargs)
+        return {key: values[0].item() for key, values in result.items()}
+
+
+def _benchmark(n: int = 2_000_000) -> None:
+    simulator = FillSimulator(seed=0)
+    rng = np.random.default_rng(1)
+    amounts = rng.uniform(0.05, 2.0, n)
+    prices = rng.lognormal(-7, 1, n)
+    reserves = rng.uniform(20, 500, n)
+    started = time.perf_counter()
+    fills = simulator.simulate(BUY, amounts, prices, reserve_quote=reserves, retries=1)
+    elapsed = time.perf_counter() - started
+    print(f"{n:,} fills in {elapsed:.2f} s: {n / elapsed:,.0f} fills/s "
+          f"(success {fills['success'].mean():.1%}, median cost {np.median(fills['cost'][fills['success']]):.2%})")
+
+
+if __name__ == "__main__":
+    _benchmark()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Testes do planejador de execução sobre pools sintéticos."""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.execution_planner import (
+    ExecutionPlanner,
+    PoolReserves,
+    amount_out,
+    max_input_for_slippage,
+    price_impact,
+)
+
+
+def test_constant_product_math():
+    """Saída, impacto e entrada máxima seguem x * y = k."""
+    print("Testando matemática do CPMM...")
+    pool = PoolReserves(reserve_in=100.0, reserve_out=1_000_000.0, fee_bps=0)
+    out = amount_out(10.0, pool)
+    assert out == pytest.approx(1_000_000 * 10 / 110)
+    assert (100 + 10) * (1_000_000 - out) == pytest.approx(100 * 1_000_000)
+    assert price_impact(10.0, pool) == pytest.approx(0.10)
+
+    fee_pool = PoolReserves(100.0, 1_000_000.0, fee_bps=25)
+    size = max_input_for_slippage(fee_pool, 0.02)
+    assert price_impact(size, fee_pool) == pytest.approx(0.02)
+    print("✓ CPMM OK")
+
+
+def test_small_order_is_not_split():
+    """Uma ordem pequena sai inteira em uma única ordem filha."""
+    print("Testando ordem pequena...")
+    pool = PoolReserves(100.0, 1_000_000.0)
+    plan = ExecutionPlanner(max_slippage=0.02).plan(0.5, pool)
+    assert len(plan.children) == 1 and plan.unfilled == 0
+    assert plan.children[0].delay_seconds == 0
+    assert 0 < plan.slippage < 0.02
+    print("✓ Ordem pequena OK")
+
+
+def test_large_order_split_under_max_slippage():
+    """Ordens grandes viram filhas que respeitam o limite, com o resto não executado."""
+    print("Testando divisão de ordem grande...")
+    pool = PoolReserves(100.0, 1_000_000.0)
+    planner = ExecutionPlanner(max_slippage=0.02, window_seconds=10, interval_seconds=2, recovery=0.5)
+    plan = planner.plan(10.0, pool)
+
+    assert len(plan.children) > 1
+    assert [c.delay_seconds for c in plan.children] == sorted(c.delay_seconds for c in plan.children)
+    assert all(c.delay_seconds <= 10 for c in plan.children)
+    assert plan.slippage <= 0.02
+    limit_price = pool.spot_price * 1.02
+    for child in plan.children:
+        # min_amount_out garante o preço limite e deixa folga sobre o esperado
+        assert child.min_amount_out < child.expected_out
+        assert child.amount_in * (1 - pool.fee) / child.min_amount_out == pytest.approx(limit_price)
+    assert plan.unfilled > 0 and plan.filled + plan.unfilled == pytest.approx(10.0)
+
+    # Uma única ordem do mesmo tamanho teria ~10% de impacto
+    assert price_impact(10.0, pool) > 0.09
+
+    # Sem recuperação do pool, só a primeira filha cabe no limite
+    no_recovery = ExecutionPlanner(max_slippage=0.02, recovery=0).plan(10.0, pool)
+    assert len(no_recovery.children) == 1
+    print(f"✓ {len(plan.children)} filhas, slippage {plan.slippage:.2%}")
+
+
+def test_planner_from_trader_config():
+    """max_slippage e a seção execution vêm da config do Trader."""
+    print("Testando from_config...")
+    planner = ExecutionPlanner.from_config({"max_slippage": 0.03, "execution": {"window_seconds": 4}})
+    assert planner.max_slippage == 0.03 and planner.window_seconds == 4
+    print("✓ from_config OK")
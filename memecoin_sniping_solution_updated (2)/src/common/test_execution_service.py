@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""Testes do serviço de execução e do ledger único de trades."""
+
+import os
+import sys
+from decimal import Decimal
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.execution_planner import PoolReserves
+from common.execution_service import (
+    BUY,
+    ExecutionService,
+    Fill,
+    InMemoryLedgerTable,
+    Order,
+    PaperVenue,
+    SELL,
+    TradeLedger,
+    VenueAdapter,
+)
+
+
+class BrokenVenue(VenueAdapter):
+    name = "broken"
+
+    def execute(self, order):
+        raise RuntimeError("rpc down")
+
+
+class RevertingVenue(VenueAdapter):
+    """Envia a transação, que reverte (paga a taxa de rede)."""
+
+    name = "reverting"
+    mode = "real"
+
+    def execute(self, order):
+        return Fill.rejected(order, "slippage exceeded", submitted=True, network_fee=0.00001)
+
+
+def make_service():
+    table = InMemoryLedgerTable()
+    return ExecutionService([PaperVenue(capital=10.0), BrokenVenue(), RevertingVenue()], TradeLedger(table)), table
+
+
+def test_open_and_close_write_one_item():
+    """Entrada e saída gravam um único item com preços e P&L."""
+    print("Testando abertura e fechamento no ledger...")
+    service, table = make_service()
+    trade = service.open_position(Order("token", BUY, size=0.1, price=0.002, metadata={"ab_arm": "B"}))
+    assert trade["status"] == "open" and trade["ab_arm"] == "B"
+    assert trade["amount_quote"] == pytest.approx(1.0)
+    assert trade["amount_tokens"] == pytest.approx(500.0)
+
+    closed = service.close_position(trade, price=0.003, reason="take_profit")
+    assert closed["pnl_pct"] == pytest.approx(0.5)
+    assert closed["pnl_quote"] == pytest.approx(trade["amount_quote"] * 0.5)
+    assert closed["pnl"] == closed["pnl_quote"]
+
+    assert table.writes == 2 and len(table.items) == 1
+    stored = table.items[trade["trade_id"]]
+    assert stored["tradeId"] == stored["trade_id"]
+    assert stored["exit_price"] == Decimal("0.003") and stored["status"] == "closed"
+    assert service.ledger.open_positions() == []
+    print("✓ Ledger OK")
+
+
+def test_paper_venue_pays_pool_impact_both_ways():
+    """Com reservas do pool, a compra paga mais e a venda recebe menos."""
+    print("Testando impacto do pool no PaperVenue...")
+    service, _ = make_service()
+    pool = PoolReserves(reserve_in=20.0, reserve_out=20.0 / 0.002)
+    trade = service.open_position(Order("token", BUY, size=0.2, price=0.002, pool=pool))
+    assert trade["entry_price"] > 0.002 and trade["entry_slippage"] > 0
+
+    closed = service.close_position(trade, price=0.002, reason="stop_loss", pool=pool)
+    assert closed["exit_price"] < 0.002
+    assert closed["pnl"] < 0
+    print(f"✓ Round trip com impacto: P&L {closed['pnl_pct']:.2%}")
+
+
+def test_close_keeps_percent_and_quote_pnl_apart():
+    """Sem valor de entrada conhecido o P&L em moeda fica ausente, nunca recebe o percentual."""
+    print("Testando P&L percentual e em moeda...")
+    table = InMemoryLedgerTable()
+    ledger = TradeLedger(table)
+    trade = {"trade_id": "legacy", "entry_price": 0.002, "status": "open"}
+    order = Order("token", SELL, size=1.0, price=0.001)
+    fill = Fill(order_id=order.order_id, success=True, price=0.001, filled_at="2024-01-01T00:00:00")
+
+    closed = ledger.close(trade, order, fill, "stop_loss")
+    assert closed["pnl_pct"] == pytest.approx(-0.5)
+    assert "pnl" not in closed and "pnl_quote" not in closed
+    assert "pnl" not in table.items["legacy"] and table.items["legacy"]["pnl_pct"] == Decimal("-0.5")
+
+    closed = ledger.close({**trade, "amount_quote": 4.0}, order, fill, "stop_loss")
+    assert closed["pnl_quote"] == pytest.approx(-2.0) and closed["pnl"] == pytest.approx(-2.0)
+    print("✓ P&L percentual e em moeda separados")
+
+
+def test_failed_orders_are_not_recorded():
+    """Ordens rejeitadas antes do envio ou venues com erro não gravam nada."""
+    print("Testando ordens não executadas...")
+    service, table = make_service()
+    assert service.open_position(Order("token", BUY, size=0.1, price=0.0)) is None
+    assert service.open_position(Order("token", BUY, size=0.1, price=1.0, venue="broken")) is None
+    fill = service.execute(Order("token", BUY, size=0.1, price=1.0, venue="missing"))
+    assert isinstance(fill, Fill) and not fill.success and "missing" in fill.error
+    assert table.writes == 0
+    print("✓ Nada gravado para ordens não executadas")
+
+
+def test_submitted_failures_are_recorded_with_fees():
+    """Transações enviadas que falharam viram itens ``failed`` com a taxa paga."""
+    print("Testando registro de ordens falhas...")
+    service, table = make_service()
+    order = Order("token", BUY, size=0.1, price=1.0, venue="reverting", trade_id="t1")
+    assert service.open_position(order) is None
+    item = service.ledger.get("t1")
+    assert item["status"] == "failed" and item["mode"] == "real"
+    assert item["network_fee"] == pytest.approx(0.00001) and item["exit_time"] and item["error"]
+    assert table.writes == 1 and service.ledger.open_positions() == []
+    print("✓ Ordem falha registrada")
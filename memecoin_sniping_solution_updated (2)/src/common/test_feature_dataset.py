@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""Testes do dataset Parquet particionado de features."""
+
+import io
+import json
+import os
+import sys
+import threading
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import boto3
+import pyarrow.fs as pafs
+import pytest
+from botocore.exceptions import ClientError
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.feature_dataset import FeatureDataset, token_bucket
+
+
+class ConditionalS3:
+    """S3 com PutObject condicional; ``rival`` grava antes da próxima escrita do teste."""
+
+    def __init__(self):
+        self.objects = {}
+        self.rival = None
+
+    def get_object(self, Bucket, Key):
+        if Key not in self.objects:
+            raise ClientError({"Error": {"Code": "NoSuchKey"}}, "GetObject")
+        body, etag = self.objects[Key]
+        return {"Body": io.BytesIO(body), "ETag": etag}
+
+    def put_object(self, Bucket, Key, Body, ContentType=None, IfMatch=None, IfNoneMatch=None):
+        if self.rival is not None:
+            rival, self.rival = self.rival, None
+            self.objects[Key] = (json.dumps(rival).encode(), '"rival"')
+        current = self.objects.get(Key)
+        if (IfNoneMatch == "*" and current) or (IfMatch is not None and (not current or current[1] != IfMatch)):
+            raise ClientError({"Error": {"Code": "PreconditionFailed"}}, "PutObject")
+        self.objects[Key] = (Body, f'"{len(self.objects)}-{hash(Body)}"')
+
+
+def make_frame(day, rows=300, tokens=("TokA", "TokB", "TokC"), seed=0):
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp(day, tz="UTC").value // 10 ** 9
+    return pd.DataFrame({
+        "timestamp": start + rng.integers(0, 86_400, rows),
+        "token_address": rng.choice(list(tokens), rows),
+        "price": rng.random(rows),
+        "liquidity_usd": rng.integers(0, 100_000, rows).astype(float),
+        "target": rng.integers(0, 2, rows),
+    })
+
+
+def test_append_is_partitioned_and_append_only(tmp_path):
+    """Cada append cria arquivos novos por partição e registra no manifesto."""
+    print("Testando append particionado...")
+    dataset = FeatureDataset(str(tmp_path), token_buckets=4)
+    first = dataset.append(make_frame("2024-01-01"))
+    paths = {entry["path"] for entry in first}
+    dataset.append(make_frame("2024-01-01", seed=1))
+
+    manifest = FeatureDataset(str(tmp_path)).manifest()
+    assert manifest["token_buckets"] == 4
+    assert paths <= {entry["path"] for entry in manifest["files"]}
+    assert sum(entry["rows"] for entry in manifest["files"]) == 600
+    for entry in manifest["files"]:
+        assert entry["path"].startswith(f"date=2024-01-01/token_bucket={entry['token_bucket']}/")
+    print(f"✓ {len(manifest['files'])} arquivos no manifesto")
+
+
+def test_read_prunes_days_tokens_and_columns(tmp_path):
+    """Últimos N dias só abrem os arquivos desses dias; filtros e colunas descem ao Parquet."""
+    print("Testando leitura com pruning...")
+    dataset = FeatureDataset(str(tmp_path), token_buckets=4)
+    for offset in range(10):
+        dataset.append(make_frame(f"2024-01-{offset + 1:02d}", seed=offset))
+
+    files = dataset.files(start="2024-01-04", end="2024-01-10")
+    assert {entry["date"] for entry in files} == {f"2024-01-{d:02d}" for d in range(4, 11)}
+    recent = dataset.read(days=7, today=date(2024, 1, 10), columns=["price", "target"])
+    assert list(recent.columns) == ["price", "target"]
+    assert len(recent) == sum(entry["rows"] for entry in files)
+
+    only_a = dataset.read(tokens=["TokA"], filters=[("liquidity_usd", ">", 50_000)])
+    assert set(only_a["token_address"]) == {"TokA"} and (only_a["liquidity_usd"] > 50_000).all()
+    assert {entry["token_bucket"] for entry in dataset.files(tokens=["TokA"])} == {token_bucket("TokA", 4)}
+    assert dataset.read(start="2030-01-01").empty
+    print(f"✓ {len(recent)} linhas dos últimos 7 dias")
+
+
+def test_compaction_keeps_rows_and_rebuild(tmp_path):
+    """A compactação junta arquivos pequenos sem perder linhas."""
+    print("Testando compactação...")
+    dataset = FeatureDataset(str(tmp_path), token_buckets=1)
+    frames = [make_frame("2024-01-01", rows=50, seed=i) for i in range(6)]
+    for frame in frames:
+        dataset.append(frame)
+    before = dataset.read().sort_values(["timestamp", "price"]).reset_index(drop=True)
+
+    stats = dataset.compact(small_file_rows=1_000, min_files=4)
+    assert stats == {"partitions": 1, "files_removed": 6, "files_written": 1}
+    assert len(dataset.files()) == 1 and dataset.rows() == 300
+    after = dataset.read().sort_values(["timestamp", "price"]).reset_index(drop=True)
+    pd.testing.assert_frame_equal(before, after)
+    assert dataset.compact(small_file_rows=1_000, min_files=4)["partitions"] == 0
+    assert FeatureDataset(str(tmp_path), token_buckets=1).rebuild_manifest() == 1
+
+    assert dataset.purge(grace_s=0) == 6
+    os.remove(dataset.manifest_path)
+    assert FeatureDataset(str(tmp_path), token_buckets=1).rebuild_manifest() == 1
+    rebuilt = FeatureDataset(str(tmp_path))
+    assert rebuilt.rows() == 300 and rebuilt.manifest()["token_buckets"] == 1
+    print("✓ Compactação OK")
+
+
+def test_compaction_defers_deleting_replaced_files(tmp_path):
+    """Quem leu o manifesto antigo ainda encontra os arquivos até o fim da carência."""
+    print("Testando tombstones da compactação...")
+    dataset = FeatureDataset(str(tmp_path), token_buckets=1)
+    for i in range(4):
+        dataset.append(make_frame("2024-01-01", rows=20, seed=i))
+    stale = FeatureDataset(str(tmp_path))
+    old_files = stale.files()
+
+    dataset.compact(small_file_rows=1_000, min_files=4)
+    assert all(os.path.exists(os.path.join(str(tmp_path), entry["path"])) for entry in old_files)
+    assert len(stale.read()) == 80
+    assert [entry["path"] for entry in dataset.manifest()["tombstones"]] == sorted(e["path"] for e in old_files)
+
+    assert dataset.purge() == 0
+    assert dataset.purge(grace_s=0) == 4
+    assert not any(os.path.exists(os.path.join(str(tmp_path), entry["path"])) for entry in old_files)
+    assert "tombstones" not in dataset.manifest(refresh=True) and dataset.rows() == 80
+    print("✓ Arquivos substituídos só somem depois do purge")
+
+
+def test_concurrent_appends_keep_every_file(tmp_path):
+    """Vários writers simultâneos não perdem entradas do manifesto (lock local)."""
+    print("Testando appends concorrentes...")
+    frames = [make_frame("2024-01-01", rows=40, seed=i) for i in range(8)]
+    threads = [threading.Thread(target=FeatureDataset(str(tmp_path), token_buckets=2).append, args=(frame,))
+               for frame in frames]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    dataset = FeatureDataset(str(tmp_path))
+    assert dataset.rows() == 320 and len(dataset.read()) == 320
+    assert dataset.manifest()["version"] == 8
+    print(f"✓ {len(dataset.files())} arquivos de 8 writers")
+
+
+def test_s3_manifest_retries_on_precondition_failure():
+    """Na S3 a escrita usa If-Match; se outro writer ganhou, a mudança é reaplicada."""
+    print("Testando escrita condicional do manifesto na S3...")
+    s3 = ConditionalS3()
+    dataset = FeatureDataset("bucket/features", filesystem=pafs.S3FileSystem(anonymous=True, region="us-east-1"),
+                             s3_client=s3, manifest_retries=3)
+    first = {"path": "date=2024-01-01/token_bucket=0/part-a.parquet", "rows": 10}
+    dataset._update_manifest(lambda files: files + [first])
+    assert json.loads(s3.objects["features/_manifest.json"][0])["files"] == [first]
+
+    rival = {"path": "date=2024-01-01/token_bucket=1/part-b.parquet", "rows": 5}
+    s3.rival = {"version": 2, "token_buckets": 16, "files": [first, rival]}
+    mine = {"path": "date=2024-01-01/token_bucket=2/part-c.parquet", "rows": 7}
+    manifest = dataset._update_manifest(lambda files: files + [mine])
+    assert manifest["files"] == [first, rival, mine] and manifest["version"] == 3
+    assert json.loads(s3.objects["features/_manifest.json"][0]) == manifest
+    print("✓ Manifesto na S3 sem atualização perdida")
+
+
+def test_s3_requires_conditional_put_support():
+    """Um botocore sem If-Match no PutObject é recusado em vez de falhar a cada escrita."""
+    print("Testando exigência de PutObject condicional...")
+    client = boto3.client("s3", region_name="us-east-1", aws_access_key_id="x", aws_secret_access_key="x")
+    members = client.meta.service_model.operation_model("PutObject").input_shape.members
+    assert "IfMatch" in members and "IfNoneMatch" in members
+    FeatureDataset("bucket/features", filesystem=pafs.S3FileSystem(anonymous=True, region="us-east-1"),
+                   s3_client=client)
+
+    class OldShape:
+        members = {"Bucket": None, "Key": None, "Body": None}
+
+    class OldClient:
+        class meta:
+            class service_model:
+                @staticmethod
+                def operation_model(name):
+                    return type("Operation", (), {"input_shape": OldShape})
+
+    with pytest.raises(RuntimeError, match="conditional PutObject"):
+        FeatureDataset("bucket/features", filesystem=pafs.S3FileSystem(anonymous=True, region="us-east-1"),
+                       s3_client=OldClient())
+    print("✓ SDK sem escrita condicional recusado")
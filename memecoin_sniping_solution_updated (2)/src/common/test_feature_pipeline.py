@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""Testes do pipeline de features a partir das fontes reais."""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.feature_pipeline import (
+    FEATURE_COLUMNS,
+    build_features,
+    days_between,
+    group_rolling,
+    parse_factor,
+    slice_sources,
+    synthetic_sources,
+)
+from common.execution_service import (
+    BUY,
+    ExecutionService,
+    Fill,
+    InMemoryLedgerTable,
+    Order,
+    TradeLedger,
+    VenueAdapter,
+    from_dynamodb,
+)
+
+
+class ScriptedVenue(VenueAdapter):
+    """Devolve fills com horários e taxas fixos (compras) e sai ao preço da ordem."""
+
+    name = "scripted"
+    mode = "real"
+
+    def __init__(self, entries):
+        self.entries = dict(entries)
+
+    def execute(self, order):
+        if order.side != BUY:
+            return Fill(order.order_id, True, price=order.price, amount_tokens=order.size,
+                        amount_quote=order.size * order.price)
+        filled_at, fee, success = self.entries[order.created_at]
+        if not success:
+            return Fill.rejected(order, "reverted", submitted=True, network_fee=fee)
+        return Fill(order.order_id, True, price=order.price, amount_tokens=1.0 / order.price, amount_quote=1.0,
+                    network_fee=fee, filled_at=filled_at)
+
+
+def test_group_rolling_matches_pandas():
+    """Média e desvio por grupo iguais ao rolling do pandas."""
+    print("Testando rolling vetorizado por grupo...")
+    rng = np.random.default_rng(0)
+    groups = np.sort(rng.integers(0, 50, 2_000))
+    values = rng.normal(size=2_000)
+    values[rng.random(2_000) < 0.1] = np.nan
+    mean, std = group_rolling(values, groups, window=5, min_periods=2)
+
+    series = pd.Series(values).groupby(groups)
+    expected_mean = series.rolling(5, min_periods=2).mean().to_numpy()
+    expected_std = series.rolling(5, min_periods=2).std().to_numpy()
+    assert np.allclose(mean, expected_mean, equal_nan=True)
+    assert np.allclose(std, expected_std, equal_nan=True)
+    print("✓ Rolling igual ao pandas")
+
+
+def test_features_from_sources():
+    """Valores de um trade montados à mão a partir do ledger, preços, análise e migração."""
+    print("Testando features de um trade...")
+    trades = pd.DataFrame({
+        "trade_id": ["old", "new"],
+        "token_address": ["TokA", "TokA"],
+        "status": ["closed", "closed"],
+        "order_time": ["2024-01-06T10:00:00+00:00", "2024-01-06T12:00:00+00:00"],
+        "entry_time": ["2024-01-06T10:00:01+00:00", "2024-01-06T12:00:02+00:00"],
+        "reference_price": [0.001, 0.002],
+        "entry_slippage": [0.02, 0.5],
+        "network_fee": [0.00001, 0.00003],
+        "amount_quote": [1.0, 2.0],
+        "pnl_pct": [-0.1, 0.3],
+    })
+    prices = pd.DataFrame({
+        "token_address": ["TokA"] * 3,
+        "timestamp": ["2024-01-06T11:00:00+00:00", "2024-01-06T11:30:00+00:00", "2024-01-06T12:30:00+00:00"],
+        "price": [0.0015, 0.0018, 0.5],
+        "volume_usd": [100.0, 300.0, 1e9],
+    })
+    analyses = pd.DataFrame({
+        "token_address": ["TokA"] * 2,
+        "analysis_timestamp": ["2024-01-06T09:00:00+00:00", "2024-01-06T11:00:00+00:00"],
+        "overall_score": [0.5, 0.8],
+        "price_stability_score": [0.4, 0.6],
+        "community_interest_score": [0.5, 0.75],
+        "opportunity_factors": [["2 smart wallets comprando"], ["5 smart wallets comprando", "Alta liquidez: $50,000"]],
+        "risk_factors": [[], ["1 smart wallets vendendo"]],
+    })
+    migrations = pd.DataFrame({
+        "token_address": ["TokA"],
+        "graduation_timestamp": ["2024-01-06T06:00:00+00:00"],
+        "liquidity_at_graduation": [10_000.0],
+        "total_volume_usd": [5_000.0],
+    })
+    row = build_features(trades, prices, analyses, migrations, quote_usd=150.0).iloc[-1]
+
+    assert row["trade_id"] == "new" and row["target"] == 1
+    assert row["amount_usd"] == pytest.approx(300.0)
+    assert row["price_per_token"] == pytest.approx(0.002)
+    assert row["slippage"] == pytest.approx(0.02)  # só o fill anterior, nunca o próprio
+    assert row["rpc_latency"] == pytest.approx(1_000.0)
+    assert row["prev_price"] == pytest.approx(0.0015)
+    assert row["price_change_pct"] == pytest.approx(0.0018 / 0.0015 - 1)
+    assert row["volume_ma_5"] == pytest.approx(200.0) and row["prev_volume"] == pytest.approx(100.0)
+    assert row["snif_score"] == pytest.approx(80.0)
+    assert row["social_sentiment_score"] == pytest.approx(0.5)
+    assert row["whale_buy_activity"] == 5 and row["whale_sell_activity"] == 1 and row["new_whale_entries"] == 3
+    assert row["liquidity_usd"] == pytest.approx(50_000.0) and row["volume_24h_usd"] == pytest.approx(5_000.0)
+    assert row["token_age_hours"] == pytest.approx(6.0) and row["liquidity_locked"] == 1
+    assert row["hour"] == 12 and row["is_weekend"] == 1
+    assert parse_factor("a|1") == (None, pytest.approx(np.nan, nan_ok=True))
+    print("✓ Features de um trade OK")
+
+
+def test_execution_features_from_ledger_writes():
+    """Taxa de rede, latência e falhas vêm dos itens que o ledger realmente grava."""
+    print("Testando features de execução a partir do ledger...")
+    venue = ScriptedVenue({
+        "2024-01-06T10:00:00": ("2024-01-06T10:00:01", 0.00001, True),
+        "2024-01-06T10:30:00": ("2024-01-06T10:30:01", 0.00002, False),
+        "2024-01-06T11:00:00": ("2024-01-06T11:00:02", 0.00003, True),
+        "2024-01-06T12:00:00": ("2024-01-06T12:00:01", 0.00005, True),
+    })
+    table = InMemoryLedgerTable()
+    service = ExecutionService([venue], TradeLedger(table))
+    for created_at in venue.entries:
+        order = Order("TokA", BUY, size=1.0, price=0.002, size_unit="quote", venue="scripted",
+                      trade_id=created_at, created_at=created_at)
+        trade = service.open_position(order)
+        if trade:
+            service.close_position(trade, price=0.003, reason="take_profit")
+
+    trades = pd.DataFrame([from_dynamodb(item) for item in table.items.values()])
+    assert (trades["status"] == "failed").sum() == 1
+    row = build_features(trades).set_index("trade_id").loc["2024-01-06T12:00:00"]
+    assert row["gas_price_avg"] == pytest.approx(0.00002)
+    assert row["gas_price_std"] == pytest.approx(np.std([0.00001, 0.00003], ddof=1))
+    assert row["rpc_latency"] == pytest.approx(1_500.0)
+    assert row["failure_rate"] == pytest.approx(1 / 3)
+    print("✓ Features de execução preenchidas pelo ledger")
+
+
+def test_no_future_leakage():
+    """Alterar dados posteriores a cada decisão não muda nenhuma feature."""
+    print("Testando ausência de vazamento de dados futuros...")
+    sources = synthetic_sources(rows=3_000, tokens=100, days=5, seed=1)
+    cutoff = pd.Timestamp("2024-01-03", tz="UTC").value // 1_000_000
+    baseline = build_features(**sources, end="2024-01-03")
+
+    future = {name: frame.copy() for name, frame in sources.items()}
+    prices, analyses, trades = future["prices"], future["analyses"], future["trades"]
+    prices.loc[prices["timestamp"] >= cutoff, ["price", "volume_usd"]] *= 1_000
+    analyses.loc[analyses["analysis_timestamp"] >= cutoff, "overall_score"] = -1.0
+    later = trades["order_time"] >= cutoff
+    trades.loc[later, "entry_slippage"] = 9.9
+    trades.loc[later, "status"] = "failed"
+    future["migrations"]["liquidity_at_graduation"] = future["migrations"]["liquidity_at_graduation"].where(
+        future["migrations"]["graduation_timestamp"] < cutoff, 1e12)
+
+    changed = build_features(**future, end="2024-01-03")
+    pd.testing.assert_frame_equal(baseline, changed)
+    print(f"✓ {len(baseline)} linhas sem vazamento")
+
+
+def test_daily_runs_match_full_build():
+    """Rodar dia a dia gera as mesmas linhas que o processamento completo."""
+    print("Testando execução incremental por dia...")
+    sources = synthetic_sources(rows=2_000, tokens=80, days=4, seed=2)
+    full = build_features(**sources)
+    days = days_between("2024-01-01", "2024-01-04")
+    daily = pd.concat([build_features(**sources, start=day, end=pd.Timestamp(day) + pd.Timedelta(days=1))
+                       for day in days], ignore_index=True)
+    pd.testing.assert_frame_equal(full, daily)
+    assert list(full.columns[3:-1]) == list(FEATURE_COLUMNS)
+    print(f"✓ {len(days)} dias = processamento completo")
+
+
+def test_sliced_day_matches_full_build():
+    """Com lookback suficiente, o dia calculado só com a janela recente é igual ao completo."""
+    print("Testando dia com fontes recortadas...")
+    sources = synthetic_sources(rows=3_000, tokens=40, days=6, seed=3)
+    full = build_features(**sources, start="2024-01-05", end="2024-01-06")
+    window = slice_sources(sources, "2024-01-05", "2024-01-06", lookback_days=3)
+    assert len(window["prices"]) < len(sources["prices"])
+    day = build_features(**window, start="2024-01-05", end="2024-01-06")
+    graduated = full["liquidity_locked"] == 1  # sem migração, a idade vem do primeiro preço na janela
+    pd.testing.assert_frame_equal(full[graduated], day[graduated])
+    pd.testing.assert_frame_equal(full.drop(columns="token_age_hours"), day.drop(columns="token_age_hours"))
+    print(f"✓ {len(full)} linhas iguais com 3 dias de lookback")
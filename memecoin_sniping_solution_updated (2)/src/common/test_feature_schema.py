@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Testes do registro de schema das features."""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.feature_pipeline import build_features, synthetic_sources
+from common.feature_schema import FEATURE_SCHEMA, Column, FeatureSchema, SchemaError
+
+
+def test_pipeline_writes_compact_dtypes(tmp_path):
+    """O pipeline grava float32/int8/bool e o Parquet preserva os tipos."""
+    print("Testando tipos compactos no Parquet...")
+    features = build_features(**synthetic_sources(rows=2_000, tokens=50, days=2))
+    assert list(features.columns) == [column.name for column in FEATURE_SCHEMA.columns]
+    path = tmp_path / "features.parquet"
+    features.to_parquet(path, index=False)
+    loaded = pd.read_parquet(path)
+    for column in FEATURE_SCHEMA.features + (FEATURE_SCHEMA.target,):
+        assert str(loaded[column.name].dtype) == column.dtype, column.name
+    assert loaded["is_weekend"].dtype == bool and loaded["price_per_token"].dtype == np.float32
+    print(f"✓ {len(loaded)} linhas com os tipos do schema v{FEATURE_SCHEMA.version}")
+
+
+def test_cast_and_matrix_fail_fast():
+    """Colunas ausentes, texto ou nulos em colunas obrigatórias geram SchemaError."""
+    print("Testando validação de DataFrames...")
+    frame = pd.DataFrame({name: [1.0, 2.0] for name in FEATURE_SCHEMA.names})
+    frame["target"] = [0, 1]
+    frame["extra"] = ["a", "b"]
+    matrix = FEATURE_SCHEMA.matrix(frame[list(reversed(frame.columns))])
+    assert tuple(matrix.columns) == FEATURE_SCHEMA.names
+
+    with pytest.raises(SchemaError, match="slippage"):
+        FEATURE_SCHEMA.cast(frame.drop(columns="slippage"))
+    with pytest.raises(SchemaError, match="hour"):
+        FEATURE_SCHEMA.cast(frame.assign(hour=[1.0, np.nan]))
+    with pytest.raises(SchemaError, match="amount_usd"):
+        FEATURE_SCHEMA.cast(frame.assign(amount_usd=pd.to_datetime(["2024-01-01", "2024-01-02"])))
+    assert str(FEATURE_SCHEMA.cast(frame.assign(target=[1, np.nan]))["target"].dtype) == "Int8"
+    print("✓ Erros de schema detectados")
+
+
+def test_inference_vector_reorders_and_validates():
+    """Requisições nomeadas são reordenadas; erros de nome, tamanho e tipo são rejeitados."""
+    print("Testando validação de requisições de inferência...")
+    request = {name: float(i) for i, name in reversed(list(enumerate(FEATURE_SCHEMA.names)))}
+    request["is_weekend"] = True
+    request["snif_score"] = None
+    vector = FEATURE_SCHEMA.vector(request)
+    assert vector[0] == 0.0 and vector[FEATURE_SCHEMA.names.index("is_weekend")] == 1.0
+    assert np.isnan(vector[FEATURE_SCHEMA.names.index("snif_score")])
+    assert FEATURE_SCHEMA.vectors([list(range(29))]) == [[float(i) for i in range(29)]]
+
+    with pytest.raises(SchemaError, match="Unknown"):
+        FEATURE_SCHEMA.vector({**request, "feature1": 1.0})
+    with pytest.raises(SchemaError, match="Missing"):
+        FEATURE_SCHEMA.vector({k: v for k, v in request.items() if k != "liquidity_usd"})
+    with pytest.raises(SchemaError, match="Expected 29"):
+        FEATURE_SCHEMA.vector([1.0, 2.0])
+    with pytest.raises(SchemaError, match="number"):
+        FEATURE_SCHEMA.vector({**request, "amount_usd": "10"})
+    with pytest.raises(SchemaError, match="null"):
+        FEATURE_SCHEMA.vector({**request, "hour": None})
+    print("✓ Requisições validadas")
+
+
+def test_saved_schema_roundtrip_and_compatibility(tmp_path):
+    """O schema salvo com o modelo é relido igual; outra versão das features é incompatível."""
+    print("Testando schema salvo junto do modelo...")
+    path = str(tmp_path / "model.schema.json")
+    FEATURE_SCHEMA.save(path)
+    assert FeatureSchema.load(path) == FEATURE_SCHEMA
+    FEATURE_SCHEMA.check_compatible(FeatureSchema.load(path))
+
+    old = FeatureSchema(version=0, features=(Column("feature1", "float32"), Column("feature2", "float32")))
+    with pytest.raises(SchemaError, match="does not match"):
+        FEATURE_SCHEMA.check_compatible(old)
+    document = FEATURE_SCHEMA.to_dict()
+    document["features"] = document["features"][::-1]
+    with pytest.raises(SchemaError, match="fingerprint"):
+        FeatureSchema.from_dict(document)
+    print("✓ Schema salvo OK")
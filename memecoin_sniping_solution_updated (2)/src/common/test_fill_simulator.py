@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""Testes do simulador de fills do paper trading."""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.execution_planner import PoolReserves, amount_out
+from common.fill_simulator import (
+    DROPPED,
+    FILLED,
+    REVERTED,
+    FillModel,
+    FillSimulator,
+    moves_from_paths,
+)
+
+
+def test_fill_matches_constant_product_without_latency():
+    """Sem volatilidade nem falhas, o fill é o swap do CPMM."""
+    print("Testando fill contra o CPMM...")
+    simulator = FillSimulator(FillModel(volatility=0.0, failure_rate=0.0, network_fee=0.001))
+    pool = PoolReserves(reserve_in=100.0, reserve_out=50_000.0)
+    fill = simulator.fill("buy", 2.0, pool.spot_price, reserve_quote=pool.reserve_in)
+
+    assert fill["success"] and fill["reason"] == FILLED
+    assert fill["amount_out"] == pytest.approx(amount_out(2.0, pool))
+    assert fill["slippage"] == pytest.approx(2.0 * (1 - pool.fee) / 100.0)
+    # Custo = impacto + taxa do pool + taxa de rede
+    spent = 2.0 + 0.001
+    assert fill["cost"] == pytest.approx(spent / (fill["amount_out"] * pool.spot_price) - 1)
+
+    sell = simulator.fill("sell", 1_000.0, pool.spot_price, reserve_base=pool.reserve_out)
+    assert sell["amount_out"] == pytest.approx(amount_out(1_000.0, pool.reversed()))
+    print("✓ Fill igual ao swap do CPMM")
+
+
+def test_failures_reverts_and_retries():
+    """Falhas seguem failure_rate; movimentos acima de max_slippage revertem."""
+    print("Testando falhas e reenvios...")
+    simulator = FillSimulator(FillModel(failure_rate=0.2, volatility=0.0, network_fee=0.01), seed=3)
+    fills = simulator.simulate("buy", np.ones(50_000), 1.0)
+    assert (fills["reason"] == DROPPED).mean() == pytest.approx(0.2, abs=0.01)
+    failed = ~fills["success"]
+    assert np.isnan(fills["price"][failed]).all()
+    assert np.allclose(fills["cost"][failed], 0.01)  # só a taxa de rede perdida
+
+    retried = simulator.simulate("buy", np.ones(50_000), 1.0, retries=2)
+    assert retried["success"].mean() == pytest.approx(1 - 0.2 ** 3, abs=0.01)
+    assert retried["attempts"].max() == 3
+
+    simulator.model.failure_rate = 0.0
+    assert simulator.fill("buy", 1.0, 1.0, move=1.05)["reason"] == REVERTED
+    assert simulator.fill("buy", 1.0, 1.0, move=1.01)["reason"] == FILLED
+    print("✓ Falhas e reenvios OK")
+
+
+def test_moves_from_recorded_paths():
+    """O preço de chegada vem do caminho registrado (função degrau)."""
+    print("Testando movimento a partir de caminhos registrados...")
+    paths = [
+        (np.array([0, 1_000, 2_000]), np.array([1.0, 1.1, 1.2])),
+        (np.array([10_000, 10_500]), np.array([2.0, 1.0])),
+    ]
+    moves = moves_from_paths(paths, decision_ms=[500, 10_000], latency_ms=[1_000, 100_000])
+    assert moves == pytest.approx([1.1, 0.5])
+    print("✓ Movimentos dos caminhos OK")
+
+
+def test_calibrate_from_real_trades():
+    """Latência, falhas, taxa de rede e volatilidade vêm dos trades reais."""
+    print("Testando calibração...")
+    trades = [
+        {"mode": "real", "status": "closed", "order_time": "2024-01-01T00:00:00",
+         "entry_time": f"2024-01-01T00:00:0{i}.500", "network_fee": 0.00002}
+        for i in range(4)
+    ] + [{"mode": "paper", "entry_time": "x"}] * 10
+    failures = [{"mode": "real", "status": "failed", "network_fee": 0.00002}] * 2 + [{"mode": "paper"}] * 5
+    rng = np.random.default_rng(0)
+    times = np.arange(0, 600_000, 1_000)
+    prices = np.exp(np.cumsum(0.01 * rng.standard_normal(len(times))))
+    base = FillModel(failure_rate=0.05)
+    model = FillModel.calibrate(trades, {"t": (times, prices)}, base=base, prior_weight=4, failures=failures)
+
+    assert model.latency_median_ms == pytest.approx(np.sqrt(1500 * 2500))
+    assert model.failure_rate == pytest.approx((2 + 4 * 0.05) / (6 + 4))
+    assert model.network_fee == pytest.approx(0.00002)
+    assert model.volatility == pytest.approx(0.01, rel=0.1)
+    # Sem as ordens falhas, trades fechados não dizem nada sobre a taxa de falha
+    assert FillModel.calibrate(trades, base=base, prior_weight=4).failure_rate == 0.05
+    print(f"✓ Modelo calibrado: {model.to_dict()}")
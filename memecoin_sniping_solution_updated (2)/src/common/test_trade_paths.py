@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""Testes para o armazenamento colunar de caminhos de preço."""
+
+import io
+import json
+import os
+import sys
+import tempfile
+from datetime import datetime, timezone
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.trade_paths import (
+    TradePathStore,
+    TradePathWriter,
+    compact_json_logs,
+    sync_from_s3,
+    sync_to_s3,
+    to_epoch_ms,
+)
+
+
+class FakeS3:
+    """S3 em memória com paginação de list_objects_v2."""
+
+    def __init__(self, objects):
+        self.objects = dict(objects)
+        self.modified = {}
+
+    def get_paginator(self, name):
+        store = self
+
+        class Paginator:
+            def paginate(self, Bucket, Prefix):
+                keys = sorted(k for k in store.objects if k.startswith(Prefix))
+                for start in range(0, len(keys), 2):
+                    yield {"Contents": [{"Key": k, "Size": len(store_bytes(store.objects[k])),
+                                         "LastModified": store.modified.get(k, datetime(2024, 1, 1, tzinfo=timezone.utc))}
+                                        for k in keys[start:start + 2]]}
+
+        return Paginator()
+
+    def get_object(self, Bucket, Key):
+        return {"Body": io.BytesIO(store_bytes(self.objects[Key]))}
+
+    def upload_file(self, filename, bucket, key):
+        with open(filename, "rb") as handle:
+            self.objects[key] = handle.read()
+        self.modified[key] = datetime.now(timezone.utc)
+
+    def delete_objects(self, Bucket, Delete):
+        for obj in Delete["Objects"]:
+            self.objects.pop(obj["Key"], None)
+
+    def download_file(self, bucket, key, filename):
+        with open(filename, "wb") as handle:
+            handle.write(self.objects[key])
+
+
+def store_bytes(value):
+    return value if isinstance(value, bytes) else json.dumps(value).encode()
+
+
+def test_writer_and_zero_copy_reads():
+    """Cada trade vira uma fatia contígua, lida como visão do arquivo mapeado."""
+    print("Testando escrita e leitura por trade...")
+    with tempfile.TemporaryDirectory() as root:
+        writer = TradePathWriter(root)
+        writer.extend([
+            ("b", "2024-01-01T00:00:02Z", 2.2),
+            ("a", "2024-01-01T00:00:02Z", 1.2),
+            ("a", "2024-01-01T00:00:01Z", 1.0),
+            ("b", "2024-01-01T00:00:01Z", 2.0),
+        ])
+        writer.flush()
+
+        store = TradePathStore(root)
+        timestamps, prices = store.path("a")
+        assert prices.tolist() == [1.0, 1.2]
+        assert timestamps.tolist() == [to_epoch_ms("2024-01-01T00:00:01Z"), to_epoch_ms("2024-01-01T00:00:02Z")]
+        # Sem cópia: a fatia aponta para o memmap do segmento
+        assert isinstance(prices.base, np.memmap) or isinstance(prices, np.memmap)
+        assert store.price_paths(["a", "b", "missing"]).keys() == {"a", "b"}
+    print("✓ Leituras por fatia OK")
+
+
+def test_compaction_merges_parts_and_days():
+    """Partes do mesmo dia são fundidas; trades que cruzam dias continuam ordenados."""
+    print("Testando compactação...")
+    with tempfile.TemporaryDirectory() as root:
+        writer = TradePathWriter(root, max_buffered_points=2)
+        writer.extend([
+            ("a", "2024-01-01T23:59:58Z", 1.0),
+            ("a", "2024-01-01T23:59:59Z", 1.1),
+            ("a", "2024-01-02T00:00:00Z", 1.2),
+            ("c", "2024-01-01T10:00:00Z", 5.0),
+        ])
+        writer.flush()
+
+        store = TradePathStore(root)
+        assert len(store.segments("2024-01-01")) == 2
+        assert store.compact() == 4
+        assert len(store.segments("2024-01-01")) == 1
+        assert store.path("a")[1].tolist() == [1.0, 1.1, 1.2]
+        assert store.path("c")[1].tolist() == [5.0]
+    print("✓ Compactação OK")
+
+
+def test_compact_json_logs_from_s3():
+    """Logs JSON legados do Executor são convertidos e enviados ao S3."""
+    print("Testando conversão dos logs JSON...")
+    s3 = FakeS3({
+        "price_logs/TOKEN/2024/01/01/trade_1_2024-01-01T00:00:01.json":
+            {"tokenAddress": "TOKEN", "timestamp": "2024-01-01T00:00:01", "price": 1.0},
+        "price_logs/TOKEN/2024/01/01/trade_1_2024-01-01T00:00:02.json":
+            {"tokenAddress": "TOKEN", "timestamp": "2024-01-01T00:00:02", "price": 1.5},
+        "price_logs/TOKEN/2024/01/01/trade_2_2024-01-01T00:00:01.json":
+            {"tokenAddress": "TOKEN", "timestamp": "2024-01-01T00:00:01", "price": 3.0},
+        "price_logs/TOKEN/2024/01/01/broken_1.json": {"tokenAddress": "TOKEN"},
+        # Lote NDJSON do PriceLogBuffer
+        "price_logs/ndjson/2024/01/01/part-000002-abcd.ndjson": (
+            b'{"tradeId": "trade_3", "timestamp": "2024-01-01T00:00:02", "price": 2.5}\n'
+            b'{"tradeId": "trade_3", "timestamp": "2024-01-01T00:00:01", "price": 2.0}\n'
+        ),
+    })
+    with tempfile.TemporaryDirectory() as build, tempfile.TemporaryDirectory() as replica:
+        stats = compact_json_logs(s3, "bucket", build)
+        assert stats["points"] == 5 and stats["skipped"] == 1
+        assert stats["uploaded"] == 4  # ts, price, trade, index de um segmento
+        assert sync_from_s3(s3, "bucket", replica) == 4
+        paths = TradePathStore(replica).price_paths(["trade_1", "trade_2", "trade_3"])
+        assert {k: v.tolist() for k, v in paths.items()} == {
+            "trade_1": [1.0, 1.5], "trade_2": [3.0], "trade_3": [2.0, 2.5]}
+    print("✓ Conversão OK")
+
+
+def test_repeated_compaction_does_not_duplicate_points():
+    """Reconverter todo o price_logs/ substitui o dia no S3 em vez de somar outra cópia."""
+    print("Testando recompactação idempotente...")
+    s3 = FakeS3({
+        "price_logs/ndjson/2024/01/01/part-1.ndjson": (
+            b'{"tradeId": "t1", "timestamp": "2024-01-01T00:00:01", "price": 1.0}\n'
+            b'{"tradeId": "t1", "timestamp": "2024-01-01T00:00:02", "price": 1.1}\n'
+        ),
+        # Segmento de uma versão anterior (nome aleatório) com os mesmos pontos
+        "trade_paths/2024-01-01/segment-0a1b2c3d.index.json": b"{}",
+    })
+    with tempfile.TemporaryDirectory() as replica:
+        for run in range(2):
+            with tempfile.TemporaryDirectory() as build:
+                compact_json_logs(s3, "bucket", build)
+            sync_from_s3(s3, "bucket", replica)
+            assert TradePathStore(replica).path("t1")[1].tolist() == [1.0, 1.1], run
+        assert sorted(k for k in s3.objects if k.startswith("trade_paths/")) == [
+            f"trade_paths/2024-01-01/segment{suffix}" for suffix in (".index.json", ".price.npy", ".trade.npy", ".ts.npy")]
+
+        # Um ponto novo do mesmo trade e um repetido: o dia é reescrito sem duplicatas
+        s3.objects["price_logs/ndjson/2024/01/01/part-2.ndjson"] = (
+            b'{"tradeId": "t1", "timestamp": "2024-01-01T00:00:02", "price": 1.1}\n'
+            b'{"tradeId": "t1", "timestamp": "2024-01-01T00:00:03", "price": 1.2}\n'
+        )
+        with tempfile.TemporaryDirectory() as build:
+            compact_json_logs(s3, "bucket", build)
+        assert sync_from_s3(s3, "bucket", replica) > 0
+        assert TradePathStore(replica).path("t1")[1].tolist() == [1.0, 1.1, 1.2]
+    print("✓ Sem pontos duplicados")
+
+
+def test_compaction_of_persistent_root_drops_duplicates():
+    """Um root reaproveitado recompacta o segmento anterior junto com as partes novas."""
+    print("Testando recompactação local...")
+    with tempfile.TemporaryDirectory() as root:
+        for _ in range(2):
+            writer = TradePathWriter(root)
+            writer.extend([("a", "2024-01-01T00:00:01Z", 1.0), ("a", "2024-01-01T00:00:02Z", 1.1)])
+            writer.flush()
+            assert TradePathStore(root).compact() == 2
+        store = TradePathStore(root)
+        assert store.path("a")[1].tolist() == [1.0, 1.1]
+        assert sorted(os.listdir(os.path.join(root, "2024-01-01")))[0] == "segment.index.json"
+        assert sync_to_s3(FakeS3({}), "bucket", root) == 4
+    print("✓ Recompactação local OK")
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""Testes para as versões imutáveis de configuração."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.versioned_config import FrozenDict, VersionedConfig, content_hash
+
+BASE = {
+    "analyzer": {"quality_score_threshold": 60, "weights": [0.6, 0.4]},
+    "trader": {"high_score_sl": 0.10, "high_score_tp": 0.30},
+    "optimizer": {"search": {"n_trials": 512}},
+}
+
+
+def test_changes_create_new_version_with_shared_sections():
+    """Aplicar um delta não altera a versão original e compartilha as seções intactas."""
+    print("Testando versões com compartilhamento estrutural...")
+    base = VersionedConfig.from_dict(BASE)
+    candidate = base.with_changes({"trader.high_score_sl": 0.12, "analyzer": {"quality_score_threshold": 70}})
+
+    assert base["trader"]["high_score_sl"] == 0.10
+    assert candidate["trader"]["high_score_sl"] == 0.12
+    assert candidate.get_path("analyzer.quality_score_threshold") == 70
+    assert candidate["optimizer"] is base["optimizer"]
+    assert candidate.parent_hash == base.hash and candidate.hash != base.hash
+    assert base.with_changes({"trader.high_score_sl": 0.10}) is base
+
+    try:
+        base["trader"]["high_score_sl"] = 0.5
+        raise AssertionError("FrozenDict deveria ser imutável")
+    except TypeError:
+        pass
+    print("✓ Versões independentes")
+
+
+def test_hash_is_content_based_and_diff_is_minimal():
+    """O hash independe da ordem das chaves; o diff lista só as folhas alteradas."""
+    print("Testando hash de conteúdo e diff...")
+    reordered = {"optimizer": BASE["optimizer"], "trader": BASE["trader"], "analyzer": BASE["analyzer"]}
+    assert content_hash(BASE) == content_hash(reordered) == VersionedConfig.from_dict(BASE).hash
+    assert content_hash({"a": 1}) != content_hash({"a": 1.5})
+
+    base = VersionedConfig.from_dict(BASE)
+    candidate = base.with_changes({"trader.high_score_tp": 0.45, "trader.new_key": True})
+    assert base.diff(candidate) == {
+        "trader.high_score_tp": (0.30, 0.45),
+        "trader.new_key": (None, True),
+    }
+    assert candidate.to_dict()["analyzer"]["weights"] == [0.6, 0.4]
+    assert isinstance(candidate.root["trader"], FrozenDict)
+    print("✓ Hash e diff OK")
@@ -0,0 +1,411 @@
+"""Compact columnar store for per-trade price paths.
+
+The executor historically logged every price point as its own JSON object in
+S3 (``price_logs/{token}/{date}/{trade}_{ts}.json``) plus one DynamoDB item.
+That is expensive to write and impractical to read back for backtests.  This
+module stores the same data as per-day columnar segments:
+
+    {root}/{YYYY-MM-DD}/{part}.ts.npy       int64  epoch milliseconds
+    {root}/{YYYY-MM-DD}/{part}.price.npy    float64 prices
+    {root}/{YYYY-MM-DD}/{part}.trade.npy    int32  index into the trade list
+    {root}/{YYYY-MM-DD}/{part}.index.json   trade ids and [start, stop) ranges
+
+Within a segment rows are sorted by (trade, timestamp), so a trade's path is
+a contiguous slice.  Segments are opened with ``np.load(mmap_mode="r")`` and
+``TradePathStore.path`` returns views into the mapped files, so reading a
+trade costs no copy unless its points span several parts of a day.
+
+Compaction merges the parts of a day into one segment with the fixed name
+``segment`` and drops duplicate points (same trade and timestamp), so
+re-running ``compact_json_logs`` over the whole ``price_logs/`` prefix
+rebuilds each day instead of adding another copy of it.  ``sync_to_s3``
+overwrites the day's objects and deletes the ones the local day no longer
+has; ``sync_from_s3`` mirrors them back, replacing changed files.
+
+Usage:
+
+    writer = TradePathWriter("/tmp/trade_paths")
+    writer.append("trade_1", "2024-01-01T00:00:00", 0.0012)
+    writer.flush()
+
+    store = TradePathStore("/tmp/trade_paths")
+    timestamps, prices = store.path("trade_1")
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+import uuid
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+_DAY_PATTERN = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+# Name of the single segment a day is compacted into
+SEGMENT_NAME = "segment"
+_SEGMENT_SUFFIXES = (".ts.npy", ".price.npy", ".trade.npy", ".index.json")
+
+
+def to_epoch_ms(timestamp) -> int:
+    """Convert an ISO string, datetime or epoch (s or ms) into epoch milliseconds."""
+    if isinstance(timestamp, (int, float, np.integer, np.floating)):
+        value = float(timestamp)
+        return int(value if value > 1e11 else value * 1000)
+    if isinstance(timestamp, datetime):
+        moment = timestamp
+    else:
+        moment = datetime.fromisoformat(str(timestamp).replace("Z", "+00:00"))
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp() * 1000)
+
+
+def day_of(epoch_ms: int) -> str:
+    return datetime.fromtimestamp(epoch_ms / 1000, tz=timezone.utc).strftime("%Y-%m-%d")
+
+
+def write_segment(directory: str, part: str, points: Mapping[str, List[Tuple[int, float]]]) -> int:
+    """Write one immutable segment for ``{trade_id: [(epoch_ms, price), ...]}``.
+
+    Args:
+        directory: Day directory that receives the segment files.
+        part: Segment name (unique within the day).
+        points: Price points grouped by trade id.
+
+    Returns:
+        Number of rows written.
+    """
+    os.makedirs(directory, exist_ok=True)
+    trade_ids = sorted(points)
+    sizes = np.array([len(points[t]) for t in trade_ids], dtype=np.int64)
+    total = int(sizes.sum())
+
+    timestamps = np.empty(total, dtype=np.int64)
+    prices = np.empty(total, dtype=np.float64)
+    trades = np.repeat(np.arange(len(trade_ids), dtype=np.int32), sizes)
+    stops = np.cumsum(sizes)
+    starts = stops - sizes
+    for i, trade_id in enumerate(trade_ids):
+        rows = sorted(points[trade_id])
+        timestamps[starts[i]:stops[i]] = [ts for ts, _ in rows]
+        prices[starts[i]:stops[i]] = [price for _, price in rows]
+
+    np.save(os.path.join(directory, f"{part}.ts.npy"), timestamps)
+    np.save(os.path.join(directory, f"{part}.price.npy"), prices)
+    np.save(os.path.join(directory, f"{part}.trade.npy"), trades)
+    # The index is written last: a segment without it is ignored by readers
+    with open(os.path.join(directory, f"{part}.index.json"), "w") as handle:
+        json.dump({"trades": trade_ids, "starts": starts.tolist(), "stops": stops.tolist()}, handle)
+    return total
+
+
+class TradePathWriter:
+    """Buffers price points and flushes them as per-day segments."""
+
+    def __init__(self, root: str, max_buffered_points: int = 100_000):
+        self.root = root
+        self.max_buffered_points = max_buffered_points
+        self._buffer: Dict[str, Dict[str, List[Tuple[int, float]]]] = defaultdict(lambda: defaultdict(list))
+        self._buffered = 0
+
+    def __len__(self) -> int:
+        return self._buffered
+
+    def append(self, trade_id: str, timestamp, price: float) -> None:
+        epoch_ms = to_epoch_ms(timestamp)
+        self._buffer[day_of(epoch_ms)][trade_id].append((epoch_ms, float(price)))
+        self._buffered += 1
+        if self._buffered >= self.max_buffered_points:
+            self.flush()
+
+    def extend(self, points: Iterable[Tuple[str, object, float]]) -> None:
+        for trade_id, timestamp, price in points:
+            self.append(trade_id, timestamp, price)
+
+    def flush(self) -> List[str]:
+        """Write buffered points; returns the segment paths (without extension) written."""
+        written = []
+        for day, points in self._buffer.items():
+            part = f"part-{datetime.now(timezone.utc).strftime('%H%M%S')}-{uuid.uuid4().hex[:8]}"
+            write_segment(os.path.join(self.root, day), part, points)
+            written.append(os.path.join(self.root, day, part))
+        self._buffer.clear()
+        self._buffered = 0
+        return written
+
+
+class _Segment:
+    """Memory-mapped segment."""
+
+    __slots__ = ("timestamps", "prices", "trades", "ranges")
+
+    def __init__(self, directory: str, part: str):
+        base = os.path.join(directory, part)
+        with open(f"{base}.index.json") as handle:
+            index = json.load(handle)
+        self.timestamps = np.load(f"{base}.ts.npy", mmap_mode="r")
+        self.prices = np.load(f"{base}.price.npy", mmap_mode="r")
+        self.trades = np.load(f"{base}.trade.npy", mmap_mode="r")
+        self.ranges = {
+            trade_id: (start, stop)
+            for trade_id, start, stop in zip(index["trades"], index["starts"], index["stops"])
+        }
+
+
+class TradePathStore:
+    """Read side of the store: maps segments lazily and slices trade paths."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self._segments: Dict[str, List[_Segment]] = {}
+        self._trade_days: Optional[Dict[str, List[str]]] = None
+
+    def days(self) -> List[str]:
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(d for d in os.listdir(self.root) if _DAY_PATTERN.match(d))
+
+    def segments(self, day: str) -> List[_Segment]:
+        if day not in self._segments:
+            directory = os.path.join(self.root, day)
+            parts = sorted(
+                name[: -len(".index.json")] for name in os.listdir(directory) if name.endswith(".index.json")
+            ) if os.path.isdir(directory) else []
+            self._segments[day] = [_Segment(directory, part) for part in parts]
+        return self._segments[day]
+
+    def _days_by_trade(self) -> Dict[str, List[str]]:
+        if self._trade_days is None:
+            self._trade_days = defaultdict(list)
+            for day in self.days():
+                for trade_id in {t for segment in self.segments(day) for t in segment.ranges}:
+                    self._trade_days[trade_id].append(day)
+        return self._trade_days
+
+    def trade_ids(self) -> List[str]:
+        return sorted(self._days_by_trade())
+
+    def path(self, trade_id: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Return ``(timestamps_ms, prices)`` for a trade.
+
+        When the trade lives in a single segment the arrays are read-only views
+        into the memory-mapped files; otherwise the pieces are concatenated.
+        """
+        pieces = []
+        for day in self._days_by_trade().get(trade_id, []):
+            for segment in self.segments(day):
+                bounds = segment.ranges.get(trade_id)
+                if bounds is not None:
+                    start, stop = bounds
+                    pieces.append((segment.timestamps[start:stop], segment.prices[start:stop]))
+        if not pieces:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+        if len(pieces) == 1:
+            return pieces[0]
+        timestamps = np.concatenate([p[0] for p in pieces])
+        prices = np.concatenate([p[1] for p in pieces])
+        order = np.argsort(timestamps, kind="stable")
+        return timestamps[order], prices[order]
+
+    def price_paths(self, trade_ids: Iterable[str]) -> Dict[str, np.ndarray]:
+        """Prices only, keyed by trade id (trades without points are omitted)."""
+        paths = {}
+        for trade_id in trade_ids:
+            _, prices = self.path(trade_id)
+            if len(prices):
+                paths[trade_id] = prices
+        return paths
+
+    def compact_day(self, day: str) -> int:
+        """Merge all parts of a day into its ``segment``, dropping duplicate points.
+
+        A point is identified by its trade id and timestamp; when the same
+        point appears in several parts the last one read wins.
+
+        Returns:
+            Row count of the day after compaction.
+        """
+        segments = self.segments(day)
+        directory = os.path.join(self.root, day)
+        parts = sorted(name[: -len(".index.json")] for name in os.listdir(directory)
+                       if name.endswith(".index.json")) if segments else []
+        if parts == [SEGMENT_NAME] or not segments:
+            return sum(len(s.timestamps) for s in segments)
+        points: Dict[str, Dict[int, float]] = defaultdict(dict)
+        for segment in segments:
+            for trade_id, (start, stop) in segment.ranges.items():
+                points[trade_id].update(zip(segment.timestamps[start:stop].tolist(),
+                                            segment.prices[start:stop].tolist()))
+        old_files = [name for name in os.listdir(directory) if name.endswith(".npy") or name.endswith(".json")]
+        # Built outside the day directory so readers never pick up a half-written segment
+        staging = os.path.join(self.root, f".staging-{uuid.uuid4().hex[:8]}")
+        rows = write_segment(staging, SEGMENT_NAME, {t: list(p.items()) for t, p in points.items()})
+        # Old indexes go first so a concurrent reader never sees duplicated rows; os.replace
+        # keeps the inodes of files still memory-mapped by readers, and the new index is moved last
+        for name in old_files:
+            if name.endswith(".index.json"):
+                os.remove(os.path.join(directory, name))
+        new_files = [f"{SEGMENT_NAME}{suffix}" for suffix in _SEGMENT_SUFFIXES]
+        for name in new_files:
+            os.replace(os.path.join(staging, name), os.path.join(directory, name))
+        os.rmdir(staging)
+        for name in old_files:
+            if name not in new_files and not name.endswith(".index.json"):
+                os.remove(os.path.join(directory, name))
+        del self._segments[day]
+        self._trade_days = None
+        logger.info("Compacted %s: %d parts -> 1 segment (%d rows, %d duplicate points dropped)",
+                    day, len(segments), rows, sum(len(s.timestamps) for s in segments) - rows)
+        return rows
+
+    def compact(self) -> int:
+        """Compact every day; returns the total row count."""
+        return sum(self.compact_day(day) for day in self.days())
+
+
+def _parse_json_log_key(key: str) -> Optional[str]:
+    """Extract the trade id from ``price_logs/{token}/{Y}/{m}/{d}/{trade}_{ts}.json``."""
+    name = key.rsplit("/", 1)[-1]
+    if not name.endswith(".json") or "_" not in name:
+        return None
+    return name[: -len(".json")].rsplit("_", 1)[0]
+
+
+def _append_ndjson_log(s3_client, bucket: str, key: str, writer: "TradePathWriter",
+                       stats: Dict[str, int]) -> None:
+    """Append a batched log (one JSON record with ``tradeId`` per line) to ``writer``."""
+    body = s3_client.get_object(Bucket=bucket, Key=key)["Body"].read().decode("utf-8")
+    for line in body.splitlines():
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            writer.append(record["tradeId"], record["timestamp"], float(record["price"]))
+            stats["points"] += 1
+        except (KeyError, TypeError, ValueError) as e:
+            logger.warning("Skipping malformed line in price log %s: %s", key, e)
+
+
+def compact_json_logs(s3_client, bucket: str, root: str, source_prefix: str = "price_logs/",
+                      dest_prefix: Optional[str] = "trade_paths/",
+                      max_buffered_points: int = 100_000) -> Dict[str, int]:
+    """Convert the JSON price logs into columnar segments.
+
+    Reads both the legacy per-point objects and the batched NDJSON objects
+    written by the executor's ``PriceLogBuffer``.
+
+    Args:
+        s3_client: boto3 S3 client.
+        bucket: Bucket holding the JSON logs (and receiving the segments).
+        root: Local directory where the segments are built (e.g. under /tmp).
+        source_prefix: Prefix of the legacy JSON logs.
+        dest_prefix: Prefix the compacted segments are uploaded to; ``None``
+            keeps them local only.
+        max_buffered_points: Points buffered before an intermediate part is written.
+
+    Returns:
+        Counters: ``objects`` read, ``points`` converted, ``skipped`` objects and
+        ``uploaded`` files.
+    """
+    writer = TradePathWriter(root, max_buffered_points=max_buffered_points)
+    stats = {"objects": 0, "points": 0, "skipped": 0, "uploaded": 0}
+    paginator = s3_client.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=bucket, Prefix=source_prefix):
+        for obj in page.get("Contents", []):
+            stats["objects"] += 1
+            if obj["Key"].endswith(".ndjson"):
+                _append_ndjson_log(s3_client, bucket, obj["Key"], writer, stats)
+                continue
+            trade_id = _parse_json_log_key(obj["Key"])
+            if trade_id is None:
+                stats["skipped"] += 1
+                continue
+            try:
+                body = json.loads(s3_client.get_object(Bucket=bucket, Key=obj["Key"])["Body"].read())
+                writer.append(trade_id, body["timestamp"], float(body["price"]))
+                stats["points"] += 1
+            except (KeyError, TypeError, ValueError) as e:
+                logger.warning("Skipping malformed price log %s: %s", obj["Key"], e)
+                stats["skipped"] += 1
+    writer.flush()
+    TradePathStore(root).compact()
+    if dest_prefix is not None:
+        stats["uploaded"] = sync_to_s3(s3_client, bucket, root, dest_prefix)
+    logger.info("JSON price logs compacted: %s", stats)
+    return stats
+
+
+def _list_keys(s3_client, bucket: str, prefix: str) -> List[Dict]:
+    objects = []
+    for page in s3_client.get_paginator("list_objects_v2").paginate(Bucket=bucket, Prefix=prefix):
+        objects.extend(page.get("Contents", []))
+    return objects
+
+
+def sync_to_s3(s3_client, bucket: str, root: str, prefix: str = "trade_paths/") -> int:
+    """Upload every segment file under ``root``; returns the number of files uploaded.
+
+    Each local day replaces its S3 counterpart: objects under ``{prefix}{day}/``
+    that the local day no longer has (superseded parts and segments) are
+    deleted once the new files are uploaded, index files first.
+    """
+    uploaded = 0
+    for day in TradePathStore(root).days():
+        directory = os.path.join(root, day)
+        names = sorted(os.listdir(directory), key=lambda n: (n.endswith(".index.json"), n))
+        for name in names:
+            s3_client.upload_file(os.path.join(directory, name), bucket, f"{prefix}{day}/{name}")
+            uploaded += 1
+        keep = {f"{prefix}{day}/{name}" for name in names}
+        stale = [obj["Key"] for obj in _list_keys(s3_client, bucket, f"{prefix}{day}/") if obj["Key"] not in keep]
+        stale.sort(key=lambda key: not key.endswith(".index.json"))
+        for start in range(0, len(stale), 1000):
+            s3_client.delete_objects(Bucket=bucket, Delete={
+                "Objects": [{"Key": key} for key in stale[start:start + 1000]], "Quiet": True})
+        if stale:
+            logger.info("Deleted %d superseded objects under %s%s/", len(stale), prefix, day)
+    return uploaded
+
+
+def _changed(obj: Dict, path: str) -> bool:
+    """Whether the listed S3 object differs from the local copy (size or newer upload)."""
+    if obj.get("Size", os.path.getsize(path)) != os.path.getsize(path):
+        return True
+    modified = obj.get("LastModified")
+    return modified is not None and modified.timestamp() > os.path.getmtime(path)
+
+
+def sync_from_s3(s3_client, bucket: str, root: str, prefix: str = "trade_paths/") -> int:
+    """Mirror the S3 segments into ``root``; returns the number of files fetched.
+
+    Files are downloaded when missing locally or when the S3 object changed
+    (different size or uploaded after the local copy); local files of a synced day that S3 no longer has are removed.
+    """
+    fetched = 0
+    remote: Dict[str, set] = defaultdict(set)
+    for obj in _list_keys(s3_client, bucket, prefix):
+        relative = obj["Key"][len(prefix):]
+        if relative.count("/") != 1 or not _DAY_PATTERN.match(relative.split("/")[0]):
+            continue
+        day, name = relative.split("/")
+        remote[day].add(name)
+        target = os.path.join(root, relative)
+        if os.path.exists(target) and not _changed(obj, target):
+            continue
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        s3_client.download_file(bucket, obj["Key"], target)
+        fetched += 1
+    for day, names in remote.items():
+        directory = os.path.join(root, day)
+        for name in os.listdir(directory):
+            if name not in names and (name.endswith(".npy") or name.endswith(".json")):
+                os.remove(os.path.join(directory, name))
+    return fetched
@@ -0,0 +1,219 @@
+"""Immutable, content-addressed configuration versions.
+
+Agent configurations are nested JSON documents.  Copying and mutating them
+in place is error prone (a shallow ``dict.copy()`` shares every section with
+the original), so configurations are represented as frozen trees instead:
+
+* ``FrozenDict`` is a read-only mapping; lists become tuples.
+* Every node carries a content hash computed Merkle-style from its children,
+  so the hash of a configuration identifies it exactly and is computed once
+  per node.
+* ``VersionedConfig.with_changes`` applies a delta and returns a new version
+  that shares every untouched section with its parent (structural sharing);
+  only the nodes on the path to a changed value are rebuilt.
+* ``diff`` skips any subtree whose hash matches, so comparing two versions
+  costs time proportional to the changed sections.
+
+Usage:
+
+    from common.versioned_config import VersionedConfig
+
+    base = VersionedConfig.from_dict(config)
+    candidate = base.with_changes({"trader.high_score_sl": 0.12})
+    candidate.hash, base.diff(candidate)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import Any, Dict, Iterator, Mapping, Optional, Tuple
+
+HASH_LENGTH = 16
+
+
+def _digest(payload: str) -> str:
+    return hashlib.sha256(payload.encode()).hexdigest()[:HASH_LENGTH]
+
+
+class FrozenDict(Mapping):
+    """Read-only mapping with a cached Merkle content hash."""
+
+    __slots__ = ("_data", "_hash")
+
+    def __init__(self, data: Mapping[str, Any]):
+        self._data = {str(key): freeze(value) for key, value in data.items()}
+        self._hash: Optional[str] = None
+
+    def __getitem__(self, key: str) -> Any:
+        return self._data[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __hash__(self) -> int:
+        return hash(self.content_hash)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, FrozenDict):
+            return self.content_hash == other.content_hash
+        return isinstance(other, Mapping) and thaw(self) == thaw(other)
+
+    def __repr__(self) -> str:
+        return f"FrozenDict({self._data!r})"
+
+    @property
+    def content_hash(self) -> str:
+        if self._hash is None:
+            parts = [f"{json.dumps(key)}:{content_hash(self._data[key])}" for key in sorted(self._data)]
+            self._hash = _digest("{" + ",".join(parts) + "}")
+        return self._hash
+
+    def _replace(self, key: str, value: Any) -> "FrozenDict":
+        """New node with one child replaced; other children are shared, not copied."""
+        node = FrozenDict.__new__(FrozenDict)
+        node._data = dict(self._data)
+        node._data[key] = freeze(value)
+        node._hash = None
+        return node
+
+
+def freeze(value: Any) -> Any:
+    """Recursively convert dicts/lists into ``FrozenDict``/tuples."""
+    if isinstance(value, FrozenDict):
+        return value
+    if isinstance(value, Mapping):
+        return FrozenDict(value)
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def thaw(value: Any) -> Any:
+    """Convert a frozen tree back into plain (JSON-serializable) dicts and lists."""
+    if isinstance(value, Mapping):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [thaw(item) for item in value]
+    return value
+
+
+def content_hash(value: Any) -> str:
+    """Content hash of any configuration value (dicts are hashed order-independently)."""
+    if isinstance(value, FrozenDict):
+        return value.content_hash
+    if isinstance(value, Mapping):
+        return FrozenDict(value).content_hash
+    if isinstance(value, (list, tuple)):
+        return _digest("[" + ",".join(content_hash(item) for item in value) + "]")
+    return _digest(json.dumps(value, default=str))
+
+
+def _split(path: str) -> Tuple[str, ...]:
+    return tuple(path.split("."))
+
+
+def _flatten(delta: Mapping[str, Any], prefix: Tuple[str, ...] = ()) -> Iterator[Tuple[Tuple[str, ...], Any]]:
+    """Yield ``(path, value)`` pairs from dotted keys and/or nested dicts."""
+    for key, value in delta.items():
+        path = prefix + _split(key)
+        if isinstance(value, Mapping) and not isinstance(value, FrozenDict):
+            yield from _flatten(value, path)
+        else:
+            yield path, value
+
+
+def _set_in(node: FrozenDict, path: Tuple[str, ...], value: Any) -> FrozenDict:
+    head, rest = path[0], path[1:]
+    if not rest:
+        return node._replace(head, value)
+    child = node.get(head)
+    if not isinstance(child, FrozenDict):
+        child = FrozenDict({})
+    return node._replace(head, _set_in(child, rest, value))
+
+
+class VersionedConfig(Mapping):
+    """A frozen configuration identified by its content hash."""
+
+    __slots__ = ("root", "parent_hash")
+
+    def __init__(self, root: FrozenDict, parent_hash: Optional[str] = None):
+        self.root = root
+        self.parent_hash = parent_hash
+
+    @classmethod
+    def from_dict(cls, config: Mapping[str, Any]) -> "VersionedConfig":
+        if isinstance(config, VersionedConfig):
+            return config
+        return cls(freeze(config))
+
+    def __getitem__(self, key: str) -> Any:
+        return self.root[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.root)
+
+    def __len__(self) -> int:
+        return len(self.root)
+
+    def __repr__(self) -> str:
+        return f"VersionedConfig(hash={self.hash!r}, parent={self.parent_hash!r})"
+
+    @property
+    def hash(self) -> str:
+        return self.root.content_hash
+
+    def get_path(self, path: str, default: Any = None) -> Any:
+        node: Any = self.root
+        for key in _split(path):
+            if not isinstance(node, Mapping) or key not in node:
+                return default
+            node = node[key]
+        return node
+
+    def with_changes(self, delta: Mapping[str, Any]) -> "VersionedConfig":
+        """Return a new version with ``delta`` applied.
+
+        ``delta`` maps dotted paths (``"trader.high_score_sl"``) or nested
+        dicts to new values.  Sections not on a changed path are shared with
+        this version.
+        """
+        root = self.root
+        for path, value in _flatten(delta):
+            root = _set_in(root, path, value)
+        if root.content_hash == self.hash:
+            return self
+        return VersionedConfig(root, parent_hash=self.hash)
+
+    def diff(self, other: "VersionedConfig") -> Dict[str, Tuple[Any, Any]]:
+        """Changed leaves as ``{dotted_path: (value_here, value_there)}``."""
+        changes: Dict[str, Tuple[Any, Any]] = {}
+        _diff(self.root, other.root, (), changes)
+        return changes
+
+    def to_dict(self) -> Dict[str, Any]:
+        return thaw(self.root)
+
+
+_MISSING = object()
+
+
+def _diff(left: Any, right: Any, path: Tuple[str, ...], changes: Dict[str, Tuple[Any, Any]]) -> None:
+    if left is right:
+        return
+    if isinstance(left, FrozenDict) and isinstance(right, FrozenDict):
+        if left.content_hash == right.content_hash:
+            return
+        for key in sorted(set(left) | set(right)):
+            _diff(left.get(key, _MISSING), right.get(key, _MISSING), path + (key,), changes)
+        return
+    if left is not _MISSING and right is not _MISSING and content_hash(left) == content_hash(right):
+        return
+    changes[".".join(path)] = (
+        None if left is _MISSING else thaw(left),
+        None if right is _MISSING else thaw(right),
+    )
@@ -8,9 +8,11 @@ demonstrates reading the SQS queue URL from the configuration file
 instead of relying solely on environment variables.
 """
 
+import hmac
 import json
 import logging
 import asyncio
+import os
 from typing import Dict, List, Optional
 
 import boto3
@@ -32,6 +34,57 @@ SQS_QUEUE_URL: str = CONFIG.get("discoverer", {}).get("sqs_queue_url") or \
     boto3.client("sqs").get_queue_url(QueueName="DiscovererQueue")["QueueUrl"]
 MIGRATION_TRACKING_TABLE: str = CONFIG.get("discoverer", {}).get("migration_table", "PumpSwapMigrationTable")
 
+# Value Helius sends in the Authorization header of webhook deliveries
+WEBHOOK_AUTH_TOKEN: Optional[str] = os.environ.get("HELIUS_WEBHOOK_AUTH_TOKEN") or \
+    CONFIG.get("discoverer", {}).get("webhook_auth_token")
+
+# Wrapped SOL is the quote side of every swap, not the token being traded
+WSOL_MINT = "So11111111111111111111111111111111111111112"
+# Swaps per SQS message; keeps each message well below the 256 KB limit
+SWAP_BATCH_SIZE = 500
+
+
+def swaps_from_webhook(transactions: List[Dict[str, any]]) -> List[Dict[str, any]]:
+    """Extract wallet swaps from a Helius enhanced-transaction webhook.
+
+    The webhook is registered for the smart money wallets, so the fee payer
+    of each ``SWAP`` transaction is the wallet.  A token transfer into the
+    wallet is a buy, one out of it is a sell; ``amount`` is the token
+    quantity.  Returns swaps in the format of ``SmartMoneyIndex.ingest``.
+    """
+    swaps = []
+    for tx in transactions:
+        if tx.get("type") != "SWAP" or not tx.get("feePayer"):
+            continue
+        wallet = tx["feePayer"]
+        for transfer in tx.get("tokenTransfers") or []:
+            mint = transfer.get("mint")
+            if not mint or mint == WSOL_MINT:
+                continue
+            if transfer.get("toUserAccount") == wallet:
+                side = "buy"
+            elif transfer.get("fromUserAccount") == wallet:
+                side = "sell"
+            else:
+                continue
+            swaps.append({
+                "mint": mint,
+                "wallet": wallet,
+                "side": side,
+                "amount": float(transfer.get("tokenAmount") or 0),
+                "timestamp": tx.get("timestamp"),
+            })
+    return swaps
+
+
+def smart_money_messages(transactions: List[Dict[str, any]]) -> List[Dict[str, any]]:
+    """Batch the swaps of a webhook into ``smart_money_swaps`` messages for the Analyzer."""
+    swaps = swaps_from_webhook(transactions)
+    return [
+        {"event_type": "smart_money_swaps", "swaps": swaps[i:i + SWAP_BATCH_SIZE]}
+        for i in range(0, len(swaps), SWAP_BATCH_SIZE)
+    ]
+
 
 class PumpSwapDiscoverer:
     """Discoverer class that uses the config system.
@@ -57,7 +110,7 @@ class PumpSwapDiscoverer:
         """Send a discovery message to the configured SQS queue."""
         try:
             self.sqs.send_message(QueueUrl=SQS_QUEUE_URL, MessageBody=json.dumps(message))
-            logger.info("Sent migration message to SQS")
+            logger.info("Sent %s message to SQS", message.get("event_type", "migration"))
         except Exception as exc:
             logger.error("Failed to send message to SQS: %s", exc)
 
@@ -90,29 +143,53 @@ class PumpSwapDiscoverer:
             # sleep for a configured interval (default 60s)
             await asyncio.sleep(CONFIG.get("discoverer", {}).get("poll_interval", 60))
 
-    def process_webhook(self, webhook_data: Dict[str, any]) -> None:
-        """Process a webhook from an external service.
+    def process_webhook(self, webhook_data: List[Dict[str, any]]) -> int:
+        """Publish the smart money swaps of a Helius webhook to SQS.
 
-        In a production system this method would parse the webhook body,
-        validate it and push relevant events to SQS.  Here it just logs
-        the call for demonstration.
+        The Analyzer consumes the ``smart_money_swaps`` messages from the same
+        queue and feeds its ``SmartMoneyIndex``.  Returns the number of swaps
+        published.
         """
-        logger.info("Received webhook: %s", webhook_data)
-        # TODO: implement webhook parsing and push to SQS
+        if isinstance(webhook_data, dict):
+            webhook_data = [webhook_data]
+        messages = smart_money_messages(webhook_data)
+        for message in messages:
+            self.send_to_sqs(message)
+        swaps = sum(len(message["swaps"]) for message in messages)
+        logger.info("Webhook with %d transactions produced %d swaps", len(webhook_data), swaps)
+        return swaps
+
+
+def webhook_authorized(event: Dict[str, any]) -> bool:
+    """Check the webhook's Authorization header; rejects everything if no token is configured."""
+    headers = {key.lower(): value for key, value in (event.get("headers") or {}).items()}
+    if not WEBHOOK_AUTH_TOKEN:
+        logger.error("Webhook received but no webhook auth token is configured")
+        return False
+    return hmac.compare_digest(headers.get("authorization", ""), WEBHOOK_AUTH_TOKEN)
+
+
+def lambda_handler(event, context):
+    """Entry point for the Lambda (the Python runtime only calls synchronous handlers)."""
+    return asyncio.run(handle_event(event, context))
 
 
-async def lambda_handler(event, context):
-    """Entry point for the Lambda.
+async def handle_event(event, context):
+    """Run the discovery logic, or publish the swaps of a Helius webhook.
 
-    This handler demonstrates how to run the discovery logic and send
-    messages to SQS using the central configuration.  When executed in
-    AWS, the runtime will inject ``event`` and ``context`` automatically.
+    Webhook deliveries arrive through the function URL with the
+    transactions in ``body``; any other event triggers a discovery run.
     """
     try:
         sqs_client = boto3.client("sqs")
         secrets = boto3.client("secretsmanager")
         dynamodb = boto3.resource("dynamodb")
         async with PumpSwapDiscoverer(sqs_client, secrets, dynamodb) as discoverer:
+            if "body" in event:
+                if not webhook_authorized(event):
+                    return {"statusCode": 401, "body": json.dumps({"error": "unauthorized"})}
+                swaps = discoverer.process_webhook(json.loads(event["body"] or "[]"))
+                return {"statusCode": 200, "body": json.dumps({"swaps": swaps})}
             migrations = await discoverer.discover_pumpswap_migrations()
             for mig in migrations:
                 discoverer.send_to_sqs(mig)
@@ -1,3 +1,4 @@
+import io
 import json
 import logging
 import os
@@ -6,6 +7,9 @@ import boto3
 from datetime import datetime
 from botocore.exceptions import ClientError
 
+from common.feature_dataset import FeatureDataset
+from streaming_etl import stream_csv_to_dataset, stream_csv_to_parquet
+
 # Configuração de logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
@@ -14,15 +18,75 @@ logger.setLevel(logging.INFO)
 RAW_DATA_BUCKET = os.environ.get("RAW_DATA_BUCKET", "memecoin-sniping-raw-data")
 PROCESSED_DATA_BUCKET = os.environ.get("PROCESSED_DATA_BUCKET", "memecoin-sniping-processed-data")
 
+# "memory" lê o objeto inteiro com pandas, "streaming" processa em lotes
+# (streaming_etl) e "auto" escolhe pelo tamanho do objeto
+ETL_MODE = os.environ.get("ETL_MODE", "auto")
+STREAMING_THRESHOLD_BYTES = int(os.environ.get("STREAMING_THRESHOLD_BYTES", 64 * 1024 * 1024))
+
+# Dataset particionado (ex.: s3://memecoin-sniping-processed-data/features). Quando
+# definido, os dados processados são anexados a ele em vez de um Parquet por arquivo
+FEATURE_DATASET_URI = os.environ.get("FEATURE_DATASET_URI", "")
+
 class ETLProcessor:
-    def __init__(self):
+    def __init__(self, s3_client=None, raw_bucket: str = None, processed_bucket: str = None,
+                 mode: str = None, streaming_threshold: int = None, dataset: FeatureDataset = None):
         # Inicializa o cliente S3 aqui para que o mock possa ser aplicado antes
-        self.s3 = boto3.client("s3")
+        self.s3 = s3_client or boto3.client("s3")
+        self.raw_bucket = raw_bucket or RAW_DATA_BUCKET
+        self.processed_bucket = processed_bucket or PROCESSED_DATA_BUCKET
+        self.mode = mode or ETL_MODE
+        self.streaming_threshold = STREAMING_THRESHOLD_BYTES if streaming_threshold is None else streaming_threshold
+        if self.mode not in ("auto", "memory", "streaming"):
+            raise ValueError(f"ETL_MODE inválido: {self.mode}")
+        if dataset is None and FEATURE_DATASET_URI:
+            dataset = FeatureDataset(FEATURE_DATASET_URI)
+        self.dataset = dataset
+
+    def _use_streaming(self, response: dict) -> bool:
+        if self.mode != "auto":
+            return self.mode == "streaming"
+        size = response.get("ContentLength")
+        return size is None or size > self.streaming_threshold
 
-    def process_raw_data(self, raw_file_key: str) -> pd.DataFrame:
+    def process_object(self, raw_file_key: str, processed_file_key: str) -> dict:
+        """Processa um objeto bruto e grava o Parquet, em memória ou em streaming.
+
+        Com um dataset configurado, os dados são anexados a ele (e as partições
+        com muitos arquivos pequenos são compactadas) e ``processed_file_key``
+        não é usado. Retorna o modo usado e o número de linhas processadas.
+        """
+        try:
+            response = self.s3.get_object(Bucket=self.raw_bucket, Key=raw_file_key)
+        except ClientError as e:
+            logger.error(f"Erro de cliente S3 ao ler dados brutos {raw_file_key}: {e}")
+            raise
+
+        if self._use_streaming(response):
+            try:
+                if self.dataset is not None:
+                    stats = stream_csv_to_dataset(self.s3, self.raw_bucket, raw_file_key, self.dataset,
+                                                  body=response["Body"])
+                else:
+                    stats = stream_csv_to_parquet(self.s3, self.raw_bucket, raw_file_key, self.processed_bucket,
+                                                  processed_file_key, body=response["Body"])
+            except Exception as e:
+                logger.error(f"Erro no ETL em streaming de {raw_file_key}: {e}")
+                raise
+            result = {"mode": "streaming", "rows": stats["rows"]}
+        else:
+            df = self.process_raw_data(raw_file_key, response=response)
+            self.save_processed_data(df, processed_file_key)
+            result = {"mode": "memory", "rows": len(df)}
+
+        if self.dataset is not None:
+            self.dataset.compact()
+        return result
+
+    def process_raw_data(self, raw_file_key: str, response: dict = None) -> pd.DataFrame:
         """Lê dados brutos do S3, processa e retorna um DataFrame."""
         try:
-            response = self.s3.get_object(Bucket=RAW_DATA_BUCKET, Key=raw_file_key)
+            if response is None:
+                response = self.s3.get_object(Bucket=self.raw_bucket, Key=raw_file_key)
             raw_data = response["Body"].read().decode("utf-8")
             
             # Assumindo que o raw_data é um CSV simples para demonstração
@@ -42,7 +106,10 @@ class ETLProcessor:
             raise
 
     def save_processed_data(self, df: pd.DataFrame, processed_file_key: str) -> None:
-        """Salva o DataFrame processado no S3."""
+        """Salva o DataFrame processado no S3 (ou o anexa ao dataset particionado)."""
+        if self.dataset is not None:
+            self.dataset.append(df)
+            return
         try:
             # Salvar como Parquet para eficiência
             parquet_buffer = io.BytesIO()
@@ -50,12 +117,12 @@ class ETLProcessor:
             parquet_buffer.seek(0)
             
             self.s3.put_object(
-                Bucket=PROCESSED_DATA_BUCKET,
+                Bucket=self.processed_bucket,
                 Key=processed_file_key,
                 Body=parquet_buffer.getvalue(),
                 ContentType="application/x-parquet"
             )
-            logger.info(f"Dados processados salvos em s3://{PROCESSED_DATA_BUCKET}/{processed_file_key}")
+            logger.info(f"Dados processados salvos em s3://{self.processed_bucket}/{processed_file_key}")
             
         except ClientError as e:
             logger.error(f"Erro de cliente S3 ao salvar dados processados {processed_file_key}: {e}")
@@ -77,14 +144,11 @@ def lambda_handler(event, context):
             
             logger.info(f"Processando arquivo: s3://{bucket_name}/{object_key}")
             
-            # Processar dados brutos
-            processed_df = processor.process_raw_data(object_key)
-            
             # Definir chave para o arquivo processado (ex: mudando a extensão)
             processed_file_key = object_key.replace("raw/", "processed/").replace(".csv", ".parquet")
             
-            # Salvar dados processados
-            processor.save_processed_data(processed_df, processed_file_key)
+            # Processar e salvar (em streaming para arquivos grandes)
+            processor.process_object(object_key, processed_file_key)
             
         return {
             "statusCode": 200,
@@ -100,8 +164,6 @@ def lambda_handler(event, context):
 
 # Para teste local
 if __name__ == "__main__":
-    import io
-    
     # Configurações de ambiente para teste local
     os.environ["RAW_DATA_BUCKET"] = "memecoin-sniping-raw-data-local"
     os.environ["PROCESSED_DATA_BUCKET"] = "memecoin-sniping-processed-data-local"
@@ -110,7 +172,8 @@ if __name__ == "__main__":
     class MockS3Client:
         def get_object(self, Bucket, Key):
             if Key == "raw/test_data.csv":
-                return {"Body": io.BytesIO(b"col1,col2\n1,a\n2,b\n3,c")}
+                data = b"col1,col2\n1,a\n2,b\n3,c"
+                return {"Body": io.BytesIO(data), "ContentLength": len(data)}
             raise ClientError({"Error": {"Code": "NoSuchKey"}}, "GetObject")
             
         def put_object(self, Bucket, Key, Body, ContentType=None):
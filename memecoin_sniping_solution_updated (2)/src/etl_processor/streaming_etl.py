@@ -0,0 +1,385 @@
+"""
+ETL em streaming: CSV bruto do S3 para Parquet no S3 com memória limitada.
+
+``ETLProcessor.process_raw_data`` lê o objeto inteiro, decodifica para uma
+única string e monta um DataFrame: o pico de memória é algumas vezes o
+tamanho do arquivo, e arquivos de vários GB estouram a memória do Lambda.
+
+Aqui nada é materializado por inteiro:
+
+- ``S3BodyReader`` expõe o ``Body`` do ``get_object`` como um arquivo
+  binário lido em pedaços (``chunk_size``);
+- ``pyarrow.csv.open_csv`` faz o parse em streaming, um ``RecordBatch`` por
+  bloco de ``block_size`` bytes;
+- cada lote passa pela transformação (``transform``) e é gravado como row
+  group de um ``pyarrow.parquet.ParquetWriter``;
+- o writer escreve num ``MultipartUploadWriter``, que envia uma parte do
+  multipart upload a cada ``part_size`` bytes (mínimo de 5 MB do S3) e só
+  conclui o upload quando o arquivo termina; em caso de erro o upload é
+  abortado e nada fica visível no bucket.
+
+A memória fica limitada por ``block_size`` + ``part_size`` + um row group,
+independente do tamanho do arquivo.
+
+``stream_csv_to_dataset`` faz o mesmo parse, mas grava os lotes como arquivos
+novos de um ``common.feature_dataset.FeatureDataset`` (particionado por data e
+token) em vez de um Parquet por arquivo bruto.
+
+Execute ``python streaming_etl.py [GB]`` para gerar um CSV sintético local
+(5 GB por padrão) e medir o pico de RSS e as linhas/s do modo streaming,
+comparando com o modo em memória num arquivo pequeno.
+"""
+
+import io
+import logging
+import os
+import time
+import uuid
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+MIN_PART_SIZE = 5 * 1024 * 1024
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+DEFAULT_BLOCK_SIZE = 4 * 1024 * 1024
+DEFAULT_PART_SIZE = 16 * 1024 * 1024
+DEFAULT_FLUSH_ROWS = 500_000
+
+
+class S3BodyReader(io.RawIOBase):
+    """Arquivo binário somente leitura sobre o ``Body`` de um ``get_object``."""
+
+    def __init__(self, body, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.body = body
+        self.chunk_size = chunk_size
+        self.bytes_read = 0
+        self._pending = memoryview(b"")
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if not self._pending:
+            self._pending = memoryview(self.body.read(max(self.chunk_size, len(buffer))) or b"")
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]  # fatia sem cópia
+        self.bytes_read += size
+        return size
+
+    def close(self) -> None:
+        if hasattr(self.body, "close"):
+            self.body.close()
+        super().close()
+
+
+class MultipartUploadWriter(io.RawIOBase):
+    """Arquivo binário somente escrita que sobe para o S3 em multipart upload."""
+
+    def __init__(self, s3_client, bucket: str, key: str, part_size: int = DEFAULT_PART_SIZE,
+                 content_type: str = "application/x-parquet"):
+        self.s3 = s3_client
+        self.bucket = bucket
+        self.key = key
+        self.part_size = max(part_size, MIN_PART_SIZE)
+        self.content_type = content_type
+        self._buffer = bytearray()
+        self._parts = []
+        self._upload_id: Optional[str] = None
+        self._position = 0
+        self._done = False
+
+    def writable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def write(self, data) -> int:
+        size = len(data)
+        self._buffer += data
+        self._position += size
+        if len(self._buffer) >= self.part_size:
+            buffer, self._buffer = self._buffer, bytearray()
+            view = memoryview(buffer)
+            start = 0
+            while len(buffer) - start >= self.part_size:
+                self._upload_part(view[start:start + self.part_size])
+                start += self.part_size
+            self._buffer += view[start:]
+            view.release()
+        return size
+
+    @property
+    def parts(self) -> int:
+        return len(self._parts)
+
+    def _upload_part(self, data) -> None:
+        if self._upload_id is None:
+            response = self.s3.create_multipart_upload(Bucket=self.bucket, Key=self.key,
+                                                       ContentType=self.content_type)
+            self._upload_id = response["UploadId"]
+        number = len(self._parts) + 1
+        response = self.s3.upload_part(Bucket=self.bucket, Key=self.key, UploadId=self._upload_id,
+                                       PartNumber=number, Body=bytes(data))
+        self._parts.append({"PartNumber": number, "ETag": response["ETag"]})
+
+    def close(self) -> None:
+        """Envia o restante e conclui o upload (arquivos pequenos usam um único ``put_object``)."""
+        if self._done or self.closed:
+            super().close()
+            return
+        try:
+            if self._upload_id is None:
+                self.s3.put_object(Bucket=self.bucket, Key=self.key, Body=bytes(self._buffer),
+                                   ContentType=self.content_type)
+            else:
+                if self._buffer:
+                    self._upload_part(self._buffer)
+                self.s3.complete_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self._upload_id,
+                                                  MultipartUpload={"Parts": self._parts})
+            self._buffer = bytearray()
+            self._done = True
+        except Exception:
+            self.abort()
+            raise
+        finally:
+            super().close()
+
+    def abort(self) -> None:
+        """Descarta as partes já enviadas."""
+        if self._upload_id is not None and not self._done:
+            try:
+                self.s3.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self._upload_id)
+            except Exception as e:
+                logger.error(f"Erro ao abortar multipart upload de {self.key}: {e}")
+        self._done = True
+        self._buffer = bytearray()
+
+
+def add_processed_timestamp(batch: pa.RecordBatch) -> pa.RecordBatch:
+    """Transformação padrão: a mesma coluna ``processed_timestamp`` do modo em memória."""
+    stamp = pa.array([datetime.now().isoformat()] * batch.num_rows, type=pa.string())
+    return pa.RecordBatch.from_arrays(batch.columns + [stamp], names=batch.schema.names + ["processed_timestamp"])
+
+
+def stream_csv_to_parquet(s3_client, source_bucket: str, source_key: str, target_bucket: str, target_key: str,
+                          transform: Callable[[pa.RecordBatch], pa.RecordBatch] = add_processed_timestamp,
+                          chunk_size: int = DEFAULT_CHUNK_SIZE, block_size: int = DEFAULT_BLOCK_SIZE,
+                          part_size: int = DEFAULT_PART_SIZE, body=None) -> Dict[str, float]:
+    """Converte um CSV do S3 em Parquet no S3, lote a lote.
+
+    ``body`` permite reaproveitar o ``Body`` de um ``get_object`` já feito.
+    Os tipos das colunas são inferidos do primeiro bloco. Retorna linhas,
+    bytes lidos, row groups, partes enviadas, duração e linhas/s.
+    """
+    started = time.perf_counter()
+    if body is None:
+        body = s3_client.get_object(Bucket=source_bucket, Key=source_key)["Body"]
+    source = S3BodyReader(body, chunk_size)
+    sink = MultipartUploadWriter(s3_client, target_bucket, target_key, part_size)
+    rows = row_groups = 0
+    writer = None
+    try:
+        reader = pacsv.open_csv(io.BufferedReader(source, buffer_size=chunk_size),
+                                read_options=pacsv.ReadOptions(block_size=block_size))
+        for batch in reader:
+            batch = transform(batch)
+            if writer is None:
+                writer = pq.ParquetWriter(sink, batch.schema, compression="snappy")
+            writer.write_batch(batch)
+            rows += batch.num_rows
+            row_groups += 1
+        if writer is None:
+            # CSV só com cabeçalho: grava um Parquet vazio com o esquema lido
+            writer = pq.ParquetWriter(sink, transform(pa.RecordBatch.from_pylist([], schema=reader.schema)).schema)
+        writer.close()
+        sink.close()
+    except Exception:
+        sink.abort()
+        raise
+    finally:
+        source.close()
+
+    elapsed = time.perf_counter() - started
+    stats = {
+        "rows": rows,
+        "bytes_read": source.bytes_read,
+        "row_groups": row_groups,
+        "parts": sink.parts,
+        "seconds": elapsed,
+        "rows_per_second": rows / elapsed if elapsed > 0 else 0.0,
+    }
+    logger.info(f"{source_key}: {rows} linhas em {row_groups} row groups, {sink.parts} partes, "
+                f"{elapsed:.1f} s ({stats['rows_per_second']:,.0f} linhas/s)")
+    return stats
+
+
+def stream_csv_to_dataset(s3_client, source_bucket: str, source_key: str, dataset,
+                          transform: Callable[[pa.RecordBatch], pa.RecordBatch] = add_processed_timestamp,
+                          chunk_size: int = DEFAULT_CHUNK_SIZE, block_size: int = DEFAULT_BLOCK_SIZE,
+                          flush_rows: int = DEFAULT_FLUSH_ROWS, body=None) -> Dict[str, float]:
+    """Converte um CSV do S3 em arquivos novos de um ``FeatureDataset`` particionado.
+
+    Os lotes são acumulados até ``flush_rows`` linhas antes de cada ``append``,
+    para não gerar um arquivo por bloco do parser.
+    """
+    started = time.perf_counter()
+    if body is None:
+        body = s3_client.get_object(Bucket=source_bucket, Key=source_key)["Body"]
+    source = S3BodyReader(body, chunk_size)
+    rows = files = 0
+    pending, pending_rows = [], 0
+    try:
+        reader = pacsv.open_csv(io.BufferedReader(source, buffer_size=chunk_size),
+                                read_options=pacsv.ReadOptions(block_size=block_size))
+        for batch in reader:
+            pending.append(transform(batch))
+            pending_rows += batch.num_rows
+            if pending_rows >= flush_rows:
+                files += len(dataset.append(pa.Table.from_batches(pending)))
+                rows += pending_rows
+                pending, pending_rows = [], 0
+        if pending:
+            files += len(dataset.append(pa.Table.from_batches(pending)))
+            rows += pending_rows
+    finally:
+        source.close()
+
+    elapsed = time.perf_counter() - started
+    stats = {
+        "rows": rows,
+        "bytes_read": source.bytes_read,
+        "files": files,
+        "seconds": elapsed,
+        "rows_per_second": rows / elapsed if elapsed > 0 else 0.0,
+    }
+    logger.info(f"{source_key}: {rows} linhas em {files} arquivos do dataset, "
+                f"{elapsed:.1f} s ({stats['rows_per_second']:,.0f} linhas/s)")
+    return stats
+
+class LocalS3:
+    """S3 em disco (bucket = diretório), para o benchmark e a execução local."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self._uploads = {}
+
+    def _path(self, bucket: str, key: str) -> str:
+        path = os.path.join(self.root, bucket, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return path
+
+    def get_object(self, Bucket, Key):
+        path = self._path(Bucket, Key)
+        return {"Body": open(path, "rb"), "ContentLength": os.path.getsize(path)}
+
+    def put_object(self, Bucket, Key, Body, ContentType=None):
+        with open(self._path(Bucket, Key), "wb") as f:
+            f.write(Body)
+
+    def create_multipart_upload(self, Bucket, Key, ContentType=None):
+        upload_id = uuid.uuid4().hex
+        self._uploads[upload_id] = open(self._path(Bucket, Key) + f".{upload_id}.part", "wb")
+        return {"UploadId": upload_id}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        self._uploads[UploadId].write(Body)
+        return {"ETag": f"{PartNumber}"}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        handle = self._uploads.pop(UploadId)
+        handle.close()
+        os.replace(handle.name, self._path(Bucket, Key))
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        handle = self._uploads.pop(UploadId)
+        handle.close()
+        os.remove(handle.name)
+
+
+def _write_synthetic_csv(path: str, size_bytes: int, block_rows: int = 500_000) -> None:
+    """CSV sintético de negociações, escrito em blocos até ``size_bytes``."""
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(0)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write("timestamp,token_address,price,volume_24h,liquidity_usd,holders,quality_score,side\n")
+        tokens = np.array([f"Tok{i:040d}" for i in range(1_000)])
+        start = 1_700_000_000
+        while f.tell() < size_bytes:
+            frame = pd.DataFrame({
+                "timestamp": start + np.arange(block_rows),
+                "token_address": tokens[rng.integers(0, len(tokens), block_rows)],
+                "price": rng.lognormal(-7, 2, block_rows).round(12),
+                "volume_24h": rng.lognormal(10, 2, block_rows).round(2),
+                "liquidity_usd": rng.lognormal(11, 1.5, block_rows).round(2),
+                "holders": rng.integers(1, 50_000, block_rows),
+                "quality_score": rng.integers(0, 100, block_rows),
+                "side": np.where(rng.random(block_rows) < 0.5, "buy", "sell"),
+            })
+            f.write(frame.to_csv(index=False, header=False))
+            start += block_rows
+
+
+def _run_mode(mode: str, root: str, key: str) -> Dict[str, float]:
+    """Executa um modo no processo atual e mede o pico de RSS (chamado em subprocesso)."""
+    import resource
+
+    s3_client = LocalS3(root)
+    started = time.perf_counter()
+    if mode == "streaming":
+        stats = stream_csv_to_parquet(s3_client, "raw", key, "processed", key + ".parquet")
+    else:
+        from etl_processor import ETLProcessor
+
+        processor = ETLProcessor(s3_client=s3_client, raw_bucket="raw", processed_bucket="processed")
+        df = processor.process_raw_data(key)
+        processor.save_processed_data(df, key + ".parquet")
+        stats = {"rows": len(df), "seconds": time.perf_counter() - started}
+        stats["rows_per_second"] = stats["rows"] / stats["seconds"]
+    # ru_maxrss está em KiB no Linux
+    stats["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return stats
+
+
+def _benchmark(size_gb: float = 5.0, memory_sample_mb: int = 256, root: str = "/tmp/etl_benchmark") -> None:
+    """Pico de RSS e linhas/s do streaming no arquivo grande e do modo em memória numa amostra."""
+    import json
+    import subprocess
+    import sys
+
+    here = os.path.abspath(__file__)
+    runs = [("streaming", f"synthetic_{size_gb:g}gb.csv", size_gb * 1024 ** 3),
+            ("memory", f"synthetic_{memory_sample_mb}mb.csv", memory_sample_mb * 1024 ** 2),
+            ("streaming", f"synthetic_{memory_sample_mb}mb.csv", memory_sample_mb * 1024 ** 2)]
+    for mode, key, size in runs:
+        path = os.path.join(root, "raw", key)
+        if not os.path.exists(path):
+            print(f"Gerando {path} ({size / 1024 ** 2:,.0f} MB)...")
+            _write_synthetic_csv(path, int(size))
+        output = subprocess.run([sys.executable, here, "--run", mode, root, key],
+                                check=True, capture_output=True, text=True).stdout
+        stats = json.loads(output.strip().splitlines()[-1])
+        print(f"{mode:<9} {os.path.getsize(path) / 1024 ** 2:9,.0f} MB  {stats['rows']:>12,} linhas  "
+              f"{stats['seconds']:7.1f} s  {stats['rows_per_second']:>10,.0f} linhas/s  "
+              f"pico RSS {stats['peak_rss_mb']:,.0f} MB")
+
+
+if __name__ == "__main__":
+    import json
+    import sys
+
+    if len(sys.argv) > 1 and sys.argv[1] == "--run":
+        logging.getLogger().setLevel(logging.WARNING)
+        print(json.dumps(_run_mode(*sys.argv[2:5])))
+    else:
+        _benchmark(float(sys.argv[1]) if len(sys.argv) > 1 else 5.0)
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""Testes do ETL Processor (modos em memória e em streaming)."""
+
+import io
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from common.feature_dataset import FeatureDataset
+from etl_processor import ETLProcessor, lambda_handler
+from streaming_etl import MIN_PART_SIZE, LocalS3, MultipartUploadWriter, stream_csv_to_parquet
+
+
+def write_csv(s3, key, rows):
+    frame = pd.DataFrame({
+        "timestamp": range(rows),
+        "token_address": [f"Tok{i % 7}" for i in range(rows)],
+        "price": [0.001 * (i % 13 + 1) for i in range(rows)],
+    })
+    s3.put_object(Bucket="raw", Key=key, Body=frame.to_csv(index=False).encode())
+    return frame
+
+
+def read_parquet(s3, key):
+    return pd.read_parquet(io.BytesIO(s3.get_object(Bucket="processed", Key=key)["Body"].read()))
+
+
+def test_streaming_matches_memory_mode(tmp_path):
+    """Os dois modos geram o mesmo Parquet; o streaming grava vários row groups."""
+    print("Testando streaming contra o modo em memória...")
+    s3 = LocalS3(str(tmp_path))
+    expected = write_csv(s3, "raw/trades.csv", 20_000)
+
+    for mode in ("memory", "streaming"):
+        processor = ETLProcessor(s3_client=s3, raw_bucket="raw", processed_bucket="processed", mode=mode)
+        result = processor.process_object("raw/trades.csv", f"processed/{mode}.parquet")
+        assert result == {"mode": mode, "rows": 20_000}
+
+    memory = read_parquet(s3, "processed/memory.parquet")
+    streaming = read_parquet(s3, "processed/streaming.parquet")
+    columns = list(expected.columns)
+    pd.testing.assert_frame_equal(streaming[columns], memory[columns])
+    assert "processed_timestamp" in streaming
+
+    stats = stream_csv_to_parquet(s3, "raw", "raw/trades.csv", "processed", "processed/small_blocks.parquet",
+                                  block_size=64 * 1024)
+    assert stats["rows"] == 20_000 and stats["row_groups"] > 1
+    print(f"✓ Modos equivalentes ({stats['row_groups']} row groups)")
+
+
+def test_multipart_upload_parts_and_abort(tmp_path):
+    """Partes de part_size viram um único objeto; erro aborta o upload."""
+    print("Testando multipart upload...")
+    s3 = LocalS3(str(tmp_path))
+    data = os.urandom(2 * MIN_PART_SIZE + 123)
+    writer = MultipartUploadWriter(s3, "processed", "out.bin", part_size=MIN_PART_SIZE)
+    for start in range(0, len(data), 1_000_000):
+        writer.write(data[start:start + 1_000_000])
+    writer.close()
+    assert writer.parts == 3
+    assert s3.get_object(Bucket="processed", Key="out.bin")["Body"].read() == data
+
+    writer = MultipartUploadWriter(s3, "processed", "aborted.bin", part_size=MIN_PART_SIZE)
+    writer.write(data)
+    writer.abort()
+    assert not os.path.exists(os.path.join(str(tmp_path), "processed", "aborted.bin"))
+    assert not s3._uploads
+    print("✓ Multipart upload OK")
+
+
+def test_auto_mode_and_lambda_handler(tmp_path):
+    """No modo auto, objetos acima do limite vão para o streaming."""
+    print("Testando modo auto pelo lambda_handler...")
+    s3 = LocalS3(str(tmp_path))
+    write_csv(s3, "raw/big.csv", 1_000)
+    processor = ETLProcessor(s3_client=s3, raw_bucket="raw", processed_bucket="processed",
+                             streaming_threshold=1_000)
+    assert processor.process_object("raw/big.csv", "processed/big.parquet")["mode"] == "streaming"
+    processor.streaming_threshold = 10 ** 9
+    assert processor.process_object("raw/big.csv", "processed/big.parquet")["mode"] == "memory"
+
+    with pytest.raises(ValueError):
+        ETLProcessor(s3_client=s3, mode="chunked")
+
+    event = {"Records": [{"s3": {"bucket": {"name": "raw"}, "object": {"key": "raw/big.csv"}}}]}
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr("etl_processor.boto3.client", lambda service: s3)
+        mp.setattr("etl_processor.RAW_DATA_BUCKET", "raw")
+        mp.setattr("etl_processor.PROCESSED_DATA_BUCKET", "processed")
+        assert lambda_handler(event, None)["statusCode"] == 200
+    assert len(read_parquet(s3, "processed/big.parquet")) == 1_000
+    print("✓ Modo auto OK")
+
+
+def test_dataset_mode_appends_partitioned_files(tmp_path):
+    """Com dataset configurado, os dois modos anexam ao dataset particionado."""
+    print("Testando ETL gravando no dataset particionado...")
+    s3 = LocalS3(str(tmp_path / "s3"))
+    frame = write_csv(s3, "raw/trades.csv", 5_000)
+    frame["timestamp"] = 1_704_067_200 + frame["timestamp"] * 60  # 2024-01-01 em diante, ~3,5 dias
+    s3.put_object(Bucket="raw", Key="raw/trades.csv", Body=frame.to_csv(index=False).encode())
+    dataset = FeatureDataset(str(tmp_path / "features"), token_buckets=4)
+
+    for mode in ("memory", "streaming"):
+        processor = ETLProcessor(s3_client=s3, raw_bucket="raw", processed_bucket="processed",
+                                 mode=mode, dataset=dataset)
+        assert processor.process_object("raw/trades.csv", "processed/unused.parquet")["rows"] == 5_000
+
+    assert dataset.rows() == 10_000
+    assert {entry["date"] for entry in dataset.files()} == {"2024-01-01", "2024-01-02", "2024-01-03", "2024-01-04"}
+    assert not os.path.exists(tmp_path / "s3" / "processed" / "processed" / "unused.parquet")
+    day = dataset.read(start="2024-01-02", end="2024-01-02", columns=["timestamp"])
+    assert len(day) == 2 * 1_440
+    print(f"✓ {len(dataset.files())} arquivos no dataset")
@@ -1,27 +1,45 @@
 import json
 import logging
 import os
-import boto3
 from datetime import datetime
 from botocore.exceptions import ClientError
-from web3 import Web3
+
+from common.execution_service import BUY, ExecutionService, Fill, InMemoryLedgerTable, Order, VenueAdapter
+from price_log_buffer import PriceLogBuffer
+from runtime import ExecutorRuntime, get_runtime, set_runtime
 
 # Configuração de logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
 # Mocks para boto3 e Web3
-class MockDynamoDBTable:
+class MockDynamoDBTable(InMemoryLedgerTable):
     def __init__(self, name):
+        super().__init__(key_attribute="tradeId")
         self.name = name
-        self.items = {}
 
     def put_item(self, Item):
         print(f"Mock DynamoDB: Item salvo na tabela {self.name}: {Item}")
-        self.items[Item["tradeId"]] = Item
+        super().put_item(Item)
+
+    def batch_writer(self, overwrite_by_pkeys=None):
+        return MockBatchWriter(self)
+
+class MockBatchWriter:
+    def __init__(self, table):
+        self.table = table
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def put_item(self, Item):
+        self.table.put_item(Item)
 
 class MockS3Client:
-    def put_object(self, Bucket, Key, Body, ContentType=None):
+    def put_object(self, Bucket, Key, Body, ContentType=None, **kwargs):
         print(f"Mock S3: Objeto salvo no bucket {Bucket} com chave {Key}")
 
 class MockWeb3:
@@ -47,40 +65,101 @@ class MockEth:
         print(f"Mock Web3: Aguardando recibo da transação {tx_hash}")
         return {"status": 1} # Recibo de sucesso simulado
 
-# Substitui os clientes AWS e Web3 pelos mocks para teste local
-boto3_client_original = boto3.client
-boto3_resource_original = boto3.resource
-web3_original = Web3
-
-def mock_boto3_client(service_name, region_name=None):
-    if service_name == "s3":
-        return MockS3Client()
-    return boto3_client_original(service_name, region_name)
-
-def mock_boto3_resource(service_name, region_name=None):
-    if service_name == "dynamodb":
-        return type("MockDynamoDB", (object,), {"Table": MockDynamoDBTable})()
-    return boto3_resource_original(service_name, region_name)
-
-# Atribui a classe MockWeb3 diretamente a Web3
-Web3 = MockWeb3
-
-boto3.client = mock_boto3_client
-boto3.resource = mock_boto3_resource
+class MockDynamoDBResource:
+    def __init__(self):
+        self.tables = {}
 
-# Clientes AWS (agora usando os mocks)
-dynamodb = boto3.resource("dynamodb")
-s3 = boto3.client("s3")
+    def Table(self, name):
+        return self.tables.setdefault(name, MockDynamoDBTable(name))
 
 # Variáveis de ambiente
-TRADE_LOG_TABLE = os.environ.get("TRADE_LOG_TABLE", "MemecoinSnipingTradeLog")
-PRICE_LOG_BUCKET = os.environ.get("PRICE_LOG_BUCKET", "memecoin-sniping-price-logs")
 MODE = os.environ.get("MODE", "paper") # 'paper' ou 'real'
 
+class EvmVenue(VenueAdapter):
+    """Venue EVM do ``ExecutionService``.
+
+    Em paper mode o fill vem do ``FillSimulator`` do runtime (latência,
+    variação de preço, taxas e falhas); em modo real o swap é enviado via
+    Web3 e o preço do fill é o preço após o trade.
+    """
+
+    name = "evm"
+
+    def __init__(self, executor: "Executor"):
+        self.executor = executor
+
+    @property
+    def mode(self):
+        return MODE
+
+    def execute(self, order: Order) -> Fill:
+        if MODE != "real":
+            return self._simulate(order)
+        # Exemplo de interação com Web3 para um trade real
+        # Isso é um placeholder e precisaria de lógica real de contrato/DEX
+        # from web3.middleware import geth_poa_middleware
+        # self.executor.w3.middleware_onion.inject(geth_poa_middleware, layer=0)
+        # account = self.executor.w3.eth.account.from_key("YOUR_PRIVATE_KEY")
+        # nonce = self.executor.w3.eth.get_transaction_count(account.address)
+        # tx = {
+        #     'from': account.address,
+        #     'to': '0xYourDEXRouterAddress',
+        #     'value': self.executor.w3.to_wei(order.size, 'ether'),
+        #     'gas': 2000000,
+        #     'gasPrice': self.executor.w3.to_wei('50', 'gwei'),
+        #     'nonce': nonce,
+        #     'data': '0xYourContractCallData' # Chamada para swap na DEX
+        # }
+        # signed_tx = self.executor.w3.eth.account.sign_transaction(tx, account.key)
+        # tx_hash = self.executor.w3.eth.send_raw_transaction(signed_tx.rawTransaction)
+        # receipt = self.executor.w3.eth.wait_for_transaction_receipt(tx_hash)
+        price = self.executor.fetch_price(order.token_address) # Buscar preço real após trade
+        tx_signature = f"evm-{order.order_id}"
+        if price <= 0:
+            return Fill.rejected(order, "preço indisponível")
+        quote = order.size if order.side == BUY else order.size * price
+        return Fill(
+            order_id=order.order_id,
+            success=True,
+            price=price,
+            amount_tokens=quote / price,
+            amount_quote=quote,
+            slippage=price / order.price - 1 if order.price else 0.0,
+            tx_signature=tx_signature,
+        )
+
+    def _simulate(self, order: Order) -> Fill:
+        if order.price <= 0:
+            return Fill.rejected(order, "preço indisponível")
+        fill = self.executor.runtime.fill_simulator.fill(order.side, order.size, order.price)
+        if not fill["success"]:
+            return Fill.rejected(order, "transação simulada falhou", submitted=True, network_fee=fill["fees"])
+        quote = order.size if order.side == BUY else fill["amount_out"]
+        return Fill(
+            order_id=order.order_id,
+            success=True,
+            price=fill["price"],
+            amount_tokens=fill["amount_out"] if order.side == BUY else order.size,
+            amount_quote=quote,
+            slippage=fill["slippage"],
+            tx_signature=f"paper-{order.order_id}",
+            network_fee=fill["fees"],
+        )
+
 class Executor:
-    def __init__(self):
-        self.trade_log_table = dynamodb.Table(TRADE_LOG_TABLE)
-        self.w3 = Web3(Web3.HTTPProvider("http://localhost:8545")) # Conecta ao mock ou nó real
+    def __init__(self, runtime: ExecutorRuntime = None, price_log: PriceLogBuffer = None):
+        # Clientes vêm do runtime do container (criados uma vez, ou injetados nos testes)
+        self.runtime = runtime or get_runtime()
+        self.trade_log_table = self.runtime.trade_log_table
+        self.s3 = self.runtime.s3
+        self.price_log = price_log if price_log is not None else self.runtime.price_log
+        # Trades vão para o ledger único (tabela do Trader); a série de preços fica na TradeLog
+        self.execution = ExecutionService([EvmVenue(self)], self.runtime.ledger)
+
+    @property
+    def w3(self):
+        """Web3 do runtime, conectado só quando usado (modo real)."""
+        return self.runtime.w3
 
     def fetch_price(self, token_address: str) -> float:
         """Simula a busca do preço atual do token."""
@@ -89,7 +168,16 @@ class Executor:
         return 0.00000123 # Preço simulado em USD
 
     def log_price_series(self, token_address: str, timestamp: str, price: float, trade_id: str) -> None:
-        """Registra o preço do token em DynamoDB e S3."""
+        """Registra o preço do token em DynamoDB e S3.
+
+        Com o buffer ativo só enfileira o registro; as escritas são feitas em
+        lote pela thread do ``PriceLogBuffer``, fora do caminho do trade.
+        """
+        if self.runtime.price_log_mode == "off":
+            return
+        if self.price_log is not None:
+            self.price_log.log(token_address, timestamp, price, trade_id)
+            return
         try:
             # Log no DynamoDB para acesso rápido
             self.trade_log_table.put_item(
@@ -105,8 +193,8 @@ class Executor:
 
             # Log em S3 para dados históricos e análises mais profundas
             s3_key = f'price_logs/{token_address}/{datetime.now().strftime("%Y/%m/%d")}/{trade_id}_{timestamp}.json'
-            s3.put_object(
-                Bucket=PRICE_LOG_BUCKET,
+            self.s3.put_object(
+                Bucket=self.runtime.price_log_bucket,
                 Key=s3_key,
                 Body=json.dumps({"tokenAddress": token_address, "timestamp": timestamp, "price": price})
             )
@@ -118,86 +206,65 @@ class Executor:
             logger.error(f"Erro inesperado ao registrar preço: {e}")
 
     def execute_trade(self, token_address: str, confidence_score: float, trade_params: dict) -> dict:
-        """Executa ou simula um trade com base no confidence score e modo."""
+        """Executa ou simula um trade com base no confidence score e modo.
+
+        A ordem passa pelo ``ExecutionService``: o trade é gravado no ledger
+        único na entrada, com o mesmo esquema dos trades do Trader, e fechado
+        em seguida com uma ordem de venda ao preço após o trade (o monitor do
+        Trader só roteia a venue Solana).  O PnL é o realizado no fechamento
+        (em paper mode, com os fills do ``FillSimulator``).  Ordens não
+        enviadas (fallback, modo desconhecido) só aparecem no log.
+        """
         trade_id = f"trade_{token_address}_{int(datetime.now().timestamp())}"
         price_before = self.fetch_price(token_address)
         self.log_price_series(token_address, datetime.now().isoformat(), price_before, trade_id)
 
-        if MODE == "paper":
-            logger.info(f"[PAPER MODE] Simulação de trade para {token_address} com score {confidence_score:.2f}")
-            # Simular execução e resultado
-            price_after = price_before * (1 + (confidence_score * 0.1) - 0.02) # Simula um ganho ou perda
-            trade_status = "simulated_success" if confidence_score > 0.6 else "simulated_failure"
-            pnl = (price_after - price_before) / price_before
-            logger.info(f"[PAPER MODE] Preço antes: {price_before}, Preço depois: {price_after}, PnL: {pnl:.2%}")
-
-        elif MODE == "real":
-            if confidence_score >= trade_params.get("threshold", 0.7):
-                logger.info(f"[REAL MODE] Executando trade para {token_address} com score {confidence_score:.2f}")
-                try:
-                    # Exemplo de interação com Web3 para um trade real
-                    # Isso é um placeholder e precisaria de lógica real de contrato/DEX
-                    # from web3.middleware import geth_poa_middleware
-                    # self.w3.middleware_onion.inject(geth_poa_middleware, layer=0)
-                    # account = self.w3.eth.account.from_key("YOUR_PRIVATE_KEY")
-                    # nonce = self.w3.eth.get_transaction_count(account.address)
-                    # tx = {
-                    #     'from': account.address,
-                    #     'to': '0xYourDEXRouterAddress',
-                    #     'value': self.w3.to_wei(trade_params.get('amount', 0), 'ether'),
-                    #     'gas': 2000000,
-                    #     'gasPrice': self.w3.to_wei('50', 'gwei'),
-                    #     'nonce': nonce,
-                    #     'data': '0xYourContractCallData' # Chamada para swap na DEX
-                    # }
-                    # signed_tx = self.w3.eth.account.sign_transaction(tx, account.key)
-                    # tx_hash = self.w3.eth.send_raw_transaction(signed_tx.rawTransaction)
-                    # receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
-
-                    trade_status = "executed_success"
-                    price_after = self.fetch_price(token_address) # Buscar preço real após trade
-                    pnl = (price_after - price_before) / price_before
-                    logger.info(f"[REAL MODE] Trade real executado. Preço antes: {price_before}, Preço depois: {price_after}, PnL: {pnl:.2%}")
-                except Exception as e:
-                    logger.error(f"[REAL MODE] Erro ao executar trade para {token_address}: {e}")
-                    trade_status = "executed_failure"
-                    price_after = price_before # Preço não mudou se falhou
-                    pnl = 0.0
-            else:
-                logger.info(f"[REAL MODE] Confidence score {confidence_score:.2f} abaixo do threshold. Aplicando fallback heurístico.")
-                # Lógica de fallback heurístico
-                trade_status = "fallback_applied"
-                price_after = price_before
-                pnl = 0.0
-        else:
+        order = Order(
+            token_address=token_address,
+            side=BUY,
+            size=float(trade_params.get("amount", 0)),
+            price=price_before,
+            size_unit="quote",
+            venue=EvmVenue.name,
+            trade_id=trade_id,
+            metadata={
+                "confidence_score": confidence_score,
+                "trade_params": json.dumps(trade_params), # Armazenar parâmetros como string JSON
+            },
+        )
+        price_after = price_before
+        pnl = 0.0
+
+        if MODE not in ("paper", "real"):
             logger.warning(f"Modo desconhecido: {MODE}. Nenhuma ação de trade executada.")
             trade_status = "no_action"
-            price_after = price_before
-            pnl = 0.0
+        elif confidence_score < trade_params.get("threshold", 0.7):
+            logger.info(f"[{MODE.upper()} MODE] Confidence score {confidence_score:.2f} abaixo do threshold. Aplicando fallback heurístico.")
+            # Lógica de fallback heurístico
+            trade_status = "fallback_applied"
+        else:
+            # Em paper mode o fill é simulado (latência, variação de preço, taxas e falhas)
+            prefix = "simulated" if MODE == "paper" else "executed"
+            logger.info(f"[{MODE.upper()} MODE] Executando trade para {token_address} com score {confidence_score:.2f}")
+            trade = self.execution.open_position(order)
+            if trade:
+                trade_status = f"{prefix}_success"
+                price_after = self.fetch_price(token_address) # Preço após o trade
+                closed = self.execution.close_position(trade, price_after, "executor_exit")
+                if closed:
+                    pnl = closed["pnl_pct"]
+                else:
+                    # A venda falhou: a posição segue aberta no ledger
+                    pnl = (price_after - trade["entry_price"]) / trade["entry_price"]
+                    logger.warning(f"[{MODE.upper()} MODE] Venda do trade {trade_id} não executada; posição aberta")
+                logger.info(f"[{MODE.upper()} MODE] Trade executado. Preço antes: {price_before}, "
+                            f"Preço de entrada: {trade['entry_price']}, Preço depois: {price_after}, PnL: {pnl:.2%}")
+            else:
+                logger.error(f"[{MODE.upper()} MODE] Erro ao executar trade para {token_address}")
+                trade_status = f"{prefix}_failure"
 
         self.log_price_series(token_address, datetime.now().isoformat(), price_after, trade_id) # Log do preço após trade
-
-        # Registrar trade no DynamoDB
-        try:
-            self.trade_log_table.put_item(
-                Item={
-                    "tradeId": trade_id,
-                    "tokenAddress": token_address,
-                    "timestamp": datetime.now().isoformat(),
-                    "confidenceScore": confidence_score,
-                    "mode": MODE,
-                    "status": trade_status,
-                    "priceBefore": price_before,
-                    "priceAfter": price_after,
-                    "pnl": pnl,
-                    "tradeParams": json.dumps(trade_params) # Armazenar parâmetros como string JSON
-                }
-            )
-            logger.info(f"Trade {trade_id} registrado com status: {trade_status}")
-        except ClientError as e:
-            logger.error(f"Erro de cliente DynamoDB ao registrar trade: {e}")
-        except Exception as e:
-            logger.error(f"Erro inesperado ao registrar trade: {e}")
+        logger.info(f"Trade {trade_id} processado com status: {trade_status}")
 
         return {
             "trade_id": trade_id,
@@ -208,27 +275,51 @@ class Executor:
         }
 
 def lambda_handler(event, context):
-    """Função principal do Lambda para o Agente Executor."""
+    """Função principal do Lambda para o Agente Executor.
+
+    Processa todos os ``Records`` do evento com o ``Executor`` do runtime do
+    container.  Registros com falha são devolvidos em ``batchItemFailures``
+    (formato de resposta parcial do SQS) para serem reenviados sozinhos.
+    """
     try:
         logger.info("Agente Executor iniciado.")
-        executor = Executor()
-
-        # O evento deve conter os dados do Optimizer
-        message_body = json.loads(event["Records"][0]["body"])
-        token_address = message_body["token_address"]
-        confidence_score = message_body["confidence_score"]
-        trade_params = message_body["trade_params"]
-
-        result = executor.execute_trade(token_address, confidence_score, trade_params)
+        executor = get_runtime().executor
+
+        results = []
+        failures = []
+        for record in event.get("Records", []):
+            try:
+                # O evento deve conter os dados do Optimizer
+                message_body = json.loads(record["body"])
+                token_address = message_body["token_address"]
+                confidence_score = message_body["confidence_score"]
+                trade_params = message_body["trade_params"]
+
+                results.append(executor.execute_trade(token_address, confidence_score, trade_params))
+            except Exception as e:
+                logger.error(f"Erro ao processar registro {record.get('messageId')}: {e}")
+                failures.append({"itemIdentifier": record.get("messageId")})
+
+        if executor.price_log is not None:
+            # O ambiente pode ser congelado/descartado após a resposta
+            executor.price_log.flush()
+
+        body = {
+            "message": "Execução de trade processada",
+            "processed": len(results),
+            "failed": len(failures),
+            "results": [
+                {"trade_id": r["trade_id"], "status": r["status"], "pnl": r["pnl"]} for r in results
+            ],
+        }
+        if results:
+            # Campos do primeiro trade, mantidos para quem lia a resposta de um registro
+            body.update(body["results"][0])
 
         return {
-            "statusCode": 200,
-            "body": json.dumps({
-                "message": "Execução de trade processada",
-                "trade_id": result["trade_id"],
-                "status": result["status"],
-                "pnl": result["pnl"]
-            }, default=str)
+            "statusCode": 200 if results or not failures else 500,
+            "body": json.dumps(body, default=str),
+            "batchItemFailures": failures,
         }
 
     except Exception as e:
@@ -244,6 +335,7 @@ if __name__ == "__main__":
     os.environ["TRADE_LOG_TABLE"] = "MemecoinSnipingTradeLogLocal"
     os.environ["PRICE_LOG_BUCKET"] = "memecoin-sniping-price-logs-local"
     os.environ["MODE"] = "paper" # Testar em paper mode
+    set_runtime(ExecutorRuntime.local())
 
     # Simular um evento do Optimizer
     test_event = {
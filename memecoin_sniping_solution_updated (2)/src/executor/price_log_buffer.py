@@ -0,0 +1,220 @@
+"""
+Buffer write-behind para a série de preços do Executor.
+
+``Executor.log_price_series`` fazia um ``put_item`` no DynamoDB e um
+``put_object`` no S3 por observação de preço, duas vezes por trade e dentro
+do caminho de execução: a latência do trade incluía quatro round trips à AWS.
+
+O ``PriceLogBuffer`` tira essas escritas do caminho crítico:
+
+- ``log`` só enfileira o registro (microssegundos) e retorna;
+- uma thread em segundo plano acumula os registros e os grava em lote:
+  no DynamoDB via ``batch_writer`` (``BatchWriteItem`` de até 25 itens, com
+  reenvio dos não processados) e no S3 como um único objeto NDJSON por lote
+  (``price_logs/ndjson/{AAAA/MM/DD}/part-{HHMMSS}-{uuid}.ndjson``);
+- o lote é gravado quando atinge ``max_records`` registros, ``max_bytes``
+  bytes de NDJSON ou ``max_age_seconds`` desde o primeiro registro;
+- ``flush`` força a gravação e espera por ela.  O ambiente do Lambda é
+  congelado entre invocações (a thread para junto) e pode ser descartado sem
+  aviso, por isso o ``lambda_handler`` chama ``flush`` ao final de cada
+  invocação, depois que o trade já foi executado; ``atexit``/SIGTERM cobrem o
+  encerramento do processo.
+
+Os objetos NDJSON são lidos por ``common.trade_paths.compact_json_logs`` junto
+com os JSON antigos (um ponto por objeto).
+
+Execute ``python price_log_buffer.py`` para comparar a latência de
+``execute_trade`` com log síncrono, com o buffer e sem log.
+"""
+
+import atexit
+import json
+import logging
+import queue
+import signal
+import threading
+import time
+import uuid
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+from botocore.exceptions import ClientError
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+DEFAULT_PREFIX = "price_logs/ndjson/"
+
+
+class PriceLogBuffer:
+    """Fila de registros de preço gravada em lote por uma thread em segundo plano."""
+
+    def __init__(self, table, s3_client, bucket: str, prefix: str = DEFAULT_PREFIX,
+                 max_records: int = 500, max_bytes: int = 1_000_000, max_age_seconds: float = 30.0):
+        self.table = table
+        self.s3 = s3_client
+        self.bucket = bucket
+        self.prefix = prefix
+        self.max_records = max_records
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.written = 0
+        self.failed = 0
+
+    def log(self, token_address: str, timestamp: str, price: float, trade_id: str) -> None:
+        """Enfileira uma observação de preço; não faz I/O."""
+        self._ensure_worker()
+        self._queue.put({
+            "tradeId": trade_id,
+            "timestamp": timestamp,
+            "tokenAddress": token_address,
+            "price": price,
+            "logType": "price_series",
+        })
+
+    def flush(self, timeout: Optional[float] = 10.0) -> bool:
+        """Grava tudo o que foi enfileirado até aqui; ``False`` se o prazo expirar."""
+        if self._thread is None:
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        if not done.wait(timeout):
+            logger.warning(f"Flush do log de preços não terminou em {timeout} s")
+            return False
+        return True
+
+    def _ensure_worker(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="price-log-buffer", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        pending: List[Dict] = []
+        size = 0
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                entry = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                entry = None
+
+            if isinstance(entry, dict):
+                pending.append(entry)
+                size += len(json.dumps(entry, default=str)) + 1
+                if deadline is None:
+                    deadline = time.monotonic() + self.max_age_seconds
+                if len(pending) < self.max_records and size < self.max_bytes:
+                    continue
+
+            # Lote cheio, prazo vencido ou flush pedido
+            if pending:
+                self._write(pending)
+                pending, size, deadline = [], 0, None
+            if isinstance(entry, threading.Event):
+                entry.set()
+
+    def _write(self, records: List[Dict]) -> None:
+        started = time.perf_counter()
+        try:
+            with self.table.batch_writer(overwrite_by_pkeys=["tradeId", "timestamp"]) as batch:
+                for record in records:
+                    batch.put_item(Item={**record, "price": Decimal(str(record["price"]))})
+
+            now = datetime.utcnow()
+            key = f"{self.prefix}{now:%Y/%m/%d}/part-{now:%H%M%S}-{uuid.uuid4().hex[:8]}.ndjson"
+            body = "\n".join(json.dumps(record, default=str) for record in records) + "\n"
+            self.s3.put_object(Bucket=self.bucket, Key=key, Body=body.encode("utf-8"),
+                               ContentType="application/x-ndjson")
+            self.written += len(records)
+            logger.info(f"{len(records)} preços gravados em lote ({key}) em "
+                        f"{(time.perf_counter() - started) * 1000:.1f} ms")
+        except ClientError as e:
+            self.failed += len(records)
+            logger.error(f"Erro de cliente AWS ao gravar lote de preços: {e}")
+        except Exception as e:
+            self.failed += len(records)
+            logger.error(f"Erro inesperado ao gravar lote de preços: {e}")
+
+    def install_shutdown_hooks(self) -> None:
+        """Grava o buffer no encerramento do processo (``atexit`` e SIGTERM)."""
+        atexit.register(self.flush)
+        try:
+            previous = signal.getsignal(signal.SIGTERM)
+
+            def _on_sigterm(signum, frame):
+                self.flush()
+                if callable(previous):
+                    previous(signum, frame)
+
+            signal.signal(signal.SIGTERM, _on_sigterm)
+        except ValueError:
+            # signal.signal só pode ser chamado na thread principal
+            pass
+
+
+def _benchmark(rounds: int = 20, round_trip_ms: float = 25.0) -> None:
+    """Latência de ``execute_trade`` com log síncrono, com buffer e sem log."""
+    import executor as executor_module
+
+    class SlowTable:
+        def put_item(self, Item):
+            time.sleep(round_trip_ms / 1000)
+
+        def update_item(self, **kwargs):
+            time.sleep(round_trip_ms / 1000)
+
+        def batch_writer(self, overwrite_by_pkeys=None):
+            return SlowBatch()
+
+    class SlowBatch:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            time.sleep(round_trip_ms / 1000)
+
+        def put_item(self, Item):
+            pass
+
+    class SlowS3:
+        def put_object(self, **kwargs):
+            time.sleep(round_trip_ms / 1000)
+
+    class SlowResource:
+        def Table(self, name):
+            return SlowTable()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    executor_module.MODE = "paper"
+    runtime = executor_module.ExecutorRuntime(dynamodb=SlowResource(), s3=SlowS3(), price_log_mode="sync")
+    agent = executor_module.Executor(runtime=runtime)
+
+    def measure(label, price_log):
+        agent.price_log = price_log
+        started = time.perf_counter()
+        for i in range(rounds):
+            agent.execute_trade(f"token_{i}", 0.8, {"threshold": 0.7})
+        elapsed = (time.perf_counter() - started) / rounds * 1000
+        print(f"{label:<10} {elapsed:7.1f} ms por trade")
+
+    original_log = agent.log_price_series
+    measure("síncrono", None)
+    buffer = PriceLogBuffer(SlowTable(), SlowS3(), "benchmark")
+    measure("buffer", buffer)
+    buffer.flush()
+    agent.log_price_series = lambda *args, **kwargs: None
+    measure("sem log", None)
+    agent.log_price_series = original_log
+    print(f"(round trip simulado de {round_trip_ms:.0f} ms; a entrada e a saída no ledger continuam síncronas)")
+
+
+if __name__ == "__main__":
+    _benchmark()
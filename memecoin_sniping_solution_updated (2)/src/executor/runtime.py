@@ -0,0 +1,217 @@
+"""
+Runtime do Executor: clientes criados uma vez por container Lambda.
+
+Antes, o ``lambda_handler`` criava um ``Executor`` (e um provider Web3) a cada
+invocação e o módulo substituía ``boto3.client``/``boto3.resource`` por mocks
+globalmente no import.  O ``ExecutorRuntime``:
+
+- cria os clientes de forma preguiçosa, no primeiro uso, e os mantém durante
+  a vida do container (invocações quentes reaproveitam o pool de conexões
+  HTTP do botocore e a sessão do provider Web3);
+- importa ``web3`` só quando o Web3 é de fato usado (modo real); o import
+  custa ~0,9 s e não é necessário em paper mode;
+- expõe o ``FillSimulator`` do paper mode e o ``TradeLedger`` (tabela do Trader) usado pelo ``ExecutionService``;
+- aceita clientes injetados (``ExecutorRuntime(dynamodb=..., s3=...)``), o que
+  substitui o monkey-patching global nos testes e na execução local
+  (``ExecutorRuntime.local()``).
+
+Execute ``python runtime.py`` para medir o tempo de import e a latência de
+invocações quentes com e sem reaproveitamento.
+"""
+
+import json
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+from typing import Optional
+
+import boto3
+from botocore.config import Config
+
+from common.execution_service import TradeLedger
+from common.fill_simulator import FillSimulator
+from price_log_buffer import PriceLogBuffer
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+BOTO_CONFIG = Config(
+    max_pool_connections=int(os.environ.get("AWS_MAX_POOL_CONNECTIONS", "20")),
+    retries={"max_attempts": 3, "mode": "standard"},
+)
+
+
+class ExecutorRuntime:
+    """Clientes AWS/Web3, buffer de preços e ``Executor`` compartilhados no container."""
+
+    def __init__(self, dynamodb=None, s3=None, web3=None, trade_log_table: Optional[str] = None,
+                 trader_table: Optional[str] = None, price_log_bucket: Optional[str] = None, rpc_url: Optional[str] = None,
+                 price_log_mode: Optional[str] = None, fill_simulator: Optional[FillSimulator] = None):
+        self._dynamodb = dynamodb
+        self._s3 = s3
+        self._w3 = web3
+        self.trade_log_table_name = trade_log_table or os.environ.get("TRADE_LOG_TABLE", "MemecoinSnipingTradeLog")
+        # Ledger único de trades, compartilhado com o Trader
+        self.trader_table_name = trader_table or os.environ.get("TRADER_TABLE_NAME", "MemecoinSnipingTraderTable")
+        self.price_log_bucket = price_log_bucket or os.environ.get("PRICE_LOG_BUCKET", "memecoin-sniping-price-logs")
+        self.rpc_url = rpc_url or os.environ.get("RPC_URL", "http://localhost:8545")
+        # 'buffered' (padrão, fora do caminho crítico), 'sync' (comportamento antigo) ou 'off'
+        self.price_log_mode = price_log_mode or os.environ.get("PRICE_LOG_MODE", "buffered")
+        self._fill_simulator = fill_simulator
+        self._trade_log_table = None
+        self._ledger = None
+        self._price_log = None
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def local(cls, **kwargs) -> "ExecutorRuntime":
+        """Runtime com os mocks de DynamoDB, S3 e Web3 (testes e execução local)."""
+        from executor import MockDynamoDBResource, MockS3Client, MockWeb3
+
+        kwargs.setdefault("dynamodb", MockDynamoDBResource())
+        kwargs.setdefault("s3", MockS3Client())
+        kwargs.setdefault("web3", MockWeb3())
+        kwargs.setdefault("fill_simulator", FillSimulator(seed=0))
+        return cls(**kwargs)
+
+    @property
+    def dynamodb(self):
+        if self._dynamodb is None:
+            self._dynamodb = boto3.resource("dynamodb", config=BOTO_CONFIG)
+        return self._dynamodb
+
+    @property
+    def s3(self):
+        if self._s3 is None:
+            self._s3 = boto3.client("s3", config=BOTO_CONFIG)
+        return self._s3
+
+    @property
+    def w3(self):
+        if self._w3 is None:
+            from web3 import Web3
+
+            self._w3 = Web3(Web3.HTTPProvider(self.rpc_url, request_kwargs={"timeout": 10}))
+        return self._w3
+
+    @property
+    def trade_log_table(self):
+        if self._trade_log_table is None:
+            self._trade_log_table = self.dynamodb.Table(self.trade_log_table_name)
+        return self._trade_log_table
+
+    @property
+    def fill_simulator(self) -> FillSimulator:
+        """Simulador de fills do paper mode (parâmetros calibrados em ``FILL_MODEL``, JSON)."""
+        if self._fill_simulator is None:
+            self._fill_simulator = FillSimulator.from_config(json.loads(os.environ.get("FILL_MODEL", "{}")))
+        return self._fill_simulator
+
+    @property
+    def ledger(self) -> TradeLedger:
+        """Ledger de trades na tabela do Trader."""
+        if self._ledger is None:
+            self._ledger = TradeLedger(self.dynamodb.Table(self.trader_table_name))
+        return self._ledger
+
+    @property
+    def price_log(self) -> Optional[PriceLogBuffer]:
+        """Buffer de preços (``None`` fora do modo 'buffered')."""
+        if self._price_log is None and self.price_log_mode == "buffered":
+            with self._lock:
+                if self._price_log is None:
+                    self._price_log = PriceLogBuffer(
+                        self.trade_log_table,
+                        self.s3,
+                        self.price_log_bucket,
+                        max_records=int(os.environ.get("PRICE_LOG_MAX_RECORDS", "500")),
+                        max_age_seconds=float(os.environ.get("PRICE_LOG_MAX_AGE_SECONDS", "30")),
+                    )
+                    self._price_log.install_shutdown_hooks()
+        return self._price_log
+
+    @property
+    def executor(self):
+        """``Executor`` reaproveitado entre invocações."""
+        if self._executor is None:
+            from executor import Executor
+
+            self._executor = Executor(runtime=self)
+        return self._executor
+
+
+_RUNTIME: Optional[ExecutorRuntime] = None
+
+
+def get_runtime() -> ExecutorRuntime:
+    """Runtime do container, criado na primeira chamada."""
+    global _RUNTIME
+    if _RUNTIME is None:
+        _RUNTIME = ExecutorRuntime()
+    return _RUNTIME
+
+
+def set_runtime(runtime: Optional[ExecutorRuntime]) -> None:
+    """Substitui o runtime do container (testes e execução local)."""
+    global _RUNTIME
+    _RUNTIME = runtime
+
+
+def _benchmark(invocations: int = 200) -> None:
+    """Tempo de import do módulo e latência de invocações quentes."""
+
+    import executor as executor_module
+    # Executado como script, este arquivo é __main__: usa o módulo importado pelo executor
+    import runtime as runtime_module
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    for module in ("executor", "web3"):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-c", f"import sys; sys.path.insert(0, {here!r}); import {module}"], check=True)
+        print(f"import {module:<9} {time.perf_counter() - started:6.2f} s (processo novo)")
+
+    class NullTable:
+        def put_item(self, Item):
+            pass
+
+        def update_item(self, **kwargs):
+            pass
+
+    class NullResource:
+        def Table(self, name):
+            return NullTable()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+    executor_module.MODE = "paper"
+    event = {"Records": [{"messageId": "1", "body": json.dumps(
+        {"token_address": "token", "confidence_score": 0.8, "trade_params": {"threshold": 0.7}})}]}
+
+    s3_client = boto3.client("s3", config=BOTO_CONFIG)
+
+    def fresh_runtime():
+        return runtime_module.ExecutorRuntime(dynamodb=NullResource(), s3=s3_client, price_log_mode="off")
+
+    def measure(label, reuse):
+        runtime_module.set_runtime(fresh_runtime())
+        executor_module.lambda_handler(event, None)  # invocação fria
+        started = time.perf_counter()
+        for _ in range(invocations):
+            if not reuse:
+                # Comportamento antigo: Executor, tabela e provider Web3 novos a cada invocação
+                runtime_module.set_runtime(fresh_runtime())
+                runtime_module.get_runtime().w3
+            executor_module.lambda_handler(event, None)
+        print(f"{label:<10} {(time.perf_counter() - started) / invocations * 1000:6.2f} ms por invocação")
+
+    measure("sem reuso", False)
+    measure("com reuso", True)
+    runtime_module.set_runtime(None)
+
+
+if __name__ == "__main__":
+    _benchmark()
@@ -8,7 +8,19 @@ from unittest.mock import patch
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+from common.fill_simulator import FillModel, FillSimulator
 from executor import Executor, lambda_handler
+from runtime import ExecutorRuntime, get_runtime, set_runtime
+
+
+def local_runtime(**kwargs):
+    """Runtime com mocks e fills simulados sem falhas de transação."""
+    kwargs.setdefault("fill_simulator", FillSimulator(FillModel(failure_rate=0.0), seed=0))
+    return ExecutorRuntime.local(**kwargs)
+
+
+# Clientes injetados (mocks) em vez de substituir o boto3 globalmente
+set_runtime(local_runtime())
 
 
 def test_execute_trade_paper_mode():
@@ -69,3 +81,141 @@ def test_lambda_handler():
     assert response['statusCode'] == 200
     assert body['status'] in ['simulated_success', 'executed_success']
     print("✓ lambda_handler OK")
+
+
+def test_execute_trade_writes_unified_ledger():
+    """O trade paper é aberto e fechado no ledger com os fills simulados e o esquema do Trader."""
+    print("Testando registro do trade no ledger único...")
+    runtime = local_runtime(price_log_mode="off")
+    with patch('executor.MODE', 'paper'):
+        result = Executor(runtime=runtime).execute_trade('token321', 0.85, {'threshold': 0.7, 'amount': 10})
+
+    table = runtime.dynamodb.Table(runtime.trader_table_name)
+    trade = runtime.ledger.get(result['trade_id'])
+    assert table.writes == 2  # abertura e fechamento
+    assert trade['venue'] == 'evm' and trade['status'] == 'closed'
+    assert trade['close_reason'] == 'executor_exit'
+    assert trade['reference_price'] == result['price_before']
+    assert trade['entry_price'] != result['price_before']  # latência e taxas
+    assert abs(trade['amount_tokens'] * trade['entry_price'] - 10) < 1e-9
+    assert abs(result['pnl'] - (trade['exit_price'] / trade['entry_price'] - 1)) < 1e-9
+    assert runtime.ledger.open_positions() == []
+    print("✓ Trade registrado no ledger único")
+
+
+def test_execute_trade_simulated_failure():
+    """Uma transação simulada que falha não abre trade; fica registrada como ordem falha."""
+    print("Testando falha simulada no Executor...")
+    runtime = local_runtime(price_log_mode="off", fill_simulator=FillSimulator(FillModel(failure_rate=1.0)))
+    with patch('executor.MODE', 'paper'):
+        result = Executor(runtime=runtime).execute_trade('token654', 0.85, {'threshold': 0.7, 'amount': 10})
+
+    assert result['status'] == 'simulated_failure' and result['pnl'] == 0.0
+    failed = runtime.ledger.get(result['trade_id'])
+    assert failed['status'] == 'failed' and failed['mode'] == 'paper'
+    assert failed['exit_time'] and 'entry_price' not in failed
+    assert runtime.ledger.open_positions() == []
+    print("✓ Falha simulada OK")
+
+
+def test_price_log_buffer_batches_writes():
+    """O buffer enfileira os preços e grava em lote no DynamoDB e no S3."""
+    print("Testando PriceLogBuffer...")
+    from price_log_buffer import PriceLogBuffer
+
+    class Batch:
+        def __init__(self, items):
+            self.items = items
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def put_item(self, Item):
+            self.items.append(Item)
+
+    class Table:
+        def __init__(self):
+            self.items = []
+            self.batches = 0
+
+        def batch_writer(self, overwrite_by_pkeys=None):
+            self.batches += 1
+            return Batch(self.items)
+
+    class S3:
+        def __init__(self):
+            self.objects = {}
+
+        def put_object(self, Bucket, Key, Body, ContentType=None):
+            self.objects[Key] = Body
+
+    table, s3_client = Table(), S3()
+    buffer = PriceLogBuffer(table, s3_client, "bucket", max_records=3, max_age_seconds=60)
+    for i in range(4):
+        buffer.log("token", f"2024-01-01T00:00:0{i}", 1.0 + i, "trade_1")
+    assert buffer.flush(timeout=5)
+
+    # 3 registros pelo limite do lote + 1 no flush
+    assert table.batches == 2 and len(table.items) == 4
+    assert len(s3_client.objects) == 2
+    lines = b"".join(s3_client.objects.values()).decode().splitlines()
+    assert sorted(json.loads(line)["price"] for line in lines) == [1.0, 2.0, 3.0, 4.0]
+    assert all(key.endswith(".ndjson") for key in s3_client.objects)
+    assert buffer.written == 4 and buffer.failed == 0
+    print("✓ PriceLogBuffer OK")
+
+
+def test_log_price_series_uses_buffer():
+    """Com buffer, log_price_series não faz I/O no caminho do trade."""
+    print("Testando log_price_series com buffer...")
+
+    class Recorder:
+        def __init__(self):
+            self.calls = []
+
+        def log(self, *args):
+            self.calls.append(args)
+
+    recorder = Recorder()
+    exec_agent = Executor(price_log=recorder)
+    with patch('executor.MODE', 'paper'), patch.object(exec_agent.trade_log_table, 'put_item') as put_item:
+        exec_agent.execute_trade('token789', 0.85, {'threshold': 0.7})
+
+    assert len(recorder.calls) == 2  # antes e depois do trade
+    assert put_item.call_count == 0  # o trade vai para o ledger, não para a TradeLog
+    print("✓ log_price_series com buffer OK")
+
+
+def test_lambda_handler_processes_all_records():
+    """Todos os registros são processados com o mesmo Executor e clientes."""
+    print("Testando lambda_handler com vários registros...")
+    runtime = local_runtime(price_log_mode="off")
+    set_runtime(runtime)
+    try:
+        records = [
+            {'messageId': str(i), 'body': json.dumps({
+                'token_address': f'token{i}',
+                'confidence_score': 0.9,
+                'trade_params': {'threshold': 0.7},
+            })}
+            for i in range(3)
+        ]
+        records.append({'messageId': 'bad', 'body': 'not json'})
+        with patch('executor.MODE', 'paper'):
+            first = lambda_handler({'Records': records}, None)
+            executor = runtime.executor
+            lambda_handler({'Records': records[:1]}, None)
+
+        body = json.loads(first['body'])
+        assert first['statusCode'] == 200
+        assert body['processed'] == 3 and len(body['results']) == 3
+        assert first['batchItemFailures'] == [{'itemIdentifier': 'bad'}]
+        # Invocação quente reaproveita o Executor e a tabela
+        assert get_runtime() is runtime and runtime.executor is executor
+        assert executor.trade_log_table is runtime.dynamodb.Table(runtime.trade_log_table_name)
+    finally:
+        set_runtime(local_runtime())
+    print("✓ lambda_handler com vários registros OK")
@@ -11,6 +11,9 @@ from sklearn.metrics import f1_score, roc_auc_score
 import boto3
 from botocore.exceptions import ClientError
 
+from common.feature_dataset import FeatureDataset
+from common.feature_schema import FEATURE_SCHEMA, FeatureSchema
+
 # Configuração de logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
@@ -22,6 +25,14 @@ STAGING_LOCAL_MODEL_KEY = os.environ.get("STAGING_LOCAL_MODEL_KEY", "optimizer/m
 STAGING_SAGEMAKER_MODEL_KEY = os.environ.get("STAGING_SAGEMAKER_MODEL_KEY", "optimizer/model/staging/sagemaker_model.pkl")
 SAGEMAKER_TRAINING_JOB_ROLE_ARN = os.environ.get("SAGEMAKER_TRAINING_JOB_ROLE_ARN")
 SAGEMAKER_TRAINING_IMAGE = os.environ.get("SAGEMAKER_TRAINING_IMAGE") # Ex: 'your-ecr-repo/sagemaker-sklearn-container:latest'
+# Dataset particionado gravado pelo ETL (common.feature_dataset); pode ser um URI s3://
+FEATURE_DATASET_URI = os.environ.get("FEATURE_DATASET_URI", "")
+
+
+def schema_key(model_key: str) -> str:
+    """Chave do schema de features salvo ao lado do modelo (model.pkl -> model.schema.json)."""
+    return os.path.splitext(model_key)[0] + ".schema.json"
+
 
 class ModelTrainer:
     def __init__(self):
@@ -30,18 +41,21 @@ class ModelTrainer:
         self.sagemaker = boto3.client("sagemaker", region_name="us-east-1")
 
     def load_processed_data(self, days_back: int = 7) -> pd.DataFrame:
-        """Carrega dados processados do S3 para treinamento."""
+        """Carrega as features dos últimos dias do dataset processado, com os tipos do schema."""
         try:
-            # Simula o carregamento de dados processados
-            # Em um cenário real, você listaria objetos no bucket e concatenaria
-            # Para este exemplo, vamos criar um DataFrame simulado
-            data = {
-                'feature1': np.random.rand(100),
-                'feature2': np.random.rand(100) * 10,
-                'target': np.random.randint(0, 2, 100) # 0 ou 1 para classificação
-            }
-            df = pd.DataFrame(data)
-            logger.info(f"Dados processados simulados carregados. Shape: {df.shape}")
+            if not FEATURE_DATASET_URI:
+                logger.warning("FEATURE_DATASET_URI não configurado. Nenhum dado carregado.")
+                return pd.DataFrame()
+            dataset = FeatureDataset(FEATURE_DATASET_URI)
+            if not dataset.exists():
+                logger.warning(f"Dataset de features não encontrado em {FEATURE_DATASET_URI}")
+                return pd.DataFrame()
+            df = dataset.read(days=days_back)
+            missing = FEATURE_SCHEMA.missing(df.columns, require_target=True)
+            if missing:
+                raise ValueError(f"Dataset fora do schema de features v{FEATURE_SCHEMA.version}: faltam {missing}")
+            df = FEATURE_SCHEMA.cast(df[df["target"].notna()])
+            logger.info(f"Dados processados carregados. Shape: {df.shape}")
             return df
         except Exception as e:
             logger.error(f"Erro ao carregar dados processados: {e}")
@@ -51,8 +65,8 @@ class ModelTrainer:
         """Treina um modelo localmente e avalia seu desempenho."""
         logger.info("Iniciando treinamento de modelo local...")
         
-        X = df[["feature1", "feature2"]]
-        y = df["target"]
+        X = FEATURE_SCHEMA.matrix(df)
+        y = df["target"].astype("int8")
         
         X_train, X_val, y_train, y_val = train_test_split(X, y, test_size=0.3, random_state=42)
         
@@ -71,8 +85,11 @@ class ModelTrainer:
         local_model_path = "/tmp/local_model.pkl"
         joblib.dump(model, local_model_path)
         
-        # Upload para S3 staging
+        # Upload para S3 staging, com o schema das features usado no treino
         self.s3.upload_file(local_model_path, MODEL_BUCKET, STAGING_LOCAL_MODEL_KEY)
+        local_schema_path = "/tmp/local_model.schema.json"
+        FEATURE_SCHEMA.save(local_schema_path)
+        self.s3.upload_file(local_schema_path, MODEL_BUCKET, schema_key(STAGING_LOCAL_MODEL_KEY))
         logger.info(f"Modelo local salvo em S3: s3://{MODEL_BUCKET}/{STAGING_LOCAL_MODEL_KEY}")
         
         return {
@@ -142,9 +159,14 @@ class ModelTrainer:
         local_model_path = "/tmp/model_to_evaluate.pkl"
         self.s3.download_file(MODEL_BUCKET, model_s3_key, local_model_path)
         model = joblib.load(local_model_path)
+
+        # O modelo só pode ser avaliado com as mesmas features, na mesma ordem
+        local_schema_path = "/tmp/model_to_evaluate.schema.json"
+        self.s3.download_file(MODEL_BUCKET, schema_key(model_s3_key), local_schema_path)
+        FEATURE_SCHEMA.check_compatible(FeatureSchema.load(local_schema_path))
         
-        X = df[["feature1", "feature2"]]
-        y = df["target"]
+        X = FEATURE_SCHEMA.matrix(df)
+        y = df["target"].astype("int8")
         
         # Usar o mesmo split de validação ou um novo conjunto de teste
         _, X_val, _, y_val = train_test_split(X, y, test_size=0.3, random_state=42)
@@ -237,6 +259,14 @@ if __name__ == "__main__":
     os.environ["SAGEMAKER_TRAINING_JOB_ROLE_ARN"] = "arn:aws:iam::123456789012:role/service-role/AmazonSageMaker-ExecutionRole-20231231T123456"
     os.environ["SAGEMAKER_TRAINING_IMAGE"] = "123456789012.dkr.ecr.us-east-1.amazonaws.com/sagemaker-sklearn-container:latest"
 
+    # Dataset de features sintético (últimos dias) para o teste local
+    import tempfile
+    from common.feature_pipeline import build_features, synthetic_sources
+    FEATURE_DATASET_URI = tempfile.mkdtemp(prefix="features_")
+    sample = build_features(**synthetic_sources(rows=2_000, tokens=50, days=3))
+    sample["timestamp"] += int(datetime.now().timestamp() * 1000) - int(sample["timestamp"].max())
+    FeatureDataset(FEATURE_DATASET_URI).append(sample)
+
     # Mock de S3 e SageMaker para teste local
     class MockS3Client:
         def upload_file(self, Filename, Bucket, Key):
@@ -0,0 +1,175 @@
+"""
+Avaliação sequencial do A/B test iniciado por ``create_ab_test_config``.
+
+O Trader marca cada trade com ``ab_arm`` ("A" = configuração atual, "B" =
+otimizada) e ``ab_test_id``.  A cada execução o Optimizer entrega apenas os
+trades fechados desde a última marca d'água (``exit_time``) e as métricas de
+cada braço são atualizadas de forma incremental com ``MetricsAccumulator``.
+
+O teste é um mSPRT (mixture sequential probability ratio test) sobre a
+diferença de P&L médio entre os braços, com mistura normal N(0, tau²) para
+o efeito.  A razão de verossimilhança
+
+    Λ = sqrt(V / (V + tau²)) · exp(tau² · Δ² / (2 · V · (V + tau²)))
+
+com Δ = média_B − média_A e V = s²_A/n_A + s²_B/n_B pode ser consultada a
+qualquer momento sem inflar o erro tipo I: o teste para assim que
+Λ ≥ 1/alpha.  O p-valor sempre válido é ``min(1, 1/max Λ)``.
+
+Essa garantia exige que a mistura (tau) não dependa dos dados do teste: tau
+é fixado no início, a partir de ``ab_evaluation.tau`` na configuração ou do
+desvio padrão do P&L dos trades anteriores ao teste (``pre_test_tau``), e
+salvo no estado.  Só sem nenhum dos dois ele é fixado uma única vez pela
+variância combinada do primeiro lote com dois trades por braço.
+
+O estado (acumuladores, marca d'água e p-valor) é serializável com
+``to_dict``/``from_dict`` e fica salvo junto da configuração A/B no S3.
+"""
+
+import logging
+import math
+from typing import Dict, Iterable, Mapping, Optional
+
+import pandas as pd
+
+from metrics import MetricsAccumulator, trades_frame
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+RUNNING = "running"
+WINNER_A = "A"
+WINNER_B = "B"
+
+
+def pre_test_tau(trades: Iterable[Mapping]) -> Optional[float]:
+    """Desvio padrão do P&L dos trades fechados antes do teste (None sem dados)."""
+    df = trades_frame(list(trades))
+    if df.empty or "pnl" not in df:
+        return None
+    if "status" in df:
+        df = df[df["status"] == "closed"]
+    pnl = df["pnl"].dropna()
+    std = float(pnl.std(ddof=1)) if len(pnl) >= 2 else 0.0
+    return std if std > 0 else None
+
+
+class SequentialABTest:
+    """mSPRT incremental sobre o P&L por trade dos braços A e B."""
+
+    def __init__(self, test_id: str = "", alpha: float = 0.05, tau: Optional[float] = None,
+                 min_trades_per_arm: int = 30):
+        self.test_id = test_id
+        self.alpha = alpha
+        # Escala do efeito na mistura: fixa durante todo o teste (ver docstring do módulo)
+        self.tau = tau
+        self.min_trades_per_arm = min_trades_per_arm
+        self.arms = {WINNER_A: MetricsAccumulator(), WINNER_B: MetricsAccumulator()}
+        self.watermark = ""
+        self.p_value = 1.0
+        self.status = RUNNING
+
+    @classmethod
+    def from_config(cls, ab_config: Mapping, pre_test_trades: Optional[Iterable[Mapping]] = None) -> "SequentialABTest":
+        """Restaura o estado salvo em ``ab_test_state`` (ou cria um novo teste).
+
+        Um teste novo sem ``tau`` na configuração usa ``pre_test_tau(pre_test_trades)``.
+        """
+        settings = dict(ab_config.get("config_a", {}).get("optimizer", {}).get("ab_evaluation", {}))
+        state = ab_config.get("ab_test_state")
+        test_id = str(ab_config.get("ab_test_start_time", ""))
+        if state and state.get("test_id") == test_id:
+            return cls.from_dict(state)
+        if settings.get("tau") is None and pre_test_trades is not None:
+            settings["tau"] = pre_test_tau(pre_test_trades)
+        return cls(test_id=test_id, **settings)
+
+    def update(self, trades: Iterable[Mapping]) -> int:
+        """Incorpora os trades fechados deste teste posteriores à marca d'água."""
+        df = trades_frame(list(trades))
+        if df.empty or "ab_arm" not in df or "exit_time" not in df:
+            return 0
+        mask = df["exit_time"].notna()
+        if "status" in df:
+            mask &= df["status"] == "closed"
+        if "ab_test_id" in df:
+            mask &= df["ab_test_id"] == self.test_id
+        if self.watermark:
+            mask &= df["exit_time"] > pd.Timestamp(self.watermark)
+        df = df[mask]
+        added = 0
+        for arm, accumulator in self.arms.items():
+            added += accumulator.update(df[df["ab_arm"] == arm])
+        if added:
+            self.watermark = df["exit_time"].max().isoformat()
+            self._fix_tau()
+            self._test()
+        return added
+
+    def _fix_tau(self) -> None:
+        # Último recurso (sem configuração nem histórico): fixado uma vez e salvo no estado
+        a, b = self.arms[WINNER_A], self.arms[WINNER_B]
+        if self.tau is None and a.count >= 2 and b.count >= 2:
+            pooled = (a.m2 + b.m2) / (a.count + b.count - 2)
+            if pooled > 0:
+                self.tau = math.sqrt(pooled)
+                logger.info(f"A/B test {self.test_id}: tau fixado em {self.tau:.6g} pelo primeiro lote")
+
+    def likelihood_ratio(self) -> float:
+        a, b = self.arms[WINNER_A], self.arms[WINNER_B]
+        if a.count < 2 or b.count < 2 or self.tau is None:
+            return 1.0
+        var_a = a.m2 / (a.count - 1)
+        var_b = b.m2 / (b.count - 1)
+        v = var_a / a.count + var_b / b.count
+        tau2 = self.tau ** 2
+        if v <= 0 or tau2 <= 0:
+            return 1.0
+        delta = b.mean - a.mean
+        log_ratio = 0.5 * math.log(v / (v + tau2)) + tau2 * delta * delta / (2 * v * (v + tau2))
+        return math.exp(min(log_ratio, 700.0))
+
+    def _test(self) -> None:
+        if self.status != RUNNING:
+            return
+        # O p-valor sempre válido só pode diminuir
+        self.p_value = min(self.p_value, 1.0 / max(self.likelihood_ratio(), 1.0))
+        enough = all(acc.count >= self.min_trades_per_arm for acc in self.arms.values())
+        if enough and self.p_value <= self.alpha:
+            self.status = WINNER_B if self.arms[WINNER_B].mean > self.arms[WINNER_A].mean else WINNER_A
+            logger.info(f"A/B test {self.test_id} encerrado: braço {self.status} vence (p={self.p_value:.4f})")
+
+    def report(self) -> Dict:
+        return {
+            "test_id": self.test_id,
+            "status": self.status,
+            "p_value": self.p_value,
+            "arms": {arm: acc.metrics() for arm, acc in self.arms.items()},
+        }
+
+    def to_dict(self) -> Dict:
+        return {
+            "test_id": self.test_id,
+            "alpha": self.alpha,
+            "tau": self.tau,
+            "min_trades_per_arm": self.min_trades_per_arm,
+            "watermark": self.watermark,
+            "p_value": self.p_value,
+            "status": self.status,
+            "arms": {arm: acc.to_dict() for arm, acc in self.arms.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, state: Mapping) -> "SequentialABTest":
+        test = cls(
+            test_id=state.get("test_id", ""),
+            alpha=float(state.get("alpha", 0.05)),
+            tau=None if state.get("tau") is None else float(state["tau"]),
+            min_trades_per_arm=int(state.get("min_trades_per_arm", 30)),
+        )
+        test.watermark = state.get("watermark", "")
+        test.p_value = float(state.get("p_value", 1.0))
+        test.status = state.get("status", RUNNING)
+        for arm, arm_state in state.get("arms", {}).items():
+            test.arms[arm] = MetricsAccumulator.from_dict(arm_state)
+        return test
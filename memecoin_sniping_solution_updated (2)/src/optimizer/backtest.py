@@ -0,0 +1,318 @@
+"""
+Engine de backtest vetorizado para os parâmetros de SL/TP do Trader.
+
+Cada trade histórico é reproduzido sobre o caminho de preços registrado pelo
+Executor (``price_logs``).  Os caminhos viram uma matriz de retornos
+``(trades, pontos)`` relativa ao preço de entrada; a partir dela guardamos o
+máximo e o mínimo acumulados de cada linha.  Como essas séries são monótonas,
+o primeiro ponto em que o TP (ou o SL) é atingido sai de um único
+``np.searchsorted`` sobre a matriz achatada: cada linha recebe um
+deslocamento maior que a amplitude dos retornos, o que mantém o array
+achatado ordenado e permite consultar todos os trades de todos os conjuntos
+de parâmetros de uma vez.
+
+Os tiers de SL/TP seguem ``trader.calculate_trade_parameters``: score >= 80
+usa os parâmetros ``high``, score >= 60 os ``medium`` e abaixo disso os
+valores fixos do tier baixo.
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+HIGH_SCORE_TIER = 80
+MEDIUM_SCORE_TIER = 60
+LOW_TIER_SL = 0.20
+LOW_TIER_TP = 0.20
+LOW_TIER_POSITION = 0.05
+
+# Ordem das colunas de uma matriz de parâmetros
+PARAM_COLUMNS = ("quality_threshold", "high_sl", "high_tp", "med_sl", "med_tp")
+# Colunas opcionais de dimensionamento (fração do capital por tier)
+SIZING_COLUMNS = ("high_position", "med_position")
+
+# Saídas por trade
+EXIT_END = 0
+EXIT_TP = 1
+EXIT_SL = 2
+
+
+def price_paths_from_logs(log_items: Iterable[Mapping]) -> Dict[str, List[float]]:
+    """Agrupa os registros ``price_series`` do Executor em caminhos por trade."""
+    grouped: Dict[str, List] = {}
+    for item in log_items:
+        if item.get("logType", "price_series") != "price_series":
+            continue
+        grouped.setdefault(item["tradeId"], []).append((item["timestamp"], float(item["price"])))
+    return {trade_id: [price for _, price in sorted(points)] for trade_id, points in grouped.items()}
+
+
+@dataclass
+class TradeMatrix:
+    """Caminhos de retorno de N trades, alinhados à esquerda e ordenados por entrada."""
+    returns: np.ndarray        # (N, L) retorno relativo à entrada; linhas completadas com o último valor
+    lengths: np.ndarray        # (N,) pontos válidos por trade
+    quality: np.ndarray        # (N,) quality_score de cada trade
+    amount_usd: np.ndarray     # (N,) tamanho da posição
+    trade_ids: List[str]
+    entry_times: Optional[np.ndarray] = None  # (N,) datetime64[ns] UTC
+    # Execução simulada (``apply_fills``): entrada preenchida e custos de entrada/saída
+    filled: Optional[np.ndarray] = None       # (N,) bool
+    entry_cost: Optional[np.ndarray] = None   # (N,) fração do valor nocional
+    exit_cost: Optional[np.ndarray] = None    # (N,)
+
+    # Arrays necessários para simular; ``arrays``/``from_arrays`` os compartilham
+    ARRAY_FIELDS = ("returns", "lengths", "quality", "amount_usd", "last_return", "offsets", "flat_max", "flat_min",
+                    "filled", "entry_cost", "exit_cost")
+
+    def __post_init__(self):
+        n, width = self.returns.shape
+        if self.filled is None:
+            self.filled = np.ones(n, dtype=bool)
+        if self.entry_cost is None:
+            self.entry_cost = np.zeros(n)
+        if self.exit_cost is None:
+            self.exit_cost = np.zeros(n)
+        self.width = width
+        self.last_return = self.returns[np.arange(n), self.lengths - 1] if n else np.zeros(0)
+        run_max = np.maximum.accumulate(self.returns, axis=1)
+        run_min_neg = np.maximum.accumulate(-self.returns, axis=1)
+        # Deslocamento por linha: mantém o array achatado não decrescente
+        span = float(max(run_max.max(initial=0.0), run_min_neg.max(initial=0.0))) + 1.0
+        self.offsets = np.arange(n, dtype=np.float64) * (2 * span + 1.0)
+        self.flat_max = (run_max + self.offsets[:, None]).ravel()
+        self.flat_min = (run_min_neg + self.offsets[:, None]).ravel()
+        self._row_start = np.arange(n) * width
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """Arrays pré-computados da matriz (para compartilhar entre processos)."""
+        return {name: getattr(self, name) for name in self.ARRAY_FIELDS}
+
+    @classmethod
+    def from_arrays(cls, arrays: Mapping[str, np.ndarray], start: int = 0, stop: Optional[int] = None,
+                    ) -> "TradeMatrix":
+        """Visão das linhas ``[start, stop)`` sem copiar nem recalcular os arrays.
+
+        Como as linhas são contíguas no array achatado e os deslocamentos são
+        absolutos, a fatia continua ordenada e a busca funciona sobre ela.
+        """
+        stop = len(arrays["lengths"]) if stop is None else stop
+        width = arrays["returns"].shape[1]
+        view = cls.__new__(cls)
+        view.returns = arrays["returns"][start:stop]
+        view.lengths = arrays["lengths"][start:stop]
+        view.quality = arrays["quality"][start:stop]
+        view.amount_usd = arrays["amount_usd"][start:stop]
+        view.last_return = arrays["last_return"][start:stop]
+        view.offsets = arrays["offsets"][start:stop]
+        view.flat_max = arrays["flat_max"][start * width:stop * width]
+        view.flat_min = arrays["flat_min"][start * width:stop * width]
+        view.filled = arrays["filled"][start:stop]
+        view.entry_cost = arrays["entry_cost"][start:stop]
+        view.exit_cost = arrays["exit_cost"][start:stop]
+        view.trade_ids = []
+        view.entry_times = None
+        view.width = width
+        view._row_start = np.arange(stop - start) * width
+        return view
+
+    @classmethod
+    def from_trades(cls, trades: Sequence[Mapping], price_paths: Optional[Mapping[str, Sequence[float]]] = None,
+                    ) -> "TradeMatrix":
+        """Monta a matriz a partir dos trades do TraderTable.
+
+        O caminho de cada trade vem de ``price_paths[trade_id]``, do campo
+        ``price_path`` do próprio trade ou, na falta de ambos, de
+        ``[entry_price, exit_price]``.
+        """
+        price_paths = price_paths or {}
+        rows = []
+        for trade in trades:
+            entry = float(trade.get("entry_price") or 0)
+            if entry <= 0:
+                continue
+            trade_id = str(trade.get("trade_id", trade.get("tradeId", len(rows))))
+            path = price_paths.get(trade_id)
+            if path is None or not len(path):
+                path = trade.get("price_path")
+            if path is None or not len(path):
+                exit_price = trade.get("exit_price", trade.get("close_price"))
+                path = [entry] if exit_price is None else [entry, float(exit_price)]
+            rows.append((
+                str(trade.get("entry_time", "")),
+                trade_id,
+                np.asarray(path, dtype=np.float64) / entry - 1.0,
+                float(trade.get("quality_score", 0) or 0),
+                float(trade.get("amount_usd", 1.0) or 1.0),
+            ))
+        rows.sort(key=lambda row: row[0])
+        entry_times = pd.to_datetime([row[0] for row in rows], utc=True, errors="coerce", format="ISO8601")
+
+        width = max((len(row[2]) for row in rows), default=1)
+        returns = np.zeros((len(rows), width))
+        lengths = np.empty(len(rows), dtype=np.int64)
+        for i, (_, _, path, _, _) in enumerate(rows):
+            returns[i, :len(path)] = path
+            returns[i, len(path):] = path[-1]
+            lengths[i] = len(path)
+        return cls(
+            returns=returns,
+            lengths=lengths,
+            quality=np.array([row[3] for row in rows]),
+            amount_usd=np.array([row[4] for row in rows]),
+            trade_ids=[row[1] for row in rows],
+            entry_times=entry_times.tz_convert(None).to_numpy("datetime64[ns]"),
+        )
+
+    def apply_fills(self, simulator, liquidity: Optional[np.ndarray] = None, exit_retries: int = 3) -> "TradeMatrix":
+        """Simula a execução de cada trade com um ``common.fill_simulator.FillSimulator``.
+
+        A entrada pode falhar (o trade deixa de ser selecionado) e entrada e
+        saída passam a custar latência, impacto e taxas.  A saída é reenviada
+        até ``exit_retries`` vezes e não reverte por slippage.  ``liquidity``
+        (N,), na unidade de ``amount_usd``, dá o impacto no pool (metade de
+        cada lado); sem ela não há impacto.
+        """
+        n = len(self)
+        reserve = np.full(n, np.inf) if liquidity is None else np.asarray(liquidity, dtype=np.float64) / 2
+        entry = simulator.simulate("buy", self.amount_usd, 1.0, reserve_quote=reserve)
+        exit_fill = simulator.simulate("sell", np.where(entry["success"], entry["amount_out"], self.amount_usd), 1.0,
+                                       reserve_base=reserve, max_slippage=np.inf, retries=exit_retries)
+        self.filled = entry["success"]
+        self.entry_cost = np.where(entry["success"], entry["cost"], 0.0)
+        self.exit_cost = exit_fill["cost"]
+        return self
+
+    def _first_hit(self, flat: np.ndarray, levels: np.ndarray) -> np.ndarray:
+        """Índice do primeiro ponto com valor >= ``levels[p, n]`` (``width`` se nunca)."""
+        positions = np.searchsorted(flat, levels + self.offsets, side="left")
+        hit = positions - self._row_start
+        return np.where(hit < self.lengths, hit, self.width)
+
+    def simulate(self, params: np.ndarray) -> Dict[str, np.ndarray]:
+        """Simula P conjuntos de parâmetros (matriz ``(P, 5)`` em ``PARAM_COLUMNS``,
+        ou ``(P, 7)`` com ``SIZING_COLUMNS`` ao final).
+
+        Retorna arrays ``(P, N)``: ``selected``, ``returns`` (retorno realizado
+        por trade), ``exit_reason``, ``exit_index`` e ``position`` (fração do
+        capital por trade, ou None sem colunas de dimensionamento).
+        """
+        params = np.atleast_2d(np.asarray(params, dtype=np.float64))
+        threshold, high_sl, high_tp, med_sl, med_tp = (params[:, i:i + 1] for i in range(5))
+
+        high = self.quality >= HIGH_SCORE_TIER
+        medium = (self.quality >= MEDIUM_SCORE_TIER) & ~high
+        sl = np.where(high, high_sl, np.where(medium, med_sl, LOW_TIER_SL))
+        tp = np.where(high, high_tp, np.where(medium, med_tp, LOW_TIER_TP))
+
+        tp_index = self._first_hit(self.flat_max, tp)
+        sl_index = self._first_hit(self.flat_min, sl)
+        # Empate impossível no mesmo ponto (retorno >= tp > 0 > -sl); SL vence por conservadorismo
+        exit_reason = np.where(
+            (sl_index <= tp_index) & (sl_index < self.width), EXIT_SL,
+            np.where(tp_index < self.width, EXIT_TP, EXIT_END),
+        )
+        realized = np.where(exit_reason == EXIT_TP, tp, np.where(exit_reason == EXIT_SL, -sl, self.last_return))
+        # Custos de execução (zero sem ``apply_fills``)
+        realized = (1 + realized) * (1 - self.exit_cost) / (1 + self.entry_cost) - 1
+        exit_index = np.where(exit_reason == EXIT_TP, tp_index,
+                              np.where(exit_reason == EXIT_SL, sl_index, self.lengths - 1))
+        position = None
+        if params.shape[1] >= len(PARAM_COLUMNS) + len(SIZING_COLUMNS):
+            high_pos, med_pos = params[:, 5:6], params[:, 6:7]
+            position = np.where(high, high_pos, np.where(medium, med_pos, LOW_TIER_POSITION))
+        return {
+            "selected": (self.quality >= threshold) & self.filled,
+            "returns": realized,
+            "exit_reason": exit_reason,
+            "exit_index": exit_index,
+            "position": position,
+        }
+
+    def evaluate(self, params: np.ndarray, initial_capital: float = 1000.0) -> Dict[str, np.ndarray]:
+        """Métricas por conjunto de parâmetros, todas como arrays de tamanho P."""
+        sim = self.simulate(params)
+        selected = sim["selected"]
+        returns = np.where(selected, sim["returns"], 0.0)
+        if sim["position"] is None:
+            pnl = returns * self.amount_usd
+        else:
+            pnl = returns * sim["position"] * initial_capital
+
+        trade_count = selected.sum(axis=1)
+        safe_count = np.maximum(trade_count, 1)
+        wins = ((returns > 0) & selected).sum(axis=1)
+        mean_return = returns.sum(axis=1) / safe_count
+        variance = (np.where(selected, returns - mean_return[:, None], 0.0) ** 2).sum(axis=1) / np.maximum(trade_count - 1, 1)
+        std = np.sqrt(variance)
+
+        # Drawdown sobre a curva de capital (capital inicial + P&L acumulado)
+        equity = initial_capital + np.cumsum(pnl, axis=1)
+        peak = np.maximum(np.maximum.accumulate(equity, axis=1), initial_capital)
+        drawdown = ((equity - peak) / peak).min(axis=1, initial=0.0)
+
+        return {
+            "trade_count": trade_count,
+            "win_rate": np.where(trade_count > 0, wins / safe_count, 0.0),
+            "total_pnl": pnl.sum(axis=1),
+            "total_return": pnl.sum(axis=1) / initial_capital,
+            "avg_return": np.where(trade_count > 0, mean_return, 0.0),
+            "max_drawdown": drawdown,
+            "sharpe_ratio": np.where(std > 0, mean_return / np.where(std > 0, std, 1.0), 0.0),
+            "tp_rate": ((sim["exit_reason"] == EXIT_TP) & selected).sum(axis=1) / safe_count,
+            "sl_rate": ((sim["exit_reason"] == EXIT_SL) & selected).sum(axis=1) / safe_count,
+        }
+
+
+def params_matrix(param_sets: Iterable[Mapping[str, float]]) -> np.ndarray:
+    """Converte dicionários de parâmetros em matriz ``(P, 5)`` (ou ``(P, 7)`` com posições)."""
+    param_sets = list(param_sets)
+    columns = PARAM_COLUMNS
+    if param_sets and all(name in param_sets[0] for name in SIZING_COLUMNS):
+        columns = PARAM_COLUMNS + SIZING_COLUMNS
+    return np.array([[float(p[name]) for name in columns] for p in param_sets], dtype=np.float64).reshape(-1, len(columns))
+
+
+def _benchmark(n_trades: int = 500, path_len: int = 240, n_params: int = 5000) -> None:
+    import time
+
+    rng = np.random.default_rng(7)
+    trades = [
+        {
+            "trade_id": f"t{i}",
+            "entry_time": f"2024-01-01T00:{i:06d}",
+            "entry_price": 1.0,
+            "quality_score": float(rng.integers(40, 100)),
+            "amount_usd": 100.0,
+            "price_path": np.exp(np.cumsum(rng.normal(0, 0.02, path_len))).tolist(),
+        }
+        for i in range(n_trades)
+    ]
+    started = time.perf_counter()
+    matrix = TradeMatrix.from_trades(trades)
+    built = time.perf_counter() - started
+
+    params = np.column_stack([
+        rng.uniform(50, 80, n_params),
+        rng.uniform(0.05, 0.2, n_params), rng.uniform(0.15, 0.5, n_params),
+        rng.uniform(0.05, 0.25, n_params), rng.uniform(0.1, 0.4, n_params),
+    ])
+    started = time.perf_counter()
+    for chunk in np.array_split(params, max(1, n_params // 500)):
+        matrix.evaluate(chunk)
+    elapsed = time.perf_counter() - started
+    print(f"{n_trades} trades x {path_len} pontos: matriz em {built * 1000:.0f} ms, "
+          f"{n_params} conjuntos em {elapsed:.2f} s ({n_params / elapsed:,.0f}/s)")
+
+
+if __name__ == "__main__":
+    _benchmark()
@@ -0,0 +1,289 @@
+"""
+Métricas de performance dos trades, vetorizadas.
+
+Substitui o caminho antigo (``iterrows`` + ``pd.to_datetime`` por linha e um
+DataFrame reconstruído a cada chamada):
+
+- ``trades_frame`` monta o DataFrame uma vez, com colunas tipadas e os
+  timestamps convertidos numa única passada;
+- ``compute_metrics`` calcula win rate, P&L, drawdown, Sharpe, duração média
+  e o detalhamento por tier de quality_score (groupby);
+- ``MetricsAccumulator`` mantém as mesmas métricas de forma incremental à
+  medida que novos trades fechados chegam, sem reprocessar o histórico.
+
+O drawdown é medido sobre a curva de capital ``capital_inicial + P&L
+acumulado`` contra o pico (nunca menor que o capital inicial).  A fórmula
+antiga dividia pelo máximo do P&L acumulado, que pode ser zero ou negativo.
+
+Execute ``python metrics.py`` para o benchmark com 10k/100k/1M trades.
+"""
+
+import logging
+import math
+import time
+from typing import Dict, List, Mapping
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+DEFAULT_INITIAL_CAPITAL = 1000.0
+
+# Mesmos cortes de tier do Trader (calculate_trade_parameters)
+TIER_BINS = [-np.inf, 60, 80, np.inf]
+TIER_LABELS = ["low", "medium", "high"]
+
+
+def trades_frame(trades) -> pd.DataFrame:
+    """DataFrame tipado dos trades; aceita lista de dicts ou DataFrame já montado."""
+    df = trades if isinstance(trades, pd.DataFrame) else pd.DataFrame.from_records(list(trades))
+    if df.empty:
+        return df
+    df = df.copy()
+    for column in ("entry_time", "exit_time"):
+        if column in df and not pd.api.types.is_datetime64_any_dtype(df[column]):
+            df[column] = pd.to_datetime(df[column], utc=True, errors="coerce", format="ISO8601")
+    for column in ("pnl", "quality_score"):
+        if column in df:
+            df[column] = pd.to_numeric(df[column], errors="coerce")
+    return df
+
+
+def trade_durations_hours(df: pd.DataFrame) -> pd.Series:
+    """Duração de cada trade em horas (NaN quando falta entrada ou saída)."""
+    if "entry_time" not in df or "exit_time" not in df:
+        return pd.Series(np.nan, index=df.index)
+    return (df["exit_time"] - df["entry_time"]).dt.total_seconds() / 3600
+
+
+def quality_tiers(scores: pd.Series) -> pd.Series:
+    return pd.cut(scores, TIER_BINS, right=False, labels=TIER_LABELS)
+
+
+def _realization_order(df: pd.DataFrame) -> pd.DataFrame:
+    """Ordena pelo momento em que o P&L foi realizado (saída, ou entrada na falta dela)."""
+    for column in ("exit_time", "entry_time"):
+        if column in df and df[column].notna().any():
+            return df.sort_values(column, kind="stable", na_position="last")
+    return df
+
+
+def max_drawdown(pnl: np.ndarray, initial_capital: float = DEFAULT_INITIAL_CAPITAL) -> float:
+    """Maior queda relativa da curva de capital (valor <= 0)."""
+    if not len(pnl):
+        return 0.0
+    equity = initial_capital + np.cumsum(pnl)
+    peak = np.maximum(np.maximum.accumulate(equity), initial_capital)
+    return float(((equity - peak) / peak).min(initial=0.0))
+
+
+def tier_breakdown(df: pd.DataFrame) -> Dict[str, Dict[str, float]]:
+    """Métricas agregadas por tier de quality_score."""
+    if df.empty or "quality_score" not in df:
+        return {}
+    grouped = df.assign(
+        tier=quality_tiers(df["quality_score"]),
+        win=df["pnl"] > 0,
+        duration_h=trade_durations_hours(df),
+    ).groupby("tier", observed=True)
+    table = grouped.agg(
+        trades=("pnl", "size"),
+        win_rate=("win", "mean"),
+        total_pnl=("pnl", "sum"),
+        avg_pnl=("pnl", "mean"),
+        avg_trade_duration=("duration_h", "mean"),
+    )
+    table["avg_trade_duration"] = table["avg_trade_duration"].fillna(0.0)
+    return {
+        str(tier): {key: (int(value) if key == "trades" else float(value)) for key, value in row.items()}
+        for tier, row in table.iterrows()
+    }
+
+
+def compute_metrics(trades, initial_capital: float = DEFAULT_INITIAL_CAPITAL) -> Dict:
+    """Métricas de performance dos trades fechados (mesmas chaves do formato antigo, mais ``tiers``)."""
+    df = trades_frame(trades)
+    total = len(df)
+    closed = df[df["status"] == "closed"] if total and "status" in df else df.iloc[0:0]
+    if closed.empty:
+        return {
+            "total_trades": total,
+            "closed_trades": 0,
+            "win_rate": 0,
+            "avg_pnl": 0,
+            "total_pnl": 0,
+            "max_drawdown": 0,
+            "sharpe_ratio": 0,
+            "avg_trade_duration": 0,
+            "tiers": {},
+        }
+
+    closed = _realization_order(closed)
+    pnl = closed["pnl"].to_numpy(dtype=np.float64, na_value=0.0)
+    std = float(pnl.std(ddof=1)) if len(pnl) > 1 else 0.0
+    avg_pnl = float(pnl.mean())
+    durations = trade_durations_hours(closed)
+
+    return {
+        "total_trades": len(closed),
+        "closed_trades": len(closed),
+        "win_rate": float((pnl > 0).mean()),
+        "avg_pnl": avg_pnl,
+        "total_pnl": float(pnl.sum()),
+        "max_drawdown": max_drawdown(pnl, initial_capital),
+        "sharpe_ratio": avg_pnl / std if std > 0 else 0,
+        "avg_trade_duration": float(durations.mean()) if durations.notna().any() else 0,
+        "tiers": tier_breakdown(closed),
+    }
+
+
+class MetricsAccumulator:
+    """Métricas incrementais: cada ``update`` processa apenas os trades novos.
+
+    Os trades de cada lote devem vir em ordem de realização e depois dos
+    lotes anteriores.  ``to_dict``/``from_dict`` permitem persistir o estado
+    entre execuções.
+    """
+
+    FIELDS = ("count", "wins", "mean", "m2", "equity", "peak", "max_drawdown",
+              "duration_sum", "duration_count")
+
+    def __init__(self, initial_capital: float = DEFAULT_INITIAL_CAPITAL):
+        self.initial_capital = initial_capital
+        self.count = 0
+        self.wins = 0
+        self.mean = 0.0
+        self.m2 = 0.0  # soma dos quadrados dos desvios (Welford/Chan)
+        self.equity = initial_capital
+        self.peak = initial_capital
+        self.max_drawdown = 0.0
+        self.duration_sum = 0.0
+        self.duration_count = 0
+        self.tiers: Dict[str, Dict[str, float]] = {}
+
+    def update(self, trades) -> int:
+        """Incorpora novos trades (apenas os fechados contam); retorna quantos entraram."""
+        df = trades_frame(trades)
+        if df.empty:
+            return 0
+        if "status" in df:
+            df = df[df["status"] == "closed"]
+        if df.empty:
+            return 0
+        df = _realization_order(df)
+        pnl = df["pnl"].to_numpy(dtype=np.float64, na_value=0.0)
+        n = len(pnl)
+
+        # Combina média/variância do lote com o acumulado (Chan et al.)
+        batch_mean = float(pnl.mean())
+        batch_m2 = float(((pnl - batch_mean) ** 2).sum())
+        total = self.count + n
+        delta = batch_mean - self.mean
+        self.m2 += batch_m2 + delta * delta * self.count * n / total
+        self.mean += delta * n / total
+        self.count = total
+        self.wins += int((pnl > 0).sum())
+
+        equity = self.equity + np.cumsum(pnl)
+        peak = np.maximum(np.maximum.accumulate(equity), self.peak)
+        self.max_drawdown = min(self.max_drawdown, float(((equity - peak) / peak).min()))
+        self.equity = float(equity[-1])
+        self.peak = float(peak[-1])
+
+        durations = trade_durations_hours(df)
+        self.duration_sum += float(durations.sum(skipna=True))
+        self.duration_count += int(durations.notna().sum())
+
+        for tier, stats in tier_breakdown(df).items():
+            current = self.tiers.setdefault(tier, {"trades": 0, "wins": 0, "total_pnl": 0.0})
+            current["trades"] += stats["trades"]
+            current["wins"] += round(stats["win_rate"] * stats["trades"])
+            current["total_pnl"] += stats["total_pnl"]
+        return n
+
+    def metrics(self) -> Dict:
+        std = math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+        return {
+            "total_trades": self.count,
+            "closed_trades": self.count,
+            "win_rate": self.wins / self.count if self.count else 0,
+            "avg_pnl": self.mean if self.count else 0,
+            "total_pnl": self.mean * self.count,
+            "max_drawdown": self.max_drawdown,
+            "sharpe_ratio": self.mean / std if std > 0 else 0,
+            "avg_trade_duration": self.duration_sum / self.duration_count if self.duration_count else 0,
+            "tiers": {
+                tier: {
+                    "trades": stats["trades"],
+                    "win_rate": stats["wins"] / stats["trades"],
+                    "total_pnl": stats["total_pnl"],
+                    "avg_pnl": stats["total_pnl"] / stats["trades"],
+                }
+                for tier, stats in self.tiers.items() if stats["trades"]
+            },
+        }
+
+    def to_dict(self) -> Dict:
+        state = {name: getattr(self, name) for name in self.FIELDS}
+        state["initial_capital"] = self.initial_capital
+        state["tiers"] = {tier: dict(stats) for tier, stats in self.tiers.items()}
+        return state
+
+    @classmethod
+    def from_dict(cls, state: Mapping) -> "MetricsAccumulator":
+        acc = cls(float(state.get("initial_capital", DEFAULT_INITIAL_CAPITAL)))
+        for name in cls.FIELDS:
+            if name in state:
+                setattr(acc, name, type(getattr(acc, name))(state[name]))
+        acc.tiers = {
+            tier: {"trades": int(s["trades"]), "wins": int(s["wins"]), "total_pnl": float(s["total_pnl"])}
+            for tier, s in state.get("tiers", {}).items()
+        }
+        return acc
+
+
+def _synthetic_trades(n: int, seed: int = 0) -> List[Dict]:
+    rng = np.random.default_rng(seed)
+    entry = pd.Timestamp("2024-01-01", tz="UTC") + pd.to_timedelta(np.sort(rng.integers(0, 30 * 86400, n)), unit="s")
+    exit_ = entry + pd.to_timedelta(rng.integers(60, 12 * 3600, n), unit="s")
+    entry_iso = entry.strftime("%Y-%m-%dT%H:%M:%SZ")
+    exit_iso = exit_.strftime("%Y-%m-%dT%H:%M:%SZ")
+    pnl = rng.normal(1.0, 20.0, n).round(2)
+    quality = rng.integers(40, 100, n)
+    return [
+        {"trade_id": f"t{i}", "status": "closed", "pnl": float(pnl[i]), "quality_score": int(quality[i]),
+         "entry_time": entry_iso[i], "exit_time": exit_iso[i]}
+        for i in range(n)
+    ]
+
+
+def _legacy_avg_duration(trades_df: pd.DataFrame) -> float:
+    durations = []
+    for _, trade in trades_df.iterrows():
+        entry_time = pd.to_datetime(trade["entry_time"])
+        exit_time = pd.to_datetime(trade["exit_time"])
+        durations.append((exit_time - entry_time).total_seconds() / 3600)
+    return np.mean(durations) if durations else 0
+
+
+if __name__ == "__main__":
+    for n in (10_000, 100_000, 1_000_000):
+        trades = _synthetic_trades(n)
+        started = time.perf_counter()
+        compute_metrics(trades)
+        elapsed = time.perf_counter() - started
+
+        acc = MetricsAccumulator()
+        started = time.perf_counter()
+        for start in range(0, n, n // 10):
+            acc.update(trades[start:start + n // 10])
+        incremental = time.perf_counter() - started
+
+        line = f"{n:>9,} trades: compute_metrics {elapsed:6.2f} s, incremental (10 lotes) {incremental:6.2f} s"
+        if n <= 10_000:
+            started = time.perf_counter()
+            _legacy_avg_duration(pd.DataFrame(trades))
+            line += f", duração antiga (iterrows) {time.perf_counter() - started:6.2f} s"
+        print(line)
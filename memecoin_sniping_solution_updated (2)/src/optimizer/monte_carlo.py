@@ -0,0 +1,205 @@
+"""
+Simulação Monte Carlo de risco para o dimensionamento de posição.
+
+As métricas do backtest são pontuais: um único caminho histórico.  Aqui os
+resultados dos trades fechados (retorno por unidade alocada, com o tier de
+quality_score) são reamostrados por block bootstrap circular — blocos de
+trades consecutivos preservam a autocorrelação (sequências de perdas) — e
+milhares de curvas de capital são simuladas para cada conjunto de posições
+``{high, medium, low}``:
+
+    capital_t = capital_{t-1} · (1 + posição_tier · retorno_t)
+
+Tudo é vetorizado: os índices reamostrados formam uma matriz caminhos x
+trades, o log do crescimento por trade é pré-calculado uma vez por conjunto
+de posições e a curva sai de um ``cumsum``.  Os mesmos índices são usados em
+todos os conjuntos (números aleatórios comuns), então as diferenças entre
+conjuntos não vêm do ruído da amostragem.  Os caminhos são processados em
+blocos para limitar a memória.
+
+O relatório traz quantis do drawdown máximo e do retorno final,
+probabilidade de ruína (capital abaixo de ``ruin_threshold`` do inicial em
+algum momento) e a fração de Kelly por tier.
+
+Execute ``python monte_carlo.py`` para medir 100k caminhos.
+"""
+
+import logging
+import time
+from typing import Dict, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from backtest import HIGH_SCORE_TIER, LOW_TIER_POSITION, MEDIUM_SCORE_TIER
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+TIERS = ("low", "medium", "high")
+QUANTILES = (0.5, 0.9, 0.95, 0.99)
+
+
+def trade_outcomes(trades: Sequence[Mapping]) -> Tuple[np.ndarray, np.ndarray]:
+    """Retorno por unidade alocada e tier (0=low, 1=medium, 2=high) dos trades fechados.
+
+    Usa ``exit_price/entry_price - 1`` quando disponível e ``pnl/amount_usd``
+    caso contrário; a ordem de realização é mantida para o block bootstrap.
+    """
+    rows = []
+    for trade in trades:
+        if trade.get("status", "closed") != "closed":
+            continue
+        entry = float(trade.get("entry_price") or 0)
+        exit_price = trade.get("exit_price", trade.get("close_price"))
+        if entry > 0 and exit_price is not None:
+            ret = float(exit_price) / entry - 1.0
+        elif trade.get("pnl") is not None and float(trade.get("amount_usd") or 0) > 0:
+            ret = float(trade["pnl"]) / float(trade["amount_usd"])
+        else:
+            continue
+        rows.append((str(trade.get("exit_time") or trade.get("entry_time") or ""), max(ret, -1.0),
+                     float(trade.get("quality_score", 0) or 0)))
+    rows.sort(key=lambda row: row[0])
+    returns = np.array([row[1] for row in rows], dtype=np.float64)
+    quality = np.array([row[2] for row in rows], dtype=np.float64)
+    tiers = (quality >= MEDIUM_SCORE_TIER).astype(np.int8) + (quality >= HIGH_SCORE_TIER)
+    return returns, tiers
+
+
+def kelly_fraction(returns: np.ndarray, max_fraction: float = 1.0, steps: int = 401) -> float:
+    """Fração que maximiza E[log(1 + f·r)] em ``[0, max_fraction]`` (busca em grade)."""
+    if not len(returns) or returns.mean() <= 0:
+        return 0.0
+    fractions = np.linspace(0.0, max_fraction, steps)
+    # Perda total (r = -1) com f = 1 vira log(0): limita para não gerar -inf
+    growth = np.log(np.maximum(1.0 + fractions[:, None] * returns[None, :], 1e-12)).mean(axis=1)
+    return float(fractions[int(np.argmax(growth))])
+
+
+class MonteCarloSimulator:
+    """Block bootstrap de trades e curvas de capital vetorizadas."""
+
+    def __init__(self, n_paths: int = 10_000, horizon: Optional[int] = None, block_size: int = 5,
+                 ruin_threshold: float = 0.5, seed: int = 42, chunk_size: int = 10_000,
+                 kelly_multiplier: float = 0.5):
+        self.n_paths = n_paths
+        self.horizon = horizon
+        self.block_size = block_size
+        self.ruin_threshold = ruin_threshold
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.kelly_multiplier = kelly_multiplier
+
+    @classmethod
+    def from_config(cls, config: Dict) -> "MonteCarloSimulator":
+        """Cria o simulador a partir da seção ``optimizer.monte_carlo``."""
+        return cls(**config.get("optimizer", {}).get("monte_carlo", {}))
+
+    def bootstrap_indices(self, n_trades: int, n_paths: int, horizon: int,
+                          rng: np.random.Generator) -> np.ndarray:
+        """Matriz ``n_paths x horizon`` de índices por block bootstrap circular."""
+        block = max(1, min(self.block_size, n_trades))
+        n_blocks = -(-horizon // block)
+        starts = rng.integers(0, n_trades, size=(n_paths, n_blocks, 1))
+        indices = (starts + np.arange(block)) % n_trades
+        return indices.reshape(n_paths, n_blocks * block)[:, :horizon]
+
+    def simulate(self, returns: np.ndarray, tiers: np.ndarray,
+                 position_sets: Mapping[str, Mapping[str, float]]) -> Dict[str, Dict]:
+        """Simula cada conjunto de posições (``{"high": f, "medium": f, "low": f}``)."""
+        n_trades = len(returns)
+        if not n_trades:
+            return {}
+        horizon = self.horizon or n_trades
+        names = list(position_sets)
+        # log(1 + f·r) por trade, para cada conjunto: (conjuntos x trades)
+        fractions = np.array([[position_sets[name].get(tier, 0.0) for tier in TIERS] for name in names])
+        growth = np.log(np.maximum(1.0 + fractions[:, tiers] * returns[None, :], 1e-12))
+
+        rng = np.random.default_rng(self.seed)
+        drawdowns = np.empty((len(names), self.n_paths))
+        finals = np.empty((len(names), self.n_paths))
+        ruined = np.zeros(len(names), dtype=np.int64)
+        log_ruin = np.log(self.ruin_threshold)
+        for start in range(0, self.n_paths, self.chunk_size):
+            size = min(self.chunk_size, self.n_paths - start)
+            indices = self.bootstrap_indices(n_trades, size, horizon, rng)
+            for k in range(len(names)):
+                log_equity = np.cumsum(growth[k][indices], axis=1)
+                peak = np.maximum(np.maximum.accumulate(log_equity, axis=1), 0.0)
+                drawdowns[k, start:start + size] = 1.0 - np.exp((log_equity - peak).min(axis=1))
+                finals[k, start:start + size] = np.expm1(log_equity[:, -1])
+                ruined[k] += int((log_equity.min(axis=1) <= log_ruin).sum())
+
+        report = {}
+        for k, name in enumerate(names):
+            report[name] = {
+                "positions": dict(position_sets[name]),
+                "paths": self.n_paths,
+                "horizon": horizon,
+                "max_drawdown_quantiles": {f"p{int(q * 100)}": float(v)
+                                           for q, v in zip(QUANTILES, np.quantile(drawdowns[k], QUANTILES))},
+                "final_return_quantiles": {f"p{int(q * 100)}": float(v)
+                                           for q, v in zip((0.05, 0.5, 0.95), np.quantile(finals[k], (0.05, 0.5, 0.95)))},
+                "ruin_probability": float(ruined[k] / self.n_paths),
+            }
+        return report
+
+    def kelly(self, returns: np.ndarray, tiers: np.ndarray) -> Dict[str, Dict[str, float]]:
+        """Fração de Kelly por tier e a fração sugerida (``kelly_multiplier`` x Kelly)."""
+        result = {}
+        for code, tier in enumerate(TIERS):
+            tier_returns = returns[tiers == code]
+            if not len(tier_returns):
+                continue
+            full = kelly_fraction(tier_returns)
+            result[tier] = {
+                "trades": int(len(tier_returns)),
+                "kelly": round(full, 4),
+                "suggested": round(full * self.kelly_multiplier, 4),
+            }
+        return result
+
+    def risk_report(self, trades: Sequence[Mapping],
+                    position_sets: Mapping[str, Mapping[str, float]]) -> Dict:
+        """Relatório completo (simulação por conjunto + Kelly por tier) para os trades."""
+        returns, tiers = trade_outcomes(trades)
+        if not len(returns):
+            return {}
+        started = time.perf_counter()
+        report = {"trades": int(len(returns)), "simulations": self.simulate(returns, tiers, position_sets),
+                  "kelly": self.kelly(returns, tiers)}
+        report["elapsed_s"] = round(time.perf_counter() - started, 3)
+        logger.info(f"Monte Carlo: {len(position_sets)} conjuntos x {self.n_paths} caminhos em {report['elapsed_s']} s")
+        return report
+
+
+def position_set(trader_config: Mapping, params: Optional[Mapping] = None) -> Dict[str, float]:
+    """Posições por tier da config do Trader, com os parâmetros otimizados por cima."""
+    params = params or {}
+    return {
+        "high": float(params.get("high_score_position", trader_config.get("high_score_position", 0.15))),
+        "medium": float(params.get("medium_score_position", trader_config.get("medium_score_position", 0.10))),
+        "low": float(params.get("low_score_position", trader_config.get("low_score_position", LOW_TIER_POSITION))),
+    }
+
+
+def _benchmark() -> None:
+    rng = np.random.default_rng(0)
+    n = 500
+    returns = np.clip(rng.standard_t(3, n) * 0.15 + 0.02, -1.0, None)
+    tiers = rng.integers(0, 3, n).astype(np.int8)
+    simulator = MonteCarloSimulator(n_paths=100_000, horizon=200, block_size=5)
+    sets = {"current": {"high": 0.15, "medium": 0.10, "low": 0.05},
+            "aggressive": {"high": 0.30, "medium": 0.20, "low": 0.10}}
+    started = time.perf_counter()
+    report = simulator.simulate(returns, tiers, sets)
+    elapsed = time.perf_counter() - started
+    print(f"100k caminhos x 200 trades x {len(sets)} conjuntos: {elapsed:.2f} s")
+    for name, result in report.items():
+        print(name, result["max_drawdown_quantiles"], f"ruína {result['ruin_probability']:.4f}")
+    print("Kelly:", simulator.kelly(returns, tiers))
+
+
+if __name__ == "__main__":
+    _benchmark()
@@ -2,13 +2,23 @@ import json
 import logging
 import os
 import boto3
-import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 from botocore.exceptions import ClientError, NoCredentialsError
 from decimal import Decimal
 import io
 
+from ab_evaluation import RUNNING, SequentialABTest
+from common.fill_simulator import FillModel, FillSimulator
+from common.versioned_config import VersionedConfig, content_hash
+from backtest import TradeMatrix, params_matrix, price_paths_from_logs
+from metrics import compute_metrics, trade_durations_hours, trades_frame
+from monte_carlo import MonteCarloSimulator, position_set
+from optimizer_state import STATE_ID, OptimizerState
+from param_search import ParameterSearch
+from trade_loader import TradeLoader, frame_to_trades
+from walk_forward import WalkForwardHarness
+
 # Configuração de logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
@@ -23,20 +33,23 @@ class MockDynamoDBTable:
         return {"Item": self.items.get(Key["trade_id"])}
         
     def put_item(self, Item):
-        self.items[Item["trade_id"]] = Item
+        self.items[Item.get("trade_id", Item.get("optimizationId"))] = Item
 
     def scan(self, FilterExpression, ExpressionAttributeValues):
         # Simula um scan simples para o teste
         # Em um ambiente real, isso seria mais complexo
         return {"Items": list(self.items.values())}
 
+    def query(self, KeyConditionExpression, **kwargs):
+        return {"Items": []}
+
 class MockS3Client:
     def get_object(self, Bucket, Key):
         if Key == "agent_config.json":
             return {"Body": io.BytesIO(json.dumps(get_default_config()).encode("utf-8"))}
         raise ClientError({"Error": {"Code": "NoSuchKey"}}, "GetObject")
 
-    def put_object(self, Bucket, Key, Body, ContentType):
+    def put_object(self, Bucket, Key, Body, ContentType, **kwargs):
         print(f"Mock S3: Objeto salvo no bucket {Bucket} com a chave {Key}")
 
 class MockSageMakerRuntime:
@@ -81,40 +94,123 @@ OPTIMIZER_TABLE_NAME = os.environ.get("OPTIMIZER_TABLE_NAME", "MemecoinSnipingOp
 CONFIG_BUCKET = os.environ.get("CONFIG_BUCKET", "memecoin-sniping-config-bucket")
 CONFIG_KEY = os.environ.get("CONFIG_KEY", "agent_config.json")
 SAGEMAKER_OPTIMIZER_ENDPOINT_NAME = os.environ.get("SAGEMAKER_OPTIMIZER_ENDPOINT_NAME", "memecoin-optimizer-endpoint")
+TRADE_LOG_TABLE_NAME = os.environ.get("TRADE_LOG_TABLE", "MemecoinSnipingTradeLog")
+CONFIG_VERSIONS_PREFIX = "config_versions/"
+OPTIMIZER_STATE_KEY = os.environ.get("OPTIMIZER_STATE_KEY", "optimizer_state/trade_window.json.gz")
 
 # Tabelas DynamoDB
 trader_table = dynamodb.Table(TRADER_TABLE_NAME)
 optimizer_table = dynamodb.Table(OPTIMIZER_TABLE_NAME)
+trade_log_table = dynamodb.Table(TRADE_LOG_TABLE_NAME)
+
+# Versões de configuração já conhecidas, por hash de conteúdo
+_CONFIG_VERSIONS = {}
+
+# Carregadores de trades (cliente de baixo nível do DynamoDB), por status, criados sob demanda
+_TRADE_LOADERS = {}
+
+def get_trade_loader(status="closed"):
+    """Carregador tipado do histórico (criado na primeira chamada, reaproveitado entre invocações)."""
+    if status not in _TRADE_LOADERS:
+        _TRADE_LOADERS[status] = TradeLoader.from_config(boto3.client("dynamodb"), TRADER_TABLE_NAME,
+                                                         get_default_config(), status=status)
+    return _TRADE_LOADERS[status]
+
+def get_historical_trades(days_back=30, since=None, as_frame=False):
+    """Recupera os trades fechados do DynamoDB.
 
-def get_historical_trades(days_back=30):
-    """Recupera dados históricos de trades do DynamoDB."""
+    Com ``since`` (ISO), retorna apenas os trades fechados a partir desse
+    instante, em vez da janela inteira de ``days_back`` dias.  Com
+    ``as_frame=True`` retorna o DataFrame tipado do carregador.
+    """
     try:
-        # Calcular data de início
-        start_date = (datetime.utcnow() - timedelta(days=days_back)).isoformat()
-        
-        # Scan da tabela de trades
-        response = trader_table.scan(
-            FilterExpression="entry_time >= :start_date",
-            ExpressionAttributeValues={":start_date": start_date}
-        )
-        
-        trades = response["Items"]
-        
-        # Converter Decimal para float para compatibilidade com pandas
-        for trade in trades:
-            for key, value in trade.items():
-                if isinstance(value, Decimal):
-                    trade[key] = float(value)
-        
-        logger.info(f"Recuperados {len(trades)} trades dos últimos {days_back} dias.")
-        return trades
+        start = pd.Timestamp(since).to_pydatetime() if since else datetime.utcnow() - timedelta(days=days_back)
+        df = get_trade_loader().load(start)
+        logger.info(f"Recuperados {len(df)} trades " + (f"fechados após {since}." if since else f"dos últimos {days_back} dias."))
+        return df if as_frame else frame_to_trades(df)
     
     except ClientError as e:
         logger.error(f"Erro de cliente DynamoDB ao recuperar trades históricos: {e}")
-        return []
+        return pd.DataFrame() if as_frame else []
     except Exception as e:
         logger.error(f"Erro inesperado ao recuperar trades históricos: {e}")
-        return []
+        return pd.DataFrame() if as_frame else []
+
+def get_failed_orders(trades):
+    """Ordens de entrada que falharam no período dos ``trades`` (itens ``failed`` do ledger).
+
+    Retorna ``None`` se não for possível lê-las, para a calibração manter a
+    taxa de falha configurada.
+    """
+    exit_times = pd.to_datetime([t.get("exit_time") for t in trades], utc=True, errors="coerce", format="ISO8601")
+    if not len(trades) or exit_times.isna().all():
+        return None
+    try:
+        df = get_trade_loader("failed").load(exit_times.min().to_pydatetime())
+        logger.info(f"Recuperadas {len(df)} ordens falhas para a calibração do modelo de fills.")
+        return frame_to_trades(df)
+    except ClientError as e:
+        logger.error(f"Erro de cliente DynamoDB ao recuperar ordens falhas: {e}")
+        return None
+    except Exception as e:
+        logger.error(f"Erro inesperado ao recuperar ordens falhas: {e}")
+        return None
+
+def load_optimizer_state():
+    """Carrega o último estado salvo do Optimizer (tabela + janela de trades no S3)."""
+    from boto3.dynamodb.conditions import Key
+
+    try:
+        response = optimizer_table.query(
+            KeyConditionExpression=Key("optimizationId").eq(STATE_ID),
+            ScanIndexForward=False,
+            Limit=1
+        )
+        items = response.get("Items", [])
+    except ClientError as e:
+        logger.error(f"Erro ao carregar estado do Optimizer: {e}")
+        items = []
+    if not items:
+        logger.info("Nenhum estado anterior do Optimizer; iniciando do zero.")
+        return OptimizerState()
+    
+    trades = []
+    try:
+        response = s3.get_object(Bucket=CONFIG_BUCKET, Key=OPTIMIZER_STATE_KEY)
+        trades = OptimizerState.load_trades(response["Body"].read())
+    except ClientError as e:
+        # Sem a janela, o estado não serve: reprocessar a janela inteira
+        logger.warning(f"Janela de trades do Optimizer indisponível ({e}); reconstruindo.")
+        return OptimizerState()
+    return OptimizerState.from_item(items[0], trades)
+
+def save_optimizer_state(state):
+    """Persiste o estado do Optimizer para a próxima execução."""
+    try:
+        s3.put_object(
+            Bucket=CONFIG_BUCKET,
+            Key=OPTIMIZER_STATE_KEY,
+            Body=state.dump_trades(),
+            ContentType="application/json",
+            ContentEncoding="gzip"
+        )
+        optimizer_table.put_item(Item=_to_dynamodb(state.to_item()))
+        logger.info(f"Estado do Optimizer salvo (marca d'água {state.watermark}).")
+    except ClientError as e:
+        logger.error(f"Erro ao salvar estado do Optimizer: {e}")
+
+def update_optimizer_state(state, config=None, window_days=30):
+    """Busca só os trades fechados desde a última execução e os incorpora ao estado."""
+    since = state.watermark or None
+    trades = get_historical_trades(days_back=window_days) if not since else get_historical_trades(since=since)
+    new_trades = state.add_trades(trades, window_days=window_days)
+    # Caminhos de preço resolvidos uma única vez, apenas para os trades novos
+    paths = get_price_paths(new_trades, config)
+    for trade in new_trades:
+        path = paths.get(trade.get("trade_id"))
+        if path is not None and len(path):
+            trade["price_path"] = [float(p) for p in path]
+    return new_trades
 
 def calculate_performance_metrics(trades):
     """Calcula métricas de performance dos trades."""
@@ -122,55 +218,9 @@ def calculate_performance_metrics(trades):
         if not trades:
             return {}
         
-        df = pd.DataFrame(trades)
+        metrics = compute_metrics(trades)
         
-        # Filtrar apenas trades fechados
-        closed_trades = df[df["status"] == "closed"]
-        
-        if closed_trades.empty:
-            return {
-                "total_trades": len(trades),
-                "closed_trades": 0,
-                "win_rate": 0,
-                "avg_pnl": 0,
-                "total_pnl": 0,
-                "max_drawdown": 0,
-                "sharpe_ratio": 0,
-                "avg_trade_duration": 0
-            }
-        
-        # Calcular métricas
-        total_trades = len(closed_trades)
-        winning_trades = len(closed_trades[closed_trades["pnl"] > 0])
-        win_rate = winning_trades / total_trades if total_trades > 0 else 0
-        
-        avg_pnl = closed_trades["pnl"].mean()
-        total_pnl = closed_trades["pnl"].sum()
-        
-        # Calcular drawdown máximo
-        cumulative_pnl = closed_trades["pnl"].cumsum()
-        running_max = cumulative_pnl.expanding().max()
-        drawdown = (cumulative_pnl - running_max) / running_max
-        max_drawdown = drawdown.min()
-        
-        # Calcular Sharpe ratio simplificado
-        if closed_trades["pnl"].std() > 0:
-            sharpe_ratio = avg_pnl / closed_trades["pnl"].std()
-        else:
-            sharpe_ratio = 0
-        
-        metrics = {
-            "total_trades": total_trades,
-            "closed_trades": len(closed_trades),
-            "win_rate": win_rate,
-            "avg_pnl": avg_pnl,
-            "total_pnl": total_pnl,
-            "max_drawdown": max_drawdown,
-            "sharpe_ratio": sharpe_ratio,
-            "avg_trade_duration": calculate_avg_trade_duration(closed_trades)
-        }
-        
-        logger.info(f"Métricas calculadas: Win Rate: {win_rate:.2%}, Total P&L: ${total_pnl:.2f}")
+        logger.info(f"Métricas calculadas: Win Rate: {metrics['win_rate']:.2%}, Total P&L: ${metrics['total_pnl']:.2f}")
         return metrics
     
     except Exception as e:
@@ -183,21 +233,84 @@ def calculate_avg_trade_duration(trades_df):
         if trades_df.empty:
             return 0
         
-        durations = []
-        for _, trade in trades_df.iterrows():
-            if "entry_time" in trade and "exit_time" in trade:
-                entry_time = pd.to_datetime(trade["entry_time"])
-                exit_time = pd.to_datetime(trade["exit_time"])
-                duration = (exit_time - entry_time).total_seconds() / 3600  # em horas
-                durations.append(duration)
-        
-        return np.mean(durations) if durations else 0
+        durations = trade_durations_hours(trades_frame(trades_df))
+        return float(durations.mean()) if durations.notna().any() else 0
     
     except Exception as e:
         logger.error(f"Erro ao calcular duração média: {e}")
         return 0
 
 
+def load_trade_path_store(config):
+    """Abre o armazenamento colunar de caminhos de preço (``optimizer.trade_paths``), se configurado."""
+    store_config = (config or {}).get("optimizer", {}).get("trade_paths", {})
+    if not store_config.get("bucket"):
+        return None
+    try:
+        from common.trade_paths import TradePathStore, sync_from_s3
+    except ImportError:
+        logger.warning("Módulo common.trade_paths indisponível; usando a tabela de logs.")
+        return None
+    local_dir = store_config.get("local_dir", "/tmp/trade_paths")
+    try:
+        fetched = sync_from_s3(s3, store_config["bucket"], local_dir, store_config.get("prefix", "trade_paths/"))
+        logger.info(f"{fetched} arquivos de segmentos de preço baixados para {local_dir}.")
+    except ClientError as e:
+        logger.error(f"Erro ao sincronizar segmentos de preço do S3: {e}")
+    return TradePathStore(local_dir)
+
+
+def get_price_paths(trades, config=None):
+    """Recupera os caminhos de preço registrados pelo Executor para cada trade.
+
+    Lê primeiro os segmentos colunares (mapeados em memória, sem cópia) e
+    consulta a tabela de logs apenas para os trades que não estão neles.
+    """
+    from boto3.dynamodb.conditions import Key
+
+    store = load_trade_path_store(config)
+    paths = store.price_paths(t["trade_id"] for t in trades if t.get("trade_id")) if store else {}
+
+    log_items = []
+    for trade in trades:
+        trade_id = trade.get("trade_id")
+        if not trade_id or trade_id in paths or trade.get("price_path"):
+            continue
+        try:
+            kwargs = {"KeyConditionExpression": Key("tradeId").eq(trade_id)}
+            while True:
+                response = trade_log_table.query(**kwargs)
+                log_items.extend(response.get("Items", []))
+                if "LastEvaluatedKey" not in response:
+                    break
+                kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+        except ClientError as e:
+            logger.error(f"Erro de cliente DynamoDB ao recuperar preços do trade {trade_id}: {e}")
+    paths.update(price_paths_from_logs(log_items))
+    logger.info(f"Caminhos de preço recuperados para {len(paths)} de {len(trades)} trades.")
+    return paths
+
+
+def apply_fill_model(matrix, trades, config=None):
+    """Aplica ao backtest as falhas e os custos de execução do ``FillSimulator``.
+
+    O modelo parte de ``trader.fill_model`` e, com
+    ``optimizer.fill_model.calibrate``, é calibrado com os trades reais do
+    histórico (latência e taxa de rede) e com as ordens falhas do mesmo
+    período (taxa de falha).
+    """
+    config = config or get_default_config()
+    fill_config = config.get("optimizer", {}).get("fill_model", {})
+    if not fill_config.get("enabled", False) or not len(matrix):
+        return matrix
+    trader_config = config.get("trader", {})
+    model = FillModel.from_config({"max_slippage": trader_config.get("max_slippage", 0.02),
+                                   **trader_config.get("fill_model", {})})
+    if fill_config.get("calibrate", True):
+        model = FillModel.calibrate(trades, base=model, failures=get_failed_orders(trades))
+    return matrix.apply_fills(FillSimulator(model, seed=fill_config.get("seed")))
+
+
 def simulate_performance_with_params(
     historical_data,
     quality_threshold,
@@ -205,21 +318,24 @@ def simulate_performance_with_params(
     high_tp,
     med_sl,
     med_tp,
+    price_paths=None,
 ):
-    """Simples simulação de performance para testes."""
-    selected = [
-        t for t in historical_data if t.get("quality_score", 0) >= quality_threshold
-    ]
-    if not selected:
-        return {"trade_count": 0, "win_rate": 0}
-
-    wins = 0
-    for trade in selected:
-        pnl = trade.get("exit_price", 0) - trade.get("entry_price", 0)
-        if pnl > 0:
-            wins += 1
-    win_rate = wins / len(selected)
-    return {"trade_count": len(selected), "win_rate": win_rate}
+    """Reproduz os trades históricos com os parâmetros de SL/TP informados.
+
+    Para avaliar muitos conjuntos de parâmetros, monte um ``TradeMatrix`` uma
+    vez e chame ``evaluate`` com a matriz de parâmetros inteira.
+    """
+    matrix = TradeMatrix.from_trades(historical_data, price_paths)
+    metrics = matrix.evaluate(params_matrix([{
+        "quality_threshold": quality_threshold,
+        "high_sl": high_sl,
+        "high_tp": high_tp,
+        "med_sl": med_sl,
+        "med_tp": med_tp,
+    }]))
+    result = {name: values[0].item() for name, values in metrics.items()}
+    result["trade_count"] = int(result["trade_count"])
+    return result
 
 def load_current_config():
     """Carrega a configuração atual do S3."""
@@ -265,12 +381,62 @@ def get_default_config():
             "low_score_sl": 0.20,
             "low_score_tp": 0.20,
             "low_score_position": 0.05,
-            "max_slippage": 0.02
+            "max_slippage": 0.02,
+            "fill_model": {
+                "latency_median_ms": 800,
+                "latency_sigma": 0.6,
+                "volatility": 0.003,
+                "failure_rate": 0.05,
+                "fee_bps": 25,
+                "network_fee": 0.0
+            }
         },
         "optimizer": {
             "optimization_frequency": "weekly",
             "ab_test_percentage": 0.15,
-            "min_trades_for_optimization": 50
+            "min_trades_for_optimization": 50,
+            "ab_evaluation": {
+                "alpha": 0.05,
+                "min_trades_per_arm": 30
+            },
+            "search": {
+                "backend": "local",
+                "sampler": "tpe",
+                "n_trials": 512,
+                "batch_size": 64,
+                "patience": 8,
+                "seed": 42,
+                "workers": 1,
+                "min_trades": 10
+            },
+            "walk_forward": {
+                "train_days": 30,
+                "test_days": 7,
+                "min_train_trades": 50,
+                "min_test_trades": 10,
+                "workers": 1
+            },
+            "trade_loader": {
+                "index_name": "StatusExitTimeIndex",
+                "scan_segments": 4,
+                "cache_dir": "/tmp/trade_cache"
+            },
+            "monte_carlo": {
+                "n_paths": 10000,
+                "block_size": 5,
+                "ruin_threshold": 0.5,
+                "seed": 42
+            },
+            "trade_paths": {
+                "bucket": None,
+                "prefix": "trade_paths/",
+                "local_dir": "/tmp/trade_paths"
+            },
+            "fill_model": {
+                "enabled": True,
+                "calibrate": True,
+                "seed": 42
+            }
         }
     }
 
@@ -307,39 +473,45 @@ def invoke_sagemaker_optimizer_endpoint(historical_data, current_metrics):
         logger.error(f"Erro inesperado ao invocar endpoint SageMaker para otimização: {e}")
         return {}, 0
 
-def create_ab_test_config(current_config, optimized_params):
-    """Cria configuração para A/B testing."""
+# Parâmetro otimizado -> caminho na configuração dos agentes
+AB_PARAM_PATHS = {
+    "quality_threshold": "analyzer.quality_score_threshold",
+    "high_score_sl": "trader.high_score_sl",
+    "high_score_tp": "trader.high_score_tp",
+    "medium_score_sl": "trader.medium_score_sl",
+    "medium_score_tp": "trader.medium_score_tp",
+    "high_score_position": "trader.high_score_position",
+    "medium_score_position": "trader.medium_score_position",
+}
+
+def create_ab_test_config(current_config, optimized_params, pre_test_trades=None):
+    """Cria configuração para A/B testing.
+
+    A configuração B é uma nova versão imutável da A com os parâmetros
+    otimizados aplicados; as seções não alteradas são compartilhadas e a
+    configuração atual nunca é modificada.  O estado inicial do teste
+    sequencial já leva o tau fixado com os trades anteriores ao teste.
+    """
     try:
-        # Configuração A (atual)
-        config_a = current_config.copy()
-        
-        # Configuração B (otimizada)
-        config_b = current_config.copy()
-        
-        # Aplicar parâmetros otimizados à configuração B
-        if "quality_threshold" in optimized_params:
-            config_b["analyzer"]["quality_score_threshold"] = optimized_params["quality_threshold"]
-        
-        if "high_score_sl" in optimized_params:
-            config_b["trader"]["high_score_sl"] = optimized_params["high_score_sl"]
-        
-        if "high_score_tp" in optimized_params:
-            config_b["trader"]["high_score_tp"] = optimized_params["high_score_tp"]
-        
-        if "medium_score_sl" in optimized_params:
-            config_b["trader"]["medium_score_sl"] = optimized_params["medium_score_sl"]
-        
-        if "medium_score_tp" in optimized_params:
-            config_b["trader"]["medium_score_tp"] = optimized_params["medium_score_tp"]
+        # Configuração A (atual) e B (otimizada)
+        config_a = VersionedConfig.from_dict(current_config)
+        config_b = config_a.with_changes({
+            path: optimized_params[name] for name, path in AB_PARAM_PATHS.items() if name in optimized_params
+        })
         
         # Adicionar metadados de A/B test
         ab_test_config = {
             "ab_test_active": True,
             "ab_test_start_time": datetime.utcnow().isoformat(),
-            "ab_test_percentage": current_config["optimizer"]["ab_test_percentage"],
-            "config_a": config_a,
-            "config_b": config_b
+            "ab_test_percentage": config_a["optimizer"]["ab_test_percentage"],
+            "config_a": config_a.to_dict(),
+            "config_b": config_b.to_dict(),
+            "config_a_hash": config_a.hash,
+            "config_b_hash": config_b.hash,
+            "ab_test_changes": {path: list(values) for path, values in config_a.diff(config_b).items()},
         }
+        test = SequentialABTest.from_config(ab_test_config, pre_test_trades=pre_test_trades or [])
+        ab_test_config["ab_test_state"] = test.to_dict()
         
         return ab_test_config
     
@@ -347,6 +519,23 @@ def create_ab_test_config(current_config, optimized_params):
         logger.error(f"Erro ao criar configuração A/B test: {e}")
         return current_config
 
+def evaluate_ab_test(ab_config, trades):
+    """Atualiza o teste sequencial do A/B em andamento com os trades novos.
+
+    Retorna ``(config, report)``: enquanto o teste roda, ``config`` é o próprio
+    documento A/B com o estado atualizado; ao atingir significância, é a
+    configuração do braço vencedor, promovida a configuração atual.
+    """
+    test = SequentialABTest.from_config(ab_config)
+    added = test.update(trades)
+    report = test.report()
+    logger.info(f"A/B test {test.test_id}: {added} trades novos, p-valor {test.p_value:.4f}, status {test.status}")
+    if test.status == RUNNING:
+        return {**ab_config, "ab_test_state": test.to_dict()}, report
+    winner = ab_config["config_b"] if test.status == "B" else ab_config["config_a"]
+    return winner, report
+
+
 def save_config_to_s3(config):
     """Salva a configuração atualizada no S3."""
     try:
@@ -362,7 +551,7 @@ def save_config_to_s3(config):
         logger.info("Configuração atualizada salva no S3.")
         
         # Criar backup com timestamp
-        backup_key = f"config_backups/config_{datetime.utcnow().strftime("%Y%m%d_%H%M%S")}.json"
+        backup_key = f"config_backups/config_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.json"
         s3.put_object(
             Bucket=CONFIG_BUCKET,
             Key=backup_key,
@@ -371,13 +560,55 @@ def save_config_to_s3(config):
         )
         
         logger.info(f"Backup da configuração salvo: {backup_key}")
+        
+        # Versões endereçadas por conteúdo: trades guardam o hash da config em que rodaram
+        arms = [config["config_a"], config["config_b"]] if config.get("ab_test_active") else [config]
+        for arm_config in arms:
+            config_hash = content_hash(arm_config)
+            if config_hash not in _CONFIG_VERSIONS:
+                s3.put_object(
+                    Bucket=CONFIG_BUCKET,
+                    Key=f"{CONFIG_VERSIONS_PREFIX}{config_hash}.json",
+                    Body=json.dumps(arm_config, default=str),
+                    ContentType="application/json"
+                )
+                _CONFIG_VERSIONS[config_hash] = VersionedConfig.from_dict(arm_config)
     
     except Exception as e:
         logger.error(f"Erro ao salvar configuração no S3: {e}")
         raise
 
+def load_config_version(config_hash):
+    """Recupera (com cache) a versão exata da configuração registrada num trade."""
+    if config_hash not in _CONFIG_VERSIONS:
+        response = s3.get_object(Bucket=CONFIG_BUCKET, Key=f"{CONFIG_VERSIONS_PREFIX}{config_hash}.json")
+        _CONFIG_VERSIONS[config_hash] = VersionedConfig.from_dict(json.loads(response["Body"].read().decode("utf-8")))
+    return _CONFIG_VERSIONS[config_hash]
+
+def group_trades_by_config(trades):
+    """Agrupa os trades pelo hash da configuração em que foram executados."""
+    groups = {}
+    for trade in trades:
+        groups.setdefault(trade.get("config_hash"), []).append(trade)
+    return groups
+
+def _to_dynamodb(value):
+    """Converte floats (inclusive aninhados) para Decimal."""
+    if isinstance(value, dict):
+        return {k: _to_dynamodb(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_to_dynamodb(v) for v in value]
+    if isinstance(value, float):
+        return Decimal(str(value))
+    return value
+
 def save_optimization_results(optimization_id, results):
-    """Salva os resultados da otimização no DynamoDB."""
+    """Salva os resultados da otimização no DynamoDB.
+
+    ``results["optimization_type"]`` registra como os parâmetros foram obtidos
+    (``optimizer.search.backend``: ``"local"`` ou ``"sagemaker"``, ou
+    ``"walk_forward"`` na validação).
+    """
     try:
         item = {
             "optimizationId": optimization_id,
@@ -385,16 +616,13 @@ def save_optimization_results(optimization_id, results):
             "best_params": results["best_params"],
             "best_value": Decimal(str(results["best_value"])),
             "historical_metrics": results["historical_metrics"],
-            "optimization_type": "sagemaker_ml",
+            "risk": results.get("risk", {}),
+            "optimization_type": results.get("optimization_type", "local"),
             "status": "completed"
         }
         
-        # Converter valores float para Decimal
-        for key, value in item.items():
-            if isinstance(value, dict):
-                for k, v in value.items():
-                    if isinstance(v, float):
-                        value[k] = Decimal(str(v))
+        # Converter valores float para Decimal (inclusive nas métricas por tier)
+        item = _to_dynamodb(item)
         
         optimizer_table.put_item(Item=item)
         logger.info(f"Resultados da otimização {optimization_id} salvos.")
@@ -404,10 +632,58 @@ def save_optimization_results(optimization_id, results):
     except Exception as e:
         logger.error(f"Erro inesperado ao salvar resultados da otimização: {e}")
 
-def run_bayesian_optimization(historical_trades):
-    """Stub of Bayesian optimization logic."""
-    current_metrics = calculate_performance_metrics(historical_trades)
-    return invoke_sagemaker_optimizer_endpoint(historical_trades, current_metrics)
+def run_bayesian_optimization(historical_trades, config=None, state=None):
+    """Busca os melhores parâmetros de SL/TP e posição; retorna (best_params, best_value).
+
+    Por padrão a busca roda em processo sobre o backtest vetorizado
+    (``optimizer.search.backend = "local"``); ``"sagemaker"`` mantém a
+    chamada ao endpoint.  Com ``state``, a busca parte das observações da
+    execução anterior e as atualiza.
+    """
+    config = config or get_default_config()
+    search_config = config.get("optimizer", {}).get("search", {})
+    if search_config.get("backend", "local") == "sagemaker":
+        current_metrics = calculate_performance_metrics(historical_trades)
+        return invoke_sagemaker_optimizer_endpoint(historical_trades, current_metrics)
+
+    try:
+        closed_trades = [t for t in historical_trades if t.get("status", "closed") == "closed"]
+        matrix = TradeMatrix.from_trades(closed_trades, get_price_paths(closed_trades, config))
+        matrix = apply_fill_model(matrix, historical_trades, config)
+        if not len(matrix):
+            logger.warning("Nenhum trade com preço de entrada para o backtest.")
+            return {}, 0
+        search = ParameterSearch.from_config(config)
+        result = search.run(matrix, warm_start=[o["params"] for o in state.observations] if state else None)
+        if state is not None:
+            state.observations = search.observations
+        return result
+    except Exception as e:
+        logger.error(f"Erro na busca local de parâmetros: {e}")
+        return {}, 0
+
+
+def run_risk_simulation(historical_trades, config=None, best_params=None):
+    """Distribuição de drawdown/ruína das posições atuais e otimizadas (Monte Carlo)."""
+    config = config or get_default_config()
+    trader_config = config.get("trader", {})
+    position_sets = {"current": position_set(trader_config)}
+    if best_params:
+        position_sets["optimized"] = position_set(trader_config, best_params)
+    try:
+        return MonteCarloSimulator.from_config(config).risk_report(historical_trades, position_sets)
+    except Exception as e:
+        logger.error(f"Erro na simulação Monte Carlo: {e}")
+        return {}
+
+
+def run_walk_forward(historical_trades, config=None):
+    """Avalia a busca de parâmetros fora da amostra em janelas deslizantes."""
+    config = config or get_default_config()
+    closed_trades = [t for t in historical_trades if t.get("status", "closed") == "closed" and t.get("entry_time")]
+    matrix = apply_fill_model(TradeMatrix.from_trades(closed_trades, get_price_paths(closed_trades, config)),
+                              historical_trades, config)
+    return WalkForwardHarness.from_config(config).run(matrix)
 
 
 def lambda_handler(event, context):
@@ -415,28 +691,58 @@ def lambda_handler(event, context):
     try:
         logger.info("Agente Optimizer iniciado.")
         
-        # Recuperar dados históricos
-        historical_trades = get_historical_trades(days_back=30)
+        # Validação walk-forward sob demanda (ex.: {"mode": "walk_forward", "days_back": 365})
+        if event.get("mode") == "walk_forward":
+            historical_trades = get_historical_trades(days_back=event.get("days_back", 365))
+            report = run_walk_forward(historical_trades, load_current_config())
+            save_optimization_results(f"wf_{int(datetime.utcnow().timestamp())}", {
+                "best_params": {},
+                "best_value": report["summary"].get("mean_out_of_sample_value", 0.0),
+                "historical_metrics": report["summary"],
+                "optimization_type": "walk_forward",
+            })
+            return {
+                "statusCode": 200,
+                "body": json.dumps({"message": "Walk-forward concluído.", **report}, default=str)
+            }
+        
+        # Carregar configuração atual
+        current_config = load_current_config()
+        
+        # Retomar do estado anterior: só os trades fechados desde a última execução são lidos
+        state = load_optimizer_state()
+        update_optimizer_state(state, current_config)
+        historical_trades = state.trades
         
         if len(historical_trades) < 10:
             logger.warning("Dados históricos insuficientes para otimização.")
+            save_optimizer_state(state)
             return {
                 "statusCode": 200,
                 "body": json.dumps({"message": "Dados insuficientes para otimização."}) 
             }
         
-        # Calcular métricas atuais
-        current_metrics = calculate_performance_metrics(historical_trades)
+        # Métricas atualizadas de forma incremental
+        current_metrics = state.metrics.metrics()
         
-        # Carregar configuração atual
-        current_config = load_current_config()
+        # A/B test em andamento: avaliar antes de iniciar outro
+        if current_config.get("ab_test_active"):
+            current_config, ab_report = evaluate_ab_test(current_config, historical_trades)
+            save_config_to_s3(current_config)
+            if current_config.get("ab_test_active"):
+                save_optimizer_state(state)
+                return {
+                    "statusCode": 200,
+                    "body": json.dumps({"message": "A/B test em andamento.", "ab_test": ab_report}, default=str)
+                }
         
-        # Executar otimização via função de otimização
-        best_params, best_value = run_bayesian_optimization(historical_trades)
+        # Executar otimização via função de otimização (warm start pelo estado)
+        best_params, best_value = run_bayesian_optimization(historical_trades, current_config, state)
+        save_optimizer_state(state)
         
         if best_params:
             # Criar configuração para A/B testing
-            ab_test_config = create_ab_test_config(current_config, best_params)
+            ab_test_config = create_ab_test_config(current_config, best_params, historical_trades)
             
             # Salvar nova configuração
             save_config_to_s3(ab_test_config)
@@ -446,12 +752,14 @@ def lambda_handler(event, context):
             optimization_results = {
                 "best_params": best_params,
                 "best_value": best_value,
-                "historical_metrics": current_metrics
+                "historical_metrics": current_metrics,
+                "risk": run_risk_simulation(historical_trades, current_config, best_params),
+                "optimization_type": current_config.get("optimizer", {}).get("search", {}).get("backend", "local"),
             }
             
             save_optimization_results(optimization_id, optimization_results)
             
-            logger.info(f"Otimização concluída. A/B test iniciado com {ab_test_config["ab_test_percentage"]:.0%} do tráfego.")
+            logger.info(f"Otimização concluída. A/B test iniciado com {ab_test_config['ab_test_percentage']:.0%} do tráfego.")
         
         return {
             "statusCode": 200,
@@ -0,0 +1,136 @@
+"""
+Estado persistente do Optimizer entre execuções.
+
+Antes, cada execução relia 30 dias de trades, recalculava as métricas e
+começava a busca de parâmetros do zero.  O ``OptimizerState`` guarda:
+
+- ``watermark``: ``exit_time`` do último trade fechado processado; a próxima
+  execução busca apenas trades fechados depois dele;
+- ``metrics``: um ``MetricsAccumulator`` das métricas da janela, atualizado
+  só com os trades novos e reconstruído quando trades saem da janela;
+- ``observations``: os melhores conjuntos de parâmetros avaliados e seus
+  valores, usados como warm start da busca (observações do TPE);
+- ``trades``: a janela deslizante de trades fechados (com o ``price_path``
+  já resolvido), para que o backtest não precise reler a janela inteira nem
+  os caminhos de preço dos trades antigos.
+
+A parte pequena (marca d'água, métricas, observações) vira um item da
+``MemecoinSnipingOptimizerTable``; a janela de trades vai para o S3 como
+JSON compactado com gzip.
+"""
+
+import gzip
+import json
+import logging
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, List, Mapping, Optional
+
+import pandas as pd
+
+from metrics import MetricsAccumulator
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+STATE_ID = "optimizer_state"
+
+
+def from_dynamodb(value):
+    """Converte Decimals (inclusive aninhados) de volta para int/float."""
+    if isinstance(value, dict):
+        return {k: from_dynamodb(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [from_dynamodb(v) for v in value]
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    return value
+
+
+def _utc(value) -> pd.Timestamp:
+    timestamp = pd.Timestamp(value)
+    return timestamp.tz_localize("UTC") if timestamp.tzinfo is None else timestamp.tz_convert("UTC")
+
+
+class OptimizerState:
+    """Marca d'água, métricas incrementais, observações da busca e janela de trades."""
+
+    def __init__(self, watermark: str = "", metrics: Optional[MetricsAccumulator] = None,
+                 observations: Optional[List[Dict]] = None, trades: Optional[List[Dict]] = None):
+        self.watermark = watermark
+        self.metrics = metrics or MetricsAccumulator()
+        self.observations = observations or []
+        self.trades = trades or []
+
+    def add_trades(self, trades: Iterable[Mapping], window_days: float = 30,
+                   now: Optional[datetime] = None) -> List[Dict]:
+        """Incorpora os trades fechados a partir da marca d'água; retorna os novos.
+
+        A comparação com a marca d'água é inclusiva (trades fechados no mesmo
+        instante do último processado não se perdem) e os já vistos são
+        descartados pelo ``trade_id``.  Atualiza as métricas, anexa os novos à
+        janela, descarta da janela os trades mais antigos que ``window_days``
+        e avança a marca d'água.  Se algum trade sai da janela, as métricas
+        são recalculadas a partir dela, já que o acumulador não remove trades.
+        """
+        watermark = _utc(self.watermark) if self.watermark else None
+        seen = {t["trade_id"] for t in self.trades if t.get("trade_id")}
+        new_trades = []
+        for trade in trades:
+            if trade.get("status", "closed") != "closed" or not trade.get("exit_time"):
+                continue
+            exit_time = _utc(trade["exit_time"])
+            trade_id = trade.get("trade_id")
+            if watermark is not None and (exit_time < watermark or (exit_time == watermark and not trade_id)):
+                continue
+            if trade_id:
+                if trade_id in seen:
+                    continue
+                seen.add(trade_id)
+            new_trades.append((exit_time, dict(trade)))
+        new_trades.sort(key=lambda item: item[0])
+        new = [trade for _, trade in new_trades]
+        if new:
+            self.metrics.update(new)
+            self.watermark = new_trades[-1][0].isoformat()
+            self.trades.extend(new)
+
+        cutoff = _utc(now or datetime.utcnow()) - timedelta(days=window_days)
+        window = [t for t in self.trades if _utc(t["exit_time"]) >= cutoff]
+        if len(window) < len(self.trades):
+            self.metrics = MetricsAccumulator(self.metrics.initial_capital)
+            self.metrics.update(window)
+        self.trades = window
+        logger.info(f"Estado do Optimizer: {len(new)} trades novos, {len(self.trades)} na janela, "
+                    f"marca d'água {self.watermark or '-'}")
+        return new
+
+    def to_item(self) -> Dict:
+        """Item da tabela do Optimizer (sem a janela de trades)."""
+        return {
+            "optimizationId": STATE_ID,
+            "timestamp": datetime.utcnow().isoformat(),
+            "watermark": self.watermark,
+            "metrics": self.metrics.to_dict(),
+            "observations": self.observations,
+            "window_size": len(self.trades),
+        }
+
+    @classmethod
+    def from_item(cls, item: Optional[Mapping], trades: Optional[List[Dict]] = None) -> "OptimizerState":
+        if not item:
+            return cls(trades=trades)
+        item = from_dynamodb(dict(item))
+        return cls(
+            watermark=item.get("watermark", ""),
+            metrics=MetricsAccumulator.from_dict(item["metrics"]) if item.get("metrics") else None,
+            observations=item.get("observations", []),
+            trades=trades,
+        )
+
+    def dump_trades(self) -> bytes:
+        return gzip.compress(json.dumps(self.trades, default=str, separators=(",", ":")).encode("utf-8"))
+
+    @staticmethod
+    def load_trades(payload: bytes) -> List[Dict]:
+        return json.loads(gzip.decompress(payload).decode("utf-8"))
@@ -0,0 +1,309 @@
+"""
+Busca local de parâmetros do Trader sobre o backtest vetorizado.
+
+Substitui a chamada ao endpoint SageMaker por uma busca em processo:
+
+- ``tpe``: busca bayesiana com o sampler TPE do Optuna (modelo substituto),
+  usando a API ask/tell para pedir lotes de candidatos;
+- ``random`` / ``grid``: alternativas sem Optuna (usadas automaticamente se o
+  pacote não estiver instalado).
+
+Cada lote de candidatos vira uma matriz de parâmetros avaliada pelo
+``TradeMatrix``; com ``workers > 1`` o lote é dividido entre processos que
+recebem a matriz de trades uma única vez (no initializer).  A busca para
+quando o melhor valor não melhora por ``patience`` lotes seguidos.
+
+O resultado mantém o contrato ``(best_params, best_value)`` consumido por
+``create_ab_test_config``.  Execute ``python param_search.py`` para comparar
+tempo de parede e candidatos avaliados com 1 e N processos.
+"""
+
+import itertools
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from backtest import TradeMatrix
+
+try:
+    import optuna
+except ImportError:  # pragma: no cover - Optuna é opcional
+    optuna = None
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Nome do parâmetro -> (mínimo, máximo); a ordem segue as colunas do backtest
+SEARCH_SPACE: Dict[str, Tuple[float, float]] = {
+    "quality_threshold": (50, 85),
+    "high_score_sl": (0.05, 0.25),
+    "high_score_tp": (0.15, 0.80),
+    "medium_score_sl": (0.05, 0.25),
+    "medium_score_tp": (0.10, 0.60),
+    "high_score_position": (0.05, 0.25),
+    "medium_score_position": (0.02, 0.15),
+}
+INTEGER_PARAMS = ("quality_threshold",)
+
+# Worker: matriz de trades carregada uma vez por processo
+_WORKER_MATRIX: Optional[TradeMatrix] = None
+
+
+def _init_worker(arrays):
+    global _WORKER_MATRIX
+    _WORKER_MATRIX = TradeMatrix.from_arrays(arrays)
+
+
+def _evaluate_in_worker(params: np.ndarray, min_trades: int, drawdown_penalty: float,
+                        initial_capital: float) -> np.ndarray:
+    return objective_values(_WORKER_MATRIX, params, min_trades, drawdown_penalty, initial_capital)
+
+
+def objective_values(matrix: TradeMatrix, params: np.ndarray, min_trades: int = 10,
+                     drawdown_penalty: float = 1.5, initial_capital: float = 1000.0) -> np.ndarray:
+    """Retorno total penalizado pelo drawdown; conjuntos com poucos trades valem -inf."""
+    metrics = matrix.evaluate(params, initial_capital=initial_capital)
+    value = metrics["total_return"] - drawdown_penalty * np.abs(metrics["max_drawdown"])
+    return np.where(metrics["trade_count"] >= min_trades, value, -np.inf)
+
+
+class ParameterSearch:
+    """Busca paralela de parâmetros com parada antecipada e semente fixa."""
+
+    def __init__(self, sampler: str = "tpe", n_trials: int = 512, batch_size: int = 64,
+                 patience: int = 8, min_delta: float = 1e-4, seed: int = 42, workers: int = 1,
+                 min_trades: int = 10, drawdown_penalty: float = 1.5, initial_capital: float = 1000.0,
+                 grid_points: int = 4, search_space: Optional[Dict[str, Tuple[float, float]]] = None,
+                 keep_observations: int = 64):
+        if sampler == "tpe" and optuna is None:
+            logger.warning("Optuna não instalado; usando busca aleatória")
+            sampler = "random"
+        self.sampler = sampler
+        self.n_trials = n_trials
+        self.batch_size = batch_size
+        self.patience = patience
+        self.min_delta = min_delta
+        self.seed = seed
+        self.workers = workers
+        self.min_trades = min_trades
+        self.drawdown_penalty = drawdown_penalty
+        self.initial_capital = initial_capital
+        self.grid_points = grid_points
+        self.search_space = search_space or SEARCH_SPACE
+        self.names = list(self.search_space)
+        self.keep_observations = keep_observations
+        self.evaluated = 0
+        self.history: List[float] = []
+        self.observations: List[Dict] = []
+
+    @classmethod
+    def from_config(cls, config: Dict) -> "ParameterSearch":
+        """Cria a busca a partir da seção ``optimizer.search`` da config."""
+        params = dict(config.get("optimizer", {}).get("search", {}))
+        params.pop("backend", None)
+        if params.get("workers") == "auto":
+            params["workers"] = os.cpu_count() or 1
+        return cls(**params)
+
+    # ------------------------------------------------------------------
+    # Geração de candidatos
+    # ------------------------------------------------------------------
+
+    def _to_matrix(self, candidates: List[Dict[str, float]]) -> np.ndarray:
+        return np.array([[c[name] for name in self.names] for c in candidates], dtype=np.float64)
+
+    def _random_batches(self):
+        rng = np.random.default_rng(self.seed)
+        low = np.array([self.search_space[n][0] for n in self.names], dtype=np.float64)
+        high = np.array([self.search_space[n][1] for n in self.names], dtype=np.float64)
+        integer = np.array([n in INTEGER_PARAMS for n in self.names])
+        remaining = self.n_trials
+        while remaining > 0:
+            size = min(self.batch_size, remaining)
+            batch = rng.uniform(low, high, size=(size, len(self.names)))
+            batch[:, integer] = np.round(batch[:, integer])
+            remaining -= size
+            yield batch
+
+    def _grid_batches(self):
+        axes = [np.linspace(*self.search_space[n], self.grid_points) for n in self.names]
+        points = itertools.islice(itertools.product(*axes), self.n_trials)
+        while True:
+            batch = list(itertools.islice(points, self.batch_size))
+            if not batch:
+                return
+            yield np.array(batch, dtype=np.float64)
+
+    # ------------------------------------------------------------------
+    # Avaliação
+    # ------------------------------------------------------------------
+
+    def _evaluator(self, matrix: TradeMatrix):
+        """Retorna (avaliar_lote, encerrar); usa processos quando ``workers > 1``."""
+        args = (self.min_trades, self.drawdown_penalty, self.initial_capital)
+        if self.workers > 1:
+            try:
+                pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    initializer=_init_worker,
+                    initargs=(matrix.arrays(),),
+                )
+
+                def evaluate(batch: np.ndarray) -> np.ndarray:
+                    chunks = np.array_split(batch, min(self.workers, len(batch)))
+                    futures = [pool.submit(_evaluate_in_worker, chunk, *args) for chunk in chunks]
+                    return np.concatenate([f.result() for f in futures])
+
+                return evaluate, pool.shutdown
+            except (OSError, NotImplementedError) as e:
+                # Ambientes como o Lambda não suportam multiprocessing
+                logger.warning(f"Pool de processos indisponível ({e}); avaliando em processo")
+
+        return (lambda batch: objective_values(matrix, batch, *args)), (lambda: None)
+
+    def run(self, matrix: TradeMatrix, warm_start: Optional[List[Dict[str, float]]] = None) -> Tuple[Dict[str, float], float]:
+        """Executa a busca e retorna ``(best_params, best_value)``.
+
+        ``warm_start`` são conjuntos de parâmetros de execuções anteriores:
+        são reavaliados sobre a matriz atual no primeiro lote e, no TPE,
+        entram como observações do modelo substituto.  Os melhores conjuntos
+        avaliados ficam em ``self.observations`` para a próxima execução.
+        """
+        evaluate, shutdown = self._evaluator(matrix)
+        best_params: Dict[str, float] = {}
+        best_value = -np.inf
+        stale = 0
+        self.evaluated = 0
+        self.history = []
+        self.observations = []
+        try:
+            seed = self._warm_start_batch(evaluate, warm_start)
+            if self.sampler == "tpe":
+                batches = self._run_tpe(evaluate, seed)
+            else:
+                batches = self._run_batches(evaluate, self._grid_batches() if self.sampler == "grid" else self._random_batches())
+            for candidates, values in itertools.chain([seed] if seed else [], batches):
+                self.evaluated += len(values)
+                self._observe(candidates, values)
+                idx = int(np.argmax(values))
+                if values[idx] > best_value + self.min_delta:
+                    best_value = float(values[idx])
+                    best_params = dict(candidates[idx])
+                    stale = 0
+                else:
+                    stale += 1
+                self.history.append(best_value)
+                if stale >= self.patience:
+                    logger.info(f"Parada antecipada após {self.evaluated} candidatos sem melhora")
+                    break
+        finally:
+            shutdown()
+
+        if not np.isfinite(best_value):
+            logger.warning("Nenhum conjunto de parâmetros atingiu o mínimo de trades")
+            return {}, 0.0
+        best_params = {
+            name: int(value) if name in INTEGER_PARAMS else round(float(value), 4)
+            for name, value in best_params.items()
+        }
+        logger.info(f"Busca {self.sampler}: {self.evaluated} candidatos, melhor valor {best_value:.4f}, parâmetros {best_params}")
+        return best_params, best_value
+
+    def _warm_start_batch(self, evaluate, warm_start):
+        """Reavalia os parâmetros anteriores (restritos ao espaço de busca atual)."""
+        candidates = []
+        for params in warm_start or []:
+            if all(name in params for name in self.names):
+                candidates.append({
+                    name: float(np.clip(params[name], *self.search_space[name])) for name in self.names
+                })
+        if not candidates:
+            return None
+        return candidates, evaluate(self._to_matrix(candidates))
+
+    def _observe(self, candidates, values) -> None:
+        """Mantém os ``keep_observations`` melhores conjuntos avaliados."""
+        self.observations.extend(
+            {"params": dict(c), "value": float(v)} for c, v in zip(candidates, values) if np.isfinite(v)
+        )
+        self.observations.sort(key=lambda o: o["value"], reverse=True)
+        del self.observations[self.keep_observations:]
+
+    def _run_batches(self, evaluate, batches):
+        for batch in batches:
+            values = evaluate(batch)
+            yield [dict(zip(self.names, row)) for row in batch], values
+
+    def _distributions(self):
+        return {
+            name: (optuna.distributions.IntDistribution(int(low), int(high)) if name in INTEGER_PARAMS
+                   else optuna.distributions.FloatDistribution(low, high))
+            for name, (low, high) in self.search_space.items()
+        }
+
+    def _run_tpe(self, evaluate, seed=None):
+        optuna.logging.set_verbosity(optuna.logging.WARNING)
+        study = optuna.create_study(
+            direction="maximize",
+            sampler=optuna.samplers.TPESampler(seed=self.seed, multivariate=True),
+        )
+        if seed:
+            distributions = self._distributions()
+            study.add_trials([
+                optuna.trial.create_trial(
+                    params={name: int(round(c[name])) if name in INTEGER_PARAMS else c[name] for name in self.names},
+                    distributions=distributions,
+                    value=float(value),
+                )
+                for c, value in zip(*seed) if np.isfinite(value)
+            ])
+        remaining = self.n_trials
+        while remaining > 0:
+            size = min(self.batch_size, remaining)
+            trials = [study.ask() for _ in range(size)]
+            candidates = [
+                {
+                    name: (trial.suggest_int(name, int(low), int(high)) if name in INTEGER_PARAMS
+                           else trial.suggest_float(name, low, high))
+                    for name, (low, high) in self.search_space.items()
+                }
+                for trial in trials
+            ]
+            values = evaluate(self._to_matrix(candidates))
+            for trial, value in zip(trials, values):
+                if np.isfinite(value):
+                    study.tell(trial, float(value))
+                else:
+                    study.tell(trial, state=optuna.trial.TrialState.PRUNED)
+            remaining -= size
+            yield candidates, values
+
+
+def _benchmark() -> None:
+    rng = np.random.default_rng(3)
+    trades = [
+        {
+            "trade_id": f"t{i}",
+            "entry_time": f"{i:06d}",
+            "entry_price": 1.0,
+            "quality_score": float(rng.integers(45, 100)),
+            "price_path": np.exp(np.cumsum(rng.normal(0.0, 0.03, 240))).tolist(),
+        }
+        for i in range(1000)
+    ]
+    matrix = TradeMatrix.from_trades(trades)
+    for sampler, workers, n_trials in (("random", 1, 4096), ("random", os.cpu_count() or 1, 4096), ("tpe", 1, 512)):
+        search = ParameterSearch(sampler=sampler, n_trials=n_trials, batch_size=64, workers=workers, patience=10_000)
+        started = time.perf_counter()
+        _, best_value = search.run(matrix)
+        elapsed = time.perf_counter() - started
+        print(f"{sampler:>6} x{workers}: {search.evaluated} candidatos em {elapsed:.2f} s "
+              f"({search.evaluated / elapsed:,.0f}/s), melhor valor {best_value:.4f}")
+
+
+if __name__ == "__main__":
+    _benchmark()
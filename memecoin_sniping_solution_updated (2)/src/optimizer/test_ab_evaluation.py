@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""Testes para a avaliação sequencial do A/B test."""
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ab_evaluation import RUNNING, SequentialABTest, pre_test_tau
+
+
+def make_trades(rng, n, start, mean_a, mean_b, test_id="t1"):
+    trades = []
+    for i in range(n):
+        arm = "B" if i % 2 else "A"
+        trades.append({
+            "trade_id": f"{start}_{i}",
+            "status": "closed",
+            "ab_arm": arm,
+            "ab_test_id": test_id,
+            "pnl": float(rng.normal(mean_b if arm == "B" else mean_a, 10.0)),
+            "quality_score": 70,
+            "entry_time": f"2024-07-{start:02d}T00:00:00Z",
+            "exit_time": f"2024-07-{start:02d}T{i // 60:02d}:{i % 60:02d}:00Z",
+        })
+    return trades
+
+
+def test_stops_when_arm_b_is_better():
+    """Com efeito grande o teste para cedo e aponta o braço B."""
+    print("Testando parada com efeito...")
+    rng = np.random.default_rng(0)
+    test = SequentialABTest(test_id="t1", min_trades_per_arm=20)
+    for day in range(1, 20):
+        test.update(make_trades(rng, 60, day, 0.0, 8.0))
+        if test.status != RUNNING:
+            break
+    assert test.status == "B", test.report()
+    assert test.p_value <= 0.05
+    print(f"✓ Braço B vence no dia {day} (p={test.p_value:.4f})")
+
+
+def test_no_effect_keeps_running_and_state_roundtrip():
+    """Sem efeito o teste continua; o estado salvo retoma sem reprocessar trades."""
+    print("Testando ausência de efeito e persistência...")
+    rng = np.random.default_rng(1)
+    test = SequentialABTest(test_id="t1", min_trades_per_arm=20)
+    batch = make_trades(rng, 100, 1, 1.0, 1.0)
+    assert test.update(batch) == 100
+    assert test.status == RUNNING
+
+    restored = SequentialABTest.from_config({
+        "ab_test_start_time": "t1",
+        "ab_test_state": test.to_dict(),
+    })
+    # O mesmo lote já passou da marca d'água; trades de outro teste são ignorados
+    assert restored.update(batch) == 0
+    assert restored.update(make_trades(rng, 10, 2, 1.0, 1.0, test_id="other")) == 0
+    assert restored.update(make_trades(rng, 10, 2, 1.0, 1.0)) == 10
+    assert restored.arms["A"].count + restored.arms["B"].count == 110
+    print("✓ Estado restaurado OK")
+
+
+def test_tau_is_fixed_at_start_and_persisted():
+    """tau vem do histórico pré-teste, não muda com os trades do teste e é salvo no estado."""
+    print("Testando tau fixo durante o teste...")
+    rng = np.random.default_rng(2)
+    history = make_trades(rng, 200, 1, 0.0, 0.0, test_id="")
+    tau = pre_test_tau(history)
+    assert 8.0 < tau < 12.0
+
+    config = {"ab_test_start_time": "t1", "config_a": {"optimizer": {"ab_evaluation": {"min_trades_per_arm": 20}}}}
+    test = SequentialABTest.from_config(config, pre_test_trades=history)
+    assert test.tau == tau
+    test.update(make_trades(rng, 100, 2, 0.0, 30.0))
+    assert test.tau == tau
+
+    restored = SequentialABTest.from_config({**config, "ab_test_state": test.to_dict()}, pre_test_trades=[])
+    assert restored.tau == tau and restored.likelihood_ratio() == test.likelihood_ratio()
+
+    configured = {**config, "config_a": {"optimizer": {"ab_evaluation": {"tau": 5.0}}}}
+    assert SequentialABTest.from_config(configured, pre_test_trades=history).tau == 5.0
+    print(f"✓ tau fixo em {tau:.3f}")
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""Testes para o engine de backtest vetorizado."""
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from backtest import (
+    EXIT_END,
+    EXIT_SL,
+    EXIT_TP,
+    TradeMatrix,
+    params_matrix,
+    price_paths_from_logs,
+)
+
+
+def naive_exit(path, entry, sl, tp):
+    """Referência em Python puro: primeiro ponto que cruza SL ou TP."""
+    for price in path:
+        ret = price / entry - 1
+        if ret <= -sl:
+            return EXIT_SL, -sl
+        if ret >= tp:
+            return EXIT_TP, tp
+    return EXIT_END, path[-1] / entry - 1
+
+
+def test_price_paths_from_logs_orders_by_timestamp():
+    """Registros do Executor viram caminhos ordenados por trade."""
+    print("Testando agrupamento de price logs...")
+    logs = [
+        {"tradeId": "a", "timestamp": "2024-01-01T00:00:02", "price": 1.2, "logType": "price_series"},
+        {"tradeId": "a", "timestamp": "2024-01-01T00:00:01", "price": 1.0, "logType": "price_series"},
+        {"tradeId": "b", "timestamp": "2024-01-01T00:00:01", "price": 3.0, "logType": "price_series"},
+        {"tradeId": "b", "timestamp": "2024-01-01T00:00:02", "price": 9.0, "logType": "trade_result"},
+    ]
+    assert price_paths_from_logs(logs) == {"a": [1.0, 1.2], "b": [3.0]}
+    print("✓ Caminhos agrupados")
+
+
+def test_vectorized_matches_naive_replay():
+    """O primeiro toque em SL/TP bate com a reprodução ponto a ponto."""
+    print("Testando backtest vetorizado contra referência...")
+    rng = np.random.default_rng(42)
+    trades = []
+    for i in range(200):
+        length = int(rng.integers(1, 60))
+        trades.append({
+            "trade_id": f"t{i}",
+            "entry_time": f"2024-01-01T{i:05d}",
+            "entry_price": 2.0,
+            "quality_score": float(rng.integers(40, 100)),
+            "amount_usd": 50.0,
+            "price_path": (2.0 * np.exp(np.cumsum(rng.normal(0, 0.05, length)))).tolist(),
+        })
+    matrix = TradeMatrix.from_trades(trades)
+    param_sets = [
+        {"quality_threshold": 55, "high_sl": 0.1, "high_tp": 0.3, "med_sl": 0.15, "med_tp": 0.25},
+        {"quality_threshold": 70, "high_sl": 0.05, "high_tp": 0.6, "med_sl": 0.3, "med_tp": 0.1},
+    ]
+    sim = matrix.simulate(params_matrix(param_sets))
+
+    for p, params in enumerate(param_sets):
+        for n, trade_id in enumerate(matrix.trade_ids):
+            trade = trades[int(trade_id[1:])]
+            score = trade["quality_score"]
+            if score >= 80:
+                sl, tp = params["high_sl"], params["high_tp"]
+            elif score >= 60:
+                sl, tp = params["med_sl"], params["med_tp"]
+            else:
+                sl, tp = 0.20, 0.20
+            reason, ret = naive_exit(trade["price_path"], 2.0, sl, tp)
+            assert sim["exit_reason"][p, n] == reason, (p, trade_id)
+            assert abs(sim["returns"][p, n] - ret) < 1e-12
+            assert sim["selected"][p, n] == (score >= params["quality_threshold"])
+    print("✓ Vetorizado igual à referência")
+
+
+def test_metrics_drawdown_and_fallback_paths():
+    """Trades sem caminho usam entrada/saída; drawdown parte do capital inicial."""
+    print("Testando métricas agregadas...")
+    trades = [
+        {"trade_id": "1", "entry_time": "1", "entry_price": 1.0, "exit_price": 0.8, "quality_score": 90, "amount_usd": 100},
+        {"trade_id": "2", "entry_time": "2", "entry_price": 1.0, "exit_price": 1.5, "quality_score": 90, "amount_usd": 100},
+    ]
+    metrics = TradeMatrix.from_trades(trades).evaluate(
+        params_matrix([{"quality_threshold": 60, "high_sl": 0.1, "high_tp": 0.3, "med_sl": 0.1, "med_tp": 0.3}]),
+        initial_capital=1000.0,
+    )
+    assert metrics["trade_count"][0] == 2
+    assert metrics["win_rate"][0] == 0.5
+    assert abs(metrics["total_pnl"][0] - 20.0) < 1e-9
+    assert abs(metrics["max_drawdown"][0] - (-0.01)) < 1e-12
+    print("✓ Métricas agregadas OK")
+
+
+def test_apply_fills_charges_costs_and_drops_failed_entries():
+    """Com o simulador de fills, entradas podem falhar e os retornos pagam a execução."""
+    print("Testando backtest com fills simulados...")
+    from common.fill_simulator import FillModel, FillSimulator
+
+    trades = [
+        {"trade_id": str(i), "entry_time": f"{i:03d}", "entry_price": 1.0, "exit_price": 1.5,
+         "quality_score": 90, "amount_usd": 100}
+        for i in range(400)
+    ]
+    params = params_matrix([{"quality_threshold": 60, "high_sl": 0.1, "high_tp": 0.3, "med_sl": 0.1, "med_tp": 0.3}])
+    simulator = FillSimulator(FillModel(failure_rate=0.1, volatility=0.0), seed=0)
+    matrix = TradeMatrix.from_trades(trades).apply_fills(simulator, liquidity=np.full(400, 20_000.0))
+    sim = matrix.simulate(params)
+
+    selected = sim["selected"][0]
+    assert 0.85 < selected.mean() < 0.95
+    # TP de 30% menos impacto e taxas de entrada e saída
+    net = sim["returns"][0, selected]
+    assert (net < 0.3).all() and (net > 0.25).all()
+
+    # As visões por janela carregam os custos
+    view = TradeMatrix.from_arrays(matrix.arrays(), 10, 20)
+    assert np.array_equal(view.simulate(params)["returns"], sim["returns"][:, 10:20])
+    print(f"✓ Retorno líquido médio {net.mean():.2%} com {selected.mean():.0%} das entradas executadas")
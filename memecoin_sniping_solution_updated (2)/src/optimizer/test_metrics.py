@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""Testes para o módulo de métricas vetorizado."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from metrics import MetricsAccumulator, compute_metrics, max_drawdown, _synthetic_trades
+
+
+def test_drawdown_uses_initial_capital():
+    """Drawdown não depende de um pico de P&L positivo."""
+    print("Testando drawdown...")
+    # Primeiro trade perdedor: a fórmula antiga dividia por running max negativo
+    assert max_drawdown([-100.0, 50.0, -20.0], initial_capital=1000.0) == -0.1
+    assert max_drawdown([10.0, 20.0], initial_capital=1000.0) == 0.0
+    print("✓ Drawdown OK")
+
+
+def test_compute_metrics_with_tiers_and_durations():
+    """Métricas agregadas e detalhamento por tier."""
+    print("Testando compute_metrics...")
+    trades = [
+        {"status": "closed", "pnl": 20.0, "quality_score": 85, "entry_time": "2023-01-01T10:00:00Z", "exit_time": "2023-01-01T12:00:00Z"},
+        {"status": "closed", "pnl": -10.0, "quality_score": 65, "entry_time": "2023-01-01T14:00:00Z", "exit_time": "2023-01-01T15:00:00Z"},
+        {"status": "closed", "pnl": 15.0, "quality_score": 90, "entry_time": "2023-01-01T16:00:00Z", "exit_time": "2023-01-01T19:00:00Z"},
+        {"status": "open", "pnl": 0.0},
+    ]
+    metrics = compute_metrics(trades)
+
+    assert metrics["closed_trades"] == 3
+    assert metrics["win_rate"] == 2 / 3
+    assert metrics["total_pnl"] == 25.0
+    assert metrics["avg_trade_duration"] == 2.0
+    assert metrics["tiers"]["high"]["trades"] == 2 and metrics["tiers"]["high"]["win_rate"] == 1.0
+    assert metrics["tiers"]["medium"]["total_pnl"] == -10.0
+    assert metrics["tiers"]["high"]["avg_trade_duration"] == 2.5
+    print("✓ compute_metrics OK")
+
+
+def test_incremental_matches_batch():
+    """Atualizar em lotes produz as mesmas métricas que o cálculo completo."""
+    print("Testando acumulador incremental...")
+    trades = _synthetic_trades(5000, seed=11)
+    batch = compute_metrics(trades)
+
+    acc = MetricsAccumulator()
+    for start in range(0, len(trades), 700):
+        acc.update(trades[start:start + 700])
+    acc = MetricsAccumulator.from_dict(acc.to_dict())
+    incremental = acc.metrics()
+
+    for key in ("closed_trades", "win_rate", "avg_pnl", "total_pnl", "max_drawdown", "sharpe_ratio", "avg_trade_duration"):
+        assert abs(incremental[key] - batch[key]) < 1e-6, key
+    for tier, stats in batch["tiers"].items():
+        assert incremental["tiers"][tier]["trades"] == stats["trades"]
+        assert abs(incremental["tiers"][tier]["total_pnl"] - stats["total_pnl"]) < 1e-6
+    print("✓ Incremental igual ao completo")
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""Testes para o simulador Monte Carlo de risco."""
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from monte_carlo import MonteCarloSimulator, kelly_fraction, trade_outcomes
+
+
+def test_block_bootstrap_keeps_consecutive_trades():
+    """Cada bloco reamostrado é uma sequência contígua (circular) de trades."""
+    print("Testando block bootstrap...")
+    simulator = MonteCarloSimulator(block_size=4)
+    indices = simulator.bootstrap_indices(10, 50, 12, np.random.default_rng(0))
+    assert indices.shape == (50, 12)
+    blocks = indices.reshape(50, 3, 4)
+    assert ((np.diff(blocks, axis=2) % 10) == 1).all()
+    print("✓ Blocos contíguos")
+
+
+def test_drawdown_and_ruin_match_deterministic_cases():
+    """Com um único resultado possível, drawdown e ruína são conhecidos exatamente."""
+    print("Testando drawdown e ruína...")
+    returns = np.full(20, -0.5)
+    tiers = np.full(20, 2, dtype=np.int8)
+    simulator = MonteCarloSimulator(n_paths=1000, horizon=10, chunk_size=300)
+    report = simulator.simulate(returns, tiers, {"small": {"high": 0.1}, "big": {"high": 1.0}})
+    # 10 perdas de 5%: capital final 0.95^10
+    assert abs(report["small"]["max_drawdown_quantiles"]["p50"] - (1 - 0.95 ** 10)) < 1e-12
+    assert report["small"]["ruin_probability"] == 0.0
+    assert report["big"]["ruin_probability"] == 1.0
+    print("✓ Casos determinísticos OK")
+
+
+def test_kelly_and_trade_outcomes():
+    """Kelly de uma aposta binária bate com a fórmula fechada; tiers seguem o Trader."""
+    print("Testando Kelly e resultados dos trades...")
+    # Ganha +100% com p=0.6, perde -100% com p=0.4: f* = p - q = 0.2
+    returns = np.array([1.0] * 60 + [-1.0] * 40)
+    assert abs(kelly_fraction(returns) - 0.2) < 0.005
+    assert kelly_fraction(np.array([-0.1, -0.2])) == 0.0
+
+    trades = [
+        {"status": "closed", "entry_price": 1.0, "exit_price": 1.5, "quality_score": 85, "exit_time": "2"},
+        {"status": "closed", "pnl": -10, "amount_usd": 100, "quality_score": 65, "exit_time": "1"},
+        {"status": "open", "entry_price": 1.0, "quality_score": 90},
+    ]
+    returns, tiers = trade_outcomes(trades)
+    assert returns.tolist() == [-0.1, 0.5] and tiers.tolist() == [1, 2]
+    print("✓ Kelly e resultados OK")
@@ -9,6 +9,7 @@ import os
 import sys
 from unittest.mock import Mock, patch, MagicMock
 from decimal import Decimal
+from datetime import datetime
 
 # Adiciona o diretório atual ao path para importar o módulo optimizer
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -22,6 +23,8 @@ with patch('boto3.resource'), \
         simulate_performance_with_params,
         get_default_config,
         create_ab_test_config,
+        get_failed_orders,
+        get_historical_trades,
         lambda_handler
     )
 
@@ -145,6 +148,20 @@ def test_create_ab_test_config():
     assert ab_config['config_b']['analyzer']['quality_score_threshold'] == 70
     assert ab_config['config_b']['trader']['high_score_sl'] == 0.12
     
+    # A configuração A (e a atual) não podem ser alteradas pela B
+    assert ab_config['config_a']['analyzer']['quality_score_threshold'] == 60
+    assert ab_config['config_a']['trader']['high_score_sl'] == 0.10
+    assert current_config['trader']['high_score_sl'] == 0.10
+    assert ab_config['config_a_hash'] != ab_config['config_b_hash']
+    assert set(ab_config['ab_test_changes']) == {
+        'analyzer.quality_score_threshold', 'trader.high_score_sl', 'trader.high_score_tp'
+    }
+    
+    # O tau do teste sequencial é fixado com os trades anteriores ao teste
+    history = [{"status": "closed", "pnl": pnl} for pnl in (-2.0, 0.0, 2.0)]
+    state = create_ab_test_config(current_config, optimized_params, history)['ab_test_state']
+    assert state['tau'] == 2.0 and state['test_id']
+    
     print("✓ Configuração A/B test criada com sucesso")
 
 def test_lambda_handler():
@@ -159,8 +176,10 @@ def test_lambda_handler():
          patch('optimizer.load_current_config') as mock_load_config:
         
         # Configura os mocks
+        # Trades fechados recentemente (o estado do Optimizer usa exit_time como marca d'água)
+        exit_time = datetime.utcnow().isoformat()
         mock_trades.return_value = [
-            {'trade_id': f'test_{i}', 'status': 'closed', 'pnl': 10 * (i % 2 * 2 - 1)}
+            {'trade_id': f'test_{i}', 'status': 'closed', 'pnl': 10 * (i % 2 * 2 - 1), 'exit_time': exit_time}
             for i in range(20)  # 20 trades de teste
         ]
         
@@ -183,9 +202,24 @@ def test_lambda_handler():
         mock_optim.assert_called_once()
         mock_save_config.assert_called_once()
         mock_save_results.assert_called_once()
+        # O tipo registrado é o backend de busca configurado
+        assert mock_save_results.call_args[0][1]['optimization_type'] == 'local'
         
         print("✓ lambda_handler passou no teste")
 
+def test_loader_errors_return_empty_results():
+    """Erros inesperados do carregador não escapam de get_historical_trades nem de get_failed_orders."""
+    print("Testando erros inesperados do carregador...")
+    
+    loader = Mock()
+    loader.load.side_effect = RuntimeError("cache corrompido")
+    with patch('optimizer.get_trade_loader', return_value=loader):
+        assert get_historical_trades() == []
+        assert get_historical_trades(as_frame=True).empty
+        assert get_failed_orders([{'exit_time': '2024-07-01T00:00:00Z'}]) is None
+    
+    print("✓ Erros do carregador tratados")
+
 def test_insufficient_data():
     """Testa o comportamento com dados insuficientes."""
     print("Testando comportamento com dados insuficientes...")
@@ -215,6 +249,7 @@ if __name__ == "__main__":
         test_get_default_config()
         test_create_ab_test_config()
         test_lambda_handler()
+        test_loader_errors_return_empty_results()
         test_insufficient_data()
         
         print("\n✅ Todos os testes passaram!")
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Testes para o estado incremental do Optimizer."""
+
+import os
+import sys
+from datetime import datetime
+from decimal import Decimal
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from backtest import TradeMatrix
+from metrics import compute_metrics
+from optimizer_state import OptimizerState
+from param_search import ParameterSearch
+
+
+def closed_trade(i, day, pnl):
+    return {
+        "trade_id": f"t{i}", "status": "closed", "pnl": pnl, "quality_score": 70,
+        "entry_time": f"2024-07-{day:02d}T00:00:00Z", "exit_time": f"2024-07-{day:02d}T01:{i % 60:02d}:00Z",
+    }
+
+
+def test_state_processes_only_new_trades():
+    """Trades já vistos são ignorados; métricas batem com o cálculo completo; a janela expira."""
+    print("Testando estado incremental...")
+    now = datetime(2024, 7, 20)
+    first = [closed_trade(i, 1, float(i - 5)) for i in range(10)]
+    second = [closed_trade(10 + i, 15, float(3 - i)) for i in range(10)]
+    open_trade = {"trade_id": "open", "status": "open", "entry_time": "2024-07-15T00:00:00Z"}
+
+    state = OptimizerState()
+    assert len(state.add_trades(first, window_days=30, now=now)) == 10
+    # A próxima execução recebe de novo os trades antigos: nada é contado duas vezes
+    assert len(state.add_trades(first + second + [open_trade], window_days=30, now=now)) == 10
+    assert state.metrics.count == 20
+    expected = compute_metrics(first + second)
+    assert abs(state.metrics.metrics()["total_pnl"] - expected["total_pnl"]) < 1e-9
+
+    # Persistência: item da tabela (com Decimals) + janela compactada
+    item = {k: (Decimal(str(v)) if isinstance(v, float) else v) for k, v in state.to_item().items()}
+    restored = OptimizerState.from_item(item, OptimizerState.load_trades(state.dump_trades()))
+    assert restored.watermark == state.watermark and len(restored.trades) == 20
+
+    # Após 10 dias, os trades do dia 1 saem da janela e das métricas
+    restored.add_trades([], window_days=10, now=now)
+    assert len(restored.trades) == 10 and restored.metrics.count == 10
+    expected = compute_metrics(second)
+    assert abs(restored.metrics.metrics()["total_pnl"] - expected["total_pnl"]) < 1e-9
+    print("✓ Estado incremental OK")
+
+
+def test_watermark_is_inclusive_and_deduplicated():
+    """Trades fechados no instante da marca d'água entram uma única vez."""
+    print("Testando marca d'água inclusiva...")
+    now = datetime(2024, 7, 20)
+    state = OptimizerState()
+    state.add_trades([closed_trade(1, 10, 1.0)], now=now)
+    # Fechado no mesmo segundo, mas gravado depois da execução anterior
+    late = dict(closed_trade(2, 10, 2.0), exit_time=state.watermark)
+    assert [t["trade_id"] for t in state.add_trades([closed_trade(1, 10, 1.0), late], now=now)] == ["t2"]
+    assert state.add_trades([closed_trade(1, 10, 1.0), late], now=now) == []
+    assert state.metrics.count == 2
+    print("✓ Marca d'água inclusiva OK")
+
+
+def test_search_warm_start_reuses_observations():
+    """As observações da execução anterior entram no primeiro lote da busca."""
+    print("Testando warm start da busca...")
+    rng = np.random.default_rng(5)
+    trades = [
+        {"trade_id": f"t{i}", "entry_time": f"{i:06d}", "entry_price": 1.0,
+         "quality_score": float(rng.integers(45, 100)),
+         "price_path": np.exp(np.cumsum(rng.normal(0.0, 0.03, 60))).tolist()}
+        for i in range(300)
+    ]
+    matrix = TradeMatrix.from_trades(trades)
+    first = ParameterSearch(sampler="random", n_trials=256, batch_size=64, patience=100, keep_observations=8)
+    best_params, best_value = first.run(matrix)
+    assert len(first.observations) == 8
+
+    warm = ParameterSearch(sampler="tpe", n_trials=64, batch_size=32, patience=100)
+    _, warm_value = warm.run(matrix, warm_start=[o["params"] for o in first.observations])
+    # O melhor conjunto anterior é reavaliado, então a busca nunca piora
+    assert warm_value >= best_value - 1e-9
+    assert warm.evaluated == 64 + 8
+    print(f"✓ Warm start: {best_value:.4f} -> {warm_value:.4f}")
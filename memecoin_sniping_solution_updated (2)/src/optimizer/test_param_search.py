@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""Testes para a busca local de parâmetros."""
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from backtest import TradeMatrix
+from param_search import SEARCH_SPACE, ParameterSearch
+
+
+def make_matrix(n_trades=120, seed=5):
+    rng = np.random.default_rng(seed)
+    trades = [
+        {
+            "trade_id": f"t{i}",
+            "entry_time": f"{i:05d}",
+            "entry_price": 1.0,
+            "quality_score": float(rng.integers(45, 100)),
+            "price_path": np.exp(np.cumsum(rng.normal(0.002, 0.03, 80))).tolist(),
+        }
+        for i in range(n_trades)
+    ]
+    return TradeMatrix.from_trades(trades)
+
+
+def test_random_search_is_reproducible_and_parallel_matches():
+    """Mesma semente gera o mesmo resultado, com ou sem pool de processos."""
+    print("Testando reprodutibilidade da busca aleatória...")
+    matrix = make_matrix()
+    serial = ParameterSearch(sampler="random", n_trials=256, batch_size=64, seed=7, patience=100).run(matrix)
+    again = ParameterSearch(sampler="random", n_trials=256, batch_size=64, seed=7, patience=100).run(matrix)
+    parallel = ParameterSearch(sampler="random", n_trials=256, batch_size=64, seed=7, patience=100, workers=2).run(matrix)
+
+    assert serial == again
+    assert serial[0] == parallel[0] and abs(serial[1] - parallel[1]) < 1e-12
+    params, value = serial
+    assert set(params) == set(SEARCH_SPACE)
+    for name, (low, high) in SEARCH_SPACE.items():
+        assert low <= params[name] <= high
+    assert isinstance(params["quality_threshold"], int)
+    print(f"✓ Melhor valor {value:.4f}")
+
+
+def test_tpe_search_and_early_stopping():
+    """TPE é reprodutível e a busca para quando não há melhora."""
+    print("Testando TPE e parada antecipada...")
+    matrix = make_matrix()
+    first = ParameterSearch(sampler="tpe", n_trials=96, batch_size=16, seed=3, patience=100).run(matrix)
+    second = ParameterSearch(sampler="tpe", n_trials=96, batch_size=16, seed=3, patience=100).run(matrix)
+    assert first == second
+
+    search = ParameterSearch(sampler="grid", n_trials=10_000, batch_size=8, grid_points=3, patience=2, min_delta=1e9)
+    search.run(matrix)
+    assert search.evaluated == 8 * 3  # primeiro lote define o melhor, mais 2 lotes sem melhora
+    print("✓ TPE reprodutível e parada antecipada OK")
+
+
+def test_no_feasible_params_returns_empty():
+    """Sem trades suficientes o contrato devolve parâmetros vazios."""
+    print("Testando busca sem candidatos viáveis...")
+    search = ParameterSearch(sampler="random", n_trials=32, min_trades=10_000)
+    assert search.run(make_matrix(n_trades=20)) == ({}, 0.0)
+    print("✓ Retorno vazio OK")
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""Testes para o carregador tipado de trades."""
+
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from botocore.exceptions import ClientError
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from trade_loader import TradeLoader, frame_to_trades, items_to_frame
+
+
+def raw_trade(i, exit_time, status="closed"):
+    return {
+        "tradeId": {"S": f"t{i}"},
+        "status": {"S": status},
+        "entry_price": {"N": "1.0"},
+        "exit_price": {"N": str(1.0 + i / 100)},
+        "pnl": {"N": str(i)},
+        "quality_score": {"N": "75"},
+        "entry_time": {"S": (exit_time - timedelta(hours=1)).replace(tzinfo=None).isoformat()},
+        "exit_time": {"S": exit_time.replace(tzinfo=None).isoformat()},
+        "close_reason": {"NULL": True},
+    }
+
+
+class FakeDynamoDBClient:
+    """Cliente de baixo nível com paginação; registra as faixas consultadas."""
+
+    def __init__(self, items, has_index=True, query_error=None):
+        self.items = items
+        self.has_index = has_index
+        self.query_error = query_error
+        self.calls = []
+
+    def get_paginator(self, operation):
+        client = self
+
+        class Paginator:
+            def paginate(self, **kwargs):
+                if operation == "query" and not client.has_index:
+                    raise ClientError({"Error": {"Code": "ValidationException",
+                                                 "Message": "The table does not have the specified index"}}, "Query")
+                if operation == "query" and client.query_error:
+                    raise ClientError({"Error": {"Code": client.query_error, "Message": "denied"}}, "Query")
+                client.calls.append((operation, kwargs.get("Segment")))
+                values = kwargs["ExpressionAttributeValues"]
+                start, end = values[":start"]["S"], values[":end"]["S"]
+                matched = [
+                    item for i, item in enumerate(client.items)
+                    if item["status"]["S"] == values[":status"]["S"] and start <= item["exit_time"]["S"] <= end
+                    and (operation == "query" or i % kwargs["TotalSegments"] == kwargs["Segment"])
+                ]
+                for page_start in range(0, len(matched), 3):
+                    yield {"Items": matched[page_start:page_start + 3]}
+
+        return Paginator()
+
+
+def test_items_become_typed_columns():
+    """Valores brutos viram float64, datetime UTC e categóricos, sem Decimals."""
+    print("Testando conversão tipada...")
+    now = datetime(2024, 7, 10, tzinfo=timezone.utc)
+    df = items_to_frame([raw_trade(1, now), raw_trade(2, now, status="open")])
+    assert str(df["pnl"].dtype) == "float64"
+    assert str(df["exit_time"].dtype) == "datetime64[ns, UTC]"
+    assert str(df["status"].dtype) == "category"
+    assert df["trade_id"].tolist() == ["t1", "t2"]
+
+    trades = frame_to_trades(df)
+    assert trades[0]["pnl"] == 1.0 and "close_reason" not in trades[0]
+    assert trades[0]["exit_time"].startswith("2024-07-10T00:00:00")
+    print("✓ Colunas tipadas OK")
+
+
+def test_cache_fetches_only_delta():
+    """A segunda carga lê do DynamoDB apenas o intervalo após o fim do cache."""
+    print("Testando cache Parquet por faixa de tempo...")
+    base = datetime(2024, 7, 1, tzinfo=timezone.utc)
+    items = [raw_trade(i, base + timedelta(hours=i)) for i in range(20)]
+    with tempfile.TemporaryDirectory() as cache_dir:
+        client = FakeDynamoDBClient(items[:10])
+        loader = TradeLoader(client, "Trades", cache_dir=cache_dir, overlap_minutes=0)
+        first = loader.load(base, base + timedelta(hours=9, minutes=30))
+        assert len(first) == 10
+
+        client.items = items
+        second = loader.load(base + timedelta(hours=2), base + timedelta(hours=30))
+        assert second["trade_id"].tolist() == [f"t{i}" for i in range(2, 20)]
+        assert len(os.listdir(cache_dir)) == 1
+        print("✓ Delta buscado; cache substituído")
+
+
+def test_narrow_load_keeps_cached_range():
+    """Uma carga a partir da marca d'água não encolhe o cache da janela inteira."""
+    print("Testando cache após carga estreita...")
+    base = datetime(2024, 7, 1, tzinfo=timezone.utc)
+    items = [raw_trade(i, base + timedelta(hours=i)) for i in range(20)]
+    with tempfile.TemporaryDirectory() as cache_dir:
+        client = FakeDynamoDBClient(items)
+        loader = TradeLoader(client, "Trades", cache_dir=cache_dir, overlap_minutes=0)
+        end = base + timedelta(hours=20)
+        assert len(loader.load(base, end)) == 20
+
+        recent = loader.load(base + timedelta(hours=15), end)
+        assert recent["trade_id"].tolist() == [f"t{i}" for i in range(15, 20)]
+        calls = len(client.calls)
+        # A janela inteira continua em cache: nenhuma nova leitura
+        assert len(loader.load(base, end)) == 20 and len(client.calls) == calls
+
+        # Uma faixa disjunta ganha seu próprio cache, sem apagar o anterior
+        client.items = [raw_trade(100, base - timedelta(days=10))]
+        assert len(loader.load(base - timedelta(days=11), base - timedelta(days=9))) == 1
+        assert len(os.listdir(cache_dir)) == 2
+        print("✓ Cache da janela preservado")
+
+
+def test_failed_orders_use_their_own_cache():
+    """O carregador de ordens falhas lê só status "failed", com cache separado."""
+    print("Testando carregador de ordens falhas...")
+    base = datetime(2024, 7, 1, tzinfo=timezone.utc)
+    items = [raw_trade(i, base + timedelta(hours=i), status="failed" if i % 4 == 0 else "closed") for i in range(12)]
+    items[0]["mode"] = {"S": "real"}
+    items[0]["network_fee"] = {"N": "0.00002"}
+    with tempfile.TemporaryDirectory() as cache_dir:
+        client = FakeDynamoDBClient(items)
+        end = base + timedelta(hours=12)
+        closed = TradeLoader(client, "Trades", cache_dir=cache_dir).load(base, end)
+        failed = TradeLoader(client, "Trades", cache_dir=cache_dir, status="failed").load(base, end)
+        assert len(closed) == 9 and failed["trade_id"].tolist() == ["t0", "t4", "t8"]
+        assert failed["mode"].tolist()[0] == "real" and failed["network_fee"].iloc[0] == 0.00002
+        assert len(os.listdir(cache_dir)) == 2
+        print("✓ Ordens falhas carregadas")
+
+
+def test_parallel_scan_fallback():
+    """Sem o índice, o scan paralelo cobre todos os segmentos."""
+    print("Testando fallback para scan paralelo...")
+    base = datetime(2024, 7, 1, tzinfo=timezone.utc)
+    client = FakeDynamoDBClient([raw_trade(i, base + timedelta(hours=i)) for i in range(12)], has_index=False)
+    loader = TradeLoader(client, "Trades", scan_segments=3, cache_dir=None)
+    df = loader.load(base, base + timedelta(days=1))
+    assert len(df) == 12
+    assert sorted(segment for op, segment in client.calls if op == "scan") == [0, 1, 2]
+    print("✓ Scan paralelo OK")
+
+
+def test_query_errors_do_not_fall_back_to_scan():
+    """Falta de permissão no índice não vira um scan da tabela inteira."""
+    print("Testando erro do Query sem fallback...")
+    base = datetime(2024, 7, 1, tzinfo=timezone.utc)
+    client = FakeDynamoDBClient([raw_trade(0, base)], query_error="AccessDeniedException")
+    loader = TradeLoader(client, "Trades", cache_dir=None)
+    with pytest.raises(ClientError):
+        loader.load(base, base + timedelta(days=1))
+    assert not any(op == "scan" for op, _ in client.calls)
+    print("✓ AccessDenied propagado")
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Testes para a avaliação walk-forward."""
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from backtest import TradeMatrix, params_matrix
+from walk_forward import WalkForwardHarness, walk_forward_folds
+
+SEARCH = {"sampler": "random", "n_trials": 64, "batch_size": 32, "patience": 4, "seed": 9, "min_trades": 5}
+
+
+def make_trades(n=600, days=90, seed=2):
+    rng = np.random.default_rng(seed)
+    start = np.datetime64("2024-01-01T00:00:00")
+    offsets = np.sort(rng.integers(0, days * 86400, n))
+    return [
+        {
+            "trade_id": f"t{i}",
+            "entry_time": str(start + np.timedelta64(int(offsets[i]), "s")) + "Z",
+            "entry_price": 1.0,
+            "quality_score": float(rng.integers(45, 100)),
+            "price_path": np.exp(np.cumsum(rng.normal(0.0, 0.03, 40))).tolist(),
+        }
+        for i in range(n)
+    ]
+
+
+def test_folds_do_not_overlap_train_and_test():
+    """Teste começa onde o treino termina e as janelas avançam no tempo."""
+    print("Testando geração de folds...")
+    matrix = TradeMatrix.from_trades(make_trades())
+    folds = walk_forward_folds(matrix.entry_times, train_days=30, test_days=10, min_train_trades=20, min_test_trades=5)
+
+    assert len(folds) >= 5
+    for fold in folds:
+        assert fold.train_start < fold.train_stop == fold.test_start < fold.test_stop
+        assert matrix.entry_times[fold.test_start - 1] < matrix.entry_times[fold.test_start]
+    assert all(a.train_start <= b.train_start for a, b in zip(folds, folds[1:]))
+    print(f"✓ {len(folds)} folds")
+
+
+def test_views_match_copied_matrices():
+    """Visões sobre os arrays compartilhados equivalem a matrizes montadas do zero."""
+    print("Testando visões sem cópia...")
+    trades = make_trades(200)
+    matrix = TradeMatrix.from_trades(trades)
+    view = TradeMatrix.from_arrays(matrix.arrays(), 50, 120)
+    copy = TradeMatrix.from_trades([t for t in trades if t["trade_id"] in set(matrix.trade_ids[50:120])])
+    params = params_matrix([{"quality_threshold": 55, "high_sl": 0.1, "high_tp": 0.3, "med_sl": 0.15, "med_tp": 0.2}])
+
+    assert np.shares_memory(view.flat_max, matrix.flat_max)
+    for key, value in copy.evaluate(params).items():
+        assert np.allclose(view.evaluate(params)[key], value), key
+    print("✓ Visões equivalentes")
+
+
+def test_parallel_harness_matches_sequential():
+    """Folds em processos (memória compartilhada) dão o mesmo relatório que em sequência."""
+    print("Testando harness walk-forward...")
+    matrix = TradeMatrix.from_trades(make_trades())
+    kwargs = dict(train_days=30, test_days=10, min_train_trades=20, min_test_trades=5, search=SEARCH)
+    sequential = WalkForwardHarness(workers=1, **kwargs).run(matrix)
+    parallel = WalkForwardHarness(workers=2, **kwargs).run(matrix)
+
+    assert sequential["folds"] == parallel["folds"]
+    summary = sequential["summary"]
+    assert summary["fitted_folds"] == summary["folds"] == len(sequential["folds"])
+    assert "overfit_gap" in summary
+    for fold in sequential["folds"]:
+        assert fold["out_of_sample"]["trade_count"] >= 0
+    print(f"✓ Walk-forward: {summary}")
@@ -0,0 +1,250 @@
+"""
+Carregador tipado e paginado do histórico de trades do Trader.
+
+Substitui o scan único com filtro por string (sem paginação, truncado em
+1 MB) e a conversão item a item de Decimal:
+
+- lê os trades fechados por faixa de ``exit_time`` com ``Query`` no índice
+  ``StatusExitTimeIndex`` (status = "closed", exit_time BETWEEN); só quando
+  o índice não existe (ValidationException/ResourceNotFoundException) cai
+  para um scan paralelo em segmentos — outros erros, como falta de
+  permissão, sobem em vez de virar um scan silencioso da tabela inteira.  Com ``status="failed"``
+  lê as ordens de entrada que falharam (``exit_time`` é o horário da falha);
+- usa o cliente de baixo nível do DynamoDB e monta as colunas diretamente
+  dos valores brutos (``{"N": "1.5"}``), sem criar Decimals nem alterar
+  dicts: preços/P&L viram float64, ``entry_time``/``exit_time`` viram
+  ``datetime64[ns, UTC]`` (int64 em epoch) e status/braço viram categóricos;
+- guarda em Parquet local (``/tmp``) a união da faixa em cache com a faixa
+  pedida, identificada pelas duas pontas; a próxima execução busca só o que
+  falta (o delta desde o fim da faixa, com uma pequena sobreposição para
+  escritas atrasadas).  Uma carga estreita (ex.: a partir da marca d'água)
+  não encolhe o cache, e caches de faixas disjuntas são mantidos.
+
+Trades fechados não mudam mais, por isso podem ser cacheados com segurança.
+"""
+
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401 - necessário para DataFrame.to_parquet
+except ImportError:  # pragma: no cover - Parquet é opcional
+    pyarrow = None
+
+try:
+    from botocore.exceptions import ClientError
+except Exception:  # pragma: no cover - botocore é opcional nos testes
+    ClientError = Exception
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+DEFAULT_INDEX = "StatusExitTimeIndex"
+# Erros do Query que indicam índice ausente (e justificam o scan)
+MISSING_INDEX_CODES = ("ValidationException", "ResourceNotFoundException")
+
+FLOAT_COLUMNS = (
+    "entry_price", "exit_price", "close_price", "price_per_token", "pnl", "pnl_pct", "pnl_quote", "amount_usd",
+    "amount_tokens", "quality_score", "stop_loss_pct", "take_profit_pct", "position_size_pct",
+    "network_fee",
+)
+TIME_COLUMNS = ("order_time", "entry_time", "exit_time")
+CATEGORY_COLUMNS = ("status", "close_reason", "ab_arm", "mode", "venue")
+STRING_COLUMNS = ("trade_id", "token_address", "ab_test_id", "config_hash")
+
+
+def _raw(attribute):
+    """Valor bruto de um AttributeValue (``None`` para NULL/ausente)."""
+    if not attribute or "NULL" in attribute:
+        return None
+    return next(iter(attribute.values()))
+
+
+def items_to_frame(items: List[Dict]) -> pd.DataFrame:
+    """Converte itens no formato de baixo nível do DynamoDB em colunas tipadas."""
+    columns: Dict[str, list] = {name: [] for name in FLOAT_COLUMNS + TIME_COLUMNS + CATEGORY_COLUMNS + STRING_COLUMNS}
+    for item in items:
+        for name, values in columns.items():
+            attribute = item.get(name)
+            if attribute is None and name == "trade_id":
+                attribute = item.get("tradeId")
+            values.append(_raw(attribute))
+
+    data = {}
+    for name in FLOAT_COLUMNS:
+        data[name] = np.array([np.nan if v is None else v for v in columns[name]], dtype=np.float64)
+    for name in TIME_COLUMNS:
+        data[name] = pd.to_datetime(columns[name], utc=True, errors="coerce", format="ISO8601").as_unit("ns")
+    for name in CATEGORY_COLUMNS:
+        data[name] = pd.Categorical(columns[name])
+    for name in STRING_COLUMNS:
+        data[name] = pd.array(columns[name], dtype="string")
+    return pd.DataFrame(data)
+
+
+def frame_to_trades(df: pd.DataFrame) -> List[Dict]:
+    """Lista de dicts (formato antigo) sem os campos ausentes, com horários em ISO."""
+    if df.empty:
+        return []
+    out = df.copy()
+    for name in TIME_COLUMNS:
+        out[name] = out[name].dt.strftime("%Y-%m-%dT%H:%M:%S.%fZ").astype(object)
+    out = out.astype(object).where(out.notna(), None)
+    return [{k: v for k, v in record.items() if v is not None} for record in out.to_dict("records")]
+
+
+def _iso(moment: datetime) -> str:
+    """Formato gravado pelos agentes (``datetime.utcnow().isoformat()``)."""
+    return moment.astimezone(timezone.utc).replace(tzinfo=None).isoformat()
+
+
+class TradeLoader:
+    """Carrega trades fechados (ou ordens com outro ``status``) por faixa de ``exit_time``, com cache Parquet local."""
+
+    def __init__(self, client, table_name: str, index_name: Optional[str] = DEFAULT_INDEX,
+                 scan_segments: int = 4, cache_dir: Optional[str] = "/tmp/trade_cache",
+                 overlap_minutes: float = 10, status: str = "closed"):
+        self.client = client
+        self.table_name = table_name
+        self.status = status
+        self.index_name = index_name
+        self.scan_segments = scan_segments
+        self.cache_dir = cache_dir if pyarrow is not None else None
+        self.overlap = timedelta(minutes=overlap_minutes)
+        if cache_dir and pyarrow is None:
+            logger.warning("pyarrow não instalado; cache Parquet de trades desativado")
+
+    @classmethod
+    def from_config(cls, client, table_name: str, config: Dict, status: str = "closed") -> "TradeLoader":
+        """Cria o carregador a partir da seção ``optimizer.trade_loader``."""
+        return cls(client, table_name, status=status, **config.get("optimizer", {}).get("trade_loader", {}))
+
+    # ------------------------------------------------------------------
+    # Leitura do DynamoDB
+    # ------------------------------------------------------------------
+
+    def fetch(self, start: datetime, end: datetime) -> pd.DataFrame:
+        """Trades com o ``status`` do carregador e ``start <= exit_time <= end`` direto do DynamoDB."""
+        started = time.perf_counter()
+        values = {":status": {"S": self.status}, ":start": {"S": _iso(start)}, ":end": {"S": _iso(end)}}
+        names = {"#status": "status", "#exit": "exit_time"}
+        items = None
+        if self.index_name:
+            try:
+                items = self._paginate("query", {
+                    "TableName": self.table_name,
+                    "IndexName": self.index_name,
+                    "KeyConditionExpression": "#status = :status AND #exit BETWEEN :start AND :end",
+                    "ExpressionAttributeNames": names,
+                    "ExpressionAttributeValues": values,
+                })
+            except ClientError as e:
+                code = getattr(e, "response", {}).get("Error", {}).get("Code")
+                if code not in MISSING_INDEX_CODES:
+                    raise
+                logger.warning(f"Índice {self.index_name} indisponível ({e}); usando scan paralelo")
+        if items is None:
+            items = self._parallel_scan({
+                "TableName": self.table_name,
+                "FilterExpression": "#status = :status AND #exit BETWEEN :start AND :end",
+                "ExpressionAttributeNames": names,
+                "ExpressionAttributeValues": values,
+            })
+        df = items_to_frame(items)
+        logger.info(f"{len(df)} trades lidos do DynamoDB em {time.perf_counter() - started:.2f} s")
+        return df
+
+    def _paginate(self, operation: str, kwargs: Dict) -> List[Dict]:
+        items: List[Dict] = []
+        for page in self.client.get_paginator(operation).paginate(**kwargs):
+            items.extend(page.get("Items", []))
+        return items
+
+    def _parallel_scan(self, kwargs: Dict) -> List[Dict]:
+        segments = max(1, self.scan_segments)
+        with ThreadPoolExecutor(max_workers=segments) as pool:
+            pages = pool.map(
+                lambda segment: self._paginate("scan", {**kwargs, "Segment": segment, "TotalSegments": segments}),
+                range(segments),
+            )
+            return [item for page in pages for item in page]
+
+    # ------------------------------------------------------------------
+    # Cache Parquet por faixa de tempo
+    # ------------------------------------------------------------------
+
+    @property
+    def _cache_prefix(self) -> str:
+        return f"{self.table_name}__" if self.status == "closed" else f"{self.table_name}-{self.status}__"
+
+    def _cache_files(self) -> List[Tuple[int, int, str]]:
+        if not self.cache_dir or not os.path.isdir(self.cache_dir):
+            return []
+        files = []
+        prefix = self._cache_prefix
+        for name in os.listdir(self.cache_dir):
+            if name.startswith(prefix) and name.endswith(".parquet"):
+                try:
+                    start_ms, end_ms = (int(part) for part in name[len(prefix):-len(".parquet")].split("__"))
+                except ValueError:
+                    continue
+                files.append((start_ms, end_ms, os.path.join(self.cache_dir, name)))
+        return files
+
+    def _write_cache(self, df: pd.DataFrame, start: datetime, end: datetime) -> None:
+        """Grava a faixa ``[start, end]`` e remove só os caches contidos nela."""
+        if not self.cache_dir:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        start_ms, end_ms = _ms(start), _ms(end)
+        path = os.path.join(self.cache_dir, f"{self._cache_prefix}{start_ms}__{end_ms}.parquet")
+        df.to_parquet(path, index=False)
+        for old_start, old_end, old in self._cache_files():
+            if old != path and start_ms <= old_start and old_end <= end_ms:
+                os.remove(old)
+
+    def load(self, start: datetime, end: Optional[datetime] = None) -> pd.DataFrame:
+        """Trades com ``exit_time`` em ``[start, end]``, buscando só o que falta no cache."""
+        end = end or datetime.now(timezone.utc)
+        start, end = _utc(start), _utc(end)
+        # Aproveita o cache que cobre o início da faixa pedida e vai mais longe
+        covering = [entry for entry in self._cache_files() if entry[0] <= _ms(start) <= entry[1]]
+        if not covering:
+            covered_start, covered_end = start, end
+            df = self.fetch(start, end)
+        else:
+            start_ms, end_ms, path = max(covering, key=lambda entry: entry[1])
+            covered_start, cached_end = _from_ms(start_ms), _from_ms(end_ms)
+            covered_end = max(end, cached_end)
+            cached_df = pd.read_parquet(path)
+            delta = self.fetch(max(start, cached_end - self.overlap), end) if end > cached_end else cached_df.iloc[0:0]
+            logger.info(f"Cache de trades: {len(cached_df)} em cache, {len(delta)} no delta")
+            df = pd.concat([cached_df, delta], ignore_index=True)
+            for name in CATEGORY_COLUMNS:
+                df[name] = df[name].astype("category")
+            df = df.drop_duplicates(subset="trade_id", keep="last")
+
+        # O cache guarda a união das faixas; só o retorno é recortado em [start, end]
+        df = df.sort_values("exit_time", kind="stable").reset_index(drop=True)
+        self._write_cache(df, covered_start, covered_end)
+        df = df[(df["exit_time"] >= pd.Timestamp(start)) & (df["exit_time"] <= pd.Timestamp(end))]
+        return df.reset_index(drop=True)
+
+
+def _utc(moment: datetime) -> datetime:
+    return moment.replace(tzinfo=timezone.utc) if moment.tzinfo is None else moment.astimezone(timezone.utc)
+
+
+def _ms(moment: datetime) -> int:
+    return int(_utc(moment).timestamp() * 1000)
+
+
+def _from_ms(value: int) -> datetime:
+    return datetime.fromtimestamp(value / 1000, tz=timezone.utc)
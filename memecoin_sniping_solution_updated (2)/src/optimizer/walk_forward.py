@@ -0,0 +1,283 @@
+"""
+Avaliação walk-forward da busca de parâmetros.
+
+Ajustar e avaliar os parâmetros na mesma janela garante overfitting.  Aqui o
+histórico (ordenado por entrada) é fatiado em janelas deslizantes de treino
+e teste: a busca roda em cada janela de treino e os melhores parâmetros são
+medidos na janela de teste seguinte, fora da amostra.
+
+Os arrays pré-computados do ``TradeMatrix`` (retornos, máximos/mínimos
+acumulados achatados...) são publicados uma única vez em
+``multiprocessing.shared_memory``.  Cada worker anexa os blocos e monta as
+janelas como visões (``TradeMatrix.from_arrays``), sem cópias por fold.
+Onde não há suporte a multiprocessing (Lambda) os folds rodam em sequência
+sobre as mesmas visões.
+
+Execute ``python walk_forward.py`` para medir um walk-forward de um ano.
+"""
+
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from multiprocessing import shared_memory
+from typing import Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from backtest import TradeMatrix
+from param_search import ParameterSearch, objective_values
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Métricas fora da amostra reportadas por fold
+OOS_METRICS = ("trade_count", "win_rate", "total_return", "max_drawdown", "sharpe_ratio")
+
+
+@dataclass
+class Fold:
+    """Janela de treino ``[train_start, train_stop)`` e de teste ``[test_start, test_stop)`` (linhas)."""
+    index: int
+    train_start: int
+    train_stop: int
+    test_start: int
+    test_stop: int
+    train_period: Tuple[str, str]
+    test_period: Tuple[str, str]
+
+
+@dataclass
+class FoldResult:
+    """Resultado de um fold: parâmetros ajustados e métricas dentro/fora da amostra."""
+    fold: Fold
+    best_params: Dict[str, float]
+    in_sample_value: float
+    out_of_sample_value: float
+    out_of_sample: Dict[str, float] = field(default_factory=dict)
+
+
+def walk_forward_folds(entry_times: np.ndarray, train_days: float = 30, test_days: float = 7,
+                       step_days: Optional[float] = None, min_train_trades: int = 50,
+                       min_test_trades: int = 10) -> List[Fold]:
+    """Gera janelas deslizantes sobre ``entry_times`` (ordenado, datetime64)."""
+    times = np.asarray(entry_times, dtype="datetime64[ns]")
+    valid = ~np.isnat(times)
+    if not valid.any():
+        return []
+    step = np.timedelta64(int((step_days or test_days) * 86400), "s")
+    train = np.timedelta64(int(train_days * 86400), "s")
+    test = np.timedelta64(int(test_days * 86400), "s")
+
+    first = int(np.argmax(valid))
+    start = times[first]
+    end = times[valid][-1]
+    folds: List[Fold] = []
+    while start + train < end:
+        bounds = np.searchsorted(times[first:], [start, start + train, start + train + test]) + first
+        train_start, train_stop, test_stop = (int(b) for b in bounds)
+        if train_stop - train_start >= min_train_trades and test_stop - train_stop >= min_test_trades:
+            folds.append(Fold(
+                index=len(folds),
+                train_start=train_start,
+                train_stop=train_stop,
+                test_start=train_stop,
+                test_stop=test_stop,
+                train_period=(str(start)[:10], str(start + train)[:10]),
+                test_period=(str(start + train)[:10], str(start + train + test)[:10]),
+            ))
+        start = start + step
+    return folds
+
+
+class SharedArrays:
+    """Publica arrays NumPy em ``shared_memory``; os workers anexam pelos specs."""
+
+    def __init__(self, arrays: Mapping[str, np.ndarray]):
+        self._blocks: List[shared_memory.SharedMemory] = []
+        self.specs: Dict[str, Tuple[str, Tuple[int, ...], str]] = {}
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+            self._blocks.append(block)
+            self.specs[name] = (block.name, array.shape, array.dtype.str)
+
+    @staticmethod
+    def attach(specs: Mapping[str, Tuple[str, Tuple[int, ...], str]]):
+        """Retorna ``(arrays, blocos)``; mantenha os blocos vivos enquanto usar os arrays."""
+        blocks = []
+        arrays = {}
+        for name, (block_name, shape, dtype) in specs.items():
+            block = shared_memory.SharedMemory(name=block_name)
+            blocks.append(block)
+            arrays[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+        return arrays, blocks
+
+    def close(self) -> None:
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+
+# Estado do worker: visões sobre a memória compartilhada
+_WORKER_ARRAYS: Optional[Dict[str, np.ndarray]] = None
+_WORKER_BLOCKS: List = []
+
+
+def _init_worker(specs) -> None:
+    global _WORKER_ARRAYS, _WORKER_BLOCKS
+    _WORKER_ARRAYS, _WORKER_BLOCKS = SharedArrays.attach(specs)
+
+
+def _run_fold_in_worker(fold: Fold, search_params: Dict) -> FoldResult:
+    return run_fold(_WORKER_ARRAYS, fold, search_params)
+
+
+def run_fold(arrays: Mapping[str, np.ndarray], fold: Fold, search_params: Dict) -> FoldResult:
+    """Ajusta na janela de treino e mede os melhores parâmetros na de teste."""
+    search = ParameterSearch(**{**search_params, "workers": 1})
+    train = TradeMatrix.from_arrays(arrays, fold.train_start, fold.train_stop)
+    test = TradeMatrix.from_arrays(arrays, fold.test_start, fold.test_stop)
+
+    best_params, in_sample = search.run(train)
+    if not best_params:
+        return FoldResult(fold, {}, 0.0, 0.0, {})
+    params = np.array([[best_params[name] for name in search.names]], dtype=np.float64)
+    metrics = test.evaluate(params, initial_capital=search.initial_capital)
+    # Sem mínimo de trades fora da amostra: a janela de teste já foi filtrada
+    oos_value = objective_values(test, params, 0, search.drawdown_penalty, search.initial_capital)[0]
+    return FoldResult(
+        fold=fold,
+        best_params=best_params,
+        in_sample_value=in_sample,
+        out_of_sample_value=float(oos_value),
+        out_of_sample={name: float(metrics[name][0]) for name in OOS_METRICS},
+    )
+
+
+class WalkForwardHarness:
+    """Executa a busca em cada fold em paralelo e consolida o relatório."""
+
+    def __init__(self, train_days: float = 30, test_days: float = 7, step_days: Optional[float] = None,
+                 min_train_trades: int = 50, min_test_trades: int = 10, workers: int = 1,
+                 search: Optional[Dict] = None):
+        self.train_days = train_days
+        self.test_days = test_days
+        self.step_days = step_days
+        self.min_train_trades = min_train_trades
+        self.min_test_trades = min_test_trades
+        self.workers = workers
+        self.search_params = dict(search or {})
+        self.search_params.pop("backend", None)
+
+    @classmethod
+    def from_config(cls, config: Dict) -> "WalkForwardHarness":
+        """Cria o harness a partir de ``optimizer.walk_forward`` (e ``optimizer.search``)."""
+        optimizer_config = config.get("optimizer", {})
+        params = dict(optimizer_config.get("walk_forward", {}))
+        if params.get("workers") == "auto":
+            params["workers"] = os.cpu_count() or 1
+        return cls(search=optimizer_config.get("search", {}), **params)
+
+    def run(self, matrix: TradeMatrix) -> Dict:
+        """Roda todos os folds e retorna o relatório por fold e agregado."""
+        if matrix.entry_times is None:
+            raise ValueError("TradeMatrix sem entry_times; use TradeMatrix.from_trades")
+        folds = walk_forward_folds(
+            matrix.entry_times, self.train_days, self.test_days, self.step_days,
+            self.min_train_trades, self.min_test_trades,
+        )
+        if not folds:
+            logger.warning("Histórico insuficiente para qualquer fold walk-forward")
+            return {"folds": [], "summary": {}}
+
+        started = time.perf_counter()
+        results = self._run_parallel(matrix, folds) if self.workers > 1 and len(folds) > 1 else None
+        if results is None:
+            arrays = matrix.arrays()
+            results = [run_fold(arrays, fold, self.search_params) for fold in folds]
+        elapsed = time.perf_counter() - started
+
+        report = {"folds": [self._fold_report(r) for r in results], "summary": self._summary(results)}
+        report["summary"]["elapsed_s"] = round(elapsed, 2)
+        logger.info(f"Walk-forward: {len(folds)} folds em {elapsed:.1f} s, resumo {report['summary']}")
+        return report
+
+    def _run_parallel(self, matrix: TradeMatrix, folds: List[Fold]) -> Optional[List[FoldResult]]:
+        try:
+            shared = SharedArrays(matrix.arrays())
+        except (OSError, FileNotFoundError) as e:
+            logger.warning(f"Memória compartilhada indisponível ({e}); folds em sequência")
+            return None
+        try:
+            with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                     initargs=(shared.specs,)) as pool:
+                return list(pool.map(_run_fold_in_worker, folds, [self.search_params] * len(folds)))
+        except (OSError, NotImplementedError) as e:
+            # Ambientes como o Lambda não suportam multiprocessing
+            logger.warning(f"Pool de processos indisponível ({e}); folds em sequência")
+            return None
+        finally:
+            shared.close()
+
+    @staticmethod
+    def _fold_report(result: FoldResult) -> Dict:
+        return {
+            **asdict(result.fold),
+            "best_params": result.best_params,
+            "in_sample_value": result.in_sample_value,
+            "out_of_sample_value": result.out_of_sample_value,
+            "out_of_sample": result.out_of_sample,
+        }
+
+    @staticmethod
+    def _summary(results: List[FoldResult]) -> Dict[str, float]:
+        fitted = [r for r in results if r.best_params]
+        if not fitted:
+            return {"folds": len(results), "fitted_folds": 0}
+        in_sample = np.array([r.in_sample_value for r in fitted])
+        oos = np.array([r.out_of_sample_value for r in fitted])
+        return {
+            "folds": len(results),
+            "fitted_folds": len(fitted),
+            "mean_in_sample_value": float(in_sample.mean()),
+            "mean_out_of_sample_value": float(oos.mean()),
+            # Quanto do desempenho dentro da amostra não se repete fora dela
+            "overfit_gap": float(in_sample.mean() - oos.mean()),
+            "positive_oos_folds": int((oos > 0).sum()),
+            "mean_oos_win_rate": float(np.mean([r.out_of_sample["win_rate"] for r in fitted])),
+            "total_oos_trades": int(sum(r.out_of_sample["trade_count"] for r in fitted)),
+        }
+
+
+def _benchmark() -> None:
+    rng = np.random.default_rng(1)
+    n_trades = 20_000
+    start = np.datetime64("2024-01-01T00:00:00")
+    offsets = np.sort(rng.integers(0, 365 * 86400, n_trades))
+    trades = [
+        {
+            "trade_id": f"t{i}",
+            "entry_time": str(start + np.timedelta64(int(offsets[i]), "s")) + "Z",
+            "entry_price": 1.0,
+            "quality_score": float(rng.integers(45, 100)),
+            "price_path": np.exp(np.cumsum(rng.normal(0.0, 0.03, 120))).tolist(),
+        }
+        for i in range(n_trades)
+    ]
+    matrix = TradeMatrix.from_trades(trades)
+    harness = WalkForwardHarness(
+        train_days=30, test_days=7, workers=os.cpu_count() or 1,
+        search={"sampler": "random", "n_trials": 512, "batch_size": 128, "patience": 4},
+    )
+    report = harness.run(matrix)
+    print(f"{n_trades} trades em 1 ano, {report['summary']['folds']} folds, "
+          f"{harness.workers} processos: {report['summary']['elapsed_s']} s")
+    print({k: round(v, 4) if isinstance(v, float) else v for k, v in report["summary"].items()})
+
+
+if __name__ == "__main__":
+    _benchmark()
@@ -4,6 +4,7 @@ Script de teste para o Agente Trader.
 Este script simula o comportamento do Trader sem depender de AWS ou blockchain real.
 """
 
+import io
 import json
 import os
 import sys
@@ -20,6 +21,21 @@ with patch('boto3.client'), \
      patch('solders.keypair.Keypair'):
     from trader import calculate_trade_parameters, process_approved_token, lambda_handler
 
+from common.ab_testing import ABConfigCache
+from common.execution_service import InMemoryLedgerTable
+
+
+class ConfigS3:
+    """S3 com o documento A/B gravado pelo Optimizer."""
+
+    def __init__(self, document):
+        self.body = json.dumps(document).encode()
+        self.requests = []
+
+    def get_object(self, **kwargs):
+        self.requests.append(kwargs)
+        return {'Body': io.BytesIO(self.body), 'ETag': '"v1"'}
+
 def test_calculate_trade_parameters():
     """Testa o cálculo dos parâmetros de trade."""
     print("Testando calculate_trade_parameters...")
@@ -50,15 +66,28 @@ def test_calculate_trade_parameters():
     
     print(f"✓ Score baixo (45): SL={low_score_params['stop_loss_pct']:.0%}, TP={low_score_params['take_profit_pct']:.0%}")
 
+def test_calculate_trade_parameters_with_arm_config():
+    """Testa os parâmetros vindos da configuração do braço A/B."""
+    print("Testando calculate_trade_parameters com config do braço...")
+    
+    params = calculate_trade_parameters(85, 1.0, {'high_score_sl': 0.07, 'high_score_tp': 0.45})
+    
+    assert params['stop_loss_pct'] == 0.07, "Stop loss deveria vir da config do braço"
+    assert params['take_profit_pct'] == 0.45, "Take profit deveria vir da config do braço"
+    assert params['position_size_pct'] == 0.15, "Position size ausente deveria usar o padrão"
+    
+    print("✓ Config do braço aplicada")
+
 def test_process_approved_token():
     """Testa o processamento de token aprovado."""
     print("Testando process_approved_token...")
     
     # Mock das funções
+    ledger_table = InMemoryLedgerTable()
     with patch('trader.get_token_price') as mock_price, \
          patch('trader.get_solana_keypair') as mock_keypair, \
          patch('trader.execute_buy_order') as mock_buy, \
-         patch('trader.save_trade_to_db') as mock_save:
+         patch('trader.trader_table', ledger_table):
         
         # Configura os mocks
         mock_price.return_value = 0.001  # $0.001 por token
@@ -84,14 +113,45 @@ def test_process_approved_token():
         assert result['token_address'] == analysis_data['tokenAddress'], "Token address não confere"
         assert result['status'] == 'open', "Status deveria ser 'open'"
         assert 'trade_id' in result, "Trade ID deveria estar presente"
+        assert result['ab_arm'] in ('A', 'B'), "Trade deveria ser marcado com o braço A/B"
         
         # Verifica se as funções foram chamadas
         mock_price.assert_called()
         mock_buy.assert_called_once()
-        mock_save.assert_called_once()
+        assert ledger_table.writes == 1, "O trade deveria ser gravado uma única vez no ledger"
+        stored = ledger_table.items[result['trade_id']]
+        assert stored['entry_price'] == Decimal('0.001'), "Preço de entrada deveria vir do fill"
+        assert stored['venue'] == 'solana'
         
         print(f"✓ Trade criado com ID: {result['trade_id']}")
 
+def test_monitor_position_closes_on_take_profit():
+    """Testa o fechamento pelo ledger quando o take profit é atingido."""
+    print("Testando monitor_position com take profit...")
+    from trader import monitor_position
+
+    ledger_table = InMemoryLedgerTable()
+    ledger_table.put_item(Item={
+        'tradeId': 'legacy_trade', 'trade_id': 'legacy_trade', 'token_address': 'token',
+        'status': 'open', 'price_per_token': Decimal('0.001'), 'amount_tokens': Decimal('0.15'),
+        'stop_loss_pct': Decimal('0.1'), 'take_profit_pct': Decimal('0.3'),
+    })
+    from common.fill_simulator import FillModel, FillSimulator
+
+    exact_fills = FillSimulator(FillModel(failure_rate=0.0, volatility=0.0, fee_bps=0.0))
+    with patch('trader.trader_table', ledger_table), \
+         patch('trader.MODE', 'paper'), \
+         patch('trader.PAPER_FILLS', exact_fills), \
+         patch('trader.get_token_price', return_value=0.0015):
+        monitor_position('legacy_trade')
+
+    closed = ledger_table.items['legacy_trade']
+    assert closed['status'] == 'closed'
+    assert closed['close_reason'] == 'take_profit'
+    assert closed['exit_price'] == Decimal('0.0015')
+    assert abs(float(closed['pnl_pct']) - 0.5) < 1e-9
+    print("✓ Posição antiga fechada com P&L no ledger")
+
 def test_lambda_handler_sqs():
     """Testa o handler do Lambda com evento SQS."""
     print("Testando lambda_handler com SQS...")
@@ -128,6 +188,40 @@ def test_lambda_handler_sqs():
         
         print("✓ lambda_handler com SQS passou no teste")
 
+def test_lambda_handler_routes_to_arm_b():
+    """Com CONFIG_BUCKET/CONFIG_KEY no ambiente, o handler lê o A/B do Optimizer e usa o braço B."""
+    print("Testando roteamento A/B no handler...")
+    
+    document = {
+        'ab_test_active': True,
+        'ab_test_start_time': '2024-07-01T00:00:00',
+        'ab_test_percentage': 1.0,
+        'config_a': {'trader': {'high_score_sl': 0.10}},
+        'config_b': {'trader': {'high_score_sl': 0.07}},
+    }
+    s3 = ConfigS3(document)
+    with patch.dict(os.environ, {'CONFIG_BUCKET': 'config-bucket', 'CONFIG_KEY': 'agent_config.json'}):
+        ab_config = ABConfigCache.from_env(s3_client=s3)
+    assert ab_config is not None, "O cache A/B deveria ser criado a partir do ambiente"
+    
+    ledger_table = InMemoryLedgerTable()
+    with patch('trader.AB_CONFIG', ab_config), \
+         patch('trader.get_token_price', return_value=0.001), \
+         patch('trader.execute_buy_order', return_value={'success': True, 'transaction_signature': 'sig_b',
+                                                          'amount_tokens': 1000, 'price_per_token': 0.001}), \
+         patch('trader.trader_table', ledger_table):
+        event = {'Records': [{'eventSource': 'aws:sqs', 'body': json.dumps({
+            'tokenAddress': 'TokB', 'qualityScore': 85, 'approved': True,
+        })}]}
+        result = json.loads(lambda_handler(event, None)['body'])
+    
+    assert s3.requests[0]['Bucket'] == 'config-bucket' and s3.requests[0]['Key'] == 'agent_config.json'
+    stored = ledger_table.items[result['trade_id']]
+    assert stored['ab_arm'] == 'B' and stored['ab_test_id'] == '2024-07-01T00:00:00'
+    assert stored['stop_loss_pct'] == Decimal('0.07'), "Parâmetros deveriam vir da configuração B"
+    
+    print("✓ Trade roteado para o braço B")
+
 def test_lambda_handler_timer():
     """Testa o handler do Lambda com evento de timer."""
     print("Testando lambda_handler com timer...")
@@ -140,6 +234,13 @@ def test_lambda_handler_timer():
                 'trade_id': 'test_trade_123',
                 'token_address': 'So11111111111111111111111111111111111111112',
                 'status': 'open'
+            },
+            {
+                # Trades do Executor (venue evm) não são monitorados pelo Trader
+                'trade_id': 'evm_trade_456',
+                'token_address': 'token_evm',
+                'venue': 'evm',
+                'status': 'open'
             }
         ]
     }
@@ -182,15 +283,54 @@ def test_price_unavailable():
         
         print("✓ Teste de preço indisponível passou")
 
+def test_paper_buy_uses_pool_impact():
+    """Em paper mode, com reservas do pool, a ordem paga o impacto planejado."""
+    print("Testando compra paper com impacto no pool...")
+    from trader import execute_buy_order, pool_from_analysis
+    from common.fill_simulator import FillModel, FillSimulator
+
+    pool = pool_from_analysis({'pool_reserves': {'reserve_quote': 20.0, 'reserve_base': 2_000_000.0}})
+    simulator = FillSimulator(FillModel(failure_rate=0.0, volatility=0.0), seed=0)
+    with patch('trader.MODE', 'paper'), patch('trader.PAPER_FILLS', simulator):
+        thin = execute_buy_order('token', 0.15, 0.001, None, pool=pool)
+        flat = execute_buy_order('token', 0.15, 0.001, None)
+
+    assert thin['slippage'] > 0 and thin['price_per_token'] > 0.001
+    assert thin['child_orders'] >= 1
+    # Sem pool não há impacto, mas a taxa do pool ainda encarece a compra
+    assert flat['slippage'] == 0.0 and flat['price_per_token'] > 0.001
+    assert thin['price_per_token'] > flat['price_per_token']
+    print(f"✓ Slippage simulado {thin['slippage']:.2%} em {thin['child_orders']} ordens")
+
+
+def test_paper_buy_can_fail():
+    """Transações simuladas podem falhar e não abrem posição."""
+    print("Testando falha simulada de transação...")
+    from trader import execute_buy_order
+    from common.fill_simulator import FillModel, FillSimulator
+
+    with patch('trader.MODE', 'paper'), \
+         patch('trader.PAPER_FILLS', FillSimulator(FillModel(failure_rate=1.0), seed=0)):
+        result = execute_buy_order('token', 0.15, 0.001, None)
+
+    assert not result['success']
+    print("✓ Falha simulada OK")
+
+
 if __name__ == "__main__":
     print("Executando testes do Agente Trader...\n")
     
     try:
         test_calculate_trade_parameters()
+        test_calculate_trade_parameters_with_arm_config()
         test_process_approved_token()
+        test_monitor_position_closes_on_take_profit()
         test_lambda_handler_sqs()
+        test_lambda_handler_routes_to_arm_b()
         test_lambda_handler_timer()
         test_price_unavailable()
+        test_paper_buy_uses_pool_impact()
+        test_paper_buy_can_fail()
         
         print("\n✅ Todos os testes passaram!")
         
@@ -199,8 +339,3 @@ if __name__ == "__main__":
         import traceback
         traceback.print_exc()
         sys.exit(1)
-
-
-
-
-
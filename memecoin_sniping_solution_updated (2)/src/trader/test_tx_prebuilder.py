@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Testes da pré-montagem de transações contra um RPC falso local."""
+
+import os
+import struct
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from solders.keypair import Keypair
+from solders.pubkey import Pubkey
+
+from tx_prebuilder import (
+    BlockhashCache,
+    LocalFakeRpc,
+    PriorityFeeEstimator,
+    SolanaRpc,
+    TxPrebuilder,
+    associated_token_address,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_blockhash_cache_refreshes_only_when_stale():
+    """O blockhash em cache é reutilizado até ficar velho."""
+    print("Testando BlockhashCache...")
+    clock = FakeClock()
+    with LocalFakeRpc() as fake:
+        cache = BlockhashCache(SolanaRpc(fake.url), max_age_seconds=45, clock=clock)
+        first = cache.get()
+        clock.now = 30
+        assert cache.get() == first
+        assert fake.calls["getLatestBlockhash"] == 1
+        clock.now = 50
+        assert cache.get() != first
+        assert fake.calls["getLatestBlockhash"] == 2
+    print("✓ BlockhashCache OK")
+
+
+def test_priority_fee_percentile():
+    """A taxa é o percentil das taxas recentes, limitada ao mínimo."""
+    print("Testando PriorityFeeEstimator...")
+    clock = FakeClock()
+    with LocalFakeRpc() as fake:
+        fees = PriorityFeeEstimator(SolanaRpc(fake.url), percentile=75, min_fee=2_000, clock=clock)
+        assert fees.get() == 10_000  # taxas 0, 1k, 5k, 10k, 50k
+        assert PriorityFeeEstimator(SolanaRpc(fake.url), percentile=0, min_fee=2_000).get() == 2_000
+        fees.get()
+        assert fake.calls["getRecentPrioritizationFees"] == 2
+    print("✓ PriorityFeeEstimator OK")
+
+
+def test_build_buy_fills_prebuilt_template():
+    """Na aprovação só as quantidades são preenchidas; nada vai ao RPC."""
+    print("Testando build_buy com rota pré-montada...")
+    payer = Keypair()
+    mint = str(Pubkey.new_unique())
+    pool = str(Pubkey.new_unique())
+    route = {
+        "program_id": "675kPX9MHTjS2zt1qfr1NYHuzeLXfQM9H24wFSUt1Mp8",
+        "accounts": [["$owner", True, False], [pool, False, True], ["$token_account", False, True]],
+        "data_prefix": "09",
+    }
+    with LocalFakeRpc() as fake:
+        prebuilder = TxPrebuilder(SolanaRpc(fake.url), payer)
+        prebuilder.blockhashes.refresh()
+        prebuilder.prepare_async(mint, route).result()
+        calls_before = dict(fake.calls)
+
+        tx, timing = prebuilder.build_buy(mint, 250_000_000, 1_234_567)
+
+        assert fake.calls == calls_before
+        assert tx.signatures[0] != type(tx.signatures[0]).default()
+        message = tx.message
+        keys = message.account_keys
+        assert keys[0] == payer.pubkey()
+        assert associated_token_address(payer.pubkey(), Pubkey.from_string(mint)) in keys
+        swap = message.instructions[-1]
+        assert str(keys[swap.program_id_index]) == route["program_id"]
+        assert bytes(swap.data) == b"\x09" + struct.pack("<QQ", 250_000_000, 1_234_567)
+        assert timing["total_ms"] < 50
+    print(f"✓ build_buy OK ({timing['total_ms']:.2f} ms)")
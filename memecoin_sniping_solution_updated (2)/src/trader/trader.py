@@ -2,7 +2,9 @@ import json
 import uuid
 import os
 import logging
+import time
 import boto3
+import numpy as np
 from solana.rpc.api import Client
 from solders.keypair import Keypair
 from decimal import Decimal
@@ -11,30 +13,20 @@ import requests
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-
-class InMemoryTable:
-    """Simple in-memory table to emulate DynamoDB for local tests."""
-
-    def __init__(self):
-        self.items = {}
-
-    def scan(self):
-        return {'Items': list(self.items.values())}
-
-    def put_item(self, Item):
-        self.items[Item['trade_id']] = Item
-
-    def get_item(self, Key):
-        trade_id = Key.get('trade_id')
-        return {'Item': self.items.get(trade_id)}
-
-    def update_item(self, Key, Updates):
-        trade_id = Key.get('trade_id')
-        if trade_id in self.items:
-            self.items[trade_id].update(Updates)
-
-
+from common.ab_testing import ABConfigCache
 from common.config import load_config
+from common.execution_planner import ExecutionPlanner, PoolReserves
+from common.execution_service import (
+    BUY,
+    ExecutionService,
+    Fill,
+    InMemoryLedgerTable,
+    Order,
+    TradeLedger,
+    VenueAdapter,
+)
+from common.fill_simulator import BUY as FILL_BUY, SELL as FILL_SELL, FillSimulator
+from common.versioned_config import content_hash
 
 # Carrega configurações
 CONFIG = load_config()
@@ -43,6 +35,12 @@ MODE = CONFIG.get("trader", {}).get("mode", "paper")
 TRADER_TABLE_NAME = CONFIG.get("trader", {}).get("trader_table_name", "MemecoinSnipingTraderTable")
 SOLANA_WALLET_SECRET_ARN = CONFIG.get("trader", {}).get("solana_wallet_secret_arn")
 SOLANA_RPC_URL = CONFIG.get("trader", {}).get("solana_rpc_url", "https://api.mainnet-beta.solana.com")
+MAX_SLIPPAGE = float(CONFIG.get("trader", {}).get("max_slippage", 0.02))
+PAPER_BALANCE_SOL = float(CONFIG.get("trader", {}).get("paper_balance_sol", 10.0))
+LAMPORTS_PER_SOL = 1_000_000_000
+EXECUTION_PLANNER = ExecutionPlanner.from_config(CONFIG.get("trader", {}))
+# Paper mode: latência, variação de preço, impacto, taxas e falhas simulados
+PAPER_FILLS = FillSimulator.from_config({"max_slippage": MAX_SLIPPAGE, **CONFIG.get("trader", {}).get("fill_model", {})})
 
 dynamodb = boto3.resource("dynamodb")
 secrets_manager = boto3.client("secretsmanager")
@@ -51,13 +49,37 @@ solana_client = Client(SOLANA_RPC_URL)
 try:
     trader_table = dynamodb.Table(TRADER_TABLE_NAME)
 except Exception:
-    trader_table = InMemoryTable()
+    trader_table = InMemoryLedgerTable()
+
+# A/B routing of the configuration written by the Optimizer (None when not configured)
+AB_CONFIG = ABConfigCache.from_env()
+CONFIG_HASH = content_hash(CONFIG)
+
+# Pré-montagem de transações (modo real), criada no primeiro uso
+_TX_PREBUILDER = None
+
+
+def get_tx_prebuilder():
+    """Return the container-wide transaction prebuilder (real mode only)."""
+    global _TX_PREBUILDER
+    if _TX_PREBUILDER is None:
+        from tx_prebuilder import SolanaRpc, TxPrebuilder
+
+        _TX_PREBUILDER = TxPrebuilder(SolanaRpc(SOLANA_RPC_URL), get_solana_keypair())
+        _TX_PREBUILDER.start()
+    return _TX_PREBUILDER
+
+
+def get_token_price(token_address: str, vs_token: str = None) -> float:
+    """Return the current token price using a public aggregator.
 
-def get_token_price(token_address: str) -> float:
-    """Return the current token price using a public aggregator."""
+    Prices are in USD unless ``vs_token`` (a mint address) is given.
+    """
     try:
         # Jupiter price API does not require an API key
         url = f"https://price.jup.ag/v4/price?ids={token_address}"
+        if vs_token:
+            url += f"&vsToken={vs_token}"
         response = requests.get(url, timeout=5)
         response.raise_for_status()
         data = response.json()
@@ -85,10 +107,74 @@ def get_solana_keypair():
     # Em modo paper, retorna um keypair aleatório (não usado para transações reais)
     return Keypair()
 
-def execute_buy_order(token_address: str, position_pct: float, price: float, keypair):
-    """Execute a buy order or simulate it depending on MODE."""
+def pool_from_analysis(analysis: dict):
+    """Pool reserves (SOL -> token) carried by the analysis, if any."""
+    reserves = analysis.get('pool_reserves')
+    if not reserves:
+        return None
+    try:
+        return PoolReserves(
+            reserve_in=float(reserves['reserve_quote']),
+            reserve_out=float(reserves['reserve_base']),
+            fee_bps=float(reserves.get('fee_bps', 25)),
+        )
+    except (KeyError, TypeError, ValueError) as e:
+        logger.warning(f"Reservas do pool inválidas na análise: {e}")
+        return None
+
+
+def execute_buy_order(token_address: str, position_pct: float, price: float, keypair,
+                      swap_route: dict = None, pool: PoolReserves = None):
+    """Execute a buy order or simulate it depending on MODE.
+
+    With pool reserves (``pool``, or the vaults in ``swap_route``) the order is
+    planned by ``EXECUTION_PLANNER``: child orders sized to stay under
+    ``max_slippage`` and spread over a short window.  In real mode each child
+    is assembled from the prebuilt template (cached blockhash, priority fee
+    and accounts): only the amounts are filled in before signing and sending.
+    In paper mode the fill is simulated by ``simulate_paper_buy``.
+    """
     if MODE == "real":
+        signatures = []
+        fee_lamports = 0
         try:
+            if swap_route:
+                from solana.rpc.types import TxOpts
+
+                prebuilder = get_tx_prebuilder()
+                prepared = prebuilder.prepare(token_address, swap_route)
+                amount_in = position_pct * prebuilder.wallet_balance() / LAMPORTS_PER_SOL
+                pool = prebuilder.pool_reserves(swap_route) or pool
+                if pool is None or amount_in <= 0:
+                    return {'success': False}
+                plan = EXECUTION_PLANNER.plan(amount_in, pool)
+                started = time.monotonic()
+                for child in plan.children:
+                    time.sleep(max(0.0, started + child.delay_seconds - time.monotonic()))
+                    tx, timing = prebuilder.build_buy(
+                        token_address,
+                        int(child.amount_in * LAMPORTS_PER_SOL),
+                        int(child.min_amount_out * 10 ** prepared.decimals),
+                        swap_route,
+                    )
+                    solana_client.send_raw_transaction(bytes(tx), opts=TxOpts(skip_preflight=True))
+                    signatures.append(str(tx.signatures[0]))
+                    fee_lamports += timing['fee_lamports']
+                    logger.info(f"Ordem filha de {token_address} assinada em {timing['total_ms']:.2f} ms")
+                if not signatures:
+                    return {'success': False}
+                return {
+                    'success': True,
+                    'transaction_signature': signatures[0],
+                    'child_signatures': signatures,
+                    'amount_tokens': plan.expected_out,
+                    'amount_in': plan.filled,
+                    'price_per_token': price * (1 + plan.slippage),
+                    'slippage': plan.slippage,
+                    'child_orders': len(signatures),
+                    'unfilled_pct': plan.unfilled / plan.amount_in,
+                    'network_fee': fee_lamports / LAMPORTS_PER_SOL
+                }
             # Placeholder for real DEX interaction via solana_client
             tx_sig = str(uuid.uuid4())
             return {
@@ -100,14 +186,51 @@ def execute_buy_order(token_address: str, position_pct: float, price: float, key
             }
         except Exception as e:
             logger.error(f"Erro ao executar compra real: {e}")
+            # Ordens filhas já enviadas pagaram a taxa de rede
+            return {'success': False, 'error': str(e), 'submitted': bool(signatures),
+                    'network_fee': fee_lamports / LAMPORTS_PER_SOL}
+    return simulate_paper_buy(position_pct, price, pool)
+
+
+def simulate_paper_buy(position_pct: float, price: float, pool: PoolReserves = None):
+    """Simulate a paper buy with ``PAPER_FILLS``.
+
+    With pool reserves each child order of the plan is simulated in SOL against
+    the pool (its planned impact plus the price move during latency); without
+    them the order is simulated relative to ``price`` and ``amount_tokens``
+    keeps the position fraction as its unit.
+    """
+    if pool is not None:
+        requested = position_pct * PAPER_BALANCE_SOL
+        plan = EXECUTION_PLANNER.plan(requested, pool)
+        if not plan.children:
             return {'success': False}
-    # Paper mode simula a ordem
+        sizes = np.array([child.amount_in for child in plan.children])
+        fills = PAPER_FILLS.simulate(FILL_BUY, sizes, pool.spot_price, fee_bps=pool.fee_bps,
+                                     impact=[child.price_impact for child in plan.children])
+        reference = pool.spot_price
+    else:
+        requested = position_pct
+        sizes = np.array([position_pct])
+        fills = PAPER_FILLS.simulate(FILL_BUY, sizes, 1.0)
+        reference = 1.0
+    filled = fills['success']
+    if not filled.any():
+        return {'success': False, 'error': 'transação simulada falhou', 'submitted': True,
+                'network_fee': float(fills['fees'].sum())}
+    spent = sizes[filled].sum()
+    tokens = fills['amount_out'][filled].sum()
     return {
         'success': True,
         'transaction_signature': str(uuid.uuid4()),
-        'amount_tokens': position_pct,
-        'price_per_token': price,
-        'slippage': 0.0
+        'amount_tokens': tokens,
+        'amount_in': spent * PAPER_BALANCE_SOL if pool is None else spent,
+        'price_per_token': price * spent / tokens / reference,
+        'slippage': float(np.average(fills['slippage'][filled], weights=sizes[filled])),
+        'child_orders': int(filled.sum()),
+        'unfilled_pct': 1 - spent / requested,
+        'latency_ms': float(fills['latency_ms'].max()),
+        'network_fee': float(fills['fees'].sum()),
     }
 
 def execute_sell_order(token_address: str, amount_tokens: float, price: float, keypair):
@@ -125,100 +248,127 @@ def execute_sell_order(token_address: str, amount_tokens: float, price: float, k
         except Exception as e:
             logger.error(f"Erro ao executar venda real: {e}")
             return {'success': False}
+    fill = PAPER_FILLS.fill(FILL_SELL, amount_tokens, 1.0, retries=2, max_slippage=float('inf'))
+    if not fill['success']:
+        return {'success': False, 'error': 'transação simulada falhou'}
     return {
         'success': True,
         'transaction_signature': str(uuid.uuid4()),
         'amount_tokens': amount_tokens,
-        'price_per_token': price,
-        'slippage': 0.0
+        'price_per_token': price * fill['price'],
+        'slippage': fill['slippage']
     }
 
-def save_trade_to_db(trade: dict) -> None:
-    """Stub that would persist trade data."""
-    trader_table.put_item(Item=trade)
+class SolanaVenue(VenueAdapter):
+    """Venue Solana do ``ExecutionService``: compra e venda via ``execute_*_order``."""
+
+    name = 'solana'
+
+    @property
+    def mode(self):
+        return MODE
+
+    def execute(self, order: Order) -> Fill:
+        if order.side == BUY:
+            result = execute_buy_order(order.token_address, order.size, order.price, get_solana_keypair(),
+                                       order.route, order.pool)
+        else:
+            result = execute_sell_order(order.token_address, order.size, order.price, get_solana_keypair())
+        if not result.get('success'):
+            return Fill.rejected(order, result.get('error', 'ordem não executada'),
+                                 submitted=result.get('submitted', False),
+                                 network_fee=float(result.get('network_fee', 0.0)))
+        return Fill(
+            order_id=order.order_id,
+            success=True,
+            price=float(result.get('price_per_token', order.price)),
+            amount_tokens=float(result.get('amount_tokens', 0)),
+            amount_quote=float(result.get('amount_in', 0)),
+            slippage=float(result.get('slippage', 0.0)),
+            tx_signature=result.get('transaction_signature', ''),
+            child_orders=int(result.get('child_orders', 1)),
+            network_fee=float(result.get('network_fee', 0.0)),
+        )
+
+
+def get_execution_service() -> ExecutionService:
+    """Execution service over the Solana venue and the trader table ledger."""
+    return ExecutionService([SolanaVenue()], TradeLedger(trader_table))
 
 
 def monitor_position(trade_id: str) -> None:
     """Monitor an open position and execute sell orders when targets hit."""
-    record_resp = trader_table.get_item({'trade_id': trade_id})
-    trade = record_resp.get('Item')
-    if not trade:
+    service = get_execution_service()
+    trade = service.ledger.get(trade_id)
+    if not trade or trade.get('status') != 'open':
         return
 
     current_price = get_token_price(trade['token_address'])
     if not current_price:
         return
 
-    entry_price = trade['price_per_token']
-    sl_threshold = entry_price * (1 - trade['stop_loss_pct'])
-    tp_threshold = entry_price * (1 + trade['take_profit_pct'])
-
-    if current_price <= sl_threshold:
-        result = execute_sell_order(trade['token_address'], trade.get('amount_tokens', 0), current_price, get_solana_keypair())
-        if result.get('success'):
-            trader_table.update_item({'trade_id': trade_id}, {
-                'status': 'closed',
-                'close_reason': 'stop_loss',
-                'close_price': current_price
-            })
-    elif current_price >= tp_threshold:
-        result = execute_sell_order(trade['token_address'], trade.get('amount_tokens', 0), current_price, get_solana_keypair())
-        if result.get('success'):
-            trader_table.update_item({'trade_id': trade_id}, {
-                'status': 'closed',
-                'close_reason': 'take_profit',
-                'close_price': current_price
-            })
-
-
-def calculate_trade_parameters(quality_score: int, price: float):
-    """Return trading parameters based on quality score."""
+    # Registros anteriores ao ledger unificado usam price_per_token e não têm venue
+    entry_price = float(trade.get('entry_price') or trade['price_per_token'])
+    trade.setdefault('venue', SolanaVenue.name)
+    if current_price <= entry_price * (1 - float(trade['stop_loss_pct'])):
+        service.close_position(trade, current_price, 'stop_loss')
+    elif current_price >= entry_price * (1 + float(trade['take_profit_pct'])):
+        service.close_position(trade, current_price, 'take_profit')
+
+
+def calculate_trade_parameters(quality_score: int, price: float, trader_config: dict = None):
+    """Return trading parameters based on quality score.
+
+    ``trader_config`` is the ``trader`` section of the A/B arm configuration;
+    missing keys fall back to the default tiers.
+    """
+    trader_config = trader_config or {}
     if quality_score >= 80:
-        return {
-            'stop_loss_pct': 0.10,
-            'take_profit_pct': 0.30,
-            'position_size_pct': 0.15,
-        }
+        tier, defaults = 'high', (0.10, 0.30, 0.15)
     elif quality_score >= 60:
-        return {
-            'stop_loss_pct': 0.15,
-            'take_profit_pct': 0.25,
-            'position_size_pct': 0.10,
-        }
+        tier, defaults = 'medium', (0.15, 0.25, 0.10)
     else:
-        return {
-            'stop_loss_pct': 0.20,
-            'take_profit_pct': 0.20,
-            'position_size_pct': 0.05,
-        }
+        tier, defaults = 'low', (0.20, 0.20, 0.05)
+    return {
+        'stop_loss_pct': float(trader_config.get(f'{tier}_score_sl', defaults[0])),
+        'take_profit_pct': float(trader_config.get(f'{tier}_score_tp', defaults[1])),
+        'position_size_pct': float(trader_config.get(f'{tier}_score_position', defaults[2])),
+    }
 
 
 def process_approved_token(analysis: dict):
     """Process a token approved for trading."""
+    swap_route = analysis.get('swap_route')
+    if MODE == 'real' and swap_route:
+        # Deriva contas e decimais enquanto o preço é consultado
+        get_tx_prebuilder().prepare_async(analysis['tokenAddress'], swap_route)
     price = get_token_price(analysis['tokenAddress'])
     if not price:
         return None
 
-    params = calculate_trade_parameters(analysis['qualityScore'], price)
-    keypair = get_solana_keypair()
-    trade = execute_buy_order(analysis['tokenAddress'], params['position_size_pct'], price, keypair)
-    if not trade.get('success'):
-        return None
-
-    trade_record = {
-        'trade_id': trade['transaction_signature'],
-        'token_address': analysis['tokenAddress'],
-        'status': 'open',
-        'price_per_token': trade['price_per_token'],
-        'quality_score': analysis['qualityScore'],
-        'stop_loss_pct': params['stop_loss_pct'],
-        'take_profit_pct': params['take_profit_pct'],
-        'position_size_pct': params['position_size_pct'],
-        'is_dry_run': MODE != 'real',
-        'amount_tokens': trade.get('amount_tokens', 0)
-    }
-    save_trade_to_db(trade_record)
-    return trade_record
+    ab_test = AB_CONFIG.get() if AB_CONFIG else None
+    arm, arm_config = ab_test.route(analysis['tokenAddress']) if ab_test else ('A', {})
+    params = calculate_trade_parameters(analysis['qualityScore'], price, arm_config.get('trader'))
+    order = Order(
+        token_address=analysis['tokenAddress'],
+        side=BUY,
+        size=params['position_size_pct'],
+        price=price,
+        venue=SolanaVenue.name,
+        route=swap_route,
+        pool=pool_from_analysis(analysis),
+        metadata={
+            'quality_score': analysis['qualityScore'],
+            'stop_loss_pct': params['stop_loss_pct'],
+            'take_profit_pct': params['take_profit_pct'],
+            'position_size_pct': params['position_size_pct'],
+            'is_dry_run': MODE != 'real',
+            'ab_arm': arm,
+            'ab_test_id': ab_test.test_id if ab_test and ab_test.active else None,
+            'config_hash': ab_test.config_hash(arm) if ab_test else CONFIG_HASH,
+        },
+    )
+    return get_execution_service().open_position(order)
 
 
 def lambda_handler(event, context):
@@ -228,9 +378,10 @@ def lambda_handler(event, context):
         result = process_approved_token(body)
         return {'statusCode': 200, 'body': json.dumps(result)}
     if event.get('source') == 'aws.events':
-        response = trader_table.scan()
-        for item in response.get('Items', []):
-            if item.get('status') == 'open':
-                monitor_position(item['trade_id'])
+        service = get_execution_service()
+        for trade in service.ledger.open_positions():
+            # Trades de outras venues (ex.: 'evm' do Executor) são fechados por quem os abriu
+            if trade.get('venue', SolanaVenue.name) in service.venues:
+                monitor_position(trade['trade_id'])
         return {'statusCode': 200, 'body': json.dumps({'message': 'positions monitored'})}
     return {'statusCode': 400, 'body': json.dumps({'message': 'invalid event'})}
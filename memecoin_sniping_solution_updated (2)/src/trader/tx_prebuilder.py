@@ -0,0 +1,456 @@
+"""
+Pré-montagem de transações de compra para o Trader (modo real).
+
+Para um sniper, a métrica é o tempo entre "aprovado" e "transação enviada".
+Montar tudo no momento da ordem custa vários round trips ao RPC (blockhash,
+taxa de prioridade, decimais do mint) e a derivação das contas.  Aqui o
+trabalho é dividido:
+
+- ``BlockhashCache`` mantém o último blockhash (e ``lastValidBlockHeight``)
+  atualizado por uma thread em segundo plano; ``get`` só vai ao RPC se o
+  valor em cache estiver velho demais (ambiente Lambda congelado);
+- ``PriorityFeeEstimator`` guarda um percentil de
+  ``getRecentPrioritizationFees`` por conjunto de contas graváveis;
+- ``TxPrebuilder.prepare`` deriva a conta de token associada (ATA) do mint,
+  a instrução idempotente de criação da ATA, os decimais do mint e o modelo
+  da instrução de swap (contas resolvidas; só os campos de quantidade
+  ficam em aberto).  ``prepare_async`` faz isso em paralelo enquanto o token
+  ainda está sendo avaliado (por exemplo, durante a busca de preço);
+- na aprovação, ``build_buy`` só preenche ``amount_in``/``min_amount_out``
+  (u64 little-endian), compila a mensagem v0 com o blockhash em cache e
+  assina.
+
+A rota de swap vem da análise (``swap_route``): programa, lista de contas e
+prefixo dos dados da instrução, no layout ``prefixo + amount_in +
+min_amount_out`` usado pelos AMMs CPMM (ex.: ``swap_base_in`` do Raydium AMM
+v4, prefixo ``09``).  Contas podem usar os marcadores ``$owner``,
+``$token_account`` e ``$quote_account``.  Com ``quote_vault``/``base_vault``
+na rota, ``pool_reserves`` lê as reservas atuais para o planejador de
+execução (``common.execution_planner``).
+
+O RPC é acessado por JSON-RPC com uma ``requests.Session`` (conexões
+reaproveitadas).  ``LocalFakeRpc`` sobe um RPC falso local para testes e
+para o benchmark: execute ``python tx_prebuilder.py``.
+"""
+
+import json
+import logging
+import struct
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import requests
+from solders.compute_budget import set_compute_unit_limit, set_compute_unit_price
+from solders.hash import Hash
+from solders.instruction import AccountMeta, Instruction
+from solders.keypair import Keypair
+from solders.message import MessageV0
+from solders.pubkey import Pubkey
+from solders.transaction import VersionedTransaction
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+TOKEN_PROGRAM_ID = Pubkey.from_string("TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA")
+ASSOCIATED_TOKEN_PROGRAM_ID = Pubkey.from_string("ATokenGPvbdGVxr1b2hvZbsiqW5xWH25efTNsLJA8knL")
+SYSTEM_PROGRAM_ID = Pubkey.from_string("11111111111111111111111111111111")
+WSOL_MINT = Pubkey.from_string("So11111111111111111111111111111111111111112")
+
+
+class SolanaRpc:
+    """Cliente JSON-RPC mínimo com conexões HTTP reaproveitadas."""
+
+    def __init__(self, url: str, session: Optional[requests.Session] = None, timeout: float = 5.0):
+        self.url = url
+        self.session = session or requests.Session()
+        self.timeout = timeout
+        self._request_id = 0
+
+    def call(self, method: str, params: Optional[list] = None):
+        self._request_id += 1
+        payload = {"jsonrpc": "2.0", "id": self._request_id, "method": method, "params": params or []}
+        response = self.session.post(self.url, json=payload, timeout=self.timeout)
+        response.raise_for_status()
+        body = response.json()
+        if body.get("error"):
+            raise RuntimeError(f"Erro RPC em {method}: {body['error']}")
+        return body["result"]
+
+    def latest_blockhash(self, commitment: str = "confirmed") -> Tuple[str, int]:
+        value = self.call("getLatestBlockhash", [{"commitment": commitment}])["value"]
+        return value["blockhash"], int(value["lastValidBlockHeight"])
+
+    def recent_prioritization_fees(self, accounts: Sequence[str] = ()) -> List[int]:
+        result = self.call("getRecentPrioritizationFees", [list(accounts)] if accounts else [])
+        return [int(entry["prioritizationFee"]) for entry in result]
+
+    def token_decimals(self, mint: str) -> int:
+        return int(self.call("getTokenSupply", [mint])["value"]["decimals"])
+
+    def token_account_balance(self, account: str) -> float:
+        return float(self.call("getTokenAccountBalance", [account])["value"]["uiAmountString"])
+
+    def balance(self, address: str) -> int:
+        return int(self.call("getBalance", [address, {"commitment": "confirmed"}])["value"])
+
+
+class BlockhashCache:
+    """Último blockhash, atualizado em segundo plano a cada ``refresh_seconds``."""
+
+    def __init__(self, rpc: SolanaRpc, refresh_seconds: float = 10.0, max_age_seconds: float = 45.0,
+                 clock=time.monotonic):
+        self.rpc = rpc
+        self.refresh_seconds = refresh_seconds
+        # Um blockhash vale ~150 slots (60-90 s); acima disso busca de novo na hora
+        self.max_age_seconds = max_age_seconds
+        self.clock = clock
+        self._value: Optional[Tuple[str, int]] = None
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def refresh(self) -> Tuple[str, int]:
+        value = self.rpc.latest_blockhash()
+        with self._lock:
+            self._value, self._fetched_at = value, self.clock()
+        return value
+
+    def get(self) -> Tuple[str, int]:
+        """``(blockhash, lastValidBlockHeight)``; só bloqueia se o cache estiver velho."""
+        with self._lock:
+            value, age = self._value, self.clock() - self._fetched_at
+        if value is None or age > self.max_age_seconds:
+            return self.refresh()
+        return value
+
+    def start(self) -> None:
+        """Inicia a atualização contínua (thread daemon)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="blockhash-cache", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.warning(f"Falha ao atualizar blockhash: {e}")
+            self._stop.wait(self.refresh_seconds)
+
+
+class PriorityFeeEstimator:
+    """Percentil das taxas de prioridade recentes (micro-lamports por CU)."""
+
+    def __init__(self, rpc: SolanaRpc, percentile: float = 75, min_fee: int = 1_000,
+                 max_fee: int = 5_000_000, refresh_seconds: float = 10.0, clock=time.monotonic):
+        self.rpc = rpc
+        self.percentile = percentile
+        self.min_fee = min_fee
+        self.max_fee = max_fee
+        self.refresh_seconds = refresh_seconds
+        self.clock = clock
+        self._cache: Dict[Tuple[str, ...], Tuple[float, int]] = {}
+
+    def refresh(self, accounts: Iterable[str] = ()) -> int:
+        key = tuple(sorted(accounts))
+        fees = sorted(self.rpc.recent_prioritization_fees(key))
+        if fees:
+            rank = min(len(fees) - 1, int(round(self.percentile / 100 * (len(fees) - 1))))
+            fee = fees[rank]
+        else:
+            fee = self.min_fee
+        fee = max(self.min_fee, min(self.max_fee, fee))
+        self._cache[key] = (self.clock(), fee)
+        return fee
+
+    def get(self, accounts: Iterable[str] = ()) -> int:
+        key = tuple(sorted(accounts))
+        cached = self._cache.get(key)
+        if cached is None or self.clock() - cached[0] > self.refresh_seconds:
+            try:
+                return self.refresh(key)
+            except Exception as e:
+                logger.warning(f"Falha ao estimar taxa de prioridade: {e}")
+                return cached[1] if cached else self.min_fee
+        return cached[1]
+
+
+def associated_token_address(owner: Pubkey, mint: Pubkey) -> Pubkey:
+    return Pubkey.find_program_address(
+        [bytes(owner), bytes(TOKEN_PROGRAM_ID), bytes(mint)], ASSOCIATED_TOKEN_PROGRAM_ID
+    )[0]
+
+
+def create_ata_idempotent(payer: Pubkey, owner: Pubkey, mint: Pubkey, ata: Pubkey) -> Instruction:
+    """Instrução ``CreateIdempotent`` do programa de ATA (não falha se a conta existir)."""
+    return Instruction(ASSOCIATED_TOKEN_PROGRAM_ID, bytes([1]), [
+        AccountMeta(payer, True, True),
+        AccountMeta(ata, False, True),
+        AccountMeta(owner, False, False),
+        AccountMeta(mint, False, False),
+        AccountMeta(SYSTEM_PROGRAM_ID, False, False),
+        AccountMeta(TOKEN_PROGRAM_ID, False, False),
+    ])
+
+
+@dataclass(frozen=True)
+class SwapTemplate:
+    """Instrução de swap com as contas resolvidas; faltam só as quantidades."""
+
+    program_id: Pubkey
+    accounts: Tuple[AccountMeta, ...]
+    data_prefix: bytes
+
+    def fill(self, amount_in: int, min_amount_out: int) -> Instruction:
+        return Instruction(self.program_id, self.data_prefix + struct.pack("<QQ", amount_in, min_amount_out),
+                           list(self.accounts))
+
+
+@dataclass(frozen=True)
+class PreparedBuy:
+    mint: Pubkey
+    token_account: Pubkey
+    decimals: int
+    setup: Tuple[Instruction, ...]
+    swap: Optional[SwapTemplate]
+    writable: Tuple[str, ...]
+
+
+class TxPrebuilder:
+    """Prepara compras por token e monta/assina a transação na aprovação."""
+
+    def __init__(self, rpc: SolanaRpc, payer: Keypair, blockhashes: Optional[BlockhashCache] = None,
+                 fees: Optional[PriorityFeeEstimator] = None, compute_unit_limit: int = 200_000,
+                 max_prepared: int = 256, workers: int = 4):
+        self.rpc = rpc
+        self.payer = payer
+        self.blockhashes = blockhashes or BlockhashCache(rpc)
+        self.fees = fees or PriorityFeeEstimator(rpc)
+        self.compute_unit_limit = compute_unit_limit
+        self.max_prepared = max_prepared
+        self._prepared: "OrderedDict[str, PreparedBuy]" = OrderedDict()
+        self._pending: Dict[str, Future] = {}
+        self._balance: Optional[Tuple[float, int]] = None
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tx-prebuild")
+
+    def start(self) -> None:
+        self.blockhashes.start()
+
+    def wallet_balance(self, max_age_seconds: float = 10.0) -> int:
+        """Saldo da carteira em lamports (cache curto)."""
+        now = time.monotonic()
+        if self._balance is None or now - self._balance[0] > max_age_seconds:
+            self._balance = (now, self.rpc.balance(str(self.payer.pubkey())))
+        return self._balance[1]
+
+    def pool_reserves(self, swap_route: Dict):
+        """Reservas atuais (SOL -> token) lidas dos vaults da rota, se informados."""
+        if not swap_route.get("quote_vault") or not swap_route.get("base_vault"):
+            return None
+        from common.execution_planner import PoolReserves
+
+        return PoolReserves(
+            reserve_in=self.rpc.token_account_balance(swap_route["quote_vault"]),
+            reserve_out=self.rpc.token_account_balance(swap_route["base_vault"]),
+            fee_bps=float(swap_route.get("fee_bps", 25)),
+        )
+
+    def prepare(self, token_address: str, swap_route: Optional[Dict] = None) -> PreparedBuy:
+        """Deriva contas, decimais e o modelo de swap do token (com cache LRU)."""
+        with self._lock:
+            prepared = self._prepared.get(token_address)
+            if prepared is not None and (prepared.swap is not None or swap_route is None):
+                self._prepared.move_to_end(token_address)
+                return prepared
+
+        owner = self.payer.pubkey()
+        mint = Pubkey.from_string(token_address)
+        token_account = associated_token_address(owner, mint)
+        quote_account = associated_token_address(owner, WSOL_MINT)
+        decimals = self.rpc.token_decimals(token_address)
+        swap = _swap_template(swap_route, owner, token_account, quote_account) if swap_route else None
+        writable = tuple(str(meta.pubkey) for meta in (swap.accounts if swap else ()) if meta.is_writable)
+        # Aquece a estimativa de taxa para as contas do pool
+        self.fees.get(writable)
+
+        prepared = PreparedBuy(
+            mint=mint,
+            token_account=token_account,
+            decimals=decimals,
+            setup=(create_ata_idempotent(owner, owner, mint, token_account),),
+            swap=swap,
+            writable=writable,
+        )
+        with self._lock:
+            self._prepared[token_address] = prepared
+            self._prepared.move_to_end(token_address)
+            while len(self._prepared) > self.max_prepared:
+                self._prepared.popitem(last=False)
+        return prepared
+
+    def prepare_async(self, token_address: str, swap_route: Optional[Dict] = None) -> Future:
+        """Dispara ``prepare`` em segundo plano (uma vez por token)."""
+        with self._lock:
+            future = self._pending.get(token_address)
+            if future is None or future.done():
+                future = self._pool.submit(self.prepare, token_address, swap_route)
+                self._pending[token_address] = future
+        return future
+
+    def build_buy(self, token_address: str, amount_in: int, min_amount_out: int,
+                  swap_route: Optional[Dict] = None) -> Tuple[VersionedTransaction, Dict[str, float]]:
+        """Transação de compra assinada, tempos (ms) de cada etapa e taxa de rede (lamports)."""
+        started = time.perf_counter()
+        future = self._pending.get(token_address)
+        if future is not None:
+            future.result()
+        prepared = self.prepare(token_address, swap_route)
+        if prepared.swap is None:
+            raise ValueError(f"Sem rota de swap para {token_address}")
+        prepared_at = time.perf_counter()
+
+        blockhash, _ = self.blockhashes.get()
+        fee = self.fees.get(prepared.writable)
+        instructions = [
+            set_compute_unit_limit(self.compute_unit_limit),
+            set_compute_unit_price(fee),
+            *prepared.setup,
+            prepared.swap.fill(amount_in, min_amount_out),
+        ]
+        message = MessageV0.try_compile(self.payer.pubkey(), instructions, [], Hash.from_string(blockhash))
+        transaction = VersionedTransaction(message, [self.payer])
+        finished = time.perf_counter()
+        return transaction, {
+            "prepare_ms": (prepared_at - started) * 1000,
+            "sign_ms": (finished - prepared_at) * 1000,
+            "total_ms": (finished - started) * 1000,
+            # Taxa base por assinatura + prioridade (micro-lamports por unidade de computação)
+            "fee_lamports": 5_000 + fee * self.compute_unit_limit // 1_000_000,
+        }
+
+
+def _swap_template(route: Dict, owner: Pubkey, token_account: Pubkey, quote_account: Pubkey) -> SwapTemplate:
+    placeholders = {"$owner": owner, "$token_account": token_account, "$quote_account": quote_account}
+    accounts = []
+    for pubkey, is_signer, is_writable in route["accounts"]:
+        key = placeholders.get(pubkey) or Pubkey.from_string(pubkey)
+        accounts.append(AccountMeta(key, bool(is_signer), bool(is_writable)))
+    return SwapTemplate(
+        program_id=Pubkey.from_string(route["program_id"]),
+        accounts=tuple(accounts),
+        data_prefix=bytes.fromhex(route.get("data_prefix", "")),
+    )
+
+
+# ----------------------------------------------------------------------
+# RPC falso local (testes e benchmark)
+# ----------------------------------------------------------------------
+
+class LocalFakeRpc:
+    """Servidor JSON-RPC local com respostas sintéticas e latência configurável."""
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency_ms = latency_ms
+        self.calls: Dict[str, int] = {}
+        self._slot = 1_000
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                body = json.dumps({"jsonrpc": "2.0", "id": request["id"],
+                                   "result": fake.handle(request["method"], request.get("params", []))}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self) -> "LocalFakeRpc":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def handle(self, method: str, params: list):
+        self.calls[method] = self.calls.get(method, 0) + 1
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        if method == "getLatestBlockhash":
+            self._slot += 1
+            return {"context": {"slot": self._slot},
+                    "value": {"blockhash": str(Hash.hash(str(self._slot).encode())),
+                              "lastValidBlockHeight": self._slot + 150}}
+        if method == "getRecentPrioritizationFees":
+            return [{"slot": self._slot - i, "prioritizationFee": fee}
+                    for i, fee in enumerate((0, 1_000, 5_000, 10_000, 50_000))]
+        if method == "getTokenSupply":
+            return {"context": {"slot": self._slot}, "value": {"amount": "1000000000000000", "decimals": 6}}
+        if method == "getTokenAccountBalance":
+            return {"context": {"slot": self._slot}, "value": {"uiAmountString": "1000.5", "decimals": 6}}
+        if method == "getBalance":
+            return {"context": {"slot": self._slot}, "value": 2_000_000_000}
+        raise ValueError(f"Método não suportado: {method}")
+
+
+def _benchmark(rounds: int = 50, latency_ms: float = 30.0) -> None:
+    """Aprovação → transação assinada: montagem na hora vs pré-montada."""
+    route = {
+        "program_id": "675kPX9MHTjS2zt1qfr1NYHuzeLXfQM9H24wFSUt1Mp8",
+        "accounts": [["$owner", True, False], ["$quote_account", False, True], ["$token_account", False, True]]
+        + [[str(Pubkey.new_unique()), False, True] for _ in range(4)],
+        "data_prefix": "09",
+    }
+    tokens = [str(Pubkey.new_unique()) for _ in range(rounds)]
+    with LocalFakeRpc(latency_ms=latency_ms) as fake:
+        rpc = SolanaRpc(fake.url)
+
+        def measure(label, prebuild):
+            prebuilder = TxPrebuilder(rpc, Keypair())
+            if prebuild:
+                prebuilder.blockhashes.refresh()
+                for token in tokens:
+                    prebuilder.prepare(token, route)
+            else:
+                # Montagem na hora: sem cache de blockhash, taxa ou contas
+                prebuilder.blockhashes.max_age_seconds = -1
+                prebuilder.fees.refresh_seconds = -1
+            timings = []
+            for token in tokens:
+                if not prebuild:
+                    prebuilder._prepared.clear()
+                _, timing = prebuilder.build_buy(token, 100_000_000, 1, route)
+                timings.append(timing["total_ms"])
+            timings.sort()
+            print(f"{label:<12} p50 {timings[len(timings) // 2]:7.2f} ms   p95 {timings[int(len(timings) * 0.95)]:7.2f} ms")
+
+        print(f"RPC falso local com {latency_ms:.0f} ms por chamada, {rounds} compras")
+        measure("na hora", False)
+        measure("pré-montada", True)
+
+
+if __name__ == "__main__":
+    _benchmark()
@@ -4,6 +4,7 @@ from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import accuracy_score, f1_score
 import xgboost as xgb
 import os
+import sys
 import joblib
 # boto3 is opcional para rodar localmente em modo gratuito
 try:
@@ -23,9 +24,25 @@ USE_S3 = bool(int(os.environ.get("USE_S3", "0")))
 S3_BUCKET_NAME = os.environ.get("S3_BUCKET_NAME", "memecoin-sniping-models")
 S3_MODEL_PREFIX = os.environ.get("S3_MODEL_PREFIX", "models/")
 
-# Caminho para os dados históricos
+# Caminho para os dados históricos (arquivo único legado)
 HISTORICAL_DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "optimizer", "processed", "historical_data.parquet")
 
+# Dataset particionado por data/token (common.feature_dataset); pode ser um URI s3://
+HISTORICAL_DATASET_PATH = os.environ.get(
+    "HISTORICAL_DATASET_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "optimizer", "processed", "historical"),
+)
+# Janela de treino em dias (0 = todo o histórico); só as partições desses dias são lidas
+TRAIN_DAYS = int(os.environ.get("TRAIN_DAYS", "0"))
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+from common.feature_dataset import FeatureDataset
+from common.feature_schema import FEATURE_SCHEMA, FeatureSchema, SchemaError
+
+def schema_path(model_path):
+    """Schema de features salvo ao lado do modelo (model.joblib -> model.schema.json)."""
+    return os.path.splitext(model_path)[0] + ".schema.json"
+
 def load_model_from_s3(bucket, key, local_path):
     """Baixa modelo do S3 se boto3 estiver disponível e o uso estiver habilitado."""
     if not USE_S3 or boto3 is None:
@@ -68,6 +85,20 @@ def save_model_to_s3(model, bucket, key, local_path):
         print(f"Erro ao salvar modelo no S3: {e}")
         return False
 
+def load_historical_dataset(path, days=None):
+    """
+    Carrega dados do dataset particionado; com ``days``, só os últimos dias.
+    Retorna None se o dataset não existir.
+    """
+    dataset = FeatureDataset(path)
+    if not dataset.exists():
+        return None
+    df = dataset.read(days=days or None)
+    window = f"últimos {days} dias" if days else "todo o histórico"
+    print(f"Dados históricos carregados de: {path} ({len(df)} linhas, {window}, "
+          f"{len(dataset.files())} arquivos no dataset)")
+    return df
+
 def load_historical_data(path):
     """
     Carrega dados históricos de um arquivo parquet.
@@ -92,13 +123,15 @@ def train_model(input_df, local_model_path, s3_model_key):
         print("DataFrame de entrada vazio. Não é possível treinar o modelo.")
         return
 
-    # As features agora são todas as colunas exceto 'target'
-    if 'target' not in input_df.columns:
-        print("Erro: Coluna 'target' não encontrada no DataFrame.")
+    # As features e sua ordem vêm do schema registrado (common.feature_schema)
+    missing = FEATURE_SCHEMA.missing(input_df.columns, require_target=True)
+    if missing:
+        print(f"Erro: colunas do schema de features v{FEATURE_SCHEMA.version} ausentes: {missing}")
         return
 
-    X = input_df.drop("target", axis=1)
-    y = input_df["target"]
+    input_df = input_df[input_df["target"].notna()]
+    X = FEATURE_SCHEMA.matrix(input_df)
+    y = input_df["target"].astype("int8")
 
     if X.empty or y.empty:
         print("Dados de treino ou target vazios. Não é possível treinar o modelo.")
@@ -158,6 +191,8 @@ def train_model(input_df, local_model_path, s3_model_key):
     if not existing_model and os.path.exists(local_model_path):
         print("Tentando carregar modelo existente localmente...")
         try:
+            # Modelos treinados com outro schema não recebem as mesmas features
+            FEATURE_SCHEMA.check_compatible(FeatureSchema.load(schema_path(local_model_path)))
             local_existing_model = joblib.load(local_model_path)
             local_existing_predictions = local_existing_model.predict(X_val)
             local_existing_f1_score = f1_score(y_val, local_existing_predictions)
@@ -165,6 +200,8 @@ def train_model(input_df, local_model_path, s3_model_key):
                 existing_f1_score = local_existing_f1_score
                 existing_model = local_existing_model
             print(f"F1-score do modelo existente local: {local_existing_f1_score}")
+        except (SchemaError, FileNotFoundError) as e:
+            print(f"Modelo existente local treinado com outro schema de features; ignorando ({e})")
         except Exception as e:
             print(f"Erro ao carregar ou comparar modelo existente local: {e}")
 
@@ -174,9 +211,11 @@ def train_model(input_df, local_model_path, s3_model_key):
         model_output_dir = os.path.dirname(local_model_path)
         os.makedirs(model_output_dir, exist_ok=True)
         joblib.dump(best_model, local_model_path)
-        print(f"Novo modelo salvo localmente em: {local_model_path}")
+        FEATURE_SCHEMA.save(schema_path(local_model_path))
+        print(f"Novo modelo salvo localmente em: {local_model_path} (schema v{FEATURE_SCHEMA.version})")
         if USE_S3:
-            save_model_to_s3(best_model, S3_BUCKET_NAME, s3_model_key, local_model_path)
+            if save_model_to_s3(best_model, S3_BUCKET_NAME, s3_model_key, local_model_path):
+                boto3.client("s3").upload_file(schema_path(local_model_path), S3_BUCKET_NAME, schema_path(s3_model_key))
     else:
         print("Modelo existente é igual ou melhor. Não salvando o novo modelo.")
 
@@ -187,8 +226,10 @@ if __name__ == "__main__":
     if not USE_S3:
         print("\u26A0\ufe0f Executando em modo local. Salvamento em S3 desativado.")
 
-    # Carregar dados históricos
-    historical_df = load_historical_data(HISTORICAL_DATA_PATH)
+    # Carregar dados históricos (dataset particionado, com o arquivo único como fallback)
+    historical_df = load_historical_dataset(HISTORICAL_DATASET_PATH, TRAIN_DAYS)
+    if historical_df is None:
+        historical_df = load_historical_data(HISTORICAL_DATA_PATH)
 
     if historical_df.empty:
         print("Nenhum dado histórico disponível para treinamento. Por favor, adicione dados via dashboard ou ETL.")